@@ -1,49 +1,89 @@
 """ Connector and methods accessing S3 """
 import os
 import logging
-from io import BytesIO, StringIO
+from io import BytesIO
 import pandas_gbq
+from google.cloud import bigquery
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from app.common.constants import S3FileTypes
 from app.common.custom_exceptions import WrongFormatException
+from app.common.tracing import Tracer, trace_span
 
 
 class BigQueryConnector():
     """
     Class for interacting with bigquery
     """
-    def __init__(self, project_id: str, dataset_name: str, table_name: str) -> None:
+    def __init__(self, project_id: str, dataset_name: str, table_name: str,
+                 tracer: Tracer=None) -> None:
         """
-        Constructor for S3BucketConnector
+        Constructor for BigQueryConnector
 
         Args:
-            access_key (str): key for accessing S3
-            secret_key (str): secret key for accessing S3
-            endpoint_url (str): endpoint url to S3 API
-            bucket (str): name of the S3 bucket
+            project_id (str): id of the Google Cloud project
+            dataset_name (str): name of the dataset
+            table_name (str): name of the table
+            tracer (Tracer, optional): tracer recording a span per load
         """
         self._logger = logging.getLogger(__name__)
+        self.dataset_name = dataset_name
         self.table_id = f"{dataset_name}.{table_name}"
         self.project_id = project_id
+        self.tracer = tracer
 
 
-    def to_bq(self, data: pd.DataFrame):
+    def to_bq(self, data: pd.DataFrame or pa.Table, table_id: str=None):
         """
-        Writes pandas.DataFrame to Bigquery
+        Writes pandas.DataFrame or pyarrow.Table to Bigquery
 
         Args:
-            data (pd.DataFrame): pandas DataFrame that needs to be written)
+            data (pd.DataFrame or pa.Table): pandas DataFrame or Arrow table
+                                             that needs to be written
+            table_id (str, optional): id of the table (dataset.table).
+                                      Defaults to the table of the connector.
         """
+        table_id = table_id or self.table_id
+        if isinstance(data, pa.Table):
+            return self._arrow_to_bq(data, table_id)
         if data.empty:
             self._logger.info('The DataFrame is empty! No file will be written.')
             return None
         else:
-            out_buffer = StringIO()
-            data.to_csv(out_buffer, index=False)
-            pandas_gbq.to_gbq(data, self.table_id, project_id=self.project_id, if_exists='append')
+            with trace_span(self.tracer, 'bq.to_gbq', table_id) as span:
+                span['bytes'] = int(data.memory_usage(index=False).sum())
+                pandas_gbq.to_gbq(data, table_id, project_id=self.project_id,
+                                  if_exists='append')
             return 1
         self._logger.info("The file format %s is not "
                           "supported to be written to S3!", file_format)
         raise WrongFormatException
+
+    def _arrow_to_bq(self, table: pa.Table, table_id: str):
+        """
+        Loads pyarrow.Table to Bigquery as parquet file, so the column
+        types of the table are used without a pandas conversion
+
+        Args:
+            table (pa.Table): Arrow table that needs to be written
+            table_id (str): id of the table (dataset.table)
+        """
+        if table.num_rows == 0:
+            self._logger.info('The DataFrame is empty! No file will be written.')
+            return None
+        out_buffer = BytesIO()
+        pq.write_table(table, out_buffer)
+        out_buffer.seek(0)
+        client = bigquery.Client(project=self.project_id)
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+        )
+        with trace_span(self.tracer, 'bq.load_table', table_id) as span:
+            span['bytes'] = out_buffer.getbuffer().nbytes
+            client.load_table_from_file(out_buffer, table_id,
+                                        job_config=job_config).result()
+        return 1
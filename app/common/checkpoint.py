@@ -0,0 +1,121 @@
+""" Local checkpoints of the stages of a run """
+import logging
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Stage of the daily aggregates, shared by all runs as they are keyed by fingerprints
+STAGE_DAYS = 'days'
+# Stage of the reports before their indicators, keyed by report name
+STAGE_TRANSFORM = 'transform'
+# Stage of the loaded reports, only marked as done
+STAGE_LOAD = 'load'
+# Compression of the checkpoint files, fast enough to not slow down the stages
+CHECKPOINT_COMPRESSION = 'lz4'
+
+
+class StageCheckpoint():
+    """
+    Class for keeping the outputs of the stages of a run as local Arrow IPC
+    (Feather) files, so that a failed run resumes from the last completed
+    stage or day. The daily aggregates are keyed by their fingerprints and
+    shared by runs, the other stages belong to the run with the run key.
+    Files are memory mapped when they are read.
+    """
+    def __init__(self, checkpoint_dir: str, run_key: str) -> None:
+        """
+        Constructor for StageCheckpoint
+
+        Args:
+            checkpoint_dir (str): directory of the checkpoints, created if missing
+            run_key (str): key of the run parameters
+        """
+        self._logger = logging.getLogger(__name__)
+        self.checkpoint_dir = checkpoint_dir
+        self.run_key = run_key
+        self.run_dir = os.path.join(checkpoint_dir, 'runs', run_key)
+        self.resumed = 0
+        self._day_paths = set()
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def _path(self, stage: str, name: str, suffix: str='.arrow'):
+        """
+        Returns the path of the checkpoint of a stage
+        """
+        if stage == STAGE_DAYS:
+            path = os.path.join(self.checkpoint_dir, STAGE_DAYS, f'{name}{suffix}')
+            self._day_paths.add(path)
+            return path
+        return os.path.join(self.run_dir, stage, f'{name}{suffix}')
+
+    def get(self, stage: str, name: str):
+        """
+        Returns the checkpointed output of a stage
+
+        Args:
+            stage (str): name of the stage
+            name (str): name of the output, e.g. a day or a report
+
+        Returns:
+            df (pd.DataFrame): output of the stage or None if it is not checkpointed
+        """
+        try:
+            table = feather.read_table(self._path(stage, name), memory_map=True)
+        except (FileNotFoundError, OSError):
+            return None
+        self.resumed += 1
+        return table.to_pandas()
+
+    def put(self, stage: str, name: str, data_frame: pd.DataFrame):
+        """
+        Checkpoints the output of a stage
+
+        Args:
+            stage (str): name of the stage
+            name (str): name of the output
+            data_frame (pd.DataFrame): output of the stage
+        """
+        path = self._path(stage, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # writing to a temporary file, so a crash never leaves partial checkpoints
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        feather.write_feather(pa.Table.from_pandas(data_frame, preserve_index=False),
+                              tmp_path, compression=CHECKPOINT_COMPRESSION)
+        os.replace(tmp_path, path)
+
+    def is_done(self, stage: str, name: str):
+        """
+        Checks if a stage without output was completed
+
+        Args:
+            stage (str): name of the stage
+            name (str): name of the completed step, e.g. a report
+        """
+        return os.path.exists(self._path(stage, name, '.done'))
+
+    def mark_done(self, stage: str, name: str):
+        """
+        Marks a stage without output as completed
+
+        Args:
+            stage (str): name of the stage
+            name (str): name of the completed step
+        """
+        path = self._path(stage, name, '.done')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8'):
+            pass
+
+    def cleanup(self):
+        """
+        Removes the checkpoints of the run and the daily aggregates it used
+        """
+        for path in self._day_paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        shutil.rmtree(self.run_dir, ignore_errors=True)
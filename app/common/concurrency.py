@@ -0,0 +1,216 @@
+""" Adaptive limit of concurrent operations """
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# Error codes and HTTP status codes of S3 asking the client to slow down
+THROTTLING_CODES = {'SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+                    'TooManyRequests', 'ServiceUnavailable', '503', '429'}
+THROTTLING_STATUS = {429, 503}
+# Weight of the latest latency in the moving average
+LATENCY_ALPHA = 0.2
+# Operations of a class before its lowest average latency is tracked
+WARMUP_OPERATIONS = 10
+# Share of the distance to the average latency the lowest average rises per
+# operation, so a baseline of a faster period does not hold forever
+MIN_LATENCY_DECAY = 0.01
+# Operation class of operations started without one
+DEFAULT_OPERATION = 'default'
+# Number of limit changes kept for the metrics
+CHANGES_KEPT = 100
+
+LIMIT_CHANGE_INCREASE = 'healthy'
+LIMIT_CHANGE_THROTTLED = 'throttled'
+LIMIT_CHANGE_LATENCY = 'latency'
+
+
+def is_throttling_error(error: Exception):
+    """
+    Checks if an error of a S3 request is caused by throttling
+
+    Args:
+        error (Exception): error raised by the request
+    """
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get('Error', {}).get('Code')
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return code in THROTTLING_CODES or status in THROTTLING_STATUS
+
+
+class AIMDLimiter():
+    """
+    Limits the number of concurrent operations with additive increase and
+    multiplicative decrease. After every window of healthy operations, one
+    window being as many operations as the current limit, the limit grows
+    by one. Throttled operations or a moving average latency above
+    latency_tolerance times the lowest average seen cut the limit by
+    decrease_factor, at most once per window. The latencies are kept per
+    operation class, e.g. small ranged reads and whole objects, as their
+    latencies without load differ. The lowest average slowly rises towards
+    the current average, so it follows a lasting change of the latency.
+    """
+    def __init__(self, initial_limit: int=4, min_limit: int=1, max_limit: int=32,
+                 decrease_factor: float=0.5, latency_tolerance: float=2.0) -> None:
+        """
+        Constructor for AIMDLimiter
+
+        Args:
+            initial_limit (int, optional): limit at the start. Defaults to 4.
+            min_limit (int, optional): lowest limit. Defaults to 1.
+            max_limit (int, optional): highest limit. Defaults to 32.
+            decrease_factor (float, optional): factor applied to the limit on
+                                               throttling or rising latency
+            latency_tolerance (float, optional): ratio of the average latency to the
+                                                 lowest average latency that is healthy
+        """
+        self._logger = logging.getLogger(__name__)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self.in_flight = 0
+        self.completed = 0
+        self.throttled = 0
+        self.latencies = {}
+        self.changes = deque(maxlen=CHANGES_KEPT)
+        self.change_counts = {LIMIT_CHANGE_INCREASE: 0, LIMIT_CHANGE_THROTTLED: 0,
+                              LIMIT_CHANGE_LATENCY: 0}
+        self._healthy = 0
+        self._since_change = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Waits until an operation may start
+        """
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, throttled: bool=False,
+                operation: str=DEFAULT_OPERATION):
+        """
+        Records a finished operation and adapts the limit
+
+        Args:
+            latency (float): seconds the operation took
+            throttled (bool, optional): whether the operation was throttled
+            operation (str, optional): class of the operation, e.g. get or put
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self.completed += 1
+            self._since_change += 1
+            if throttled:
+                self.throttled += 1
+                self._decrease(LIMIT_CHANGE_THROTTLED)
+            else:
+                self._record_latency(latency, operation)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, operation: str=DEFAULT_OPERATION):
+        """
+        Context manager running an operation within the limit. Throttling
+        errors of the operation are recorded and raised again. Only the
+        request should run within the slot, not the processing of its result.
+
+        Args:
+            operation (str, optional): class of the operation, e.g. get or put
+        """
+        self.acquire()
+        start = time.perf_counter()
+        throttled = False
+        try:
+            yield
+        except ClientError as error:
+            throttled = is_throttling_error(error)
+            raise
+        finally:
+            self.release(time.perf_counter() - start, throttled, operation)
+
+    def _record_latency(self, latency: float, operation: str):
+        """
+        Updates the average latency of the operation class and increases
+        or decreases the limit
+        """
+        stats = self.latencies.setdefault(operation, {'count': 0, 'avg': None, 'min': None})
+        stats['count'] += 1
+        if stats['avg'] is None:
+            stats['avg'] = latency
+        else:
+            stats['avg'] += LATENCY_ALPHA * (latency - stats['avg'])
+        # the lowest average is the latency without load
+        if stats['count'] >= WARMUP_OPERATIONS:
+            if stats['min'] is None or stats['avg'] < stats['min']:
+                stats['min'] = stats['avg']
+            else:
+                stats['min'] += MIN_LATENCY_DECAY * (stats['avg'] - stats['min'])
+        if stats['min'] and stats['avg'] > stats['min'] * self.latency_tolerance:
+            self._decrease(LIMIT_CHANGE_LATENCY)
+            return
+        self._healthy += 1
+        if self._healthy >= self.limit and self.limit < self.max_limit:
+            self._change(self.limit + 1, LIMIT_CHANGE_INCREASE)
+
+    def _decrease(self, reason: str):
+        """
+        Cuts the limit unless it was changed within the current window
+        """
+        self._healthy = 0
+        last_cut = self.changes and self.changes[-1]['reason'] != LIMIT_CHANGE_INCREASE
+        # operations started before the last cut may still report the old overload
+        if last_cut and self._since_change < self.limit:
+            return
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit != self.limit:
+            self._change(new_limit, reason)
+
+    def _change(self, new_limit: int, reason: str):
+        """
+        Sets a new limit and records the change
+        """
+        self._logger.info('Concurrency limit changed from %s to %s (%s).',
+                          self.limit, new_limit, reason)
+        self.changes.append({
+            'at': datetime.today().strftime('%Y-%m-%d %H:%M:%S'),
+            'from': self.limit,
+            'to': new_limit,
+            'reason': reason
+        })
+        self.change_counts[reason] += 1
+        self.limit = new_limit
+        self._healthy = 0
+        self._since_change = 0
+
+    def metrics(self):
+        """
+        Returns the current state of the limiter
+
+        Returns:
+            metrics (dict): limit, operations in flight, completed and throttled
+                            operations, average and lowest average latency by
+                            operation class, counts of the limit changes by
+                            reason and the last limit changes
+        """
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'throttled': self.throttled,
+                'latencies': {
+                    operation: {'avg': stats['avg'], 'min': stats['min']}
+                    for operation, stats in self.latencies.items()
+                },
+                'change_counts': dict(self.change_counts),
+                'changes': list(self.changes)
+            }
@@ -7,6 +7,30 @@ class S3FileTypes(Enum):
     """
     CSV = "csv"
     PARQUET = "parquet"
+    FEATHER = "feather"
+
+class CompressionTypes(Enum):
+    """
+    Supported compression codecs for S3BucketConnector
+    """
+    GZIP = "gzip"
+    ZSTD = "zstd"
+    LZ4 = "lz4"
+
+class TransformEngines(Enum):
+    """
+    Supported engines for the report transformation
+    """
+    PANDAS = "pandas"
+    DUCKDB = "duckdb"
+    ARROW = "arrow"
+
+class ReportTransforms(Enum):
+    """
+    Supported transformations of report definitions
+    """
+    REPORT1 = "report1"
+
 class MetaProcessFormat(Enum):
     """
     Format constants for MetaProcess Class
@@ -16,4 +40,20 @@ class MetaProcessFormat(Enum):
     META_SOURCE_DATE_COL = "source_date"
     META_PROCESS_COL = "datetime_of_processing"
     META_FILE_FORMAT = "csv"
-    
\ No newline at end of file
+    
+class SinkTypes(Enum):
+    """
+    Supported targets the reports are written to
+    """
+    STORAGE = "storage"
+    LOCAL = "local"
+    BIGQUERY = "bigquery"
+    INDEXED = "indexed"
+
+class TradingCalendars(Enum):
+    """
+    Supported trading calendars of the source data
+    """
+    ALL = "all"
+    WEEKDAYS = "weekdays"
+    XETRA = "xetra"
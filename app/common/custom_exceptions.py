@@ -15,3 +15,43 @@ class WrongMetaFileException(Exception):
     Exception that can be raised when the given format
     is not supported.
     """
+
+class BackfillException(Exception):
+    """
+    BackfillException class
+
+    Exception that can be raised when shards of
+    a backfill could not be processed.
+    """
+
+class WrongEngineException(Exception):
+    """
+    WrongEngineException class
+
+    Exception that can be raised when the given
+    transformation engine is not supported.
+    """
+
+class WrongTransformException(Exception):
+    """
+    WrongTransformException class
+
+    Exception that can be raised when the given
+    report transformation is not supported.
+    """
+
+class SinkException(Exception):
+    """
+    SinkException class
+
+    Exception that can be raised when a report could not be
+    written to a required sink or a sink is not supported.
+    """
+
+class WrongCalendarException(Exception):
+    """
+    WrongCalendarException class
+
+    Exception that can be raised when the given
+    trading calendar is not supported.
+    """
@@ -0,0 +1,206 @@
+""" Lease objects for distributing work over several workers """
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+
+from app.common.storage import StorageConnector
+
+LEASE_STATUS_RUNNING = 'running'
+LEASE_STATUS_DONE = 'done'
+
+
+class LeaseManager():
+    """
+    Class for claiming, renewing and completing leases stored
+    as objects under a prefix in a S3 Bucket. Every lease is written
+    with a conditional write on the version that was read, so of two
+    workers claiming the same lease at the same time only one succeeds.
+    """
+    def __init__(self, s3_bucket: StorageConnector, prefix: str, owner: str=None,
+                 lease_seconds: float=300, settle_seconds: float=1) -> None:
+        """
+        Constructor for LeaseManager
+
+        Args:
+            s3_bucket (StorageConnector): connection to the storage holding the leases
+            prefix (str): prefix of the lease objects
+            owner (str, optional): name of the worker. Defaults to host name and a random id.
+            lease_seconds (float, optional): seconds until a lease expires. Defaults to 300.
+            settle_seconds (float, optional): seconds to wait before a claimed lease is
+                                              read again, which detects concurrent claims
+                                              on storages ignoring the conditions of
+                                              writes. Defaults to 1.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.s3_bucket = s3_bucket
+        self.prefix = prefix
+        self.owner = owner or f'{socket.gethostname()}-{uuid.uuid4().hex[:8]}'
+        self.lease_seconds = lease_seconds
+        self.settle_seconds = settle_seconds
+
+    def lease_key(self, lease_id: str):
+        """
+        Returns the key of the lease object
+
+        Args:
+            lease_id (str): id of the lease
+        """
+        return f'{self.prefix}{lease_id}.json'
+
+    def read(self, lease_id: str):
+        """
+        Reads a lease
+
+        Args:
+            lease_id (str): id of the lease
+
+        Returns:
+            lease (dict): content of the lease or None if there is no lease
+        """
+        return self._read_tagged(lease_id)[0]
+
+    def _read_tagged(self, lease_id: str):
+        """
+        Reads a lease together with the tag of its version
+
+        Returns:
+            lease (dict), tag (str): content and tag of the lease, None if there is no lease
+        """
+        try:
+            text, tag = self.s3_bucket.read_text_tagged(self.lease_key(lease_id))
+        except self.s3_bucket.not_found_error:
+            return None, None
+        return json.loads(text), tag
+
+    def _write(self, lease_id: str, status: str, tag: str=None, result=None):
+        """
+        Writes a lease owned by this worker if the lease is still the version of tag
+
+        Returns:
+            True if the lease was written, False if it was changed meanwhile
+        """
+        lease = {
+            'owner': self.owner,
+            'status': status,
+            'expires_at': time.time() + self.lease_seconds,
+            'result': result
+        }
+        return self.s3_bucket.write_text_if(json.dumps(lease), self.lease_key(lease_id), tag)
+
+    def is_claimable(self, lease: dict):
+        """
+        Checks if a lease can be claimed
+
+        Args:
+            lease (dict): content of the lease or None
+
+        Returns:
+            True if there is no lease or the lease is running and expired
+        """
+        if lease is None:
+            return True
+        return lease['status'] == LEASE_STATUS_RUNNING and lease['expires_at'] < time.time()
+
+    def claim(self, lease_id: str):
+        """
+        Claims a lease if it does not exist or is expired. The lease is
+        only written if it was not changed since it was read, so a worker
+        claiming it concurrently makes the claim fail.
+
+        Args:
+            lease_id (str): id of the lease
+
+        Returns:
+            True if this worker owns the lease
+        """
+        lease, tag = self._read_tagged(lease_id)
+        if not self.is_claimable(lease):
+            return False
+        if lease is not None:
+            self._logger.info('Reclaiming expired lease %s of %s.', lease_id, lease['owner'])
+        if not self._write(lease_id, LEASE_STATUS_RUNNING, tag):
+            self._logger.info('Lease %s was claimed by another worker.', lease_id)
+            return False
+        time.sleep(self.settle_seconds)
+        return self.is_owner(lease_id)
+
+    def is_owner(self, lease_id: str):
+        """
+        Checks if this worker owns a running lease
+
+        Args:
+            lease_id (str): id of the lease
+        """
+        return self._owned_tag(lease_id) is not None
+
+    def _owned_tag(self, lease_id: str):
+        """
+        Returns the tag of a running lease owned by this worker, None otherwise
+        """
+        lease, tag = self._read_tagged(lease_id)
+        if lease is None or lease['owner'] != self.owner or \
+                lease['status'] != LEASE_STATUS_RUNNING:
+            return None
+        return tag
+
+    def renew(self, lease_id: str):
+        """
+        Extends the expiry of a lease owned by this worker
+
+        Args:
+            lease_id (str): id of the lease
+
+        Returns:
+            True if the lease was renewed, False if it was lost
+        """
+        tag = self._owned_tag(lease_id)
+        if tag is None or not self._write(lease_id, LEASE_STATUS_RUNNING, tag):
+            self._logger.info('Lease %s was lost and is not renewed.', lease_id)
+            return False
+        return True
+
+    def complete(self, lease_id: str, result=None):
+        """
+        Marks a lease owned by this worker as done
+
+        Args:
+            lease_id (str): id of the lease
+            result (optional): JSON serializable result stored in the lease
+
+        Returns:
+            True if the lease was completed, False if it was lost
+        """
+        tag = self._owned_tag(lease_id)
+        if tag is None or not self._write(lease_id, LEASE_STATUS_DONE, tag, result):
+            self._logger.info('Lease %s was lost and is not completed.', lease_id)
+            return False
+        return True
+
+    def keep_alive(self, lease_id: str):
+        """
+        Starts a thread renewing a lease every third of its duration
+
+        Args:
+            lease_id (str): id of the lease
+
+        Returns:
+            stop (callable): stops the renewal and waits for the thread to finish
+        """
+        stop_event = threading.Event()
+
+        def _renew():
+            while not stop_event.wait(self.lease_seconds / 3):
+                if not self.renew(lease_id):
+                    return
+
+        thread = threading.Thread(target=_renew, daemon=True)
+        thread.start()
+
+        def _stop():
+            stop_event.set()
+            thread.join()
+
+        return _stop
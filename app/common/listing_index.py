@@ -0,0 +1,217 @@
+""" Listings of source prefixes answered from an index or from earlier listings """
+from datetime import datetime, timedelta
+import json
+import logging
+import re
+import threading
+
+from app.common.constants import MetaProcessFormat
+from app.common.storage import StorageConnector
+
+# Prefixes of the source files of one date, e.g. 2022-01-31 or 2022-01-31/
+DATE_PREFIX = re.compile(r'^\d{4}-\d{2}-\d{2}/?$')
+# Dates that are listed again, files of recent dates may still arrive
+LISTING_RECENT_DAYS = 2
+# Number of newly indexed dates after which the index is written
+LISTING_SAVE_EVERY = 50
+
+
+class _ListingStorage():
+    """
+    Base class of the source storages answering listings from listings
+    taken before. Subclasses implement list_objects_by_prefix, all other
+    methods are passed to the source storage.
+    """
+    storage = None
+
+    def __getattr__(self, name: str):
+        """
+        Passes all other attributes to the source storage
+        """
+        return getattr(self.storage, name)
+
+    def list_files_by_prefix(self, prefix: str) -> list:
+        """
+        Lists all files with a prefix
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            file_list: list of all file names containing the prefix in the key
+        """
+        return list(self.list_objects_by_prefix(prefix))
+
+    def list_etags_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with a tag changing with their content
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            etags: tags by file name of all files containing the prefix in the key
+        """
+        return {key: etag for key, (_, etag) in self.list_objects_by_prefix(prefix).items()}
+
+    def list_sizes_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with their sizes
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            sizes: sizes in bytes by file name of all files containing the prefix in the key
+        """
+        return {key: size for key, (size, _) in self.list_objects_by_prefix(prefix).items()}
+
+
+class ListingCache(_ListingStorage):
+    """
+    Source storage answering the listings of prefixes listed before, e.g.
+    by the planner of a run, so that the run does not list them again.
+    Every prefix is answered once from the given listings.
+    """
+    def __init__(self, storage: StorageConnector, listings: dict) -> None:
+        """
+        Constructor for ListingCache
+
+        Args:
+            storage (StorageConnector): storage of the source files
+            listings (dict): (size, tag) by file name by prefix
+        """
+        self.storage = storage
+        self._listings = dict(listings)
+        self._lock = threading.Lock()
+
+    def list_objects_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with their sizes and tags,
+        from the given listings the first time a prefix is listed
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            objects: (size, tag) by file name of all files containing the prefix in the key
+        """
+        with self._lock:
+            objects = self._listings.pop(prefix, None)
+        if objects is None:
+            return self.storage.list_objects_by_prefix(prefix)
+        return objects
+
+
+class ListingIndex(_ListingStorage):
+    """
+    Source storage answering the listings of past date prefixes from an index.
+    The files of a date do not change once the date is over, so every past
+    date is listed once and its keys, sizes and ETags are kept in an index
+    file. Only today's and the recent dates are listed again, so the listing
+    requests of a run do not grow with the reprocessed range. Empty listings
+    are not indexed, the files of a date may arrive late or be restored.
+    All other methods are passed to the source storage.
+    """
+    def __init__(self, storage: StorageConnector, index_storage: StorageConnector,
+                 index_key: str, recent_days: int=LISTING_RECENT_DAYS) -> None:
+        """
+        Constructor for ListingIndex
+
+        Args:
+            storage (StorageConnector): storage of the source files
+            index_storage (StorageConnector): storage of the index file
+            index_key (str): key of the index file
+            recent_days (int, optional): dates within the last recent_days days are
+                                         always listed. Defaults to LISTING_RECENT_DAYS.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.storage = storage
+        self.index_storage = index_storage
+        self.index_key = index_key
+        self.recent_days = recent_days
+        self.hits = 0
+        self.misses = 0
+        self._prefixes = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def is_immutable(self, prefix: str):
+        """
+        Checks if a prefix is the prefix of a date that is no longer recent
+
+        Args:
+            prefix (str): prefix of the keys
+        """
+        if not DATE_PREFIX.match(prefix):
+            return False
+        day = datetime.strptime(prefix[:10], MetaProcessFormat.META_DATE_FORMAT.value).date()
+        return day < datetime.today().date() - timedelta(days=self.recent_days)
+
+    def _read(self):
+        """
+        Reads the listings of the index file
+
+        Returns:
+            prefixes (dict): [size, tag] by file name by prefix
+        """
+        try:
+            return json.loads(self.index_storage.read_text(self.index_key))['prefixes']
+        except self.index_storage.not_found_error:
+            self._logger.info('No listing index found at %s.', self.index_key)
+            return {}
+
+    def list_objects_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with their sizes and tags,
+        from the index for past date prefixes
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            objects: (size, tag) by file name of all files containing the prefix in the key
+        """
+        if not self.is_immutable(prefix):
+            return self.storage.list_objects_by_prefix(prefix)
+        with self._lock:
+            if self._prefixes is None:
+                self._prefixes = self._read()
+            entry = self._prefixes.get(prefix)
+            if entry is not None:
+                self.hits += 1
+                return {key: tuple(value) for key, value in entry.items()}
+        objects = self.storage.list_objects_by_prefix(prefix)
+        with self._lock:
+            self.misses += 1
+            if not objects:
+                # a date without files is listed again by the next run
+                return objects
+            self._prefixes[prefix] = {key: list(value) for key, value in objects.items()}
+            self._pending += 1
+            save = self._pending >= LISTING_SAVE_EVERY
+        if save:
+            self.save()
+        return objects
+
+    def save(self):
+        """
+        Writes the index file if dates were added. The index file is read
+        again before, so dates added by other processes in the meantime
+        are kept. Dates lost by concurrent writes are only listed again.
+
+        Returns:
+            saved (bool): whether the index file was written
+        """
+        if not self._pending:
+            return False
+        stored = self._read()
+        with self._lock:
+            stored.update(self._prefixes)
+            self._prefixes = stored
+            text = json.dumps({'prefixes': self._prefixes}, sort_keys=True)
+            self._pending = 0
+        self.index_storage.write_text(text, self.index_key)
+        self._logger.info('Listing index saved: %s prefixes taken from the index, %s listed.',
+                          self.hits, self.misses)
+        return True
@@ -0,0 +1,331 @@
+""" Connector and methods accessing a local directory """
+import fcntl
+import hashlib
+from io import BytesIO, StringIO
+import os
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+import pyarrow.parquet as pq
+
+from app.common.storage import StorageConnector
+
+
+class LocalFileConnector(StorageConnector):
+    """
+    Class for interacting with a local directory, e.g. a local copy of
+    the Xetra data. Keys are paths relative to the root directory. Files
+    are read through memory maps, so the parsers read the page cache
+    without copying the files into Python objects first.
+    """
+    def __init__(self, root_dir: str) -> None:
+        """
+        Constructor for LocalFileConnector
+
+        Args:
+            root_dir (str): directory holding the files, created if missing
+        """
+        super().__init__()
+        self.root_dir = os.path.abspath(root_dir)
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _path(self, key: str):
+        """
+        Returns the local path of a key
+        """
+        return os.path.join(self.root_dir, *key.split('/'))
+
+    def _put_object(self, out_buffer: StringIO or BytesIO, key: str):
+        """
+        Helper function for writing files. The file is written to a temporary
+        file first, so readers never see partial files.
+
+        Args:
+            out_buffer (StringIO or BytesIO): Buffer that should be written
+            key (str): name of the file
+        """
+        self._logger.info('Writing file to %s/%s', self.root_dir, key)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = out_buffer.getvalue()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+        return True
+
+    def _stat_by_prefix(self, prefix: str):
+        """
+        Returns the stat results by key of all files with a prefix in key order
+        """
+        parent, _, name_prefix = prefix.rpartition('/')
+        parent_dir = self._path(parent) if parent else self.root_dir
+        if not os.path.isdir(parent_dir):
+            return {}
+        # only the entries of the prefix directory starting with the prefix are visited
+        paths = []
+        for entry in os.scandir(parent_dir):
+            if not entry.name.startswith(name_prefix):
+                continue
+            if entry.is_dir():
+                paths.extend(
+                    os.path.join(dir_path, file_name)
+                    for dir_path, _, file_names in os.walk(entry.path)
+                    for file_name in file_names
+                )
+            else:
+                paths.append(entry.path)
+        stats = {
+            os.path.relpath(path, self.root_dir).replace(os.sep, '/'): os.stat(path)
+            for path in paths
+            if not path.endswith('.tmp')
+        }
+        return dict(sorted(stats.items()))
+
+    def list_files_by_prefix(self, prefix: str) -> list:
+        """
+        Lists all files in the directory with a prefix
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            file_list: list of all file names containing the prefix in the key
+        """
+        return list(self._stat_by_prefix(prefix))
+
+    def list_etags_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files in the directory with a prefix together with a tag
+        of their size and modification time
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            etags: tags by file name of all files containing the prefix in the key
+        """
+        return {
+            key: f'{stat.st_size}-{stat.st_mtime_ns}'
+            for key, stat in self._stat_by_prefix(prefix).items()
+        }
+
+    def list_sizes_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files in the directory with a prefix together with their sizes
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            sizes: sizes in bytes by file name of all files containing the prefix in the key
+        """
+        return {key: stat.st_size for key, stat in self._stat_by_prefix(prefix).items()}
+
+    def list_objects_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files in the directory with a prefix together with
+        their sizes and tags in one pass
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            objects: (size, tag) by file name of all files containing the prefix in the key
+        """
+        return {
+            key: (stat.st_size, f'{stat.st_size}-{stat.st_mtime_ns}')
+            for key, stat in self._stat_by_prefix(prefix).items()
+        }
+
+    def list_files_after(self, start_after: str, prefix: str="") -> list:
+        """
+        Lists the files in the directory whose keys sort after a key
+
+        Args:
+            start_after (str): key after which the listing starts
+            prefix (str, optional): prefix of the keys that should be filtered with
+
+        Returns:
+            file_list: list of all file names after start_after in key order
+        """
+        return [key for key in self._stat_by_prefix(prefix) if key > start_after]
+
+    def _open_mapped(self, key: str, compression: str=None):
+        """
+        Opens a memory mapped file, decompressed while it is read if compressed
+
+        Args:
+            key (str): key of the file that should be read
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
+        """
+        self._logger.info('Reading file %s/%s', self.root_dir, key)
+        compression = self.compression_of_key(key, compression)
+        return pa.input_stream(pa.memory_map(self._path(key)), compression=compression)
+
+    def read_csv(self, key: str, encoding: str="utf-8", sep: str=",", compression: str=None):
+        """
+        Reads a csv file from the directory and returns a dataframe
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+            sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
+
+        Returns:
+            [pandas.DataFrame]: Pandas DataFrame that contains the data of the csv file
+        """
+        with self._open_mapped(key, compression) as stream:
+            data_frame = pd.read_csv(stream, delimiter=sep, encoding=encoding)
+
+        return data_frame
+
+    def read_csv_arrow(self, key: str, column_types: dict=None, sep: str=",",
+                       compression: str=None):
+        """
+        Reads a csv file from the directory and returns an Arrow table
+
+        Args:
+            key (str): key of the file that should be read
+            column_types (dict, optional): Arrow data types of columns by column name.
+                                           Types of other columns are inferred.
+            sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
+
+        Returns:
+            [pyarrow.Table]: Arrow table that contains the data of the csv file
+        """
+        with self._open_mapped(key, compression) as stream:
+            table = pa_csv.read_csv(
+                stream,
+                parse_options=pa_csv.ParseOptions(delimiter=sep),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types or {})
+            )
+
+        return table
+
+    def read_text(self, key: str, encoding: str="utf-8"):
+        """
+        Reads a text file from the directory
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str): content of the file
+        """
+        with open(self._path(key), encoding=encoding) as file:
+            return file.read()
+
+    def read_text_tagged(self, key: str, encoding: str="utf-8"):
+        """
+        Reads a text file from the directory together with the MD5 hash of its content
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str), tag (str): content and tag of the file
+        """
+        data = self.read_bytes(key)
+        return data.decode(encoding), hashlib.md5(data).hexdigest()
+
+    def write_text_if(self, text: str, key: str, tag: str=None):
+        """
+        Writes a text file only if its content still has the tag. The
+        directory of the file is locked while the tag is compared and the
+        file is written, so processes writing the same file are serialized.
+
+        Args:
+            text (str): content of the file
+            key (str): target name of the file
+            tag (str, optional): tag returned by read_text_tagged. None writes
+                                 the file only if it does not exist.
+
+        Returns:
+            True if the file was written, False if it was changed or created meanwhile
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        dir_fd = os.open(os.path.dirname(path), os.O_RDONLY)
+        try:
+            fcntl.flock(dir_fd, fcntl.LOCK_EX)
+            try:
+                current = self.read_text_tagged(key)[1]
+            except FileNotFoundError:
+                current = None
+            if current != tag:
+                return False
+            return self.write_text(text, key)
+        finally:
+            os.close(dir_fd)
+
+    def read_bytes(self, key: str):
+        """
+        Reads a binary file from the directory
+
+        Args:
+            key (str): key of the file that should be read
+
+        Returns:
+            data (bytes): content of the file
+        """
+        with open(self._path(key), 'rb') as file:
+            return file.read()
+
+    def read_parquet(self, key: str, columns: list=None, filters: list=None,
+                     max_workers: int=8, row_groups: list=None):
+        """
+        Reads a memory mapped parquet file from the directory and returns a dataframe.
+        Only the requested columns of the row groups matching the filters are decoded.
+
+        Args:
+            key (str): key of the file that should be read
+            columns (list, optional): columns that should be read. Defaults to all columns.
+            filters (list, optional): tuples of column, operator and value combined with
+                                      AND, e.g. [('Date', '>=', '2022-01-31')]
+            max_workers (int, optional): not used, local reads are not parallelized
+            row_groups (list, optional): indices of the row groups that should be read.
+                                         Defaults to the row groups matching the filters.
+
+        Returns:
+            [pandas.DataFrame]: Pandas DataFrame that contains the data of the parquet file
+        """
+        self._logger.info('Reading file %s/%s', self.root_dir, key)
+        if row_groups is None:
+            table = pq.read_table(self._path(key), columns=columns, filters=filters,
+                                  memory_map=True)
+        else:
+            table = pq.ParquetFile(self._path(key), memory_map=True).read_row_groups(row_groups)
+            if filters:
+                table = table.filter(pq.filters_to_expression(filters))
+            if columns is not None:
+                table = table.select(columns)
+        data_frame = table.to_pandas()
+
+        return data_frame
+
+    def delete_objects(self, keys: list):
+        """
+        Deletes files from the directory, missing files are ignored
+
+        Args:
+            keys (list): keys of the files that should be deleted
+        """
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+        return True
@@ -0,0 +1,102 @@
+""" Local cache of DataFrames keyed by fingerprints """
+import logging
+import os
+import time
+
+import pandas as pd
+
+
+class MemoCache():
+    """
+    Class for caching DataFrames as local parquet files named by a fingerprint
+    of their inputs. Entries are evicted by age and by the total size of the
+    cache, least recently used entries first.
+    """
+    def __init__(self, cache_dir: str, max_age_seconds: float=None,
+                 max_bytes: int=None) -> None:
+        """
+        Constructor for MemoCache
+
+        Args:
+            cache_dir (str): directory of the cache files, created if missing
+            max_age_seconds (float, optional): entries unused for longer are evicted.
+                                               Defaults to None (no limit).
+            max_bytes (int, optional): maximum total size of the cache files.
+                                       Defaults to None (no limit).
+        """
+        self._logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, fingerprint: str):
+        """
+        Returns the path of the cache file of a fingerprint
+        """
+        return os.path.join(self.cache_dir, f'{fingerprint}.parquet')
+
+    def get(self, fingerprint: str):
+        """
+        Returns the cached DataFrame of a fingerprint
+
+        Args:
+            fingerprint (str): fingerprint of the inputs
+
+        Returns:
+            df (pd.DataFrame): cached DataFrame or None if the fingerprint is not cached
+        """
+        path = self._path(fingerprint)
+        try:
+            data_frame = pd.read_parquet(path)
+        except (FileNotFoundError, OSError):
+            self.misses += 1
+            return None
+        # the modification time marks the last use for the eviction
+        os.utime(path)
+        self.hits += 1
+        return data_frame
+
+    def put(self, fingerprint: str, data_frame: pd.DataFrame):
+        """
+        Caches a DataFrame under a fingerprint
+
+        Args:
+            fingerprint (str): fingerprint of the inputs
+            data_frame (pd.DataFrame): DataFrame that should be cached
+        """
+        path = self._path(fingerprint)
+        # writing to a temporary file, so readers never see partial files
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        data_frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Removes the entries older than max_age_seconds and the least recently
+        used entries until the cache is not larger than max_bytes
+
+        Returns:
+            removed (int): number of removed entries
+        """
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.cache_dir)
+            if entry.name.endswith('.parquet')
+        )
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        removed = 0
+        for mtime, size, path in entries:
+            too_old = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            too_large = self.max_bytes is not None and total > self.max_bytes
+            if not too_old and not too_large:
+                continue
+            os.remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            self._logger.info('Evicted %s entries from the cache %s.', removed, self.cache_dir)
+        return removed
@@ -1,12 +1,13 @@
 """ Methods for processing the meta file """
 
 import collections
-from datetime import datetime, time, timedelta
+from datetime import datetime, time
 import pandas as pd
 from pandas._libs import missing
 from app.common.constants import MetaProcessFormat
 from app.common.custom_exceptions import WrongMetaFileException
-from app.common.s3 import S3BucketConnector
+from app.common.storage import StorageConnector
+from app.common.trading_calendar import TradingCalendar
 
 
 class MetaProcess():
@@ -14,14 +15,14 @@ class MetaProcess():
     Class for working with the meta file
     """
     @staticmethod
-    def update_meta_file(extracted_dates: list, meta_key: str, s3_bucket_meta: S3BucketConnector):
+    def update_meta_file(extracted_dates: list, meta_key: str, s3_bucket_meta: StorageConnector):
         """
         Updates the meta file with processed dates and todays date as processed date.
 
         Args:
             extracted_dates (list): a list of dates that are extracted from the source
             meta_key (str): name of the metafile in S3 Bucket
-            s3_bucket_meta (S3BucketConnector): S3BucketConnector for bucket with the meta file
+            s3_bucket_meta (StorageConnector): connector of the storage with the meta file
         """
         # Creating an empty dataframe using the meta file column names
         meta_columns = [MetaProcessFormat.META_SOURCE_DATE_COL.value,
@@ -38,7 +39,7 @@ class MetaProcess():
             if collections.Counter(old_df.columns) != collections.Counter(new_df.columns):
                 raise WrongMetaFileException
             all_df = pd.concat([old_df, new_df])
-        except s3_bucket_meta.session.client('s3').exceptions.NoSuchKey:
+        except s3_bucket_meta.not_found_error:
             # No meta file exists
             all_df = new_df
         # Writing to S3
@@ -47,7 +48,8 @@ class MetaProcess():
         return True
 
     @staticmethod
-    def return_date_list(sdate: str, meta_key: str, s3_bucket_meta: S3BucketConnector):
+    def return_date_list(sdate: str, meta_key: str, s3_bucket_meta: StorageConnector,
+                         calendar: TradingCalendar=None):
         """
         Creates a list of dates based on the input sdate and the already
         processed dates in the meta file
@@ -55,33 +57,37 @@ class MetaProcess():
         Args:
             sdate (str): the earliest date the data should be processed
             meta_key (str): name of the meta file on the S3 Bucket
-            s3_bucket_meta (S3BucketConnector): S3BucketConnector for the bucket with the meta file
+            s3_bucket_meta (StorageConnector): connector of the storage with the meta file
+            calendar (TradingCalendar, optional): calendar of the trading days. Other days
+                                                  are neither listed nor missing.
+                                                  Defaults to every day.
             
         Returns
             min_date (str): first date that should be processed
-            return_date_list (list): list of all dates from min_date till today
+            return_date_list (list): list of all trading days from the trading day
+                                     before min_date till today
         """
-        start = datetime.strptime(sdate,
-                                  MetaProcessFormat.META_DATE_FORMAT.value)\
-                                      .date() - timedelta(days=1)
+        calendar = calendar or TradingCalendar()
+        first = datetime.strptime(sdate, MetaProcessFormat.META_DATE_FORMAT.value).date()
         today = datetime.today().date()
+        # Creating a list of trading days from the trading day before sdate until today
+        dates = [calendar.previous_trading_day(first)] + calendar.trading_days(first, today)
         try:
             # If meta file exists create return_date_list using the content of the meta file
             # Reading meta file
             meta_df = s3_bucket_meta.read_csv(meta_key)
-            # Creating a list of dates from sdate until today
-            dates = [start + timedelta(days=x) for x in range(0, (today-start).days + 1)]
             # Creating set of all dates in meta file
             src_dates = set(pd.to_datetime(
                 meta_df[MetaProcessFormat.META_SOURCE_DATE_COL.value]
             ).dt.date)
             missing_dates = set(dates[1:]) - src_dates
             if missing_dates:
-                # determine the earliest date that should be extracted
-                min_date = min(missing_dates) - timedelta(days=1)
+                # determine the earliest date that should be extracted,
+                # the trading day before the first missing date
+                min_missing = min(missing_dates)
+                min_date = dates[dates.index(min_missing) - 1]
                 # Create a list of dates from min_date to today
-                return_min_date = (min_date + timedelta(days=1))\
-                    .strftime(MetaProcessFormat.META_DATE_FORMAT.value)
+                return_min_date = min_missing.strftime(MetaProcessFormat.META_DATE_FORMAT.value)
                 return_date_list = [
                     dt.strftime(MetaProcessFormat.META_DATE_FORMAT.value)
                     for dt in dates if dt >= min_date
@@ -91,14 +97,28 @@ class MetaProcess():
                 return_date_list = []
                 return_min_date = datetime(2200, 1, 1).date()\
                     .strftime(MetaProcessFormat.META_DATE_FORMAT.value)
-        except s3_bucket_meta.session.client('s3').exceptions.NoSuchKey:
+        except s3_bucket_meta.not_found_error:
             # There is no existing meta file
-            # creating a date list from sdate - 1 to today
+            # creating a date list from the trading day before sdate to today
             return_min_date = sdate
             return_date_list = [
-                (start + timedelta(days=x))\
-                    .strftime(MetaProcessFormat.META_DATE_FORMAT.value) 
-                for x in range(0, (today-start).days + 1)
+                dt.strftime(MetaProcessFormat.META_DATE_FORMAT.value) for dt in dates
             ]
             
         return return_min_date, return_date_list
+
+    @staticmethod
+    def return_date_range(sdate: str, edate: str, calendar: TradingCalendar=None):
+        """
+        Creates a list of all trading days from sdate till edate (both inclusive)
+
+        Args:
+            sdate (str): first date of the range
+            edate (str): last date of the range
+            calendar (TradingCalendar, optional): calendar of the trading days.
+                                                  Defaults to every day.
+
+        Returns
+            date_list (list): list of all trading days from sdate till edate
+        """
+        return (calendar or TradingCalendar()).trading_dates(sdate, edate)
@@ -0,0 +1,162 @@
+""" Pipelined execution of generator stages connected by bounded queues """
+import logging
+import queue
+import threading
+import time
+
+# Marks the end of the items of a stage
+_END = object()
+# Seconds between checks whether the pipeline was aborted
+_POLL_SECONDS = 0.1
+
+
+class _PipelineAborted(Exception):
+    """
+    Raised inside a stage when another stage of the pipeline failed
+    """
+
+
+class StageStats():
+    """
+    Class for the timings of one pipeline stage
+    """
+    def __init__(self, name: str) -> None:
+        """
+        Constructor for StageStats
+
+        Args:
+            name (str): name of the stage
+        """
+        self.name = name
+        self.items = 0
+        self.input_wait = 0.0
+        self.output_wait = 0.0
+        self.total = 0.0
+
+    @property
+    def idle(self):
+        """
+        Seconds the stage waited for input or for free space in the output queue
+        """
+        return self.input_wait + self.output_wait
+
+    @property
+    def busy(self):
+        """
+        Seconds the stage was working on items
+        """
+        return max(self.total - self.idle, 0.0)
+
+
+class Pipeline():
+    """
+    Runs generator stages in separate threads. Every stage is a callable
+    that receives an iterator over the items of the previous stage and
+    yields its own items. Neighbouring stages are connected by bounded
+    queues, so a fast stage blocks when the next stage falls behind.
+    """
+    def __init__(self, stages: list, queue_size: int=2) -> None:
+        """
+        Constructor for Pipeline
+
+        Args:
+            stages (list): tuples of stage name and stage callable. The first
+                           stage receives an empty iterator.
+            queue_size (int, optional): maximum number of items waiting between
+                                        two stages. Defaults to 2.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(name) for name, _ in stages]
+        self._abort = threading.Event()
+        self._errors = []
+
+    def _get(self, in_queue: queue.Queue, stats: StageStats):
+        """
+        Yields the items of the input queue until the end marker
+        """
+        while True:
+            start = time.perf_counter()
+            item = self._wait(lambda: in_queue.get(timeout=_POLL_SECONDS), queue.Empty)
+            stats.input_wait += time.perf_counter() - start
+            if item is _END:
+                return
+            yield item
+
+    def _put(self, out_queue: queue.Queue, item, stats: StageStats):
+        """
+        Puts an item into the output queue and blocks while the queue is full
+        """
+        start = time.perf_counter()
+        self._wait(lambda: out_queue.put(item, timeout=_POLL_SECONDS), queue.Full)
+        stats.output_wait += time.perf_counter() - start
+
+    def _wait(self, func, retry_exception):
+        """
+        Retries a blocking queue operation until it succeeds or the pipeline is aborted
+        """
+        while True:
+            if self._abort.is_set():
+                raise _PipelineAborted
+            try:
+                return func()
+            except retry_exception:
+                continue
+
+    def _run_stage(self, stage, stats: StageStats, in_queue: queue.Queue,
+                   out_queue: queue.Queue):
+        """
+        Runs one stage and forwards its items to the next stage
+        """
+        start = time.perf_counter()
+        try:
+            items = self._get(in_queue, stats) if in_queue is not None else iter(())
+            for item in stage(items):
+                stats.items += 1
+                if out_queue is not None:
+                    self._put(out_queue, item, stats)
+            if out_queue is not None:
+                self._put(out_queue, _END, stats)
+        except _PipelineAborted:
+            pass
+        except Exception as error:
+            self._logger.error('Pipeline stage %s failed: %s', stats.name, error)
+            self._errors.append(error)
+            self._abort.set()
+        finally:
+            stats.total = time.perf_counter() - start
+
+    def run(self):
+        """
+        Runs all stages until the last stage has processed every item.
+        The first error of a stage aborts the other stages and is raised.
+
+        Returns:
+            stats (list): StageStats instances of the stages
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, stats,
+                      queues[ind - 1] if ind > 0 else None,
+                      queues[ind] if ind < len(queues) else None),
+                name=f'pipeline-{name}',
+                daemon=True
+            )
+            for ind, ((name, stage), stats) in enumerate(zip(self.stages, self.stats))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for stats in self.stats:
+            self._logger.info('Pipeline stage %s: %s items, %.3f s busy, %.3f s idle '
+                              '(%.3f s waiting for input, %.3f s waiting for output).',
+                              stats.name, stats.items, stats.busy, stats.idle,
+                              stats.input_wait, stats.output_wait)
+        if self._errors:
+            raise self._errors[0]
+
+        return self.stats
@@ -0,0 +1,210 @@
+""" Sidecar indexes of report files sorted by ISIN """
+import base64
+import hashlib
+from io import BytesIO
+import json
+import math
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.common.s3_ranged import column_chunk_ranges
+
+# Key suffix of the sidecar index next to the report file
+INDEX_SUFFIX = '.index.json'
+# Rows of a row group of the indexed reports, a lookup reads at least one row group
+INDEX_ROW_GROUP_SIZE = 10000
+# False positive rate of the bloom filters
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+
+class BloomFilter():
+    """
+    Set of strings answering membership with a small false positive rate
+    and without false negatives, kept as bit array of a few bits per value
+    """
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytearray=None) -> None:
+        """
+        Constructor for BloomFilter
+
+        Args:
+            num_bits (int): size of the bit array
+            num_hashes (int): number of bits set per value
+            bits (bytearray, optional): bit array of a saved filter
+        """
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_values(cls, values: list, false_positive_rate: float=BLOOM_FALSE_POSITIVE_RATE):
+        """
+        Creates a filter sized for the values and adds them
+
+        Args:
+            values (list): values of the filter
+            false_positive_rate (float, optional): false positive rate of the filter
+        """
+        count = max(len(values), 1)
+        num_bits = max(8, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+        bloom = cls(num_bits, max(1, round(num_bits / count * math.log(2))))
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def _positions(self, value: str):
+        """
+        Returns the bit positions of a value by double hashing
+        """
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return [(first + ind * second) % self.num_bits for ind in range(self.num_hashes)]
+
+    def add(self, value: str):
+        """
+        Adds a value
+
+        Args:
+            value (str): value
+        """
+        for pos in self._positions(value):
+            self.bits[pos // 8] |= 1 << (pos % 8)
+
+    def __contains__(self, value: str):
+        """
+        Checks if a value may have been added
+        """
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(value))
+
+    def to_dict(self):
+        """
+        Returns the filter as JSON serializable dict
+        """
+        return {
+            'num_bits': self.num_bits,
+            'num_hashes': self.num_hashes,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Creates a filter from a dict returned by to_dict
+        """
+        return cls(data['num_bits'], data['num_hashes'],
+                   bytearray(base64.b64decode(data['bits'])))
+
+
+class ReportIndex():
+    """
+    Sidecar index of a parquet report sorted by ISIN. It keeps the ISIN
+    range, rows and byte range of every row group, the date range of the
+    report and a bloom filter of its ISINs, so that a lookup of one ISIN
+    skips reports without it and reads only its row groups.
+    """
+    def __init__(self, key: str, isin_column: str, date_column: str, min_date: str,
+                 max_date: str, row_groups: list, bloom: BloomFilter=None) -> None:
+        """
+        Constructor for ReportIndex
+
+        Args:
+            key (str): key of the report file
+            isin_column (str): column name of the ISIN
+            date_column (str): column name of the date
+            min_date (str): first date of the report
+            max_date (str): last date of the report
+            row_groups (list): dicts with min_isin, max_isin, rows, offset and length
+                               of every row group
+            bloom (BloomFilter, optional): bloom filter of the ISINs. None disables it.
+        """
+        self.key = key
+        self.isin_column = isin_column
+        self.date_column = date_column
+        self.min_date = min_date
+        self.max_date = max_date
+        self.row_groups = row_groups
+        self.bloom = bloom
+
+    @classmethod
+    def from_parquet(cls, key: str, table: pa.Table, payload: bytes, isin_column: str,
+                     date_column: str, bloom: bool=True):
+        """
+        Creates the index of a serialized report
+
+        Args:
+            key (str): key of the report file
+            table (pa.Table): report sorted by ISIN
+            payload (bytes): content of the parquet file of the report
+            isin_column (str): column name of the ISIN
+            date_column (str): column name of the date
+            bloom (bool, optional): whether a bloom filter of the ISINs is added
+
+        Returns:
+            index (ReportIndex): index of the report
+        """
+        metadata = pq.read_metadata(BytesIO(payload))
+        isin_ind = metadata.schema.names.index(isin_column)
+        row_groups = []
+        for ind in range(metadata.num_row_groups):
+            statistics = metadata.row_group(ind).column(isin_ind).statistics
+            ranges = column_chunk_ranges(metadata, [ind])
+            offset = min(start for start, _ in ranges)
+            row_groups.append({
+                'min_isin': statistics.min,
+                'max_isin': statistics.max,
+                'rows': metadata.row_group(ind).num_rows,
+                'offset': offset,
+                'length': max(end for _, end in ranges) - offset
+            })
+        dates = pc.min_max(table.column(date_column).cast(pa.string()))
+        return cls(key, isin_column, date_column, dates['min'].as_py(), dates['max'].as_py(),
+                   row_groups,
+                   BloomFilter.for_values(pc.unique(table.column(isin_column)).to_pylist())
+                   if bloom else None)
+
+    def row_groups_of(self, isin: str, start: str=None, end: str=None):
+        """
+        Returns the row groups that may contain rows of an ISIN in a date range
+
+        Args:
+            isin (str): ISIN
+            start (str, optional): first date in the format of the report
+            end (str, optional): last date in the format of the report
+
+        Returns:
+            row_groups (list): indices of the row groups
+        """
+        if (start is not None and self.max_date < start) or \
+                (end is not None and self.min_date > end):
+            return []
+        if self.bloom is not None and isin not in self.bloom:
+            return []
+        return [
+            ind
+            for ind, row_group in enumerate(self.row_groups)
+            if row_group['min_isin'] <= isin <= row_group['max_isin']
+        ]
+
+    def to_json(self):
+        """
+        Returns the index as JSON text
+        """
+        return json.dumps({
+            'key': self.key,
+            'isin_column': self.isin_column,
+            'date_column': self.date_column,
+            'min_date': self.min_date,
+            'max_date': self.max_date,
+            'row_groups': self.row_groups,
+            'bloom': self.bloom.to_dict() if self.bloom is not None else None
+        })
+
+    @classmethod
+    def from_json(cls, text: str):
+        """
+        Creates an index from the JSON text returned by to_json
+        """
+        data = json.loads(text)
+        bloom = data.pop('bloom')
+        return cls(**data, bloom=BloomFilter.from_dict(bloom) if bloom else None)
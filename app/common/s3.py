@@ -1,20 +1,28 @@
 """ Connector and methods accessing S3 """
 import os
-import logging
 from io import BytesIO, StringIO
 import boto3
+from botocore.exceptions import ClientError
 
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 
-from app.common.constants import S3FileTypes
-from app.common.custom_exceptions import WrongFormatException
+from app.common.concurrency import AIMDLimiter
+from app.common.s3_ranged import S3RangedFile, read_parquet_ranged
+from app.common.storage import StorageConnector
+from app.common.tracing import Tracer, trace_span
 
+# Error codes of writes whose precondition on the current object failed
+PRECONDITION_CODES = {'PreconditionFailed', 'ConditionalRequestConflict'}
 
-class S3BucketConnector():
+
+class S3BucketConnector(StorageConnector):
     """
     Class for interacting with S3 Buckets
     """
-    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket: str) -> None:
+    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket: str,
+                 max_concurrency: int=32, tracer: Tracer=None) -> None:
         """
         Constructor for S3BucketConnector
 
@@ -23,15 +31,23 @@ class S3BucketConnector():
             secret_key (str): secret key for accessing S3
             endpoint_url (str): endpoint url to S3 API
             bucket (str): name of the S3 bucket
+            max_concurrency (int, optional): highest number of concurrent requests.
+                                             The number adapts to latency and throttling.
+            tracer (Tracer, optional): tracer recording a span per request
         """
-        self._logger = logging.getLogger(__name__)
+        super().__init__()
         self.endpoint_url = endpoint_url
         self.session = boto3.Session(aws_access_key_id=os.environ[access_key],
                                      aws_secret_access_key=os.environ[secret_key])
         self._s3 = self.session.resource(service_name="s3", endpoint_url=endpoint_url)
         self._bucket = self._s3.Bucket(bucket)
+        self.limiter = AIMDLimiter(max_limit=max_concurrency)
+        self.not_found_error = self._s3.meta.client.exceptions.NoSuchKey
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.instrument(self._s3.meta.client)
 
-    def __put_object(self, out_buffer: StringIO or BytesIO, key: str):
+    def _put_object(self, out_buffer: StringIO or BytesIO, key: str):
         """
         Helper function for putting objects to S3 Bucket
 
@@ -40,10 +56,21 @@ class S3BucketConnector():
             key (str): name of the file
         """
         self._logger.info('Writing file to %s/%s/%s', self.endpoint_url, self._bucket.name, key)
-        self._bucket.put_object(Body=out_buffer.getvalue(), Key=key)
+        with self.limiter.slot('put'):
+            self._bucket.put_object(Body=out_buffer.getvalue(), Key=key)
 
         return True
 
+    def concurrency_metrics(self):
+        """
+        Returns the metrics of the adaptive concurrency limit of the requests
+
+        Returns:
+            metrics (dict): current limit, requests in flight, latencies
+                            and the reasons of the limit changes
+        """
+        return self.limiter.metrics()
+
     def list_files_by_prefix(self, prefix: str) -> list:
         """
         Lists all objects in the S3 bucket with a prefix
@@ -57,64 +84,260 @@ class S3BucketConnector():
         file_list = [obj.key for obj in self._bucket.objects.filter(Prefix=prefix)]
         return file_list
 
-    def read_csv(self, key: str, encoding: str="utf-8", sep: str=","):
+    def list_etags_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all objects in the S3 bucket with a prefix together with their ETags
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with
+
+        Returns:
+            etags: ETags by file name of all files containing the prefix in the key
+        """
+        etags = {obj.key: obj.e_tag for obj in self._bucket.objects.filter(Prefix=prefix)}
+        return etags
+
+    def list_sizes_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all objects in the S3 bucket with a prefix together with their sizes
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with
+
+        Returns:
+            sizes: sizes in bytes by file name of all files containing the prefix in the key
+        """
+        sizes = {obj.key: obj.size for obj in self._bucket.objects.filter(Prefix=prefix)}
+        return sizes
+
+    def list_objects_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all objects in the S3 bucket with a prefix together with
+        their sizes and ETags in one listing
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with
+
+        Returns:
+            objects: (size, ETag) by file name of all files containing the prefix in the key
+        """
+        objects = {obj.key: (obj.size, obj.e_tag)
+                   for obj in self._bucket.objects.filter(Prefix=prefix)}
+        return objects
+
+    def list_files_after(self, start_after: str, prefix: str="") -> list:
+        """
+        Lists the objects in the S3 bucket whose keys sort after a key
+
+        Args:
+            start_after (str): key after which the listing starts
+            prefix (str, optional): prefix on the S3 bucket that should be filtered with
+
+        Returns:
+            file_list: list of all file names after start_after in key order
+        """
+        paginator = self._s3.meta.client.get_paginator('list_objects_v2')
+        file_list = [
+            obj['Key']
+            for page in paginator.paginate(Bucket=self._bucket.name, Prefix=prefix,
+                                           StartAfter=start_after)
+            for obj in page.get('Contents', [])
+        ]
+        return file_list
+
+    def _get_body(self, key: str):
         """
-        Reads a csv file from S3 Bucket and returns a dataframe
+        Helper function returning the content of an object. The client
+        is used as it can be shared by threads reading files in parallel.
+        The span of the GetObject request ends with the response headers,
+        the read of the body gets its own span.
+
+        Args:
+            key (str): key of the file that should be read
+        """
+        body = self._s3.meta.client.get_object(Bucket=self._bucket.name, Key=key)["Body"]
+        with trace_span(self.tracer, 's3.GetObject.body', key) as span:
+            content = body.read()
+            span['bytes'] = len(content)
+        return content
+
+    def read_csv(self, key: str, encoding: str="utf-8", sep: str=",", compression: str=None):
+        """
+        Reads a csv file from S3 Bucket and returns a dataframe.
+        The file is downloaded within the concurrency limit and parsed after it,
+        compressed files are decompressed while they are parsed.
 
         Args:
             key (str): key of the file that should be read
             encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
             sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
 
         Returns:
             [pandas.DataFrame]: Pandas DataFrame that contains the data of the csv file
         """
         self._logger.info('Reading file %s/%s/%s',
                           self.endpoint_url, self._bucket.name, key)
-        csv_obj = self._bucket.Object(key=key).get().get("Body").read().decode(encoding)
-        data = StringIO(csv_obj)
+        compression = self.compression_of_key(key, compression)
+        # the slot is released before the file is parsed
+        with self.limiter.slot('get'):
+            content = self._get_body(key)
+        if compression is not None:
+            with pa.input_stream(pa.py_buffer(content), compression=compression) as stream:
+                return pd.read_csv(stream, delimiter=sep, encoding=encoding)
+        data = StringIO(content.decode(encoding))
         data_frame = pd.read_csv(data, delimiter=sep)
 
         return data_frame
 
-    def read_parquet(self, key: str):
+    def read_csv_arrow(self, key: str, column_types: dict=None, sep: str=",",
+                       compression: str=None):
         """
-        Reads a parquet file from S3 Bucket and returns a dataframe
+        Reads a csv file from S3 Bucket and returns an Arrow table.
+        The file is downloaded within the concurrency limit and parsed after it,
+        compressed files are decompressed while they are parsed.
 
         Args:
             key (str): key of the file that should be read
+            column_types (dict, optional): Arrow data types of columns by column name.
+                                           Types of other columns are inferred.
+            sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
 
         Returns:
-            [pandas.DataFrame]: Pandas DataFrame that contains the data of the parquet file
+            [pyarrow.Table]: Arrow table that contains the data of the csv file
         """
         self._logger.info('Reading file %s/%s/%s',
                           self.endpoint_url, self._bucket.name, key)
-        prq_obj = self._bucket.Object(key=key).get().get("Body").read()
-        data = BytesIO(prq_obj)
-        data_frame = pd.read_parquet(data)
+        compression = self.compression_of_key(key, compression)
+        # the slot is released before the file is parsed
+        with self.limiter.slot('get'):
+            content = self._get_body(key)
+        with pa.input_stream(pa.py_buffer(content), compression=compression) as stream:
+            table = pa_csv.read_csv(
+                stream,
+                parse_options=pa_csv.ParseOptions(delimiter=sep),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types or {})
+            )
 
-        return data_frame
+        return table
 
-    def to_s3(self, data: pd.DataFrame, key: str, file_format: str):
+    def read_text(self, key: str, encoding: str="utf-8"):
         """
-        Writes pandas.DataFrame to S3 Bucket in given(csv|parquet) format
+        Reads a text file from S3 Bucket
 
         Args:
-            data (pd.DataFrame): pandas DataFrame that needs to be written
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str): content of the file
+        """
+        with self.limiter.slot('get'):
+            content = self._get_body(key)
+        return content.decode(encoding)
+
+    def read_text_tagged(self, key: str, encoding: str="utf-8"):
+        """
+        Reads a text file from S3 Bucket together with its ETag
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str), tag (str): content and ETag of the file
+        """
+        with self.limiter.slot('get'):
+            response = self._s3.meta.client.get_object(Bucket=self._bucket.name, Key=key)
+            with trace_span(self.tracer, 's3.GetObject.body', key) as span:
+                content = response['Body'].read()
+                span['bytes'] = len(content)
+        return content.decode(encoding), response['ETag']
+
+    def write_text_if(self, text: str, key: str, tag: str=None):
+        """
+        Writes a text file to S3 Bucket with a conditional PUT, only if the
+        ETag of the object is still tag or, without tag, if there is no object
+
+        Args:
+            text (str): content of the file
             key (str): target name of the file
-            file_format (str): target file format (csv|parquet)
-        """
-        if data.empty:
-            self._logger.info('The DataFrame is empty! No file will be written.')
-            return None
-        if file_format == S3FileTypes.CSV.value:
-            out_buffer = StringIO()
-            data.to_csv(out_buffer, index=False)
-            return self.__put_object(out_buffer, key)
-        if file_format == S3FileTypes.PARQUET.value:
-            out_buffer = BytesIO()
-            data.to_parquet(out_buffer, index=False)
-            return self.__put_object(out_buffer, key)
-        self._logger.info("The file format %s is not "
-                          "supported to be written to S3!", file_format)
-        raise WrongFormatException
+            tag (str, optional): ETag returned by read_text_tagged. None writes
+                                 the file only if it does not exist.
+
+        Returns:
+            True if the file was written, False if it was changed or created meanwhile
+        """
+        condition = {'IfNoneMatch': '*'} if tag is None else {'IfMatch': tag}
+        self._logger.info('Writing file to %s/%s/%s', self.endpoint_url, self._bucket.name, key)
+        try:
+            with self.limiter.slot('put'):
+                self._bucket.put_object(Body=text.encode('utf-8'), Key=key, **condition)
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in PRECONDITION_CODES:
+                return False
+            raise
+
+        return True
+
+    def read_bytes(self, key: str):
+        """
+        Reads a binary file from S3 Bucket
+
+        Args:
+            key (str): key of the file that should be read
+
+        Returns:
+            data (bytes): content of the file
+        """
+        with self.limiter.slot('get'):
+            return self._get_body(key)
+
+    def delete_objects(self, keys: list):
+        """
+        Deletes objects from S3 Bucket
+
+        Args:
+            keys (list): keys of the objects that should be deleted
+        """
+        # S3 accepts at most 1000 keys per request
+        for start in range(0, len(keys), 1000):
+            with self.limiter.slot('delete'):
+                self._bucket.delete_objects(
+                    Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]]})
+
+        return True
+
+    def read_parquet(self, key: str, columns: list=None, filters: list=None,
+                     max_workers: int=8, row_groups: list=None):
+        """
+        Reads a parquet file from S3 Bucket and returns a dataframe. The footer is
+        fetched first, then only the column chunks of the requested columns in the
+        row groups whose statistics match the filters are fetched with parallel
+        ranged GET requests.
+
+        Args:
+            key (str): key of the file that should be read
+            columns (list, optional): columns that should be read. Defaults to all columns.
+            filters (list, optional): tuples of column, operator and value combined with
+                                      AND, e.g. [('Date', '>=', '2022-01-31')]
+            max_workers (int, optional): number of parallel requests. Defaults to 8.
+            row_groups (list, optional): indices of the row groups that should be read.
+                                         Defaults to the row groups matching the filters.
+
+        Returns:
+            [pandas.DataFrame]: Pandas DataFrame that contains the data of the parquet file
+        """
+        self._logger.info('Reading file %s/%s/%s',
+                          self.endpoint_url, self._bucket.name, key)
+        ranged_file = S3RangedFile(self._s3.meta.client, self._bucket.name, key,
+                                   limiter=self.limiter, tracer=self.tracer)
+        table = read_parquet_ranged(ranged_file, columns, filters, max_workers, row_groups)
+        self._logger.info('Fetched %s of %s bytes with %s requests.',
+                          ranged_file.bytes_fetched, ranged_file.size, ranged_file.requests)
+        data_frame = table.to_pandas()
+
+        return data_frame
@@ -0,0 +1,309 @@
+""" Seekable file object reading S3 objects with ranged GET requests """
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
+import threading
+
+import pyarrow.parquet as pq
+
+from app.common.tracing import trace_span
+
+# Bytes of the object end fetched at once, covering the parquet footer of most files
+TAIL_BYTES = 64 * 1024
+# Ranges closer than this are fetched by one request
+COALESCE_GAP = 1024 * 1024
+# Bytes of fetched blocks kept in the cache of a file, least recently used blocks are dropped
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class S3RangedFile(io.RawIOBase):
+    """
+    Read only file object of an S3 object. Only the requested byte ranges are
+    fetched and kept in a cache, ranges can be prefetched in parallel. The
+    cache is limited to max_cache_bytes, blocks dropped from it are fetched
+    again when they are read.
+    """
+    def __init__(self, s3_client, bucket: str, key: str, tail_bytes: int=TAIL_BYTES,
+                 limiter=None, tracer=None, max_cache_bytes: int=MAX_CACHE_BYTES) -> None:
+        """
+        Constructor for S3RangedFile. The end of the object is fetched right away.
+
+        Args:
+            s3_client: boto3 S3 client
+            bucket (str): name of the S3 bucket
+            key (str): key of the object
+            tail_bytes (int, optional): bytes of the object end that are fetched at once
+            limiter (AIMDLimiter, optional): limit of the concurrent requests
+            tracer (Tracer, optional): tracer recording a span per read of a body
+            max_cache_bytes (int, optional): bytes of fetched blocks kept in the cache.
+                                             Defaults to MAX_CACHE_BYTES.
+        """
+        super().__init__()
+        self._logger = logging.getLogger(__name__)
+        self._client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.limiter = limiter
+        self.tracer = tracer
+        self.max_cache_bytes = max_cache_bytes
+        self.bytes_fetched = 0
+        self.requests = 0
+        # data by start of the cached blocks, least recently used first
+        self._blocks = OrderedDict()
+        self._starts = []
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._pos = 0
+        content_range, data = self._get(f'bytes=-{tail_bytes}')
+        self.size = int(content_range.split('/')[-1])
+        self._add(self.size - len(data), data)
+
+    def _get(self, byte_range: str):
+        """
+        Sends one ranged GET request and reads the body
+
+        Returns:
+            content_range (str), data (bytes): content range header and data
+        """
+        if self.limiter is None:
+            return self._get_range(byte_range)
+        with self.limiter.slot('range'):
+            return self._get_range(byte_range)
+
+    def _get_range(self, byte_range: str):
+        """
+        Sends one ranged GET request without limit
+        """
+        response = self._client.get_object(Bucket=self.bucket, Key=self.key, Range=byte_range)
+        # the span of the request ends with the response headers
+        with trace_span(self.tracer, 's3.GetObject.body', self.key) as span:
+            data = response['Body'].read()
+            span['bytes'] = len(data)
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(data)
+        return response['ContentRange'], data
+
+    def _fetch(self, start: int, end: int):
+        """
+        Fetches the bytes from start till end (exclusive)
+        """
+        return start, self._get(f'bytes={start}-{end - 1}')[1]
+
+    def _add(self, start: int, data: bytes):
+        """
+        Adds a fetched block to the cache and drops the least recently
+        used blocks above max_cache_bytes
+        """
+        with self._lock:
+            if start in self._blocks:
+                self._cached_bytes -= len(self._blocks[start])
+            else:
+                insort(self._starts, start)
+            self._blocks[start] = data
+            self._blocks.move_to_end(start)
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self.max_cache_bytes and len(self._blocks) > 1:
+                old_start, old_data = self._blocks.popitem(last=False)
+                del self._starts[bisect_right(self._starts, old_start) - 1]
+                self._cached_bytes -= len(old_data)
+
+    def _cached(self, start: int, end: int):
+        """
+        Returns the bytes from start till end (exclusive) if the cached block
+        starting last before start contains them
+        """
+        with self._lock:
+            ind = bisect_right(self._starts, start) - 1
+            if ind < 0:
+                return None
+            block_start = self._starts[ind]
+            data = self._blocks[block_start]
+            if end > block_start + len(data):
+                return None
+            self._blocks.move_to_end(block_start)
+            return data[start - block_start:end - block_start]
+
+    def prefetch(self, ranges: list, max_workers: int=8):
+        """
+        Fetches byte ranges in parallel. Ranges that are close to each
+        other are coalesced into one request.
+
+        Args:
+            ranges (list): tuples of start and end (exclusive) of the byte ranges
+            max_workers (int, optional): number of parallel requests. Defaults to 8.
+        """
+        merged = []
+        for start, end in sorted(ranges):
+            if self._cached(start, end) is not None:
+                continue
+            if merged and start - merged[-1][1] <= COALESCE_GAP:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        if not merged:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start, data in executor.map(lambda rng: self._fetch(*rng), merged):
+                self._add(start, data)
+        self._logger.info('Fetched %s ranges of %s/%s.', len(merged), self.bucket, self.key)
+
+    def readable(self):
+        """
+        Returns True as the file can be read
+        """
+        return True
+
+    def seekable(self):
+        """
+        Returns True as the file supports seek
+        """
+        return True
+
+    def tell(self):
+        """
+        Returns the current position
+        """
+        return self._pos
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET):
+        """
+        Changes the current position
+        """
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = self.size + offset
+        return self._pos
+
+    def readinto(self, buffer):
+        """
+        Reads bytes from the cache or with a ranged GET into a buffer
+        """
+        end = min(self._pos + len(buffer), self.size)
+        if end <= self._pos:
+            return 0
+        data = self._cached(self._pos, end)
+        if data is None:
+            _, data = self._fetch(self._pos, end)
+            self._add(self._pos, data)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _statistics_match(statistics, operator: str, value):
+    """
+    Checks whether the min/max statistics of a column chunk may contain
+    rows matching a filter
+    """
+    if statistics is None or not statistics.has_min_max:
+        return True
+    low, high = statistics.min, statistics.max
+    if operator in ('=', '=='):
+        return low <= value <= high
+    if operator == '!=':
+        return not low == high == value
+    if operator == '<':
+        return low < value
+    if operator == '<=':
+        return low <= value
+    if operator == '>':
+        return high > value
+    if operator == '>=':
+        return high >= value
+    if operator == 'in':
+        return any(low <= val <= high for val in value)
+    if operator == 'not in':
+        return not (low == high and low in value)
+    return True
+
+
+def select_row_groups(metadata, filters: list=None):
+    """
+    Returns the row groups whose statistics match all filters
+
+    Args:
+        metadata (pq.FileMetaData): metadata of the parquet file
+        filters (list, optional): tuples of column, operator and value that are combined
+                                  with AND like the filters of pyarrow.parquet
+
+    Returns:
+        row_groups (list): indices of the matching row groups
+    """
+    names = metadata.schema.names
+    return [
+        ind
+        for ind in range(metadata.num_row_groups)
+        if all(
+            _statistics_match(
+                metadata.row_group(ind).column(names.index(column)).statistics,
+                operator, value)
+            for column, operator, value in filters or []
+        )
+    ]
+
+
+def column_chunk_ranges(metadata, row_groups: list, columns: list=None):
+    """
+    Returns the byte ranges of the column chunks of row groups
+
+    Args:
+        metadata (pq.FileMetaData): metadata of the parquet file
+        row_groups (list): indices of the row groups
+        columns (list, optional): names of the columns. Defaults to all columns.
+
+    Returns:
+        ranges (list): tuples of start and end (exclusive) of the byte ranges
+    """
+    ranges = []
+    for ind in row_groups:
+        row_group = metadata.row_group(ind)
+        for col in range(row_group.num_columns):
+            chunk = row_group.column(col)
+            if columns is not None and chunk.path_in_schema.split('.')[0] not in columns:
+                continue
+            start = chunk.data_page_offset
+            if chunk.has_dictionary_page and chunk.dictionary_page_offset:
+                start = min(start, chunk.dictionary_page_offset)
+            ranges.append((start, start + chunk.total_compressed_size))
+    return ranges
+
+
+def read_parquet_ranged(ranged_file: S3RangedFile, columns: list=None, filters: list=None,
+                        max_workers: int=8, row_groups: list=None):
+    """
+    Reads the requested columns of the row groups matching the filters
+    from a ranged file. The rows are filtered afterwards.
+
+    Args:
+        ranged_file (S3RangedFile): file object of the parquet file
+        columns (list, optional): names of the columns. Defaults to all columns.
+        filters (list, optional): tuples of column, operator and value combined with AND
+        max_workers (int, optional): number of parallel requests. Defaults to 8.
+        row_groups (list, optional): indices of the row groups that should be read.
+                                     Defaults to the row groups matching the filters.
+
+    Returns:
+        table (pa.Table): data of the parquet file
+    """
+    parquet_file = pq.ParquetFile(ranged_file)
+    metadata = parquet_file.metadata
+    if row_groups is None:
+        row_groups = select_row_groups(metadata, filters)
+    # the filter columns are needed to filter the rows
+    read_columns = columns
+    if columns is not None and filters:
+        read_columns = list(dict.fromkeys(
+            list(columns) + [column for column, _, _ in filters]))
+    ranged_file.prefetch(column_chunk_ranges(metadata, row_groups, read_columns), max_workers)
+    table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table
@@ -0,0 +1,459 @@
+""" Targets the reports are written to """
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+
+from app.common.bq import BigQueryConnector
+from app.common.constants import S3FileTypes
+from app.common.custom_exceptions import SinkException
+from app.common.report_index import INDEX_ROW_GROUP_SIZE, INDEX_SUFFIX, ReportIndex
+from app.common.storage import StorageConnector, COMPRESSION_SUFFIXES
+from app.common.tracing import Tracer
+
+
+class SinkResult(NamedTuple):
+    """Class for the outcome of writing a report to one sink
+
+    Args:
+        name (str): name of the sink
+        required (bool): whether the report has to be written to the sink
+        target (str): key or table the report was written to
+        prepare_seconds (float): seconds spent serializing the report
+        commit_seconds (float): seconds spent writing the report.
+                                None if the report was not written.
+        error (Exception): error of the sink, None if the sink succeeded
+    """
+    name: str
+    required: bool
+    target: str
+    prepare_seconds: float
+    commit_seconds: float = None
+    error: Exception = None
+
+
+class Sink(ABC):
+    """
+    Base class of the targets of the reports. A report is written in two
+    steps: prepare serializes it without making it visible and commit writes
+    it, so that nothing is written while a required sink cannot prepare it.
+    Reports committed before a required sink failed to commit are rolled back.
+    Sinks appending to their target, e.g. a table, set appends, as writing a
+    report twice duplicates its rows there.
+    """
+    appends = False
+
+    def __init__(self, name: str, required: bool=True) -> None:
+        """
+        Constructor for Sink
+
+        Args:
+            name (str): name of the sink
+            required (bool, optional): whether the meta file may only be updated
+                                       after the sink succeeded. Defaults to True.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.name = name
+        self.required = required
+
+    @abstractmethod
+    def target(self, key_stem: str, dest_args):
+        """
+        Returns the key or table the report is written to
+
+        Args:
+            key_stem (str): key of the report without the file extension
+            dest_args (DestinationConfig): destination configuration of the report
+        """
+
+    @abstractmethod
+    def prepare(self, data, target: str, dest_args):
+        """
+        Serializes the report
+
+        Args:
+            data (pd.DataFrame or pa.Table): report that should be written
+            target (str): key or table the report is written to
+            dest_args (DestinationConfig): destination configuration of the report
+
+        Returns:
+            payload: serialized report passed to commit
+        """
+
+    @abstractmethod
+    def commit(self, payload, target: str):
+        """
+        Writes a report serialized by prepare
+
+        Args:
+            payload: serialized report
+            target (str): key or table the report is written to
+        """
+
+    def rollback(self, payload, target: str):
+        """
+        Removes a committed report, nothing is removed by default
+
+        Args:
+            payload: serialized report
+            target (str): key or table the report was written to
+        """
+
+
+class StorageSink(Sink):
+    """
+    Writes the reports as files to a storage, e.g. parquet or csv files
+    to a S3 bucket or a local directory
+    """
+    def __init__(self, name: str, storage: StorageConnector, file_format: str=None,
+                 compression: str=None, required: bool=True) -> None:
+        """
+        Constructor for StorageSink
+
+        Args:
+            name (str): name of the sink
+            storage (StorageConnector): storage the files are written to
+            file_format (str, optional): file format (csv|parquet|feather).
+                                         Defaults to dest_format of the report.
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to dest_compression of the report.
+            required (bool, optional): whether the sink is required. Defaults to True.
+        """
+        super().__init__(name, required)
+        self.storage = storage
+        self.file_format = file_format
+        self.compression = compression
+
+    def _format_of(self, dest_args):
+        """
+        Returns the file format and compression codec of the files of a report
+        """
+        return (self.file_format or dest_args.dest_format,
+                self.compression or dest_args.dest_compression)
+
+    def target(self, key_stem: str, dest_args):
+        """
+        Returns the key of the file with the extension of the file format
+        and the suffix of the compression codec for csv files
+
+        Args:
+            key_stem (str): key of the report without the file extension
+            dest_args (DestinationConfig): destination configuration of the report
+        """
+        file_format, compression = self._format_of(dest_args)
+        key = f'{key_stem}.{file_format}'
+        if compression and file_format == S3FileTypes.CSV.value:
+            key += COMPRESSION_SUFFIXES[compression]
+        return key
+
+    def prepare(self, data, target: str, dest_args):
+        """
+        Serializes the report in the file format of the sink
+
+        Args:
+            data (pd.DataFrame or pa.Table): report that should be written
+            target (str): key of the file
+            dest_args (DestinationConfig): destination configuration of the report
+
+        Returns:
+            data (bytes): content of the file, None if the report is empty
+        """
+        file_format, compression = self._format_of(dest_args)
+        return self.storage.serialize(data, target, file_format, compression)
+
+    def commit(self, payload: bytes, target: str):
+        """
+        Writes the file unless the report is empty
+
+        Args:
+            payload (bytes): content of the file
+            target (str): key of the file
+        """
+        if payload is None:
+            return None
+        return self.storage.write_bytes(payload, target)
+
+    def rollback(self, payload: bytes, target: str):
+        """
+        Deletes the file unless the report was empty
+
+        Args:
+            payload (bytes): content of the file
+            target (str): key of the file
+        """
+        if payload is None:
+            return None
+        return self.storage.delete_objects([target])
+
+
+class IndexedStorageSink(StorageSink):
+    """
+    Writes the reports as parquet files sorted by ISIN and date with a
+    sidecar index next to every file, so that ReportReader reads only the
+    row groups of one ISIN. The index is written after the report, a
+    report is found by the reader once its index exists.
+    """
+    def __init__(self, name: str, storage: StorageConnector, compression: str=None,
+                 row_group_size: int=INDEX_ROW_GROUP_SIZE, bloom: bool=True,
+                 required: bool=True, isin_column: str=None, date_column: str=None) -> None:
+        """
+        Constructor for IndexedStorageSink
+
+        Args:
+            name (str): name of the sink
+            storage (StorageConnector): storage the files are written to
+            compression (str, optional): compression codec of the parquet pages.
+                                         Defaults to dest_compression of the report.
+            row_group_size (int, optional): rows of a row group, the least number
+                                            of rows read by a lookup
+            bloom (bool, optional): whether the index has a bloom filter of the ISINs.
+                                    Defaults to True.
+            required (bool, optional): whether the sink is required. Defaults to True.
+            isin_column (str, optional): ISIN column of the reports. The reports keep
+                                         the column names of the source.
+                                         Defaults to dest_col_isin of the report.
+            date_column (str, optional): date column of the reports.
+                                         Defaults to dest_col_date of the report.
+        """
+        super().__init__(name, storage, S3FileTypes.PARQUET.value, compression, required)
+        self.row_group_size = row_group_size
+        self.bloom = bloom
+        self.isin_column = isin_column
+        self.date_column = date_column
+
+    def prepare(self, data, target: str, dest_args):
+        """
+        Sorts the report by ISIN and date, serializes it and creates its index
+
+        Args:
+            data (pd.DataFrame or pa.Table): report that should be written
+            target (str): key of the file
+            dest_args (DestinationConfig): destination configuration of the report
+
+        Returns:
+            payload (tuple): content of the file and ReportIndex, None if the report is empty
+        """
+        table = data
+        if isinstance(data, pd.DataFrame):
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        if table.num_rows == 0:
+            return None
+        isin_column = self.isin_column or dest_args.dest_col_isin
+        date_column = self.date_column or dest_args.dest_col_date
+        table = table.sort_by([(isin_column, 'ascending'), (date_column, 'ascending')])
+        _, compression = self._format_of(dest_args)
+        content = self.storage.serialize(table, target, S3FileTypes.PARQUET.value, compression,
+                                         self.row_group_size)
+        return content, ReportIndex.from_parquet(target, table, content, isin_column,
+                                                 date_column, self.bloom)
+
+    def commit(self, payload: tuple, target: str):
+        """
+        Writes the file and then its index unless the report is empty
+
+        Args:
+            payload (tuple): content of the file and ReportIndex
+            target (str): key of the file
+        """
+        if payload is None:
+            return None
+        content, index = payload
+        self.storage.write_bytes(content, target)
+        return self.storage.write_text(index.to_json(), f'{target}{INDEX_SUFFIX}')
+
+    def rollback(self, payload: tuple, target: str):
+        """
+        Deletes the index and the file unless the report was empty
+
+        Args:
+            payload (tuple): content of the file and ReportIndex
+            target (str): key of the file
+        """
+        if payload is None:
+            return None
+        return self.storage.delete_objects([f'{target}{INDEX_SUFFIX}', target])
+
+
+class BigQuerySink(Sink):
+    """
+    Appends the reports to BigQuery tables, every report to the table
+    of its dest_table or to the table of the sink
+    """
+    appends = True
+
+    def __init__(self, name: str, project_id: str, dataset_name: str, table_name: str,
+                 required: bool=True, tracer: Tracer=None) -> None:
+        """
+        Constructor for BigQuerySink
+
+        Args:
+            name (str): name of the sink
+            project_id (str): id of the Google Cloud project
+            dataset_name (str): name of the dataset
+            table_name (str): name of the table of the reports without dest_table
+            required (bool, optional): whether the sink is required. Defaults to True.
+            tracer (Tracer, optional): tracer recording a span per load
+        """
+        super().__init__(name, required)
+        self.connector = BigQueryConnector(project_id=project_id, dataset_name=dataset_name,
+                                           table_name=table_name, tracer=tracer)
+
+    def target(self, key_stem: str, dest_args):
+        """
+        Returns the id of the table of the report
+        """
+        if dest_args.dest_table:
+            return f'{self.connector.dataset_name}.{dest_args.dest_table}'
+        return self.connector.table_id
+
+    def prepare(self, data, target: str, dest_args):
+        """
+        Returns the report unchanged, the load job of BigQuery serializes it
+        """
+        return data
+
+    def commit(self, payload, target: str):
+        """
+        Appends the report to the table
+
+        Args:
+            payload (pd.DataFrame or pa.Table): report that should be written
+            target (str): id of the table
+        """
+        return self.connector.to_bq(payload, target)
+
+
+class SinkWriter():
+    """
+    Writes a report to several sinks concurrently. All sinks prepare the
+    report first and the reports are only committed if every required sink
+    prepared it. Failures of optional sinks are logged, failures of required
+    sinks raise SinkException, so that the meta file is not updated. If a
+    required sink fails to commit, the reports committed on the other sinks
+    are rolled back, appended rows cannot be removed.
+    """
+    def __init__(self, sinks: list) -> None:
+        """
+        Constructor for SinkWriter
+
+        Args:
+            sinks (list): Sink instances the reports are written to
+        """
+        self._logger = logging.getLogger(__name__)
+        self.sinks = sinks
+
+    def check_targets(self, dest_args_list: list):
+        """
+        Checks that no appending sink writes several reports to one target,
+        as reports with different columns can not share a table
+
+        Args:
+            dest_args_list (list): destination configurations of the reports
+        """
+        for sink in self.sinks:
+            if not sink.appends:
+                continue
+            targets = [sink.target('', dest_args) for dest_args in dest_args_list]
+            if len(set(targets)) < len(targets):
+                self._logger.info('Sink %s writes several reports to one target!', sink.name)
+                raise SinkException(
+                    f'Sink {sink.name} writes several reports to one target, '
+                    'set dest_table of the reports.')
+
+    def _map(self, func, items: list):
+        """
+        Applies a function to all items, concurrently if there are several
+        """
+        if len(items) == 1:
+            return [func(items[0])]
+        with ThreadPoolExecutor(max_workers=len(items)) as executor:
+            return list(executor.map(func, items))
+
+    @staticmethod
+    def _timed(func, *args):
+        """
+        Calls a function and returns its result, the seconds it took and its error
+        """
+        start = time.perf_counter()
+        try:
+            return func(*args), time.perf_counter() - start, None
+        except Exception as error:
+            return None, time.perf_counter() - start, error
+
+    def write(self, data, key_stem: str, dest_args, appends: bool=None):
+        """
+        Prepares and commits a report on all sinks
+
+        Args:
+            data (pd.DataFrame or pa.Table): report that should be written
+            key_stem (str): key of the report without the file extension
+            dest_args (DestinationConfig): destination configuration of the report
+            appends (bool, optional): True writes only to the sinks appending to their
+                                      target, False only to the other sinks.
+                                      Defaults to None (all sinks).
+
+        Returns:
+            results (list): SinkResult of every written sink in the order of the sinks
+        """
+        sinks = [sink for sink in self.sinks if appends is None or sink.appends == appends]
+        if not sinks:
+            return []
+        targets = [sink.target(key_stem, dest_args) for sink in sinks]
+        # Preparing the report on all sinks
+        prepared = self._map(
+            lambda ind: self._timed(sinks[ind].prepare, data, targets[ind], dest_args),
+            list(range(len(sinks))))
+        results = [
+            SinkResult(sink.name, sink.required, target, seconds, error=error)
+            for sink, target, (_, seconds, error) in zip(sinks, targets, prepared)
+        ]
+        self._raise_required(results, 'prepare')
+        # Committing the report on the prepared sinks
+        to_commit = [ind for ind, result in enumerate(results) if result.error is None]
+        committed = self._map(
+            lambda ind: self._timed(sinks[ind].commit, prepared[ind][0], targets[ind]),
+            to_commit)
+        for ind, (_, seconds, error) in zip(to_commit, committed):
+            results[ind] = results[ind]._replace(commit_seconds=seconds, error=error)
+        for result in results:
+            self._logger.debug('Sink %s: prepared in %.3f s, committed in %s s.',
+                               result.name, result.prepare_seconds,
+                               'n/a' if result.commit_seconds is None
+                               else f'{result.commit_seconds:.3f}')
+            if result.error is not None and not result.required:
+                self._logger.warning('Optional sink %s failed: %r', result.name, result.error)
+        if any(result.error is not None and result.required for result in results):
+            self._rollback(sinks, prepared, results, to_commit)
+        self._raise_required(results, 'commit')
+
+        return results
+
+    def _rollback(self, sinks: list, prepared: list, results: list, to_commit: list):
+        """
+        Rolls back the report on all sinks it was committed to, also on the
+        failed sinks that may have written parts of it
+        """
+        rolled_back = self._map(
+            lambda ind: self._timed(sinks[ind].rollback, prepared[ind][0], results[ind].target),
+            to_commit)
+        for ind, (_, _, error) in zip(to_commit, rolled_back):
+            if error is not None:
+                self._logger.warning('Sink %s failed to roll back %s: %r',
+                                     sinks[ind].name, results[ind].target, error)
+
+    def _raise_required(self, results: list, step: str):
+        """
+        Raises SinkException if a required sink failed
+        """
+        failed = [result for result in results if result.error is not None and result.required]
+        if failed:
+            for result in failed:
+                self._logger.error('Required sink %s failed to %s the report: %r',
+                                   result.name, step, result.error)
+            raise SinkException(
+                f'{len(failed)} required sink(s) failed: '
+                f'{", ".join(result.name for result in failed)}') from failed[0].error
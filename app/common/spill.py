@@ -0,0 +1,78 @@
+""" Local spill storage for data that does not fit into the memory budget """
+import logging
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+
+class SpillStore():
+    """
+    Class for spilling DataFrame partitions to local parquet files
+    and reading them back one partition key at a time
+    """
+    def __init__(self, spill_dir: str=None) -> None:
+        """
+        Constructor for SpillStore
+
+        Args:
+            spill_dir (str, optional): directory for the spill files.
+                                       Defaults to the temporary directory of the system.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.path = tempfile.mkdtemp(prefix='report_spill_', dir=spill_dir)
+        self._partitions = {}
+
+    def spill(self, partition: str, data: pd.DataFrame):
+        """
+        Writes a DataFrame as a new file of a partition
+
+        Args:
+            partition (str): partition key, e.g. the date
+            data (pd.DataFrame): data that should be spilled
+        """
+        files = self._partitions.setdefault(partition, [])
+        file_name = os.path.join(self.path, f'{partition}_{len(files)}.parquet')
+        data.to_parquet(file_name, index=False)
+        files.append(file_name)
+        self._logger.info('Spilled %s rows of %s to %s.', len(data), partition, file_name)
+
+        return file_name
+
+    def partitions(self):
+        """
+        Returns the spilled partition keys in sorted order
+        """
+        return sorted(self._partitions)
+
+    def read(self, partition: str):
+        """
+        Reads all files of a partition
+
+        Args:
+            partition (str): partition key
+
+        Returns:
+            data (pd.DataFrame): concatenated data of the partition
+        """
+        return pd.concat(self.read_frames(partition), ignore_index=True)
+
+    def read_frames(self, partition: str):
+        """
+        Reads the files of a partition without concatenating them
+
+        Args:
+            partition (str): partition key
+
+        Returns:
+            frames (list): data of the files in the order they were spilled
+        """
+        return [pd.read_parquet(file_name) for file_name in self._partitions[partition]]
+
+    def cleanup(self):
+        """
+        Removes all spill files
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._partitions = {}
@@ -0,0 +1,401 @@
+""" Common interface of the storages holding source and report files """
+from abc import ABC, abstractmethod
+from io import BytesIO, StringIO
+import logging
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from app.common.constants import S3FileTypes, CompressionTypes
+from app.common.custom_exceptions import WrongFormatException
+
+# Key suffixes of compressed files by compression codec
+COMPRESSION_SUFFIXES = {
+    CompressionTypes.GZIP.value: '.gz',
+    CompressionTypes.ZSTD.value: '.zst',
+    CompressionTypes.LZ4.value: '.lz4'
+}
+# Compression codecs of the buffers of Arrow IPC (feather) files
+FEATHER_COMPRESSIONS = (CompressionTypes.LZ4.value, CompressionTypes.ZSTD.value)
+
+
+class StorageConnector(ABC):
+    """
+    Base class of the storages of source, report and meta files. Files are
+    addressed by keys with / separated parts like the keys of S3 objects.
+    The serialization of written files is shared, the storages implement
+    listing, reading and writing the bytes of a file.
+    """
+    # exception raised when a key does not exist
+    not_found_error = FileNotFoundError
+
+    def __init__(self) -> None:
+        """
+        Constructor for StorageConnector
+        """
+        self._logger = logging.getLogger(__name__)
+
+    @abstractmethod
+    def _put_object(self, out_buffer: StringIO or BytesIO, key: str):
+        """
+        Helper function for writing a file
+
+        Args:
+            out_buffer (StringIO or BytesIO): Buffer that should be written
+            key (str): name of the file
+        """
+
+    @abstractmethod
+    def list_files_by_prefix(self, prefix: str) -> list:
+        """
+        Lists all files with a prefix
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            file_list: list of all file names containing the prefix in the key
+        """
+
+    @abstractmethod
+    def list_etags_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with a tag changing with their content
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            etags: tags by file name of all files containing the prefix in the key
+        """
+
+    @abstractmethod
+    def list_sizes_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with their sizes
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            sizes: sizes in bytes by file name of all files containing the prefix in the key
+        """
+
+    def list_objects_by_prefix(self, prefix: str) -> dict:
+        """
+        Lists all files with a prefix together with their sizes and tags
+
+        Args:
+            prefix (str): prefix of the keys that should be filtered with
+
+        Returns:
+            objects: (size, tag) by file name of all files containing the prefix in the key
+        """
+        sizes = self.list_sizes_by_prefix(prefix)
+        etags = self.list_etags_by_prefix(prefix)
+        return {key: (size, etags.get(key)) for key, size in sizes.items()}
+
+    @abstractmethod
+    def list_files_after(self, start_after: str, prefix: str="") -> list:
+        """
+        Lists the files whose keys sort after a key
+
+        Args:
+            start_after (str): key after which the listing starts
+            prefix (str, optional): prefix of the keys that should be filtered with
+
+        Returns:
+            file_list: list of all file names after start_after in key order
+        """
+
+    @abstractmethod
+    def read_csv(self, key: str, encoding: str="utf-8", sep: str=",", compression: str=None):
+        """
+        Reads a csv file and returns a dataframe
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+            sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
+
+        Returns:
+            [pandas.DataFrame]: Pandas DataFrame that contains the data of the csv file
+        """
+
+    @abstractmethod
+    def read_csv_arrow(self, key: str, column_types: dict=None, sep: str=",",
+                       compression: str=None):
+        """
+        Reads a csv file and returns an Arrow table
+
+        Args:
+            key (str): key of the file that should be read
+            column_types (dict, optional): Arrow data types of columns by column name.
+                                           Types of other columns are inferred.
+            sep (str, optional): seperator of the csv. Defaults to ",".
+            compression (str, optional): compression codec (gzip|zstd).
+                                         Defaults to the codec of the key suffix.
+
+        Returns:
+            [pyarrow.Table]: Arrow table that contains the data of the csv file
+        """
+
+    @abstractmethod
+    def read_text(self, key: str, encoding: str="utf-8"):
+        """
+        Reads a text file
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str): content of the file
+        """
+
+    @abstractmethod
+    def read_text_tagged(self, key: str, encoding: str="utf-8"):
+        """
+        Reads a text file together with the tag of its content, which
+        write_text_if compares to detect concurrent writes
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the file. Defaults to "utf-8".
+
+        Returns:
+            text (str), tag (str): content and tag of the file
+        """
+
+    @abstractmethod
+    def write_text_if(self, text: str, key: str, tag: str=None):
+        """
+        Writes a text file only if it was not changed since it was read,
+        as one atomic operation of the storage
+
+        Args:
+            text (str): content of the file
+            key (str): target name of the file
+            tag (str, optional): tag returned by read_text_tagged. None writes
+                                 the file only if it does not exist.
+
+        Returns:
+            True if the file was written, False if it was changed or created meanwhile
+        """
+
+    @abstractmethod
+    def read_bytes(self, key: str):
+        """
+        Reads a binary file
+
+        Args:
+            key (str): key of the file that should be read
+
+        Returns:
+            data (bytes): content of the file
+        """
+
+    @abstractmethod
+    def read_parquet(self, key: str, columns: list=None, filters: list=None,
+                     max_workers: int=8, row_groups: list=None):
+        """
+        Reads a parquet file and returns a dataframe. Only the requested columns
+        of the row groups whose statistics match the filters are read.
+
+        Args:
+            key (str): key of the file that should be read
+            columns (list, optional): columns that should be read. Defaults to all columns.
+            filters (list, optional): tuples of column, operator and value combined with
+                                      AND, e.g. [('Date', '>=', '2022-01-31')]
+            max_workers (int, optional): number of parallel reads. Defaults to 8.
+            row_groups (list, optional): indices of the row groups that should be read,
+                                         e.g. from an index. Defaults to the row groups
+                                         matching the filters.
+
+        Returns:
+            [pandas.DataFrame]: Pandas DataFrame that contains the data of the parquet file
+        """
+
+    @abstractmethod
+    def delete_objects(self, keys: list):
+        """
+        Deletes files
+
+        Args:
+            keys (list): keys of the files that should be deleted
+        """
+
+    def write_text(self, text: str, key: str):
+        """
+        Writes a text file
+
+        Args:
+            text (str): content of the file
+            key (str): target name of the file
+        """
+        return self._put_object(StringIO(text), key)
+
+    def write_bytes(self, data: bytes, key: str):
+        """
+        Writes a binary file
+
+        Args:
+            data (bytes): content of the file
+            key (str): target name of the file
+        """
+        return self._put_object(BytesIO(data), key)
+
+    @staticmethod
+    def _compress(write, compression: str):
+        """
+        Helper function for streaming data through a compression codec
+
+        Args:
+            write (callable): function writing the data to a binary stream
+            compression (str): compression codec
+
+        Returns:
+            data (bytes): compressed data
+        """
+        sink = pa.BufferOutputStream()
+        with pa.CompressedOutputStream(sink, compression) as stream:
+            write(stream)
+        return sink.getvalue().to_pybytes()
+
+    def compression_of_key(self, key: str, compression: str=None):
+        """
+        Returns the compression codec of a file. A given codec is checked,
+        otherwise the codec is detected from the suffix of the key.
+
+        Args:
+            key (str): key of the file
+            compression (str, optional): compression codec (gzip|zstd|lz4)
+
+        Returns:
+            compression (str): compression codec or None if the file is not compressed
+        """
+        if compression is not None:
+            if compression not in COMPRESSION_SUFFIXES:
+                self._logger.info("The compression %s is not supported!", compression)
+                raise WrongFormatException
+            return compression
+        for codec, suffix in COMPRESSION_SUFFIXES.items():
+            if key.endswith(suffix):
+                return codec
+        return None
+
+    def to_s3(self, data: pd.DataFrame or pa.Table, key: str, file_format: str,
+              compression: str=None):
+        """
+        Writes pandas.DataFrame or pyarrow.Table to the storage
+        in given(csv|parquet|feather) format
+
+        Args:
+            data (pd.DataFrame or pa.Table): pandas DataFrame or Arrow table
+                                             that needs to be written
+            key (str): target name of the file
+            file_format (str): target file format (csv|parquet|feather)
+            compression (str, optional): compression codec (gzip|zstd|lz4). csv files are
+                                         compressed while they are written and default
+                                         to the codec of the key suffix. parquet files
+                                         use the codec for their pages, feather files
+                                         (lz4|zstd) for their buffers and are written
+                                         uncompressed by default, so that they can be
+                                         memory mapped without copies.
+        """
+        data = self.serialize(data, key, file_format, compression)
+        if data is None:
+            return None
+        return self.write_bytes(data, key)
+
+    def serialize(self, data: pd.DataFrame or pa.Table, key: str, file_format: str,
+                  compression: str=None, row_group_size: int=None):
+        """
+        Serializes pandas.DataFrame or pyarrow.Table in given(csv|parquet|feather) format
+        without writing it, so that the file can be written later
+
+        Args:
+            data (pd.DataFrame or pa.Table): pandas DataFrame or Arrow table
+                                             that needs to be serialized
+            key (str): target name of the file
+            file_format (str): target file format (csv|parquet|feather)
+            compression (str, optional): compression codec (gzip|zstd|lz4)
+            row_group_size (int, optional): maximum rows of a parquet row group.
+                                            Defaults to the pyarrow default.
+
+        Returns:
+            data (bytes): content of the file or None if the data is empty
+        """
+        if isinstance(data, pa.Table):
+            return self._serialize_arrow(data, key, file_format, compression, row_group_size)
+        if data.empty:
+            self._logger.info('The DataFrame is empty! No file will be written.')
+            return None
+        if file_format == S3FileTypes.CSV.value:
+            compression = self.compression_of_key(key, compression)
+            if compression is not None:
+                return self._compress(
+                    lambda stream: data.to_csv(stream, index=False, encoding='utf-8'),
+                    compression)
+            return data.to_csv(index=False).encode('utf-8')
+        if file_format == S3FileTypes.PARQUET.value:
+            out_buffer = BytesIO()
+            data.to_parquet(out_buffer, index=False,
+                            compression=self.compression_of_key('', compression) or 'snappy',
+                            row_group_size=row_group_size)
+            return out_buffer.getvalue()
+        if file_format == S3FileTypes.FEATHER.value:
+            return self._serialize_arrow(pa.Table.from_pandas(data, preserve_index=False),
+                                         key, file_format, compression)
+        self._logger.info("The file format %s is not "
+                          "supported to be written!", file_format)
+        raise WrongFormatException
+
+    def _serialize_arrow(self, table: pa.Table, key: str, file_format: str,
+                         compression: str=None, row_group_size: int=None):
+        """
+        Serializes pyarrow.Table in given(csv|parquet|feather) format
+        without converting it to pandas
+
+        Args:
+            table (pa.Table): Arrow table that needs to be serialized
+            key (str): target name of the file
+            file_format (str): target file format (csv|parquet|feather)
+            compression (str, optional): compression codec (gzip|zstd|lz4)
+            row_group_size (int, optional): maximum rows of a parquet row group
+
+        Returns:
+            data (bytes): content of the file or None if the table is empty
+        """
+        if table.num_rows == 0:
+            self._logger.info('The DataFrame is empty! No file will be written.')
+            return None
+        out_buffer = BytesIO()
+        if file_format == S3FileTypes.CSV.value:
+            compression = self.compression_of_key(key, compression)
+            if compression is not None:
+                return self._compress(
+                    lambda stream: pa_csv.write_csv(table, stream), compression)
+            pa_csv.write_csv(table, out_buffer)
+            return out_buffer.getvalue()
+        if file_format == S3FileTypes.PARQUET.value:
+            pq.write_table(table, out_buffer,
+                           compression=self.compression_of_key('', compression) or 'snappy',
+                           row_group_size=row_group_size)
+            return out_buffer.getvalue()
+        if file_format == S3FileTypes.FEATHER.value:
+            compression = self.compression_of_key('', compression)
+            if compression is not None and compression not in FEATHER_COMPRESSIONS:
+                self._logger.info("The compression %s is not supported for feather files!",
+                                  compression)
+                raise WrongFormatException
+            feather.write_feather(table, out_buffer, compression=compression or 'uncompressed')
+            return out_buffer.getvalue()
+        self._logger.info("The file format %s is not "
+                          "supported to be written!", file_format)
+        raise WrongFormatException
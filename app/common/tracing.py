@@ -0,0 +1,323 @@
+""" Spans of the remote calls with latency histograms """
+from contextlib import contextmanager, nullcontext
+import json
+import logging
+import math
+import threading
+import time
+
+# Upper bound of the first latency bucket in seconds
+HISTOGRAM_MIN_LATENCY = 0.0001
+# Ratio of the bounds of two neighbouring buckets, the error of the percentiles
+HISTOGRAM_GROWTH = 1.1
+# Percentiles of the latency reports
+PERCENTILES = (50, 95, 99)
+
+
+def _body_size(body):
+    """
+    Returns the bytes of the body of a request, bytes or a seekable file
+    """
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if hasattr(body, 'seek') and hasattr(body, 'tell'):
+        pos = body.tell()
+        size = body.seek(0, 2)
+        body.seek(pos)
+        return size - pos
+    return 0
+
+
+class LatencyHistogram():
+    """
+    Counts latencies in buckets with exponentially growing bounds, so that
+    any number of calls is summarized in a few hundred counters and the
+    percentiles are off by at most the growth of the buckets.
+    """
+    def __init__(self) -> None:
+        """
+        Constructor for LatencyHistogram
+        """
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float):
+        """
+        Adds a latency
+
+        Args:
+            latency (float): seconds of a call
+        """
+        ind = 0
+        if latency > HISTOGRAM_MIN_LATENCY:
+            ind = math.ceil(math.log(latency / HISTOGRAM_MIN_LATENCY, HISTOGRAM_GROWTH))
+        self.counts[ind] = self.counts.get(ind, 0) + 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def merge(self, other):
+        """
+        Adds the latencies of another histogram
+
+        Args:
+            other (LatencyHistogram): histogram, e.g. of another process
+        """
+        for ind, count in other.counts.items():
+            self.counts[ind] = self.counts.get(ind, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float):
+        """
+        Returns the upper bound of the bucket holding a percentile
+
+        Args:
+            pct (float): percentile between 0 and 100
+
+        Returns:
+            latency (float): seconds, None without latencies
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for ind in sorted(self.counts):
+            seen += self.counts[ind]
+            if seen >= rank:
+                return min(HISTOGRAM_MIN_LATENCY * HISTOGRAM_GROWTH ** ind, self.max)
+        return self.max
+
+
+class JsonlSpanExporter():
+    """
+    Appends spans as JSON lines to a local file. Every line is written at
+    once, so that several processes can append to the same file.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Constructor for JsonlSpanExporter
+
+        Args:
+            path (str): path of the file
+        """
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: dict):
+        """
+        Writes a span
+
+        Args:
+            span (dict): operation, key, bytes, latency, retries and error of a call
+        """
+        line = json.dumps(span, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        """
+        Flushes and closes the file
+        """
+        with self._lock:
+            self._file.close()
+
+
+class Tracer():
+    """
+    Records a span per remote call and the latency histograms of the
+    operations. S3 clients are traced through the events of botocore,
+    so every request including ranged GETs and the pages of listings
+    gets its own span with the retries botocore made.
+    """
+    def __init__(self, exporter: JsonlSpanExporter=None) -> None:
+        """
+        Constructor for Tracer
+
+        Args:
+            exporter (JsonlSpanExporter, optional): exporter of the spans.
+                                                    Defaults to no export.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.exporter = exporter
+        self.histograms = {}
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, latency: float, key: str=None, size: int=0,
+               retries: int=0, error: str=None):
+        """
+        Records the span of a call
+
+        Args:
+            operation (str): name of the operation, e.g. s3.GetObject
+            latency (float): seconds of the call
+            key (str, optional): key, prefix or table of the call
+            size (int, optional): bytes sent and received
+            retries (int, optional): number of retries of the call
+            error (str, optional): error of the call
+        """
+        span = {
+            'start': time.time() - latency,
+            'operation': operation,
+            'key': key,
+            'bytes': size,
+            'latency': latency,
+            'retries': retries,
+            'error': error,
+            'thread': threading.current_thread().name
+        }
+        with self._lock:
+            self.histograms.setdefault(operation, LatencyHistogram()).add(latency)
+            totals = self.totals.setdefault(
+                operation, {'bytes': 0, 'retries': 0, 'errors': 0})
+            totals['bytes'] += size
+            totals['retries'] += retries
+            totals['errors'] += error is not None
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def merge(self, histograms: dict, totals: dict):
+        """
+        Adds the latency histograms and totals of another tracer,
+        e.g. of a tracer in a worker process
+
+        Args:
+            histograms (dict): LatencyHistogram by operation
+            totals (dict): bytes, retries and errors by operation
+        """
+        with self._lock:
+            for operation, histogram in histograms.items():
+                self.histograms.setdefault(operation, LatencyHistogram()).merge(histogram)
+                own = self.totals.setdefault(
+                    operation, {'bytes': 0, 'retries': 0, 'errors': 0})
+                for name, value in totals[operation].items():
+                    own[name] += value
+
+    @contextmanager
+    def span(self, operation: str, key: str=None):
+        """
+        Context manager recording the span of a call. The yielded dict
+        takes the bytes and retries of the call.
+
+        Args:
+            operation (str): name of the operation
+            key (str, optional): key, prefix or table of the call
+        """
+        span = {'bytes': 0, 'retries': 0}
+        error = None
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as exc:
+            error = repr(exc)
+            raise
+        finally:
+            self.record(operation, time.perf_counter() - start, key,
+                        span['bytes'], span['retries'], error)
+
+    def instrument(self, client):
+        """
+        Records a span for every call of a botocore client
+
+        Args:
+            client: botocore client, e.g. of a boto3 resource
+        """
+        events = client.meta.events
+        events.register('before-parameter-build.s3', self._before_call)
+        events.register('after-call.s3', self._after_call)
+        events.register('after-call-error.s3', self._after_call_error)
+
+    @staticmethod
+    def _before_call(params: dict, context: dict, **_):
+        """
+        Keeps the start, the key and the sent bytes of a call in its context
+        """
+        context['trace'] = {
+            'start': time.perf_counter(),
+            'key': params.get('Key', params.get('Prefix')),
+            'bytes': _body_size(params.get('Body'))
+        }
+
+    def _after_call(self, http_response, parsed: dict, model, context: dict, **_):
+        """
+        Records the span of a finished call
+        """
+        trace = context.get('trace')
+        if trace is None:
+            return
+        error = None
+        if http_response.status_code >= 300:
+            error = parsed.get('Error', {}).get('Code', str(http_response.status_code))
+        size = trace['bytes'] + int(http_response.headers.get('content-length') or 0)
+        self.record(f's3.{model.name}', time.perf_counter() - trace['start'], trace['key'],
+                    size, parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0), error)
+
+    def _after_call_error(self, exception: Exception, context: dict, **_):
+        """
+        Records the span of a call failing without response
+        """
+        trace = context.get('trace')
+        if trace is None:
+            return
+        self.record('s3.error', time.perf_counter() - trace['start'], trace['key'],
+                    trace['bytes'], error=repr(exception))
+
+    def summary(self):
+        """
+        Returns the totals and latency percentiles by operation
+
+        Returns:
+            summary (dict): count, bytes, retries, errors, p50, p95, p99
+                            and max latency in seconds by operation
+        """
+        with self._lock:
+            return {
+                operation: {
+                    'count': histogram.count,
+                    **self.totals[operation],
+                    **{f'p{pct}': histogram.percentile(pct) for pct in PERCENTILES},
+                    'max': histogram.max
+                }
+                for operation, histogram in sorted(self.histograms.items())
+            }
+
+    def report(self):
+        """
+        Returns the latency percentiles by operation as text table
+        """
+        lines = [f'{"operation":<24}{"calls":>8}{"MB":>10}{"retries":>9}{"errors":>8}'
+                 f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+        for operation, stats in self.summary().items():
+            lines.append(
+                f'{operation:<24}{stats["count"]:>8}{stats["bytes"] / 2 ** 20:>10.1f}'
+                f'{stats["retries"]:>9}{stats["errors"]:>8}'
+                + ''.join(f'{stats[name] * 1000:>10.1f}' for name in ('p50', 'p95', 'p99', 'max'))
+            )
+        return '\n'.join(lines)
+
+    def close(self):
+        """
+        Closes the exporter
+        """
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+def trace_span(tracer: Tracer, operation: str, key: str=None):
+    """
+    Returns the span context manager of a tracer or a context
+    manager doing nothing if tracing is disabled
+
+    Args:
+        tracer (Tracer): tracer or None
+        operation (str): name of the operation
+        key (str, optional): key, prefix or table of the call
+    """
+    if tracer is None:
+        return nullcontext({'bytes': 0, 'retries': 0})
+    return tracer.span(operation, key)
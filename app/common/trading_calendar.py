@@ -0,0 +1,175 @@
+""" Trading calendars deciding which dates can have source data """
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from app.common.constants import MetaProcessFormat, TradingCalendars
+from app.common.custom_exceptions import WrongCalendarException
+
+# Days of the week with trading, Monday is 0
+TRADING_WEEKDAYS = (0, 1, 2, 3, 4)
+
+
+def easter_sunday(year: int):
+    """
+    Returns Easter Sunday of a year (anonymous Gregorian algorithm)
+
+    Args:
+        year (int): year
+    """
+    golden = year % 19
+    century, year_of_century = divmod(year, 100)
+    leap_century, century_rest = divmod(century, 4)
+    epact = (19 * golden + century - leap_century - (century - (century + 8) // 25 + 1) // 3
+             + 15) % 30
+    weekday = (32 + 2 * century_rest + 2 * (year_of_century // 4) - epact
+               - year_of_century % 4) % 7
+    offset = (golden + 11 * epact + 22 * weekday) // 451
+    month, day = divmod(epact + weekday - 7 * offset + 114, 31)
+    return date(year, month, day + 1)
+
+
+class TradingCalendar():
+    """
+    Calendar with trading on every day, the behaviour without calendar.
+    Calendars decide which dates are planned, listed and counted as
+    missing in the meta file.
+    """
+    def is_trading_day(self, day: date):
+        """
+        Checks if a date can have source data
+
+        Args:
+            day (date): date
+        """
+        return True
+
+    def trading_days(self, start: date, end: date):
+        """
+        Returns the trading days of a date range
+
+        Args:
+            start (date): first date of the range
+            end (date): last date of the range (inclusive)
+
+        Returns:
+            days (list): trading days as date objects
+        """
+        return [
+            start + timedelta(days=x)
+            for x in range(0, (end - start).days + 1)
+            if self.is_trading_day(start + timedelta(days=x))
+        ]
+
+    def previous_trading_day(self, day: date):
+        """
+        Returns the last trading day before a date
+
+        Args:
+            day (date): date
+        """
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def trading_dates(self, sdate: str, edate: str):
+        """
+        Returns the trading days of a date range as strings
+
+        Args:
+            sdate (str): first date of the range
+            edate (str): last date of the range (inclusive)
+
+        Returns:
+            date_list (list): trading days in META_DATE_FORMAT
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        return [
+            day.strftime(date_format)
+            for day in self.trading_days(datetime.strptime(sdate, date_format).date(),
+                                         datetime.strptime(edate, date_format).date())
+        ]
+
+
+class WeekdayCalendar(TradingCalendar):
+    """
+    Calendar with trading on weekdays except a static table of holidays
+    """
+    def __init__(self, holidays: list=None, weekdays: tuple=TRADING_WEEKDAYS) -> None:
+        """
+        Constructor for WeekdayCalendar
+
+        Args:
+            holidays (list, optional): dates without trading as date objects
+                                       or strings in META_DATE_FORMAT
+            weekdays (tuple, optional): days of the week with trading, Monday is 0
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        self.holidays = {
+            datetime.strptime(day, date_format).date() if isinstance(day, str) else day
+            for day in holidays or []
+        }
+        self.weekdays = set(weekdays)
+
+    def holidays_of_year(self, year: int):
+        """
+        Returns the holidays following fixed rules of a year,
+        none for the static table only
+
+        Args:
+            year (int): year
+        """
+        return frozenset()
+
+    def is_trading_day(self, day: date):
+        """
+        Checks if a date is a weekday with trading and not a holiday
+
+        Args:
+            day (date): date
+        """
+        return (day.weekday() in self.weekdays and day not in self.holidays
+                and day not in self.holidays_of_year(day.year))
+
+
+class XetraCalendar(WeekdayCalendar):
+    """
+    Calendar of the Xetra trading days: weekdays except New Year, Good Friday,
+    Easter Monday, Labour Day, Christmas Eve, both Christmas days and New
+    Year's Eve. Further closing days are given as holidays.
+    """
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def holidays_of_year(year: int):
+        """
+        Returns the Xetra holidays of a year
+
+        Args:
+            year (int): year
+        """
+        easter = easter_sunday(year)
+        return frozenset([
+            date(year, 1, 1), easter - timedelta(days=2), easter + timedelta(days=1),
+            date(year, 5, 1), date(year, 12, 24), date(year, 12, 25), date(year, 12, 26),
+            date(year, 12, 31)
+        ])
+
+
+def create_trading_calendar(name: str=None, holidays: list=None):
+    """
+    Creates a trading calendar by name
+
+    Args:
+        name (str, optional): calendar (all|weekdays|xetra). Defaults to all days.
+        holidays (list, optional): additional dates without trading
+
+    Returns:
+        calendar (TradingCalendar): trading calendar
+    """
+    if name is None or name == TradingCalendars.ALL.value:
+        return TradingCalendar()
+    if name == TradingCalendars.WEEKDAYS.value:
+        return WeekdayCalendar(holidays)
+    if name == TradingCalendars.XETRA.value:
+        return XetraCalendar(holidays)
+    raise WrongCalendarException(f'The trading calendar {name} is not supported!')
@@ -0,0 +1,105 @@
+""" Report transformation with Arrow compute kernels """
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.transformers.report_compact import RAW_PRICE_DECIMALS
+
+POSITION_COL = '__position'
+
+
+def source_column_types(src_args):
+    """
+    Returns the Arrow data types of the source columns, so that every
+    source file is read with the same schema. Columns that are not used
+    by the calculation are read as strings.
+
+    Args:
+        src_args (SourceConfig): NamedTuple class with source configuration data
+
+    Returns:
+        column_types (dict): Arrow data types by column name
+    """
+    column_types = {col: pa.string() for col in src_args.src_columns}
+    column_types.update({
+        src_args.src_col_start_price: pa.float64(),
+        src_args.src_col_min_price: pa.float64(),
+        src_args.src_col_max_price: pa.float64(),
+        src_args.src_col_traded_vol: pa.int64()
+    })
+    return column_types
+
+
+def _previous_in_group(values: pa.Array, groups: pa.Array):
+    """
+    Shifts values by one row and sets the first row of every group to null.
+    The input has to be sorted by the groups.
+    """
+    if len(values) == 0:
+        return values
+    previous = pa.concat_arrays([pa.nulls(1, values.type), values.slice(0, len(values) - 1)])
+    same_group = pa.concat_arrays([
+        pa.array([False]),
+        pc.equal(groups.slice(1), groups.slice(0, len(groups) - 1))
+    ])
+    return pc.if_else(same_group, previous, pa.nulls(len(values), values.type))
+
+
+def transform_with_arrow(table: pa.Table, src_args, dest_args, extract_date: str):
+    """
+    Calculates the report from an Arrow table without converting it to pandas
+
+    Args:
+        table (pa.Table): source data
+        src_args (SourceConfig): NamedTuple class with source configuration data
+        dest_args (DestinationConfig): NamedTuple class with destination/target
+                                       configuration data
+        extract_date (str): first date of the report
+
+    Returns:
+        table: report as Arrow table
+    """
+    isin = src_args.src_col_isin
+    date = src_args.src_col_date
+    # Filtering necessary source columns and removing rows with missing values
+    table = table.select(src_args.src_columns).drop_null()
+    # Restoring float32 encoded prices like restore_types does
+    table = pa.table({
+        name: pc.round(pc.cast(column, pa.float64()), RAW_PRICE_DECIMALS)
+        if column.type == pa.float32() else column
+        for name, column in zip(table.column_names, table.columns)
+    })
+    # Sorting by time, so the first and last position per ISIN and day
+    # are the rows of the opening and closing price
+    table = table.take(pc.sort_indices(table, sort_keys=[(src_args.src_col_time, 'ascending')]))
+    table = table.append_column(POSITION_COL, pa.array(range(table.num_rows), pa.int64()))
+    # Aggregating per ISIN and day
+    daily = table.group_by([isin, date]).aggregate([
+        (POSITION_COL, 'min'),
+        (POSITION_COL, 'max'),
+        (src_args.src_col_min_price, 'min'),
+        (src_args.src_col_max_price, 'max'),
+        (src_args.src_col_traded_vol, 'sum')
+    ])
+    start_price = table[src_args.src_col_start_price]
+    daily = pa.table({
+        isin: daily[isin],
+        date: daily[date],
+        dest_args.dest_col_op_price: start_price.take(daily[f'{POSITION_COL}_min']),
+        dest_args.dest_col_cls_price: start_price.take(daily[f'{POSITION_COL}_max']),
+        dest_args.dest_col_min_price: daily[f'{src_args.src_col_min_price}_min'],
+        dest_args.dest_col_max_price: daily[f'{src_args.src_col_max_price}_max'],
+        dest_args.dest_col_daily_trd_vol: daily[f'{src_args.src_col_traded_vol}_sum']
+    }).sort_by([(isin, 'ascending'), (date, 'ascending')])
+    # Change of current day's opening price compared to the
+    # previous trading day's opening price in %
+    op_price = daily[dest_args.dest_col_op_price].combine_chunks()
+    prev_op_price = _previous_in_group(op_price, daily[isin].combine_chunks())
+    change = pc.multiply(pc.divide(pc.subtract(op_price, prev_op_price), prev_op_price), 100)
+    daily = daily.append_column(dest_args.dest_col_chg_prev_cls, change)
+    # Rounding to 2 decimals
+    daily = pa.table({
+        name: pc.round(column, 2) if pa.types.is_floating(column.type) else column
+        for name, column in zip(daily.column_names, daily.columns)
+    })
+    # Removing the day before extract_date
+    return daily.filter(pc.greater_equal(daily[date], pa.scalar(extract_date)))
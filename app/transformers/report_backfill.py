@@ -0,0 +1,237 @@
+""" Sharded multi-process backfill of the Report ETL """
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import logging
+
+from app.common.constants import MetaProcessFormat
+from app.common.custom_exceptions import BackfillException
+from app.common.meta_process import MetaProcess
+from app.common.tracing import Tracer
+from app.common.trading_calendar import TradingCalendar
+from app.transformers.report_builder import (build_report_etl, build_storage_connectors,
+                                             build_tracer, build_trading_calendar)
+
+# Number of days a shard reads before its first date. The previous trading
+# day has to be part of the shard to calculate the change to the previous
+# closing price, and weekends plus holidays can span several calendar days.
+# Shards read at least the previous trading day of the calendar.
+BACKFILL_LOOKBACK_DAYS = 7
+
+
+def split_date_range(date_from: str, date_to: str, shards: int,
+                     calendar: TradingCalendar=None):
+    """
+    Splits a date range into contiguous shards of (almost) equal numbers of trading days
+
+    Args:
+        date_from (str): first date of the range
+        date_to (str): last date of the range
+        shards (int): maximum number of shards
+        calendar (TradingCalendar, optional): calendar of the trading days.
+                                              Defaults to every day.
+
+    Returns:
+        shard_list (list): list of (first date, last date) tuples
+    """
+    date_list = MetaProcess.return_date_range(date_from, date_to, calendar)
+    if not date_list:
+        return []
+    shards = max(1, min(shards, len(date_list)))
+    size, rest = divmod(len(date_list), shards)
+    shard_list = []
+    start = 0
+    for shard in range(shards):
+        # the first shards take one additional day each if the range can not be split evenly
+        end = start + size + (1 if shard < rest else 0)
+        shard_list.append((date_list[start], date_list[end - 1]))
+        start = end
+
+    return shard_list
+
+
+def plan_shards(date_from: str, date_to: str, shards: int,
+                lookback_days: int=BACKFILL_LOOKBACK_DAYS, calendar: TradingCalendar=None):
+    """
+    Splits a date range into contiguous shards and determines
+    the first date each shard has to extract
+
+    Args:
+        date_from (str): first date of the range
+        date_to (str): last date of the range
+        shards (int): maximum number of shards
+        lookback_days (int, optional): days a shard reads before its first date.
+                                       Defaults to BACKFILL_LOOKBACK_DAYS.
+        calendar (TradingCalendar, optional): calendar of the trading days.
+                                              Defaults to every day.
+
+    Returns:
+        shard_list (list): list of (first date, last date, lookback date) tuples
+    """
+    date_format = MetaProcessFormat.META_DATE_FORMAT.value
+    calendar = calendar or TradingCalendar()
+    # the single process run reads from the trading day before the range
+    range_lookback = calendar.previous_trading_day(
+        datetime.strptime(date_from, date_format).date())
+    shard_list = []
+    for shard_from, shard_to in split_date_range(date_from, date_to, shards, calendar):
+        shard_start = datetime.strptime(shard_from, date_format).date()
+        # a shard reads at least its previous trading day, but nothing before
+        # the previous trading day of the range like the single process run
+        lookback = max(range_lookback,
+                       min(shard_start - timedelta(days=lookback_days),
+                           calendar.previous_trading_day(shard_start)))
+        shard_list.append((shard_from, shard_to, lookback.strftime(date_format)))
+
+    return shard_list
+
+
+def check_no_indicators(config: dict):
+    """
+    Raises BackfillException if the reports should get indicators. The
+    rolling windows need the days in order, but the shards of a backfill
+    run in parallel and do not save the indicator state.
+
+    Args:
+        config (dict): parsed YAML configuration
+    """
+    if (config.get('processing') or {}).get('indicators'):
+        raise BackfillException(
+            'Indicators are not supported by backfills, run the dates in order instead.')
+
+
+def run_backfill_shard(config: dict, shard_from: str, shard_to: str, lookback_from: str,
+                       tracer: Tracer=None, timestamp: bool=True):
+    """
+    Runs extract, transform and load of all reports for one shard in the current process.
+    The meta file is not updated by the shard. The report keys end with the dates of
+    the shard, so shards finishing at the same time do not overwrite each other.
+
+    Args:
+        config (dict): parsed YAML configuration
+        shard_from (str): first date of the shard report
+        shard_to (str): last date of the shard report
+        lookback_from (str): first date that is extracted for the shard
+        tracer (Tracer, optional): tracer recording a span per remote call
+        timestamp (bool, optional): whether the report keys contain the time of the run.
+                                    Without it a shard run again overwrites its reports.
+                                    Defaults to True.
+
+    Returns:
+        meta_update_list (list): dates processed by the shard
+    """
+    # only the trading days of the lookback are listed
+    report_etl = build_report_etl(
+        config,
+        tracer,
+        extract_date=shard_from,
+        extract_date_list=MetaProcess.return_date_range(lookback_from, shard_to,
+                                                        build_trading_calendar(config))
+    )
+    report_etl.etl_report(update_meta=False,
+                          key_suffix=f'_{shard_from}_{shard_to}' if timestamp
+                          else f'{shard_from}_{shard_to}',
+                          timestamp=timestamp)
+    report_etl.save_listing_index()
+
+    return report_etl.meta_update_list
+
+
+def _run_traced_shard(config: dict, shard_from: str, shard_to: str, lookback_from: str):
+    """
+    Runs a shard in a worker process with its own tracer, which appends
+    the spans to the spans file of the configuration
+
+    Returns:
+        meta_update_list (list), histograms (dict), totals (dict): dates processed
+        by the shard, latency histograms and totals by operation of its tracer
+    """
+    tracer = build_tracer(config) or Tracer()
+    try:
+        dates = run_backfill_shard(config, shard_from, shard_to, lookback_from, tracer)
+    finally:
+        tracer.close()
+    return dates, tracer.histograms, tracer.totals
+
+
+class ReportBackfill():
+    """
+    Backfills the report for a date range by running contiguous
+    shards of the range in separate processes
+    """
+    def __init__(self, config: dict, date_from: str, date_to: str, workers: int=1,
+                 lookback_days: int=BACKFILL_LOOKBACK_DAYS, tracer: Tracer=None) -> None:
+        """
+        Constructor for ReportBackfill
+
+        Args:
+            config (dict): parsed YAML configuration
+            date_from (str): first date of the backfill
+            date_to (str): last date of the backfill
+            workers (int, optional): number of processes. Defaults to 1.
+            lookback_days (int, optional): days a shard reads before its first date.
+                                           Defaults to BACKFILL_LOOKBACK_DAYS.
+            tracer (Tracer, optional): tracer the latencies of the shards are added to.
+                                       The shards trace with a tracer of the configuration.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.config = config
+        self.date_from = date_from
+        self.date_to = date_to
+        self.workers = workers
+        self.lookback_days = lookback_days
+        self.tracer = tracer
+        check_no_indicators(config)
+
+    def shards(self):
+        """
+        Creates the shards of the backfill
+
+        Returns:
+            shard_list (list): list of (first date, last date, lookback date) tuples
+        """
+        return plan_shards(self.date_from, self.date_to, self.workers, self.lookback_days,
+                           build_trading_calendar(self.config))
+
+    def run(self):
+        """
+        Runs all shards and updates the meta file once with
+        the dates of all completed shards
+
+        Returns:
+            completed_dates (list): dates processed by the completed shards
+        """
+        shard_list = self.shards()
+        self._logger.info('Backfill from %s to %s started with %s shards...',
+                          self.date_from, self.date_to, len(shard_list))
+        completed_dates = []
+        failed_shards = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            run_shard = run_backfill_shard if self.tracer is None else _run_traced_shard
+            futures = {
+                executor.submit(run_shard, self.config, *shard): shard
+                for shard in shard_list
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    if self.tracer is None:
+                        completed_dates.extend(future.result())
+                    else:
+                        dates, histograms, totals = future.result()
+                        completed_dates.extend(dates)
+                        self.tracer.merge(histograms, totals)
+                    self._logger.info('Backfill shard %s - %s finished.', shard[0], shard[1])
+                except Exception:
+                    self._logger.exception('Backfill shard %s - %s failed.', shard[0], shard[1])
+                    failed_shards.append(shard)
+        completed_dates = sorted(set(completed_dates))
+        if completed_dates:
+            _, dest_s3_connector = build_storage_connectors(self.config, self.tracer)
+            MetaProcess.update_meta_file(completed_dates,
+                                         self.config['meta']['meta_key'],
+                                         dest_s3_connector)
+        if failed_shards:
+            raise BackfillException(f'Backfill shards failed: {failed_shards}')
+        self._logger.info('Backfill finished...')
+
+        return completed_dates
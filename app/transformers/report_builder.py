@@ -0,0 +1,193 @@
+""" Creates the Report ETL components from a configuration """
+import logging
+
+from app.common.constants import SinkTypes
+from app.common.custom_exceptions import SinkException
+from app.common.local_storage import LocalFileConnector
+from app.common.s3 import S3BucketConnector
+from app.common.sinks import BigQuerySink, IndexedStorageSink, StorageSink
+from app.common.tracing import JsonlSpanExporter, Tracer
+from app.common.trading_calendar import create_trading_calendar
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                  ProcessingConfig, ReportDefinition)
+
+
+def build_tracer(config: dict):
+    """
+    Creates the tracer of the remote calls from the tracing section
+    of the configuration file
+
+    Args:
+        config (dict): parsed YAML configuration
+
+    Returns:
+        tracer (Tracer): tracer exporting to the spans file, None without spans file
+    """
+    spans_file = (config.get('tracing') or {}).get('spans_file')
+    if not spans_file:
+        return None
+
+    return Tracer(JsonlSpanExporter(spans_file))
+
+
+def build_trading_calendar(config: dict):
+    """
+    Creates the trading calendar of the source section of the configuration file
+
+    Args:
+        config (dict): parsed YAML configuration
+
+    Returns:
+        calendar (TradingCalendar): trading calendar, every day without src_calendar
+    """
+    source_config = config.get('source') or {}
+
+    return create_trading_calendar(source_config.get('src_calendar'),
+                                   source_config.get('src_holidays'))
+
+
+def build_s3_connectors(s3_config: dict, tracer: Tracer=None):
+    """
+    Creates the S3BucketConnector instances for source and destination
+
+    Args:
+        s3_config (dict): s3 section of the configuration file
+        tracer (Tracer, optional): tracer recording a span per request
+
+    Returns:
+        src_s3_connector (S3BucketConnector): connection to the source S3 Bucket
+        dest_s3_connector (S3BucketConnector): connection to the destination S3 Bucket
+    """
+    src_s3_connector = S3BucketConnector(
+        access_key=s3_config['access_key'],
+        secret_key=s3_config['secret_key'],
+        endpoint_url=s3_config['src_endpoint_url'],
+        bucket=s3_config['src_bucket'],
+        **({'max_concurrency': s3_config['max_concurrency']}
+           if 'max_concurrency' in s3_config else {}),
+        tracer=tracer
+    )
+    dest_s3_connector = S3BucketConnector(
+        access_key=s3_config['access_key'],
+        secret_key=s3_config['secret_key'],
+        endpoint_url=s3_config['dest_endpoint_url'],
+        bucket=s3_config['dest_bucket'],
+        **({'max_concurrency': s3_config['max_concurrency']}
+           if 'max_concurrency' in s3_config else {}),
+        tracer=tracer
+    )
+
+    return src_s3_connector, dest_s3_connector
+
+
+def build_storage_connectors(config: dict, tracer: Tracer=None):
+    """
+    Creates the storage connectors for source and destination. The local
+    section of the configuration selects local directories instead of S3.
+
+    Args:
+        config (dict): parsed YAML configuration
+        tracer (Tracer, optional): tracer recording a span per S3 request
+
+    Returns:
+        src_connector (StorageConnector): connection to the source storage
+        dest_connector (StorageConnector): connection to the destination storage
+    """
+    local_config = config.get('local')
+    if local_config:
+        return (LocalFileConnector(local_config['src_dir']),
+                LocalFileConnector(local_config['dest_dir']))
+
+    return build_s3_connectors(config['s3'], tracer)
+
+
+def build_report_definitions(config: dict):
+    """
+    Creates the report definitions from the parsed configuration file.
+    Every entry of the reports section overrides values of the destination
+    section. Without reports section only report1 is created.
+
+    Args:
+        config (dict): parsed YAML configuration
+
+    Returns:
+        reports (list): ReportDefinition instances
+    """
+    reports = [
+        ReportDefinition(
+            name=report['name'],
+            dest_args=DestinationConfig(**{
+                **config['destination'],
+                **(report.get('destination') or {})
+            }),
+            **({'transform': report['transform']} if 'transform' in report else {})
+        )
+        for report in config.get('reports') or []
+    ]
+
+    return reports or [ReportDefinition('report1', DestinationConfig(**config['destination']))]
+
+
+def build_sinks(config: dict, dest_connector, tracer: Tracer=None):
+    """
+    Creates the sinks the reports are written to from the sinks section
+    of the configuration file. Without sinks section the reports are
+    written in dest_format to the destination storage.
+
+    Args:
+        config (dict): parsed YAML configuration
+        dest_connector (StorageConnector): connection to the destination storage
+        tracer (Tracer, optional): tracer recording a span per BigQuery load
+
+    Returns:
+        sinks (list): Sink instances
+    """
+    sinks = []
+    for sink_config in config.get('sinks') or []:
+        sink_config = dict(sink_config)
+        sink_type = sink_config.pop('type', SinkTypes.STORAGE.value)
+        name = sink_config.pop('name', sink_type)
+        if sink_type == SinkTypes.STORAGE.value:
+            sinks.append(StorageSink(name, dest_connector, **sink_config))
+        elif sink_type == SinkTypes.LOCAL.value:
+            sinks.append(StorageSink(name, LocalFileConnector(sink_config.pop('root_dir')),
+                                     **sink_config))
+        elif sink_type == SinkTypes.BIGQUERY.value:
+            sinks.append(BigQuerySink(name, tracer=tracer, **sink_config))
+        elif sink_type == SinkTypes.INDEXED.value:
+            # the reports keep the ISIN and date columns of the source
+            sink_config.setdefault('isin_column', config['source']['src_col_isin'])
+            sink_config.setdefault('date_column', config['source']['src_col_date'])
+            sinks.append(IndexedStorageSink(name, dest_connector, **sink_config))
+        else:
+            logging.getLogger(__name__).info('The sink type %s is not supported!', sink_type)
+            raise SinkException(f'The sink type {sink_type} is not supported!')
+
+    return sinks or [StorageSink('storage', dest_connector)]
+
+
+def build_report_etl(config: dict, tracer: Tracer=None, **etl_kwargs):
+    """
+    Creates a ReportETL instance from the parsed configuration file
+
+    Args:
+        config (dict): parsed YAML configuration
+        tracer (Tracer, optional): tracer recording a span per remote call
+        etl_kwargs: additional keyword arguments passed to ReportETL
+
+    Returns:
+        report_etl (ReportETL): ReportETL instance
+    """
+    src_s3_connector, dest_s3_connector = build_storage_connectors(config, tracer)
+    report_etl = ReportETL(
+        src_bucket=src_s3_connector,
+        dest_bucket=dest_s3_connector,
+        meta_key=config['meta']['meta_key'],
+        src_args=SourceConfig(**config['source']),
+        proc_args=ProcessingConfig(**(config.get('processing') or {})),
+        reports=build_report_definitions(config),
+        sinks=build_sinks(config, dest_s3_connector, tracer),
+        **etl_kwargs
+    )
+
+    return report_etl
@@ -0,0 +1,131 @@
+""" Compact numeric encoding of the raw source data """
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.common.custom_exceptions import WrongFormatException
+
+# Decimals of the source prices that have to survive the float32 encoding
+RAW_PRICE_DECIMALS = 4
+
+_logger = logging.getLogger(__name__)
+
+
+def encode_time(time: pd.Series):
+    """
+    Encodes times in the format HH:MM as minutes since midnight
+
+    Args:
+        time (pd.Series): times as strings
+
+    Returns:
+        minutes (pd.Series): minutes since midnight as int16
+    """
+    hours = pd.to_numeric(time.str.slice(0, 2), errors='coerce')
+    minutes = pd.to_numeric(time.str.slice(3, 5), errors='coerce')
+    if hours.isna().any() or minutes.isna().any() or (time.str.len() != 5).any():
+        _logger.info('The time column does not have the format HH:MM!')
+        raise WrongFormatException
+    return (hours * 60 + minutes).astype(np.int16)
+
+
+def narrow_price(price: pd.Series):
+    """
+    Encodes prices as float32 if every price can be restored exactly
+    by rounding to RAW_PRICE_DECIMALS, otherwise they stay float64
+
+    Args:
+        price (pd.Series): prices as float64
+
+    Returns:
+        price (pd.Series): prices as float32 or float64
+    """
+    narrowed = price.astype(np.float32)
+    if narrowed.astype(np.float64).round(RAW_PRICE_DECIMALS).equals(price.astype(np.float64)):
+        return narrowed
+    return price
+
+
+def narrow_volume(volume: pd.Series):
+    """
+    Encodes volumes as int32 if all values fit, otherwise as int64
+
+    Args:
+        volume (pd.Series): integral volumes
+
+    Returns:
+        volume (pd.Series): volumes as int32 or int64
+    """
+    int32 = np.iinfo(np.int32)
+    if volume.empty or (volume.min() >= int32.min and volume.max() <= int32.max):
+        return volume.astype(np.int32)
+    return volume.astype(np.int64)
+
+
+def compact_source_data(df: pd.DataFrame, src_args):
+    """
+    Reduces the raw source data to the report columns without missing
+    values, encodes the time as minutes since midnight and narrows
+    prices and volumes to the smallest lossless types
+
+    Args:
+        df (pd.DataFrame): source data of one file
+        src_args (SourceConfig): NamedTuple class with source configuration data
+
+    Returns:
+        df: compact source data
+    """
+    df = df.loc[:, src_args.src_columns].dropna()
+    df[src_args.src_col_time] = encode_time(df[src_args.src_col_time].astype(str))
+    for col in [src_args.src_col_start_price, src_args.src_col_min_price,
+                src_args.src_col_max_price]:
+        df[col] = narrow_price(df[col])
+    df[src_args.src_col_traded_vol] = narrow_volume(df[src_args.src_col_traded_vol])
+    return df.reset_index(drop=True)
+
+
+def concat_compact(frames: list):
+    """
+    Concatenates compact source data, e.g. of several files. Prices are
+    narrowed per file, so a column may be float32 in some frames only.
+    float32 prices concatenated with float64 prices would keep their
+    encoding error, so they are restored to float64 before.
+
+    Args:
+        frames (list): compact or raw source data, None entries are ignored
+
+    Returns:
+        df: concatenated data
+    """
+    frames = [frame for frame in frames if frame is not None]
+    for col in frames[0].columns if frames else []:
+        dtypes = {frame[col].dtype for frame in frames if col in frame}
+        if np.dtype(np.float32) in dtypes and len(dtypes) > 1:
+            frames = [
+                frame.assign(**{col: frame[col].astype(np.float64).round(RAW_PRICE_DECIMALS)})
+                if col in frame and frame[col].dtype == np.float32 else frame
+                for frame in frames
+            ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def restore_types(df: pd.DataFrame, price_columns: list, volume_column: str):
+    """
+    Restores float32 encoded prices to float64 and
+    int32 encoded volumes to int64
+
+    Args:
+        df (pd.DataFrame): aggregated data
+        price_columns (list): price columns
+        volume_column (str): volume column
+
+    Returns:
+        df: data with float64 prices and int64 volumes
+    """
+    for col in price_columns:
+        if df[col].dtype == np.float32:
+            df[col] = df[col].astype(np.float64).round(RAW_PRICE_DECIMALS)
+    if df[volume_column].dtype == np.int32:
+        df[volume_column] = df[volume_column].astype(np.int64)
+    return df
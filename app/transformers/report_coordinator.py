@@ -0,0 +1,177 @@
+""" Distributes a backfill of the Report ETL over several workers using leases """
+import logging
+import math
+import time
+
+from app.common.constants import SinkTypes
+from app.common.custom_exceptions import BackfillException
+from app.common.lease import LeaseManager, LEASE_STATUS_DONE
+from app.common.meta_process import MetaProcess
+from app.common.tracing import Tracer
+from app.transformers.report_backfill import (BACKFILL_LOOKBACK_DAYS, check_no_indicators,
+                                              plan_shards, run_backfill_shard)
+from app.transformers.report_builder import build_storage_connectors, build_trading_calendar
+
+COMMIT_LEASE_ID = '_commit'
+# Sink types appending the reports to their target, a range written twice duplicates rows
+APPENDING_SINK_TYPES = (SinkTypes.BIGQUERY.value,)
+
+
+def check_no_appending_sinks(config: dict):
+    """
+    Raises BackfillException if the reports should be written to sinks
+    appending to their target. A range whose lease expired is written
+    again by another worker, which only overwrites the files of the range.
+
+    Args:
+        config (dict): parsed YAML configuration
+    """
+    if any(sink_config.get('type') in APPENDING_SINK_TYPES
+           for sink_config in config.get('sinks') or []):
+        raise BackfillException(
+            'Sinks appending to their target are not supported by distributed backfills.')
+
+
+class ReportCoordinator():
+    """
+    Worker of a distributed backfill. All workers split the date range
+    into the same ranges and claim them by writing lease objects to the
+    destination bucket. The reports of a range are written to keys of the
+    range without the time of the run, so a range processed again after
+    its lease expired overwrites the reports instead of duplicating them.
+    The dates are committed to the meta file by one worker once the leases
+    of all ranges are done, the other workers return once the meta file is
+    updated.
+    """
+    def __init__(self, config: dict, date_from: str, date_to: str, range_days: int=7,
+                 lookback_days: int=BACKFILL_LOOKBACK_DAYS, poll_seconds: float=10,
+                 tracer: Tracer=None, **lease_kwargs) -> None:
+        """
+        Constructor for ReportCoordinator
+
+        Args:
+            config (dict): parsed YAML configuration
+            date_from (str): first date of the backfill
+            date_to (str): last date of the backfill
+            range_days (int, optional): number of days per range. Defaults to 7.
+            lookback_days (int, optional): days a range reads before its first date.
+                                           Defaults to BACKFILL_LOOKBACK_DAYS.
+            poll_seconds (float, optional): seconds to wait for ranges claimed
+                                            by other workers. Defaults to 10.
+            tracer (Tracer, optional): tracer recording a span per remote call
+            lease_kwargs: additional keyword arguments passed to LeaseManager
+        """
+        self._logger = logging.getLogger(__name__)
+        check_no_indicators(config)
+        check_no_appending_sinks(config)
+        self.config = config
+        self.date_from = date_from
+        self.date_to = date_to
+        self.range_days = range_days
+        self.lookback_days = lookback_days
+        self.poll_seconds = poll_seconds
+        self.meta_key = config['meta']['meta_key']
+        self.tracer = tracer
+        _, self.dest_bucket = build_storage_connectors(config, tracer)
+        self.lease_manager = LeaseManager(
+            self.dest_bucket,
+            prefix=f'{self.meta_key}.leases/{date_from}_{date_to}/',
+            **lease_kwargs
+        )
+
+    def ranges(self):
+        """
+        Creates the ranges of the backfill
+
+        Returns:
+            range_list (list): list of (first date, last date, lookback date) tuples
+        """
+        calendar = build_trading_calendar(self.config)
+        days = len(MetaProcess.return_date_range(self.date_from, self.date_to, calendar))
+        return plan_shards(self.date_from, self.date_to,
+                           math.ceil(days / self.range_days), self.lookback_days, calendar)
+
+    @staticmethod
+    def range_id(date_range: tuple):
+        """
+        Returns the lease id of a range
+
+        Args:
+            date_range (tuple): (first date, last date, lookback date) of the range
+        """
+        return f'{date_range[0]}_{date_range[1]}'
+
+    def _process_range(self, date_range: tuple):
+        """
+        Processes a claimed range while renewing its lease
+        """
+        lease_id = self.range_id(date_range)
+        self._logger.info('Worker %s processing range %s.', self.lease_manager.owner, lease_id)
+        stop_renewal = self.lease_manager.keep_alive(lease_id)
+        try:
+            dates = run_backfill_shard(self.config, *date_range, self.tracer, timestamp=False)
+        finally:
+            stop_renewal()
+        self.lease_manager.complete(lease_id, dates)
+
+    def run_worker(self):
+        """
+        Claims and processes ranges until the leases of all ranges are done
+        and commits the result afterwards or waits for its commit
+
+        Returns:
+            committed_dates (list): dates written to the meta file by this worker
+        """
+        range_list = self.ranges()
+        while True:
+            pending = False
+            for date_range in range_list:
+                lease = self.lease_manager.read(self.range_id(date_range))
+                if lease is not None and lease['status'] == LEASE_STATUS_DONE:
+                    continue
+                pending = True
+                if self.lease_manager.claim(self.range_id(date_range)):
+                    self._process_range(date_range)
+            if not pending:
+                break
+            # waiting for ranges of other workers to be done or to expire
+            time.sleep(self.poll_seconds)
+
+        return self.commit(range_list)
+
+    def commit(self, range_list: list):
+        """
+        Updates the meta file with the dates of all ranges. Workers that do
+        not own the commit lease wait until it is done and claim it again
+        if its owner stopped renewing it.
+
+        Args:
+            range_list (list): all ranges of the backfill
+
+        Returns:
+            committed_dates (list): dates written to the meta file by this worker
+        """
+        while True:
+            lease = self.lease_manager.read(COMMIT_LEASE_ID)
+            if lease is not None and lease['status'] == LEASE_STATUS_DONE:
+                return []
+            if self.lease_manager.claim(COMMIT_LEASE_ID):
+                break
+            # waiting for the commit of another worker to be done or to expire
+            time.sleep(self.poll_seconds)
+        stop_renewal = self.lease_manager.keep_alive(COMMIT_LEASE_ID)
+        try:
+            committed_dates = sorted({
+                date
+                for date_range in range_list
+                for date in self.lease_manager.read(self.range_id(date_range))['result']
+            })
+            if committed_dates:
+                MetaProcess.update_meta_file(committed_dates, self.meta_key, self.dest_bucket)
+        finally:
+            stop_renewal()
+        self.lease_manager.complete(COMMIT_LEASE_ID, committed_dates)
+        self._logger.info('Worker %s committed the backfill from %s to %s.',
+                          self.lease_manager.owner, self.date_from, self.date_to)
+
+        return committed_dates
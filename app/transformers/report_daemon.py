@@ -0,0 +1,222 @@
+""" Long running Report ETL that polls the source bucket for new files """
+from datetime import datetime, timedelta
+import logging
+import time
+
+from app.common.constants import MetaProcessFormat
+from app.common.meta_process import MetaProcess
+from app.transformers.report_backfill import BACKFILL_LOOKBACK_DAYS
+from app.transformers.report_state import (AggregateStateStore, merge_states, source_state,
+                                           state_to_daily)
+from app.transformers.report_transformer import ReportETL
+
+
+class ReportDaemon():
+    """
+    Keeps a ReportETL instance resident and polls the source bucket for keys
+    after a cursor that is persisted in the destination bucket. Every new file
+    is folded into the aggregate state of its day, so every poll only reads
+    the new files and overwrites the reports of the day from the state under
+    a stable key of the day. The state is stored next to the report, so a
+    restart does not read the files of the day again. A day is complete once
+    files of a later day arrive: its reports are appended to the appending
+    sinks, e.g. BigQuery, and the day is added to the meta file. With
+    indicators, the rolling indicators are added to the reports of a
+    complete day, which are then written to all sinks.
+    """
+    def __init__(self, report_etl: ReportETL, poll_seconds: float=60,
+                 cursor_key: str=None, lookback_days: int=BACKFILL_LOOKBACK_DAYS,
+                 state_store: AggregateStateStore=None) -> None:
+        """
+        Constructor for ReportDaemon
+
+        Args:
+            report_etl (ReportETL): ReportETL instance that is kept between the polls
+            poll_seconds (float, optional): seconds between two polls. Defaults to 60.
+            cursor_key (str, optional): key of the cursor file in the destination bucket.
+                                        Defaults to the meta key with suffix .cursor.
+            lookback_days (int, optional): days read before the cursor on start
+                                           to restore the previous day's prices
+            state_store (AggregateStateStore, optional): store of the aggregate states.
+                                                         Defaults to the folder state/
+                                                         next to the first report.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.report_etl = report_etl
+        self.poll_seconds = poll_seconds
+        self.cursor_key = cursor_key or f'{report_etl.meta_key}.cursor'
+        self.lookback_days = lookback_days
+        self.state_store = state_store or AggregateStateStore(
+            report_etl.dest_bucket,
+            AggregateStateStore.prefix_of_report(report_etl.reports[0].dest_args.dest_key))
+        self.cursor = None
+        self._current_day = None
+        self._state = None
+        self._last_key = None
+        self._dirty = False
+        self._previous = {}
+        self._day_previous = {}
+        self._day_reports = {}
+
+    def read_cursor(self):
+        """
+        Reads the persisted cursor
+
+        Returns:
+            cursor (str): last processed source key or None if no cursor exists
+        """
+        dest_bucket = self.report_etl.dest_bucket
+        try:
+            return dest_bucket.read_text(self.cursor_key).strip() or None
+        except dest_bucket.not_found_error:
+            return None
+
+    def start(self):
+        """
+        Restores the in-memory state from the persisted cursor. The stored aggregate
+        states are used and the files of days without stored state are read again.
+        Without cursor the polling starts at the first date of the extract date list
+        of ReportETL. If the meta file has all days up to today, the reports start
+        with tomorrow.
+        """
+        self._current_day, self._state, self._last_key = None, None, None
+        self._dirty = False
+        self._previous, self._day_previous, self._day_reports = {}, {}, {}
+        # indicator states of a failed poll may contain days missing in the meta file
+        self.report_etl.reset_indicators()
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        if not self.report_etl.extract_date_list:
+            # the extract date of a complete meta file lies after all days that can arrive
+            tomorrow = (datetime.today().date() + timedelta(days=1)).strftime(date_format)
+            self._logger.info('The meta file is complete, the reports start with %s.', tomorrow)
+            self.report_etl.extract_date = tomorrow
+            self.report_etl.extract_date_list = [tomorrow]
+        self.cursor = self.read_cursor()
+        if self.cursor is None:
+            # a date sorts before all keys of the date
+            self.cursor = self.report_etl.extract_date_list[0]
+            self._logger.info('No cursor found, starting after %s.', self.cursor)
+            return
+        self._logger.info('Restoring the state up to the cursor %s.', self.cursor)
+        cursor_day = self.cursor.split('/')[0]
+        first_day = (datetime.strptime(cursor_day, date_format).date()
+                     - timedelta(days=self.lookback_days)).strftime(date_format)
+        for dt in MetaProcess.return_date_range(first_day, cursor_day,
+                                                self.report_etl.calendar):
+            state, last_key = self.state_store.read(dt)
+            if state is None:
+                self._process([
+                    key
+                    for key in self.report_etl.src_bucket.list_files_by_prefix(dt)
+                    if key <= self.cursor
+                ], load=False)
+                continue
+            self._complete_day(load=False)
+            self._current_day, self._state, self._last_key = dt, state, last_key
+            self._dirty = True
+        if self._dirty:
+            self._write_day(load=False)
+        # the state may be written before a failure prevented the cursor update
+        if self._last_key is not None and self._last_key > self.cursor:
+            self.cursor = self._last_key
+
+    def poll(self):
+        """
+        Processes the source files that arrived since the last poll
+        and persists the cursor afterwards
+
+        Returns:
+            keys (list): processed source keys
+        """
+        keys = self.report_etl.src_bucket.list_files_after(self.cursor)
+        if not keys:
+            self._logger.info('No new source files after %s.', self.cursor)
+            return keys
+        self._logger.info('Processing %s new source files.', len(keys))
+        self._process(keys)
+        self.cursor = keys[-1]
+        self.report_etl.dest_bucket.write_text(self.cursor, self.cursor_key)
+
+        return keys
+
+    def run(self, max_polls: int=None):
+        """
+        Polls the source bucket until max_polls is reached. A failed poll
+        restores the state from the persisted cursor and is retried.
+
+        Args:
+            max_polls (int, optional): number of polls. Defaults to None (forever).
+        """
+        self.start()
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            try:
+                self.poll()
+            except Exception as error:
+                self._logger.error('Poll failed: %s. Restoring from the cursor.', error)
+                self.start()
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(self.poll_seconds)
+
+    def _process(self, keys: list, load: bool=True):
+        """
+        Folds source files in key order into the aggregate state of their day
+        """
+        src_args = self.report_etl.src_args
+        for key in keys:
+            day = key.split('/')[0]
+            if day != self._current_day:
+                self._complete_day(load)
+                self._current_day = day
+            self._state = merge_states([
+                self._state,
+                source_state(self.report_etl.read_source(key), src_args)
+            ], src_args)
+            self._last_key = key
+            self._dirty = True
+        if self._dirty:
+            self._write_day(load)
+
+    def _write_day(self, load: bool):
+        """
+        Creates the reports of the current day from the aggregate state and
+        overwrites them under the key of the day together with the state if
+        load is set. Appending sinks only get the report of a complete day.
+        """
+        report_etl = self.report_etl
+        for report in report_etl.reports:
+            daily = state_to_daily(self._state, report_etl.src_args, report.dest_args)
+            report_df, self._day_previous[report.name] = report_etl.finalize_day(
+                daily, self._current_day, self._previous.get(report.name), report.dest_args)
+            self._day_reports[report.name] = report_df
+            if load and self._current_day >= report_etl.extract_date:
+                report_etl.load(report_df, update_meta=False, dest_args=report.dest_args,
+                                key_suffix=self._current_day, timestamp=False, appends=False)
+        if load:
+            self.state_store.write(self._current_day, self._state, self._last_key)
+        self._dirty = False
+
+    def _complete_day(self, load: bool):
+        """
+        Keeps the last aggregates of the current day, appends its reports to the
+        appending sinks and adds it to the meta file. The indicators are added
+        to the reports of the day, their state is saved with the meta file.
+        """
+        if self._current_day is None:
+            return
+        if self._dirty:
+            self._write_day(load)
+        self._previous = dict(self._day_previous)
+        report_etl = self.report_etl
+        if load and self._current_day >= report_etl.extract_date:
+            # reports with indicators replace the reports of the polls on all sinks
+            appends = None if report_etl.proc_args.indicators else True
+            for report in report_etl.reports:
+                report_df = report_etl.add_indicators(self._day_reports[report.name], report)
+                report_etl.load(report_df, update_meta=False, dest_args=report.dest_args,
+                                key_suffix=self._current_day, timestamp=False,
+                                appends=appends)
+            report_etl.update_meta([self._current_day])
+        self._state = None
+        self._day_reports = {}
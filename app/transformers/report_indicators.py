@@ -0,0 +1,253 @@
+""" Rolling per ISIN indicators updated incrementally from the daily reports """
+from io import BytesIO
+import logging
+import posixpath
+
+import numpy as np
+import pandas as pd
+
+# Number of trading days of the rolling windows
+INDICATOR_WINDOW = 20
+# Ring buffers of the state, one row per ISIN and one column per day of the window
+_BUFFERS = ['close', 'ret', 'ret_valid', 'price_volume', 'volume']
+
+
+class IndicatorState():
+    """
+    Rolling window state of all ISINs kept in ring buffers. Every ISIN has its
+    own position in the buffers, as not all ISINs are traded every day. The
+    sums of the windows are kept next to the buffers, so adding a day replaces
+    the oldest value of every window in O(1) per ISIN, vectorized over the
+    ISINs of the day.
+    """
+    def __init__(self, window: int=INDICATOR_WINDOW) -> None:
+        """
+        Constructor for IndicatorState
+
+        Args:
+            window (int, optional): number of trading days of the windows
+        """
+        self.window = window
+        self.isins = np.array([], dtype=object)
+        self._index = {}
+        self.buffers = {name: np.zeros((0, window)) for name in _BUFFERS}
+        self.sums = {name: np.zeros(0) for name in _BUFFERS}
+        self.sum_ret_sq = np.zeros(0)
+        self.pos = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.last_close = np.zeros(0)
+        self.last_date = np.array([], dtype=object)
+
+    def _indices(self, isins: np.ndarray):
+        """
+        Returns the rows of ISINs, new ISINs get new rows
+        """
+        new_isins = [isin for isin in pd.unique(isins) if isin not in self._index]
+        if new_isins:
+            added = len(new_isins)
+            for isin in new_isins:
+                self._index[isin] = len(self._index)
+            self.isins = np.concatenate([self.isins, np.array(new_isins, dtype=object)])
+            for name in _BUFFERS:
+                self.buffers[name] = np.vstack([self.buffers[name],
+                                                np.zeros((added, self.window))])
+                self.sums[name] = np.concatenate([self.sums[name], np.zeros(added)])
+            self.sum_ret_sq = np.concatenate([self.sum_ret_sq, np.zeros(added)])
+            self.pos = np.concatenate([self.pos, np.zeros(added, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(added, dtype=np.int64)])
+            self.last_close = np.concatenate([self.last_close, np.full(added, np.nan)])
+            self.last_date = np.concatenate([self.last_date,
+                                             np.full(added, '', dtype=object)])
+        return np.array([self._index[isin] for isin in isins], dtype=np.int64)
+
+    def update(self, isins: np.ndarray, dt: str, close: np.ndarray, low: np.ndarray,
+               high: np.ndarray, volume: np.ndarray):
+        """
+        Adds one day to the windows of its ISINs. ISINs whose state already
+        contains the day or a later day are not updated.
+
+        Args:
+            isins (np.ndarray): unique ISINs traded on the day
+            dt (str): date of the day
+            close (np.ndarray): closing prices of the ISINs
+            low (np.ndarray): minimum prices of the ISINs
+            high (np.ndarray): maximum prices of the ISINs
+            volume (np.ndarray): traded volumes of the ISINs
+
+        Returns:
+            updated (np.ndarray): mask of the updated ISINs
+            sma (np.ndarray): moving average of the closing prices
+            volatility (np.ndarray): standard deviation of the daily returns in %
+            vwap (np.ndarray): volume weighted average of the typical prices
+        """
+        idx = self._indices(isins)
+        updated = self.last_date[idx] < dt
+        close, low, high = (np.asarray(arr, dtype=np.float64) for arr in (close, low, high))
+        volume = np.asarray(volume, dtype=np.float64)
+        rows, pos = idx[updated], self.pos[idx[updated]]
+        last_close = self.last_close[rows]
+        ret_valid = ~np.isnan(last_close) & (last_close != 0)
+        ret = np.where(ret_valid, close[updated] / np.where(ret_valid, last_close, 1) - 1, 0)
+        # the typical price of the day stands in for its trades
+        typical = (high + low + close)[updated] / 3
+        new_values = {
+            'close': close[updated],
+            'ret': ret,
+            'ret_valid': ret_valid.astype(np.float64),
+            'price_volume': typical * volume[updated],
+            'volume': volume[updated]
+        }
+        self.sum_ret_sq[rows] += ret ** 2 - self.buffers['ret'][rows, pos] ** 2
+        for name, values in new_values.items():
+            self.sums[name][rows] += values - self.buffers[name][rows, pos]
+            self.buffers[name][rows, pos] = values
+        self.pos[rows] = (pos + 1) % self.window
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+        self.last_close[rows] = close[updated]
+        self.last_date[rows] = dt
+        return (updated, *self.indicators(idx))
+
+    def indicators(self, idx: np.ndarray):
+        """
+        Returns the indicators of the windows of rows of the state
+
+        Args:
+            idx (np.ndarray): rows of the state
+
+        Returns:
+            sma (np.ndarray), volatility (np.ndarray), vwap (np.ndarray): indicators
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sma = self.sums['close'][idx] / self.count[idx]
+            n_ret = self.sums['ret_valid'][idx]
+            mean = self.sums['ret'][idx] / n_ret
+            variance = (self.sum_ret_sq[idx] - n_ret * mean ** 2) / (n_ret - 1)
+            volatility = np.where(n_ret > 1, np.sqrt(np.clip(variance, 0, None)) * 100, np.nan)
+            vwap = np.where(self.sums['volume'][idx] > 0,
+                            self.sums['price_volume'][idx] / self.sums['volume'][idx], np.nan)
+        return sma, volatility, vwap
+
+    def to_bytes(self):
+        """
+        Serializes the state as npz file. The window sums are not stored
+        but recomputed from the buffers when the state is read.
+        """
+        out_buffer = BytesIO()
+        np.savez_compressed(out_buffer, isins=self.isins.astype(str),
+                            pos=self.pos, count=self.count, last_close=self.last_close,
+                            last_date=self.last_date.astype(str), **self.buffers)
+        return out_buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Reads a state serialized by to_bytes
+
+        Args:
+            data (bytes): npz file of the state
+
+        Returns:
+            state (IndicatorState): state with the sums of the windows
+        """
+        with np.load(BytesIO(data)) as arrays:
+            state = cls(arrays['close'].shape[1])
+            state.isins = arrays['isins'].astype(object)
+            state._index = {isin: ind for ind, isin in enumerate(state.isins)}
+            state.buffers = {name: arrays[name] for name in _BUFFERS}
+            state.pos = arrays['pos']
+            state.count = arrays['count']
+            state.last_close = arrays['last_close']
+            state.last_date = arrays['last_date'].astype(object)
+        # summing the buffers again removes the rounding drift of the running sums
+        state.sums = {name: state.buffers[name].sum(axis=1) for name in _BUFFERS}
+        state.sum_ret_sq = (state.buffers['ret'] ** 2).sum(axis=1)
+        return state
+
+
+class IndicatorEngine():
+    """
+    Adds rolling indicators of the last trading days per ISIN to daily reports:
+    the moving average of the closing prices, the volatility of the daily
+    returns and the volume weighted average of the typical prices. The state is
+    read from and written to a npz file next to the report files.
+    """
+    def __init__(self, storage, state_key: str, window: int=INDICATOR_WINDOW) -> None:
+        """
+        Constructor for IndicatorEngine
+
+        Args:
+            storage (StorageConnector): storage holding the state file
+            state_key (str): key of the state file
+            window (int, optional): number of trading days of the windows
+        """
+        self._logger = logging.getLogger(__name__)
+        self.storage = storage
+        self.state_key = state_key
+        self.window = window
+        self.state = None
+
+    @staticmethod
+    def state_key_of_report(dest_key: str):
+        """
+        Returns the key of the state file next to the files of a report
+
+        Args:
+            dest_key (str): basic key of the report files
+        """
+        return posixpath.join(posixpath.dirname(dest_key), 'state', 'indicators.npz')
+
+    def load_state(self):
+        """
+        Reads the stored state or creates an empty state
+        """
+        try:
+            self.state = IndicatorState.from_bytes(self.storage.read_bytes(self.state_key))
+        except self.storage.not_found_error:
+            self._logger.info('No indicator state found at %s.', self.state_key)
+            self.state = IndicatorState(self.window)
+        return self.state
+
+    def save_state(self):
+        """
+        Writes the state if it was loaded
+        """
+        if self.state is not None:
+            self.storage.write_bytes(self.state.to_bytes(), self.state_key)
+        return True
+
+    def add_indicators(self, df: pd.DataFrame, src_args, dest_args):
+        """
+        Updates the state with the days of a report in date order
+        and adds the indicator columns to the report
+
+        Args:
+            df (pd.DataFrame): daily report with one row per ISIN and day
+            src_args (SourceConfig): source configuration with the ISIN and date columns
+            dest_args (DestinationConfig): destination configuration of the report
+
+        Returns:
+            df (pd.DataFrame): report with the indicator columns
+        """
+        if self.state is None:
+            self.load_state()
+        df = df.copy()
+        columns = [dest_args.dest_col_sma, dest_args.dest_col_volatility,
+                   dest_args.dest_col_vwap]
+        for column in columns:
+            df[column] = np.nan
+        stale = 0
+        for dt, day in df.groupby(src_args.src_col_date, sort=True):
+            updated, *values = self.state.update(
+                day[src_args.src_col_isin].to_numpy(), dt,
+                day[dest_args.dest_col_cls_price].to_numpy(),
+                day[dest_args.dest_col_min_price].to_numpy(),
+                day[dest_args.dest_col_max_price].to_numpy(),
+                day[dest_args.dest_col_daily_trd_vol].to_numpy())
+            stale += int((~updated).sum())
+            for column, column_values in zip(columns, values):
+                df.loc[day.index[updated], column] = column_values[updated]
+        if stale:
+            self._logger.warning('%s rows were already part of the indicator state '
+                                 'and got no indicators.', stale)
+        df[columns] = df[columns].round(decimals=2)
+        return df
@@ -0,0 +1,340 @@
+""" Cost based planning of Report ETL runs """
+from datetime import datetime
+import json
+import logging
+import math
+import resource
+import statistics
+import threading
+import time
+from typing import NamedTuple
+
+from app.common.constants import TransformEngines
+from app.common.listing_index import ListingCache
+from app.common.storage import StorageConnector
+from app.transformers.report_transformer import ReportETL
+
+# Source bytes read per second by one worker if no run was recorded yet
+DEFAULT_THROUGHPUT = 20 * 1024 * 1024
+# Peak memory per source byte if no run was recorded yet, the pandas
+# source data and the report take a multiple of the csv size
+DEFAULT_MEMORY_FACTOR = 4.0
+# Source files per read worker, small runs are not worth the threads
+FILES_PER_WORKER = 8
+MAX_READ_WORKERS = 16
+# Number of runs kept in the history
+HISTORY_RUNS = 20
+# Seconds between two samples of the memory of a run
+MEMORY_SAMPLE_SECONDS = 0.05
+
+
+def current_memory_bytes():
+    """
+    Returns the resident memory of the process. Where it is not available,
+    the peak memory of the process is returned.
+
+    Returns:
+        memory_bytes (int): memory of the process in bytes
+    """
+    try:
+        with open('/proc/self/statm', encoding='ascii') as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler():
+    """
+    Samples the resident memory of the process in a thread, so that the
+    peak of a run is measured even if an earlier run of the same process
+    took more memory
+    """
+    def __init__(self, interval: float=MEMORY_SAMPLE_SECONDS) -> None:
+        """
+        Constructor for MemorySampler
+
+        Args:
+            interval (float, optional): seconds between two samples.
+                                        Defaults to MEMORY_SAMPLE_SECONDS.
+        """
+        self.interval = interval
+        self.baseline_bytes = None
+        self.peak_bytes = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        """
+        Keeps the highest sample until the sampler is stopped
+        """
+        while not self._stop_event.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_memory_bytes())
+
+    def start(self):
+        """
+        Records the memory before the run and starts sampling
+        """
+        self.baseline_bytes = self.peak_bytes = current_memory_bytes()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling
+
+        Returns:
+            peak_bytes (int): highest memory of the process since start
+        """
+        self._stop_event.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_memory_bytes())
+        return self.peak_bytes
+
+
+class RunPlan(NamedTuple):
+    """Class for the plan of a Report ETL run
+
+    Args:
+        dates (int): number of extracted dates
+        files (int): number of source files
+        bytes (int): size of the source files in bytes
+        memory_bytes (int): estimated peak memory above the memory of the process
+                            before the run in bytes
+        seconds (float): estimated wall time in seconds
+        read_workers (int): number of source files read in parallel
+        pipeline (bool): whether the run processes batches of one day
+        history_runs (int): number of previous runs the estimates are based on
+    """
+    dates: int
+    files: int
+    bytes: int
+    memory_bytes: int
+    seconds: float
+    read_workers: int
+    pipeline: bool
+    history_runs: int
+
+    def explain(self):
+        """
+        Returns a readable description of the plan
+        """
+        based_on = (f'{self.history_runs} previous runs' if self.history_runs
+                    else 'default estimates')
+        return '\n'.join([
+            f'Dates:          {self.dates}',
+            f'Source files:   {self.files}',
+            f'Source bytes:   {self.bytes}',
+            f'Peak memory:    {self.memory_bytes} bytes above baseline (estimated)',
+            f'Wall time:      {self.seconds:.1f} seconds (estimated)',
+            f'Read workers:   {self.read_workers}',
+            f'Batching:       {"one day at a time" if self.pipeline else "all dates at once"}',
+            f'Based on:       {based_on}'
+        ])
+
+
+class RunHistory():
+    """
+    Class for the statistics of previous runs stored
+    as JSON object in a S3 Bucket
+    """
+    def __init__(self, s3_bucket: StorageConnector, key: str) -> None:
+        """
+        Constructor for RunHistory
+
+        Args:
+            s3_bucket (StorageConnector): connection to the storage holding the history
+            key (str): key of the history object
+        """
+        self.s3_bucket = s3_bucket
+        self.key = key
+
+    def read(self):
+        """
+        Reads the recorded runs
+
+        Returns:
+            runs (list): statistics of the previous runs, oldest first
+        """
+        try:
+            return json.loads(self.s3_bucket.read_text(self.key))
+        except self.s3_bucket.not_found_error:
+            return []
+
+    def append(self, run: dict):
+        """
+        Records a run and keeps the last HISTORY_RUNS runs
+
+        Args:
+            run (dict): statistics of the run
+        """
+        runs = (self.read() + [run])[-HISTORY_RUNS:]
+        self.s3_bucket.write_text(json.dumps(runs), self.key)
+        return runs
+
+    @staticmethod
+    def throughput(runs: list):
+        """
+        Returns the source bytes read per second and worker of the runs
+
+        Args:
+            runs (list): statistics of the runs
+        """
+        runs = [run for run in runs if run['seconds'] > 0 and run['bytes'] > 0]
+        if not runs:
+            return DEFAULT_THROUGHPUT
+        return sum(run['bytes'] for run in runs) / sum(
+            run['seconds'] * run['read_workers'] for run in runs)
+
+    @staticmethod
+    def memory_factor(runs: list):
+        """
+        Returns the median ratio of the memory taken by the runs to the source
+        bytes held in memory. The memory of the process before the run, e.g.
+        of the imported modules, is not taken by the source bytes and is
+        subtracted from the peak. Pipelined runs only hold the source bytes
+        of one day.
+
+        Args:
+            runs (list): statistics of the runs
+        """
+        factors = [
+            max(run['peak_memory_bytes'] - run.get('baseline_memory_bytes', 0), 0)
+            * (run['dates'] if run['pipeline'] else 1) / run['bytes']
+            for run in runs if run['bytes'] > 0
+        ]
+        return statistics.median(factors) if factors else DEFAULT_MEMORY_FACTOR
+
+
+class ReportPlanner():
+    """
+    Estimates files, bytes, memory and wall time of a Report ETL run from the
+    listing of the source files and the history of previous runs. The number
+    of read workers and the pipelined mode are chosen from the estimates.
+    A run switched to the pipelined mode still writes one report per run,
+    so the output does not depend on the plan. The run reuses the listing
+    of the plan.
+    """
+    def __init__(self, report_etl: ReportETL, history: RunHistory=None,
+                 max_read_workers: int=MAX_READ_WORKERS) -> None:
+        """
+        Constructor for ReportPlanner
+
+        Args:
+            report_etl (ReportETL): ReportETL instance that should be planned
+            history (RunHistory, optional): history of previous runs. Defaults to
+                                            the meta key with suffix .history.json.
+            max_read_workers (int, optional): maximum number of read workers
+        """
+        self._logger = logging.getLogger(__name__)
+        self.report_etl = report_etl
+        self.history = history or RunHistory(report_etl.dest_bucket,
+                                             f'{report_etl.meta_key}.history.json')
+        self.max_read_workers = max_read_workers
+        self._listings = {}
+
+    def plan(self):
+        """
+        Creates the plan of the run
+
+        Returns:
+            plan (RunPlan): estimates and chosen settings of the run
+        """
+        report_etl = self.report_etl
+        proc_args = report_etl.proc_args
+        self._listings = {
+            dt: report_etl.src_bucket.list_objects_by_prefix(dt)
+            for dt in report_etl.extract_date_list
+        }
+        sizes = {
+            key: size
+            for objects in self._listings.values()
+            for key, (size, _) in objects.items()
+        }
+        source_bytes = sum(sizes.values())
+        runs = self.history.read()
+        read_workers = max(1, min(self.max_read_workers,
+                                  math.ceil(len(sizes) / FILES_PER_WORKER)))
+        memory_bytes = int(source_bytes * RunHistory.memory_factor(runs))
+        # only the plain pandas run can be switched to daily batches
+        pipeline = proc_args.pipeline or (
+            proc_args.plan_memory_limit is not None
+            and memory_bytes > proc_args.plan_memory_limit
+            and proc_args.transform_engine == TransformEngines.PANDAS.value
+            and proc_args.memory_budget is None
+            and proc_args.cache_dir is None
+            and proc_args.checkpoint_dir is None
+        )
+        if pipeline and report_etl.extract_date_list:
+            # only one day is held in memory
+            memory_bytes //= len(report_etl.extract_date_list)
+        plan = RunPlan(
+            dates=len(report_etl.extract_date_list),
+            files=len(sizes),
+            bytes=source_bytes,
+            memory_bytes=memory_bytes,
+            seconds=source_bytes / (RunHistory.throughput(runs) * read_workers),
+            read_workers=read_workers,
+            pipeline=pipeline,
+            history_runs=len(runs)
+        )
+        self._logger.info('Planned run: %s', plan)
+        return plan
+
+    def apply(self, plan: RunPlan):
+        """
+        Sets the chosen settings of a plan on the ReportETL instance. A run
+        switched to the pipelined mode writes the reports once per run.
+
+        Args:
+            plan (RunPlan): plan of the run
+        """
+        proc_args = self.report_etl.proc_args
+        switched = plan.pipeline and not proc_args.pipeline
+        if switched:
+            self._logger.info('The estimated memory exceeds the limit, the run processes '
+                              'one day at a time and writes the reports once per run.')
+        self.report_etl.proc_args = proc_args._replace(
+            read_workers=plan.read_workers, pipeline=plan.pipeline,
+            pipeline_daily_reports=proc_args.pipeline_daily_reports and not switched)
+
+    def run(self, plan: RunPlan=None):
+        """
+        Runs the Report ETL with the settings of a plan and records the
+        statistics of the run in the history
+
+        Args:
+            plan (RunPlan, optional): plan of the run. Defaults to a new plan.
+        """
+        plan = plan or self.plan()
+        self.apply(plan)
+        report_etl = self.report_etl
+        src_bucket = report_etl.src_bucket
+        # the run extracts the files listed by the plan
+        report_etl.src_bucket = ListingCache(src_bucket, self._listings)
+        sampler = MemorySampler()
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            report_etl.etl_report()
+        finally:
+            peak_memory_bytes = sampler.stop()
+            report_etl.src_bucket = src_bucket
+            self._listings = {}
+        seconds = time.perf_counter() - start
+        self._logger.info('Run finished in %.1f seconds, estimated were %.1f seconds.',
+                          seconds, plan.seconds)
+        self.history.append({
+            'run_at': datetime.today().strftime('%Y-%m-%d %H:%M:%S'),
+            'dates': plan.dates,
+            'files': plan.files,
+            'bytes': plan.bytes,
+            'seconds': seconds,
+            'read_workers': plan.read_workers,
+            'pipeline': plan.pipeline,
+            'peak_memory_bytes': peak_memory_bytes,
+            'baseline_memory_bytes': sampler.baseline_bytes
+        })
+
+        return True
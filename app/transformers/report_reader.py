@@ -0,0 +1,211 @@
+""" Readers of the report files for downstream consumers """
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+from app.common.constants import S3FileTypes
+from app.common.report_index import INDEX_SUFFIX, ReportIndex
+from app.common.storage import StorageConnector
+from app.transformers.report_transformer import DestinationConfig
+
+
+class ReportReader():
+    """
+    Reads the rows of one ISIN from the reports written by IndexedStorageSink.
+    The sidecar indexes are read once and skip the reports without the ISIN
+    or outside the date range, only the row groups of the ISIN are fetched
+    from the other reports.
+    """
+    def __init__(self, storage: StorageConnector, dest_args: DestinationConfig,
+                 max_workers: int=8) -> None:
+        """
+        Constructor for ReportReader
+
+        Args:
+            storage (StorageConnector): storage of the reports
+            dest_args (DestinationConfig): destination configuration of the reports
+            max_workers (int, optional): number of reports read in parallel. Defaults to 8.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.storage = storage
+        self.dest_args = dest_args
+        self.max_workers = max_workers
+        self.row_groups_read = 0
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def indexes(self, refresh: bool=False):
+        """
+        Returns the indexes of all reports, reading the indexes of new reports
+
+        Args:
+            refresh (bool, optional): whether reports written since the last
+                                      call are looked for. Defaults to False.
+
+        Returns:
+            indexes (list): ReportIndex of every report in key order
+        """
+        with self._lock:
+            if refresh or not self._indexes:
+                for key in self.storage.list_files_by_prefix(self.dest_args.dest_key):
+                    if key.endswith(INDEX_SUFFIX) and key not in self._indexes:
+                        self._indexes[key] = ReportIndex.from_json(self.storage.read_text(key))
+            return [self._indexes[key] for key in sorted(self._indexes)]
+
+    def get(self, isin: str, start: str=None, end: str=None, refresh: bool=False):
+        """
+        Returns the rows of an ISIN in a date range from all reports
+
+        Args:
+            isin (str): ISIN
+            start (str, optional): first date in the date format of the reports.
+                                   Defaults to the first date of the reports.
+            end (str, optional): last date in the date format of the reports.
+                                 Defaults to the last date of the reports.
+            refresh (bool, optional): whether reports written since the last
+                                      lookup are included. Defaults to False.
+
+        Returns:
+            df (pd.DataFrame): rows of the ISIN sorted by date
+        """
+        lookups = [
+            (index, row_groups)
+            for index in self.indexes(refresh)
+            for row_groups in [index.row_groups_of(isin, start, end)]
+            if row_groups
+        ]
+        # Reading the row groups of the ISIN from the reports in parallel
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = list(executor.map(
+                lambda lookup: self.storage.read_parquet(
+                    lookup[0].key, filters=self._filters(lookup[0], isin, start, end),
+                    row_groups=lookup[1]),
+                lookups))
+        self.row_groups_read += sum(len(row_groups) for _, row_groups in lookups)
+        self._logger.info('Read %s row groups of %s reports for %s.',
+                          sum(len(row_groups) for _, row_groups in lookups),
+                          len(lookups), isin)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)\
+            .sort_values(lookups[0][0].date_column, kind='stable', ignore_index=True)
+
+    @staticmethod
+    def _filters(index: ReportIndex, isin: str, start: str=None, end: str=None):
+        """
+        Returns the row filters of a lookup on the columns of an indexed report
+        """
+        filters = [(index.isin_column, '==', isin)]
+        if start is not None:
+            filters.append((index.date_column, '>=', start))
+        if end is not None:
+            filters.append((index.date_column, '<=', end))
+        return filters
+
+
+class MappedReportReader():
+    """
+    Keeps local copies of the feather (Arrow IPC) reports and memory maps
+    them. A report is only downloaded if its ETag changed, loading it again
+    maps the local copy without reading or decoding it. Uncompressed
+    reports are loaded without copies, buffers compressed with lz4 or zstd
+    are decompressed while they are loaded.
+    """
+    def __init__(self, storage: StorageConnector, dest_args: DestinationConfig,
+                 local_dir: str) -> None:
+        """
+        Constructor for MappedReportReader
+
+        Args:
+            storage (StorageConnector): storage of the reports
+            dest_args (DestinationConfig): destination configuration of the reports
+            local_dir (str): directory of the local copies, created if missing
+        """
+        self._logger = logging.getLogger(__name__)
+        self.storage = storage
+        self.dest_args = dest_args
+        self.local_dir = local_dir
+        self.downloads = 0
+        os.makedirs(local_dir, exist_ok=True)
+
+    def _path(self, key: str):
+        """
+        Returns the path of the local copy of a report
+        """
+        return os.path.join(self.local_dir, *key.split('/'))
+
+    def reports(self):
+        """
+        Returns the ETags of the feather reports by key
+
+        Returns:
+            etags (dict): ETag by key of all feather reports under dest_key
+        """
+        return {
+            key: etag
+            for key, etag in self.storage.list_etags_by_prefix(self.dest_args.dest_key).items()
+            if key.endswith(f'.{S3FileTypes.FEATHER.value}')
+        }
+
+    def sync(self, key: str=None, etag: str=None):
+        """
+        Downloads a report unless the local copy has the same ETag
+
+        Args:
+            key (str, optional): key of the report. Defaults to the latest report.
+            etag (str, optional): ETag of the report. Defaults to the listed ETag.
+
+        Returns:
+            path (str): path of the local copy, None if there is no report
+        """
+        if key is None or etag is None:
+            etags = self.reports()
+            if key is None:
+                if not etags:
+                    return None
+                # the keys end with the creation time of the reports
+                key = max(etags)
+            etag = etags[key]
+        path = self._path(key)
+        etag_path = f'{path}.etag'
+        try:
+            with open(etag_path, 'r', encoding='utf-8') as file:
+                if file.read() == etag and os.path.exists(path):
+                    return path
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # replacing the copy keeps tables mapping the previous copy valid
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(self.storage.read_bytes(key))
+        os.replace(tmp_path, path)
+        with open(etag_path, 'w', encoding='utf-8') as file:
+            file.write(etag)
+        self.downloads += 1
+        self._logger.info('Report %s synced to %s.', key, path)
+        return path
+
+    def load(self, key: str=None, columns: list=None):
+        """
+        Syncs a report and returns it as memory mapped Arrow table
+
+        Args:
+            key (str, optional): key of the report. Defaults to the latest report.
+            columns (list, optional): columns that should be read. Defaults to all columns.
+
+        Returns:
+            table (pa.Table): report, None if there is no report
+        """
+        path = self.sync(key)
+        if path is None:
+            return None
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table
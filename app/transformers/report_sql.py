@@ -0,0 +1,115 @@
+""" Report transformation as one query on the embedded DuckDB engine """
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.transformers.report_compact import RAW_PRICE_DECIMALS
+
+# Column of the source table with the row numbers, breaking ties of equal times
+ROW_COLUMN = '__row'
+
+
+def _quote(name: str):
+    """
+    Quotes a column name for the use in SQL
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def report_query(src_args, dest_args, compact_columns: list=()):
+    """
+    Creates the SQL query calculating the report from the table "source"
+    with the row numbers of the source data in ROW_COLUMN
+
+    Args:
+        src_args (SourceConfig): NamedTuple class with source configuration data
+        dest_args (DestinationConfig): NamedTuple class with destination/target
+                                       configuration data
+        compact_columns (list, optional): float32 encoded price columns that are
+                                          restored to double
+
+    Returns:
+        query (str): SQL query with the first report date as parameter
+    """
+    isin = _quote(src_args.src_col_isin)
+    date = _quote(src_args.src_col_date)
+    # equal times resolve to the first and last row like the pandas engine
+    time = f'({_quote(src_args.src_col_time)}, {_quote(ROW_COLUMN)})'
+    op_price = _quote(dest_args.dest_col_op_price)
+    prev_op_price = f'lag({op_price}) OVER (PARTITION BY {isin} ORDER BY {date})'
+    # Rounding half to even after scaling like numpy.round does
+    rounded = lambda col: f'round_even({col} * 100, 0) / 100'
+    not_null = ' AND '.join(f'{_quote(col)} IS NOT NULL' for col in src_args.src_columns)
+    # Restoring float32 encoded prices like restore_types does
+    price = lambda col: (
+        f'round_even(CAST({_quote(col)} AS DOUBLE) * {10 ** RAW_PRICE_DECIMALS}, 0)'
+        f' / {10 ** RAW_PRICE_DECIMALS}'
+        if col in compact_columns else _quote(col)
+    )
+    query = f"""
+        WITH daily AS (
+            SELECT
+                {isin},
+                {date},
+                arg_min({price(src_args.src_col_start_price)}, {time}) AS {op_price},
+                arg_max({price(src_args.src_col_start_price)}, {time})
+                    AS {_quote(dest_args.dest_col_cls_price)},
+                min({price(src_args.src_col_min_price)})
+                    AS {_quote(dest_args.dest_col_min_price)},
+                max({price(src_args.src_col_max_price)})
+                    AS {_quote(dest_args.dest_col_max_price)},
+                CAST(sum({_quote(src_args.src_col_traded_vol)}) AS BIGINT)
+                    AS {_quote(dest_args.dest_col_daily_trd_vol)}
+            FROM source
+            WHERE {not_null}
+            GROUP BY {isin}, {date}
+        )
+        SELECT
+            {isin},
+            {date},
+            {rounded(op_price)} AS {op_price},
+            {rounded(_quote(dest_args.dest_col_cls_price))}
+                AS {_quote(dest_args.dest_col_cls_price)},
+            {rounded(_quote(dest_args.dest_col_min_price))}
+                AS {_quote(dest_args.dest_col_min_price)},
+            {rounded(_quote(dest_args.dest_col_max_price))}
+                AS {_quote(dest_args.dest_col_max_price)},
+            {_quote(dest_args.dest_col_daily_trd_vol)},
+            {rounded(f'({op_price} - {prev_op_price}) / {prev_op_price} * 100')}
+                AS {_quote(dest_args.dest_col_chg_prev_cls)}
+        FROM daily
+        QUALIFY {date} >= ?
+        ORDER BY {isin}, {date}
+    """
+    return query
+
+
+def transform_with_duckdb(df: pd.DataFrame, src_args, dest_args, extract_date: str):
+    """
+    Calculates the report with an in-process DuckDB connection
+    from the source data converted to an Arrow table
+
+    Args:
+        df (pd.DataFrame): source data
+        src_args (SourceConfig): NamedTuple class with source configuration data
+        dest_args (DestinationConfig): NamedTuple class with destination/target
+                                       configuration data
+        extract_date (str): first date of the report
+
+    Returns:
+        df: report
+    """
+    # imported here as DuckDB is only needed for this engine
+    import duckdb
+
+    source = pa.Table.from_pandas(df.loc[:, src_args.src_columns], preserve_index=False)
+    source = source.append_column(ROW_COLUMN, pa.array(np.arange(len(source), dtype=np.int64)))
+    compact_columns = [col for col in src_args.src_columns if df[col].dtype == np.float32]
+    with duckdb.connect() as con:
+        con.register('source', source)
+        report = con.execute(report_query(src_args, dest_args, compact_columns),
+                             [extract_date]).arrow()
+    if not isinstance(report, pa.Table):
+        # newer DuckDB versions return a record batch reader
+        report = report.read_all()
+    return report.to_pandas()
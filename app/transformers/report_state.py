@@ -0,0 +1,178 @@
+""" Mergeable per ISIN and day aggregate state of the source data """
+import logging
+import posixpath
+
+import numpy as np
+import pandas as pd
+
+from app.common.constants import S3FileTypes
+from app.common.storage import StorageConnector
+from app.transformers.report_compact import concat_compact, restore_types
+
+# Columns of the aggregate state besides the ISIN and date columns of the source
+STATE_OPEN = 'open_price'
+STATE_OPEN_TIME = 'open_time'
+STATE_CLOSE = 'close_price'
+STATE_CLOSE_TIME = 'close_time'
+STATE_MIN = 'min_price'
+STATE_MAX = 'max_price'
+STATE_VOLUME = 'traded_volume'
+# Column of the stored state with the last source key that was folded into it
+STATE_LAST_KEY = 'last_key'
+
+
+def merge_states(states: list, src_args):
+    """
+    Merges aggregate states. The merge is associative: the opening price is the
+    one with the earliest time, the closing price the one with the latest time,
+    prices are the minimum and maximum and volumes are summed up. On equal times
+    the opening price of the first and the closing price of the last state win.
+
+    Args:
+        states (list): aggregate states, None entries are ignored
+        src_args (SourceConfig): NamedTuple class with source configuration data
+
+    Returns:
+        state (pd.DataFrame): aggregate state sorted by ISIN and date
+    """
+    keys = [src_args.src_col_isin, src_args.src_col_date]
+    combined = concat_compact(states)
+    opening = combined.sort_values(by=[STATE_OPEN_TIME], kind='stable')\
+        .groupby(keys, as_index=False)[[STATE_OPEN, STATE_OPEN_TIME]].first()
+    closing = combined.sort_values(by=[STATE_CLOSE_TIME], kind='stable')\
+        .groupby(keys, as_index=False)[[STATE_CLOSE, STATE_CLOSE_TIME]].last()
+    extremes = combined.groupby(keys, as_index=False).agg(**{
+        STATE_MIN: (STATE_MIN, 'min'),
+        STATE_MAX: (STATE_MAX, 'max'),
+        STATE_VOLUME: (STATE_VOLUME, 'sum')
+    })
+
+    return opening.merge(closing, on=keys).merge(extremes, on=keys)
+
+
+def source_state(df: pd.DataFrame, src_args):
+    """
+    Creates the aggregate state of source data, e.g. of one source file
+
+    Args:
+        df (pd.DataFrame): source data
+        src_args (SourceConfig): NamedTuple class with source configuration data
+
+    Returns:
+        state (pd.DataFrame): aggregate state sorted by ISIN and date
+    """
+    df = df.loc[:, src_args.src_columns].dropna()
+    rows = pd.DataFrame({
+        src_args.src_col_isin: df[src_args.src_col_isin],
+        src_args.src_col_date: df[src_args.src_col_date],
+        STATE_OPEN: df[src_args.src_col_start_price],
+        STATE_OPEN_TIME: df[src_args.src_col_time],
+        STATE_CLOSE: df[src_args.src_col_start_price],
+        STATE_CLOSE_TIME: df[src_args.src_col_time],
+        STATE_MIN: df[src_args.src_col_min_price],
+        STATE_MAX: df[src_args.src_col_max_price],
+        # volumes are summed over the whole day
+        STATE_VOLUME: df[src_args.src_col_traded_vol].astype(np.int64)
+    })
+
+    return merge_states([rows], src_args)
+
+
+def state_to_daily(state: pd.DataFrame, src_args, dest_args):
+    """
+    Creates the daily aggregates of the report from an aggregate state
+
+    Args:
+        state (pd.DataFrame): aggregate state
+        src_args (SourceConfig): NamedTuple class with source configuration data
+        dest_args (DestinationConfig): NamedTuple class with destination/target
+                                       configuration data
+
+    Returns:
+        daily (pd.DataFrame): aggregates like ReportETL.aggregate_report creates them
+    """
+    daily = pd.DataFrame({
+        src_args.src_col_isin: state[src_args.src_col_isin],
+        src_args.src_col_date: state[src_args.src_col_date],
+        dest_args.dest_col_op_price: state[STATE_OPEN],
+        dest_args.dest_col_cls_price: state[STATE_CLOSE],
+        dest_args.dest_col_min_price: state[STATE_MIN],
+        dest_args.dest_col_max_price: state[STATE_MAX],
+        dest_args.dest_col_daily_trd_vol: state[STATE_VOLUME]
+    })
+
+    return restore_types(daily, [
+        dest_args.dest_col_op_price,
+        dest_args.dest_col_cls_price,
+        dest_args.dest_col_min_price,
+        dest_args.dest_col_max_price
+    ], dest_args.dest_col_daily_trd_vol)
+
+
+class AggregateStateStore():
+    """
+    Class for storing the aggregate state of every day
+    as parquet file in the destination bucket
+    """
+    def __init__(self, s3_bucket: StorageConnector, prefix: str) -> None:
+        """
+        Constructor for AggregateStateStore
+
+        Args:
+            s3_bucket (StorageConnector): connection to the destination storage
+            prefix (str): prefix of the state files
+        """
+        self._logger = logging.getLogger(__name__)
+        self.s3_bucket = s3_bucket
+        self.prefix = prefix
+
+    @staticmethod
+    def prefix_of_report(dest_key: str):
+        """
+        Returns the prefix of the state files next to the files of a report
+
+        Args:
+            dest_key (str): basic key of the report files
+
+        Returns:
+            prefix (str): prefix of the state files
+        """
+        return posixpath.join(posixpath.dirname(dest_key), 'state/')
+
+    def state_key(self, dt: str):
+        """
+        Returns the key of the state file of a day
+        """
+        return f'{self.prefix}{dt}.parquet'
+
+    def read(self, dt: str):
+        """
+        Reads the state of a day
+
+        Args:
+            dt (str): date of the day
+
+        Returns:
+            state (pd.DataFrame): aggregate state or None if no state exists
+            last_key (str): last source key folded into the state or None
+        """
+        try:
+            state = self.s3_bucket.read_parquet(self.state_key(dt))
+        except self.s3_bucket.not_found_error:
+            return None, None
+        last_key = state[STATE_LAST_KEY].iloc[0]
+
+        return state.drop(columns=[STATE_LAST_KEY]), last_key
+
+    def write(self, dt: str, state: pd.DataFrame, last_key: str):
+        """
+        Writes the state of a day
+
+        Args:
+            dt (str): date of the day
+            state (pd.DataFrame): aggregate state
+            last_key (str): last source key folded into the state
+        """
+        self.s3_bucket.to_s3(state.assign(**{STATE_LAST_KEY: last_key}),
+                             self.state_key(dt), S3FileTypes.PARQUET.value)
+        self._logger.info('Aggregate state of %s written up to %s.', dt, last_key)
@@ -1,13 +1,32 @@
 """ Report ETL Component """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+import hashlib
+import inspect
+import json
 import logging
 from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
+from app.common.constants import TransformEngines, ReportTransforms
+from app.common.custom_exceptions import WrongEngineException, WrongTransformException
+from app.common.checkpoint import STAGE_DAYS, STAGE_LOAD, STAGE_TRANSFORM, StageCheckpoint
+from app.common.listing_index import LISTING_RECENT_DAYS, ListingCache, ListingIndex
+from app.common.memo_cache import MemoCache
 from app.common.meta_process import MetaProcess
-from app.common.s3 import S3BucketConnector
-from app.common.bq import BigQueryConnector
+from app.common.pipeline import Pipeline
+from app.common.sinks import SinkWriter, StorageSink
+from app.common.storage import StorageConnector
+from app.common.trading_calendar import create_trading_calendar
+from app.common.spill import SpillStore
+from app.transformers.report_compact import compact_source_data, concat_compact, restore_types
+from app.transformers.report_indicators import INDICATOR_WINDOW, IndicatorEngine
+from app.transformers.report_arrow import source_column_types, transform_with_arrow
+from app.transformers.report_sql import transform_with_duckdb
 
 class SourceConfig(NamedTuple):
     """Class for source configuration data
@@ -22,6 +41,12 @@ class SourceConfig(NamedTuple):
         src_col_min_price (str): column name for minimum price in source
         src_col_max_price (str): column name for maximum price in source
         src_col_traded_vol (str): column name for traded volumne in source
+        src_compression (str): compression codec of the source files (gzip|zstd).
+                               None detects the codec from the key suffix.
+        src_calendar (str): trading calendar of the source (all|weekdays|xetra).
+                            Only trading days are listed and written to the meta file.
+                            None plans every calendar day.
+        src_holidays (list): additional dates without trading
     """
 
     src_first_extract_date: str
@@ -33,6 +58,9 @@ class SourceConfig(NamedTuple):
     src_col_min_price: str
     src_col_max_price: str
     src_col_traded_vol: str
+    src_compression: str = None
+    src_calendar: str = None
+    src_holidays: list = None
 
 
 class DestinationConfig(NamedTuple):
@@ -51,6 +79,16 @@ class DestinationConfig(NamedTuple):
         dest_key (str): basic key of destination/target file
         dest_key_date_format (str): date format of destination/target file key
         dest_format (str): file format of the destination/taarget file
+                           (csv|parquet|feather)
+        dest_compression (str): compression codec of the destination/target file
+                                (gzip|zstd|lz4). csv files get the suffix of the codec.
+                                feather files take lz4 or zstd and are uncompressed
+                                by default.
+        dest_col_sma (str): column name for the moving average of the closing prices
+        dest_col_volatility (str): column name for the volatility of the daily returns in %
+        dest_col_vwap (str): column name for the volume weighted average price
+        dest_table (str): table of the report in table sinks, e.g. BigQuery.
+                          None uses the table of the sink.
     """
     dest_col_isin: str
     dest_col_date: str
@@ -63,25 +101,185 @@ class DestinationConfig(NamedTuple):
     dest_key: str
     dest_key_date_format: str
     dest_format: str
+    dest_compression: str = None
+    dest_col_sma: str = 'moving_avg_closing_price_eur'
+    dest_col_volatility: str = 'volatility_%'
+    dest_col_vwap: str = 'vwap_eur'
+    dest_table: str = None
+
+class ProcessingConfig(NamedTuple):
+    """Class for processing configuration data. Only one of memory_budget,
+    pipeline, cache_dir and checkpoint_dir can be set, each of them
+    extracts the source data its own way.
+
+    Args:
+        memory_budget (int): maximum size in bytes of the raw source data kept in memory
+                             before it is spilled to local files. None disables spilling.
+        spill_dir (str): local directory for spill files. None uses the
+                         temporary directory of the system.
+        transform_engine (str): engine calculating the report (pandas|duckdb|arrow).
+                                The arrow engine extracts, transforms and loads Arrow
+                                tables without converting them to pandas.
+        compact_raw (bool): whether the extracted pandas source data is reduced to the
+                            report columns with time as minutes since midnight and
+                            narrowed numeric types
+        pipeline (bool): whether extract, transform and load run concurrently on
+                         batches of one day. Only supported by the pandas engine.
+        pipeline_queue_size (int): maximum number of days waiting between two
+                                   pipeline stages
+        pipeline_daily_reports (bool): whether the pipeline writes one report per day.
+                                       Otherwise the reports of the days are written
+                                       as one report of the run like the other modes.
+        cache_dir (str): local directory caching the daily aggregates of every report
+                         by a fingerprint of the source files. None disables the cache.
+                         Only supported by the pandas engine.
+        cache_max_age_days (float): cache entries unused for longer are evicted
+        cache_max_bytes (int): maximum total size of the cache files
+        read_workers (int): number of source files read in parallel
+        plan (bool): whether the run planner chooses read_workers and the pipelined
+                     mode from the listing and the history of previous runs
+        plan_memory_limit (int): bytes of memory available to the run. The planner
+                                 switches to the pipelined mode above the limit.
+        indicators (bool): whether rolling indicators are added to the reports. Their
+                           state is stored next to the reports with the meta file update.
+        indicator_window (int): number of trading days of the indicator windows
+        checkpoint_dir (str): local directory keeping the daily aggregates and the
+                              reports of a run until its meta file update, so that a
+                              failed run resumes from the last completed stage or day.
+                              None disables the checkpoints. Only supported by the
+                              pandas engine.
+        listing_index (bool): whether the listings of past source dates are kept in an
+                              index next to the meta file, so every past date is listed
+                              once. The index is saved with the meta file update.
+        listing_recent_days (int): dates within the last days are always listed,
+                                   their files may still arrive
+    """
+    memory_budget: int = None
+    spill_dir: str = None
+    transform_engine: str = TransformEngines.PANDAS.value
+    compact_raw: bool = False
+    pipeline: bool = False
+    pipeline_queue_size: int = 2
+    pipeline_daily_reports: bool = True
+    cache_dir: str = None
+    cache_max_age_days: float = None
+    cache_max_bytes: int = None
+    read_workers: int = 1
+    plan: bool = False
+    plan_memory_limit: int = None
+    indicators: bool = False
+    indicator_window: int = INDICATOR_WINDOW
+    checkpoint_dir: str = None
+    listing_index: bool = False
+    listing_recent_days: int = LISTING_RECENT_DAYS
+
+
+class ReportDefinition(NamedTuple):
+    """Class for the definition of one report created from the shared extract
+
+    Args:
+        name (str): name of the report
+        dest_args (DestinationConfig): NamedTuple class with destination/target
+                                       configuration data of the report
+        transform (str): transformation creating the report (report1)
+    """
+    name: str
+    dest_args: DestinationConfig
+    transform: str = ReportTransforms.REPORT1.value
+
+
+@lru_cache(maxsize=None)
+def aggregate_code_version():
+    """
+    Returns a hash of the code creating the daily aggregates,
+    so that cached aggregates are invalidated by code changes
+
+    Returns:
+        code_version (str): hash of the source code
+    """
+    source = ''.join(inspect.getsource(func) for func in [
+        ReportETL.read_source,
+        ReportETL.aggregate_report,
+        compact_source_data,
+        restore_types
+    ])
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def is_sorted_by_date_time(df: pd.DataFrame, src_args: SourceConfig):
+    """
+    Checks in one pass if the source data is sorted by date and time
+
+    Args:
+        df (pd.DataFrame): source data
+        src_args (SourceConfig): source configuration with the date and time columns
+
+    Returns:
+        is_sorted (bool): whether every row is not earlier than the row before
+    """
+    dates = df[src_args.src_col_date].to_numpy()
+    times = df[src_args.src_col_time].to_numpy()
+    if len(dates) < 2:
+        return True
+    later_date = dates[1:] > dates[:-1]
+    same_date = dates[1:] == dates[:-1]
+    return bool(np.all(later_date | (same_date & (times[1:] >= times[:-1]))))
+
+
+def date_time_order(df: pd.DataFrame, src_args: SourceConfig):
+    """
+    Returns the row order of the source data by date and time. Date and time
+    are combined into one integer key, as numpy sorts integer keys with
+    timsort, which merges the presorted runs of the files, while pandas
+    sorts several columns with lexsort. Rows with equal date and time keep
+    their order.
+
+    Args:
+        df (pd.DataFrame): source data
+        src_args (SourceConfig): source configuration with the date and time columns
+
+    Returns:
+        order (np.ndarray): positions of the rows in date and time order
+    """
+    # the sorted codes of the values keep the order of dates and times
+    date_codes, _ = pd.factorize(df[src_args.src_col_date], sort=True)
+    time_codes, times = pd.factorize(df[src_args.src_col_time], sort=True)
+    key = date_codes.astype(np.int64) * max(len(times), 1) + time_codes
+    return np.argsort(key, kind='stable')
+
 
 class ReportETL():
     """
     Reads the Xetra data, transforms and writes the transformed data
     to destination in parquet format.
     """
-    def __init__(self, src_bucket: S3BucketConnector,
-                 dest_bucket: S3BucketConnector=None, meta_key: str=None,
-                 src_args: SourceConfig=None, dest_args: DestinationConfig=None) -> None:
+    def __init__(self, src_bucket: StorageConnector,
+                 dest_bucket: StorageConnector=None, meta_key: str=None,
+                 src_args: SourceConfig=None, dest_args: DestinationConfig=None,
+                 extract_date: str=None, extract_date_list: list=None,
+                 proc_args: ProcessingConfig=None, reports: list=None,
+                 sinks: list=None) -> None:
         """
         Constructor for ReportETL
 
         Args:
-            src_bucket (S3BucketConnector): connection to source S3 Bucket
-            dest_bucket (S3BucketConnector): connection to destination/target S3 Bucket
+            src_bucket (StorageConnector): connection to the source storage
+            dest_bucket (StorageConnector): connection to the destination/target storage
             meta_key (str): key of meta file
             src_args (SourceConfig): NamedTuple class with source configuration data
             dest_args (DestinationConfig): NamedTuple class with destination/target
                                         configuration data
+            extract_date (str, optional): first date of the report. Only used together
+                                          with extract_date_list.
+            extract_date_list (list, optional): dates to be extracted. If given, the
+                                                meta file is not consulted.
+            proc_args (ProcessingConfig, optional): NamedTuple class with processing
+                                                    configuration data
+            reports (list, optional): ReportDefinition instances that are created from
+                                      one extract. Defaults to report1 with dest_args.
+            sinks (list, optional): Sink instances every report is written to
+                                    concurrently. Defaults to the files of dest_format
+                                    in the destination storage.
         """
         self._logger = logging.getLogger(__name__)
 
@@ -89,15 +287,41 @@ class ReportETL():
         self.dest_bucket = dest_bucket
         self.meta_key = meta_key
         self.src_args = src_args
-        self.dest_args = dest_args
-        self.bq_conn = BigQueryConnector(project_id='circular-unity-dl18405', dataset_name='project2', table_name='stock_market')
-
-        self.extract_date, self.extract_date_list = MetaProcess\
-            .return_date_list(
-                self.src_args.src_first_extract_date,
-                self.meta_key,
-                self.dest_bucket
-            )
+        self.reports = reports or [ReportDefinition('report1', dest_args)]
+        self.dest_args = dest_args or self.reports[0].dest_args
+        self.proc_args = proc_args or ProcessingConfig()
+        if self.proc_args.listing_index:
+            # listings of past dates are answered from the index next to the meta file
+            self.src_bucket = ListingIndex(src_bucket, dest_bucket, f'{meta_key}.listing.json',
+                                           self.proc_args.listing_recent_days)
+        self.pipeline_stats = None
+        self._indicator_engines = {}
+        self._transforms = {
+            ReportTransforms.REPORT1.value: self.transform_to_report
+        }
+        for report in self.reports:
+            if report.transform not in self._transforms:
+                self._logger.info("The transformation %s of report %s is not supported!",
+                                  report.transform, report.name)
+                raise WrongTransformException
+        self.sink_writer = SinkWriter(sinks or [StorageSink('storage', self.dest_bucket)])
+        self.sink_writer.check_targets([report.dest_args for report in self.reports])
+        self.calendar = create_trading_calendar()
+        if self.src_args is not None:
+            self.calendar = create_trading_calendar(self.src_args.src_calendar,
+                                                    self.src_args.src_holidays)
+        self.load_stats = []
+
+        if extract_date_list is None:
+            self.extract_date, self.extract_date_list = MetaProcess\
+                .return_date_list(
+                    self.src_args.src_first_extract_date,
+                    self.meta_key,
+                    self.dest_bucket,
+                    self.calendar
+                )
+        else:
+            self.extract_date, self.extract_date_list = extract_date, extract_date_list
         self.meta_update_list = [
             d 
             for d in self.extract_date_list
@@ -112,6 +336,10 @@ class ReportETL():
             df: Pandas.DataFrame with the extracted data.
         """
         self._logger.info("Extracting source files started...")
+        if self.proc_args.transform_engine == TransformEngines.ARROW.value:
+            return self._extract_arrow()
+        if self.proc_args.memory_budget is not None:
+            return self._extract_budgeted()
         files = [
             object_name
             for dt in self.extract_date_list
@@ -120,119 +348,769 @@ class ReportETL():
         if not files:
             df = pd.DataFrame()
         else:
-            df = pd.concat(
-                [
-                    self.src_bucket.read_csv(object_name)
-                    for object_name in files
-                ],
-                ignore_index=True
-            )
+            df = concat_compact(self.read_sources(files))
         self._logger.info("Extracting source files finished...")
         return df
 
-    def transform_to_report(self, df: pd.DataFrame):
+    def read_source(self, object_name: str):
+        """
+        Reads a source file, compacted if compact_raw is set
+
+        Args:
+            object_name (str): key of the source file
+
+        Returns:
+            df: Pandas.DataFrame with the data of the file
+        """
+        df = self.src_bucket.read_csv(object_name, compression=self.src_args.src_compression)
+        if self.proc_args.compact_raw:
+            df = compact_source_data(df, self.src_args)
+        return df
+
+    def read_sources(self, object_names: list, read=None):
+        """
+        Reads source files, in parallel if read_workers is larger than one
+
+        Args:
+            object_names (list): keys of the source files
+            read (callable, optional): function reading one file.
+                                       Defaults to read_source.
+
+        Returns:
+            data (list): data of the files in the order of the keys
+        """
+        read = read or self.read_source
+        if self.proc_args.read_workers <= 1 or len(object_names) <= 1:
+            return [read(object_name) for object_name in object_names]
+        with ThreadPoolExecutor(max_workers=self.proc_args.read_workers) as executor:
+            return list(executor.map(read, object_names))
+
+    def _extract_arrow(self):
+        """
+        Reads the source data and concatenates them to one Arrow table.
+        All files are read with the same column types.
+
+        Returns:
+            table: pyarrow.Table with the extracted data.
+        """
+        column_types = source_column_types(self.src_args)
+        tables = self.read_sources(
+            [
+                object_name
+                for dt in self.extract_date_list
+                for object_name in self.src_bucket.list_files_by_prefix(dt)
+            ],
+            lambda object_name: self.src_bucket.read_csv_arrow(
+                object_name, column_types, compression=self.src_args.src_compression)
+        )
+        if not tables:
+            table = pa.table({col: pa.array([], column_types[col])
+                              for col in self.src_args.src_columns})
+        else:
+            table = pa.concat_tables(
+                [table.select(self.src_args.src_columns) for table in tables])
+        self._logger.info("Extracting source files finished...")
+        return table
+
+    def _extract_budgeted(self):
+        """
+        Reads the source data while keeping the resident raw data below
+        the memory budget. Whenever the budget is exceeded the data
+        in memory is spilled per day to local parquet files.
+
+        Returns:
+            data: Pandas.DataFrame with the extracted data if nothing had to
+                  be spilled, otherwise SpillStore with the extracted data per day.
+        """
+        spill_store = SpillStore(self.proc_args.spill_dir)
+        day_frames = {}
+        resident = 0
+        for dt in self.extract_date_list:
+            for object_name in self.src_bucket.list_files_by_prefix(dt):
+                data = self.read_source(object_name)
+                day_frames.setdefault(dt, []).append(data)
+                resident += data.memory_usage(deep=True).sum()
+                if resident > self.proc_args.memory_budget:
+                    self._logger.info('Memory budget exceeded with %s bytes.', resident)
+                    self._spill(day_frames, spill_store)
+                    resident = 0
+        if not spill_store.partitions():
+            spill_store.cleanup()
+            frames = [data for dt in day_frames for data in day_frames[dt]]
+            df = concat_compact(frames) if frames else pd.DataFrame()
+            self._logger.info("Extracting source files finished...")
+            return df
+        self._spill(day_frames, spill_store)
+        self._logger.info("Extracting source files finished...")
+        return spill_store
+
+    @staticmethod
+    def _spill(day_frames: dict, spill_store: SpillStore):
+        """
+        Moves the in memory data of every day to the spill store
+        """
+        for dt, frames in day_frames.items():
+            spill_store.spill(dt, concat_compact(frames))
+        day_frames.clear()
+
+    def transform_to_report(self, df, dest_args: DestinationConfig=None):
         """
         Applies the necessary transformations to create desired report
 
         Args:
-            df (pd.DataFrame): Data that will be used to create report
+            df (pd.DataFrame, pa.Table or SpillStore): Data that will be used to create report
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
 
         Returns:
             df: transformed data (report)
         """
+        dest_args = dest_args or self.dest_args
+        if isinstance(df, SpillStore):
+            return self._transform_spilled(df, dest_args)
+        if isinstance(df, pa.Table):
+            return self._transform_arrow(df, dest_args)
         if df.empty:
             self._logger.info('The dataframe is empty. No transformations will be applied.')
             return df
+        if self.proc_args.transform_engine == TransformEngines.ARROW.value:
+            return self._transform_arrow(pa.Table.from_pandas(df, preserve_index=False),
+                                         dest_args)
+        self._logger.info('Applying transformations to report source data for report 1 started...')
+        if self.proc_args.transform_engine == TransformEngines.PANDAS.value:
+            df = self.aggregate_report(df, dest_args)
+            df = self.finalize_report(df, dest_args)
+        elif self.proc_args.transform_engine == TransformEngines.DUCKDB.value:
+            df = transform_with_duckdb(df, self.src_args, dest_args, self.extract_date)
+        else:
+            self._logger.info("The transform engine %s is not supported!",
+                              self.proc_args.transform_engine)
+            raise WrongEngineException
+        self._logger.info('Applying transformations to report source data finished...')
+        return df
+
+    def _transform_arrow(self, table: pa.Table, dest_args: DestinationConfig=None):
+        """
+        Applies the report transformations with Arrow compute kernels
+
+        Args:
+            table (pa.Table): Data that will be used to create report
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            table: transformed data (report) as pyarrow.Table
+        """
+        dest_args = dest_args or self.dest_args
+        if table.num_rows == 0:
+            self._logger.info('The dataframe is empty. No transformations will be applied.')
+            return table
+        self._logger.info('Applying transformations to report source data for report 1 started...')
+        table = transform_with_arrow(table, self.src_args, dest_args, self.extract_date)
+        self._logger.info('Applying transformations to report source data finished...')
+        return table
+
+    def _transform_spilled(self, spill_store: SpillStore,
+                           dest_args: DestinationConfig=None):
+        """
+        Applies the report transformations to spilled data by aggregating
+        one day at a time and finalizing the concatenated daily aggregates.
+        The spilled data is kept, so that further reports can be created from it.
+
+        Args:
+            spill_store (SpillStore): spilled source data per day
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            df: transformed data (report)
+        """
+        dest_args = dest_args or self.dest_args
         self._logger.info('Applying transformations to report source data for report 1 started...')
+        aggregates = [
+            self.aggregate_report(day_df, dest_args)
+            for day_df in (concat_compact(spill_store.read_frames(dt))
+                           for dt in spill_store.partitions())
+            if not day_df.empty
+        ]
+        if not aggregates:
+            self._logger.info('The dataframe is empty. No transformations will be applied.')
+            return pd.DataFrame()
+        df = pd.concat(aggregates, ignore_index=True)\
+            .sort_values(by=[self.src_args.src_col_isin, self.src_args.src_col_date])\
+                .reset_index(drop=True)
+        df = self.finalize_report(df, dest_args)
+        self._logger.info('Applying transformations to report source data finished...')
+        return df
+
+    def aggregate_report(self, df: pd.DataFrame, dest_args: DestinationConfig=None):
+        """
+        Aggregates the source data per ISIN and day to opening price,
+        closing price, minimum price, maximum price and traded volume
+
+        Args:
+            df (pd.DataFrame): source data
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            df: aggregated data sorted by ISIN and day
+        """
+        dest_args = dest_args or self.dest_args
         # Filtering necessary source columns
         df = df.loc[:, self.src_args.src_columns]
         # Removing rows with missing values
         df.dropna(inplace=True)
-        # Calculating opening price per ISIN and day
-        df[self.dest_args.dest_col_op_price] = df\
-            .sort_values(by=[self.src_args.src_col_time])\
-                .groupby([
-                    self.src_args.src_col_isin,
-                    self.src_args.src_col_date
-                    ])[self.src_args.src_col_start_price]\
-                    .transform('first')
-        # Calculating closing price per ISIN and day
-        df[self.dest_args.dest_col_cls_price] = df\
-            .sort_values(by=[self.src_args.src_col_time])\
-                .groupby([
-                    self.src_args.src_col_isin,
-                    self.src_args.src_col_date
-                    ])[self.src_args.src_col_start_price]\
-                        .transform('last')
-        # Renaming columns
-        df.rename(columns={
-            self.src_args.src_col_min_price: self.dest_args.dest_col_min_price,
-            self.src_args.src_col_max_price: self.dest_args.dest_col_max_price,
-            self.src_args.src_col_traded_vol: self.dest_args.dest_col_daily_trd_vol
-            }, inplace=True)
+        # Source files are time ordered and read in key order, so the rows are
+        # usually sorted by date and time already and need no sort at all
+        if not is_sorted_by_date_time(df, self.src_args):
+            # the sort of one combined key merges the presorted runs of the files
+            self._logger.info('Source data is not ordered by date and time, merging it.')
+            df = df.iloc[date_time_order(df, self.src_args)]
         # Aggregating per ISIN and day -> opening price, closing price,
-        # minimum price, maximum price, traded volume
+        # minimum price, maximum price, traded volume. Opening and closing
+        # prices are the first and last prices in time order.
         df = df.groupby([
             self.src_args.src_col_isin,
             self.src_args.src_col_date], as_index=False)\
-                .agg({
-                    self.dest_args.dest_col_op_price: 'min',
-                    self.dest_args.dest_col_cls_price: 'min',
-                    self.dest_args.dest_col_min_price: 'min',
-                    self.dest_args.dest_col_max_price: 'max',
-                    self.dest_args.dest_col_daily_trd_vol: 'sum'})
+                .agg(**{
+                    dest_args.dest_col_op_price: (self.src_args.src_col_start_price, 'first'),
+                    dest_args.dest_col_cls_price: (self.src_args.src_col_start_price, 'last'),
+                    dest_args.dest_col_min_price: (self.src_args.src_col_min_price, 'min'),
+                    dest_args.dest_col_max_price: (self.src_args.src_col_max_price, 'max'),
+                    dest_args.dest_col_daily_trd_vol: (self.src_args.src_col_traded_vol, 'sum')})
+        # Restoring types of compacted source data
+        df = restore_types(df, [
+            dest_args.dest_col_op_price,
+            dest_args.dest_col_cls_price,
+            dest_args.dest_col_min_price,
+            dest_args.dest_col_max_price
+        ], dest_args.dest_col_daily_trd_vol)
+        return df
+
+    def finalize_report(self, df: pd.DataFrame, dest_args: DestinationConfig=None):
+        """
+        Adds the change to the previous closing price, rounds the values
+        and removes the days before extract_date
+
+        Args:
+            df (pd.DataFrame): aggregated data sorted by ISIN and day
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            df: report
+        """
+        dest_args = dest_args or self.dest_args
         # Change of current day's closing price compared to the
         # previous trading day's closing price in %
-        df[self.dest_args.dest_col_chg_prev_cls] = df\
+        df[dest_args.dest_col_chg_prev_cls] = df\
             .sort_values(by=[self.src_args.src_col_date])\
-                .groupby([self.src_args.src_col_isin])[self.dest_args.dest_col_op_price]\
+                .groupby([self.src_args.src_col_isin])[dest_args.dest_col_op_price]\
                     .shift(1)
-        df[self.dest_args.dest_col_chg_prev_cls] = (
-            df[self.dest_args.dest_col_op_price] \
-            - df[self.dest_args.dest_col_chg_prev_cls]
-            ) / df[self.dest_args.dest_col_chg_prev_cls ] * 100
+        df[dest_args.dest_col_chg_prev_cls] = (
+            df[dest_args.dest_col_op_price] \
+            - df[dest_args.dest_col_chg_prev_cls]
+            ) / df[dest_args.dest_col_chg_prev_cls ] * 100
         # Rounding to 2 decimals
         df = df.round(decimals=2)
         # Removing the day before extract_date
         df = df[df.Date >= self.extract_date].reset_index(drop=True)
-        self._logger.info('Applying transformations to report source data finished...')
         return df
 
-    def load(self, df: pd.DataFrame):
+    def add_indicators(self, df, report: ReportDefinition):
         """
-        Saves a Pandas DataFrame to the target system
+        Adds the rolling indicators to a report if indicators are enabled
 
         Args:
-            df (pd.DataFrame): Pandas DataFrame to be written
+            df (pd.DataFrame or pa.Table): report
+            report (ReportDefinition): definition of the report
+
+        Returns:
+            df: report with the indicator columns
+        """
+        if not self.proc_args.indicators:
+            return df
+        is_table = isinstance(df, pa.Table)
+        if is_table:
+            df = df.to_pandas()
+        if df.empty:
+            return pa.Table.from_pandas(df, preserve_index=False) if is_table else df
+        if report.name not in self._indicator_engines:
+            self._indicator_engines[report.name] = IndicatorEngine(
+                self.dest_bucket,
+                IndicatorEngine.state_key_of_report(report.dest_args.dest_key),
+                self.proc_args.indicator_window)
+        df = self._indicator_engines[report.name].add_indicators(
+            df, self.src_args, report.dest_args)
+        return pa.Table.from_pandas(df, preserve_index=False) if is_table else df
+
+    def reset_indicators(self):
+        """
+        Drops the indicator states, states not saved with the meta file
+        are read again by the next report with indicators
+        """
+        self._indicator_engines = {}
+
+    def load(self, df: pd.DataFrame, update_meta: bool=True,
+             dest_args: DestinationConfig=None, key_suffix: str='',
+             timestamp: bool=True, appends: bool=None):
+        """
+        Saves a Pandas DataFrame or Arrow table to the target system
+
+        Args:
+            df (pd.DataFrame or pa.Table): Pandas DataFrame or Arrow table to be written
+            update_meta (bool, optional): whether the meta file should be updated.
+                                          Defaults to True.
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+            key_suffix (str, optional): suffix of the target key, e.g. the report date
+                                        if one report is written per day
+            timestamp (bool, optional): whether the target key contains the time of the
+                                        run. Reports that are rewritten in place, e.g.
+                                        the report of the current day, use a stable key
+                                        without it. Defaults to True.
+            appends (bool, optional): True writes only to the sinks appending to their
+                                      target, False only to the other sinks.
+                                      Defaults to None (all sinks).
         """
-        # Creating target key
-        target_key = (
-            f'{self.dest_args.dest_key}'
-            f'{datetime.today().strftime(self.dest_args.dest_key_date_format)}.'
-            f'{self.dest_args.dest_format}'
+        dest_args = dest_args or self.dest_args
+        # Creating target key without the extension of the file format
+        run_time = (datetime.today().strftime(dest_args.dest_key_date_format)
+                    if timestamp else '')
+        key_stem = f'{dest_args.dest_key}{run_time}{key_suffix}'
+        # Write to all sinks, a failing required sink raises before the meta file update
+        results = self.sink_writer.write(df, key_stem, dest_args, appends)
+        self.load_stats.extend(results)
+        seconds = ', '.join(
+            f'{result.name} {result.prepare_seconds + result.commit_seconds:.3f}'
+            for result in results if result.commit_seconds is not None
         )
-        # Write to the destination
-        #self.dest_bucket.to_s3(df, target_key, self.dest_args.dest_format)
-        self.bq_conn.to_bq(df)
-        self._logger.info('Report for <%s> successfully written.', 
-                          datetime.today().strftime('%Y-%m-%d'))
+        self._logger.info('Report for <%s> successfully written. Seconds by sink: %s',
+                          datetime.today().strftime('%Y-%m-%d'), seconds)
         # update metafile
-        #MetaProcess.update_meta_file(self.meta_update_list, self.meta_key, self.dest_bucket)
-        self._logger.info('Report meta file succesfully updated.')
+        if update_meta:
+            self.update_meta()
         
         return True
+
+    def save_listing_index(self):
+        """
+        Saves the listings of past source dates if the listing index is enabled
+        """
+        src_bucket = self.src_bucket
+        if isinstance(src_bucket, ListingCache):
+            # the listings of the planner are passed on top of the index
+            src_bucket = src_bucket.storage
+        if isinstance(src_bucket, ListingIndex):
+            src_bucket.save()
+
+    def update_meta(self, date_list: list=None):
+        """
+        Updates the meta file with the processed dates
+
+        Args:
+            date_list (list, optional): processed dates. Defaults to meta_update_list.
+        """
+        date_list = date_list or self.meta_update_list
+        # the indicator state is stored with the meta file, so days are added once
+        for engine in self._indicator_engines.values():
+            engine.save_state()
+        self.save_listing_index()
+        MetaProcess.update_meta_file(date_list, self.meta_key, self.dest_bucket)
+        self._logger.info('Report meta file succesfully updated.')
         
 
-    def etl_report(self):
+    def etl_report(self, update_meta: bool=True, key_suffix: str='', timestamp: bool=True):
         """
-        Manage the ETL process to create report
+        Manage the ETL process to create the reports. The source data is
+        extracted once and shared by the transformations of all reports.
+
+        Args:
+            update_meta (bool, optional): whether the meta file should be updated
+                                          after the last report. Defaults to True.
+            key_suffix (str, optional): suffix of the report keys, e.g. the date range
+                                        if several runs write reports at the same time
+            timestamp (bool, optional): whether the report keys contain the time of the
+                                        run. Runs writing the same reports again without
+                                        it overwrite them. Defaults to True.
+
+        Raises:
+            ValueError: if more than one of pipeline, cache_dir, checkpoint_dir
+                        and memory_budget is set
         """
+        modes = [
+            name
+            for name, value in [('pipeline', self.proc_args.pipeline or None),
+                                ('cache_dir', self.proc_args.cache_dir),
+                                ('checkpoint_dir', self.proc_args.checkpoint_dir),
+                                ('memory_budget', self.proc_args.memory_budget)]
+            if value is not None
+        ]
+        if len(modes) > 1:
+            # every mode extracts the source data its own way, one would be ignored
+            raise ValueError(f'The processing settings {", ".join(modes)} can not be '
+                             'combined, set only one of them.')
+        if self.proc_args.pipeline:
+            return self._etl_report_pipelined(update_meta, key_suffix, timestamp)
+        if self.proc_args.cache_dir is not None:
+            return self._etl_report_cached(update_meta, key_suffix, timestamp)
+        if self.proc_args.checkpoint_dir is not None:
+            return self._etl_report_checkpointed(update_meta, key_suffix, timestamp)
         # Extract
-        df = self.extract()
-        # Transform
-        df = self.transform_to_report(df)
-        # Load
-        self.load(df)
-        
+        source = self.extract()
+        try:
+            for ind, report in enumerate(self.reports):
+                self._logger.info('Creating report %s...', report.name)
+                # Transform
+                df = self._transforms[report.transform](source, report.dest_args)
+                df = self.add_indicators(df, report)
+                # Load
+                self.load(df, update_meta=update_meta and ind == len(self.reports) - 1,
+                          dest_args=report.dest_args, key_suffix=key_suffix,
+                          timestamp=timestamp)
+        finally:
+            if isinstance(source, SpillStore):
+                source.cleanup()
+
+        return True
+
+    def _etl_report_pipelined(self, update_meta: bool=True, key_suffix: str='',
+                              timestamp: bool=True):
+        """
+        Runs extract, transform and load as a pipeline of daily batches, so that
+        downloading a day overlaps with transforming and loading the previous days.
+        Every report is written once per day, or once per run without
+        pipeline_daily_reports.
+
+        Args:
+            update_meta (bool, optional): whether the meta file should be updated
+                                          after the last day. Defaults to True.
+            key_suffix (str, optional): suffix of the report keys before the date
+            timestamp (bool, optional): whether the report keys contain the time of the run
+        """
+        if self.proc_args.transform_engine != TransformEngines.PANDAS.value:
+            self._logger.info("The transform engine %s is not supported by the pipeline!",
+                              self.proc_args.transform_engine)
+            raise WrongEngineException
+        pipeline = Pipeline([
+            ('extract', self._extract_days),
+            ('transform', self._transform_days),
+            ('load', lambda batches: self._load_days(batches, key_suffix, timestamp))
+        ], queue_size=self.proc_args.pipeline_queue_size)
+        self.pipeline_stats = pipeline.run()
+        if update_meta:
+            self.update_meta()
+
+        return True
+
+    def _extract_days(self, _):
+        """
+        Pipeline stage reading the source data of one day at a time
+
+        Yields:
+            dt (str), df (pd.DataFrame): date and source data of the date
+        """
+        for dt in self.extract_date_list:
+            frames = self.read_sources(self.src_bucket.list_files_by_prefix(dt))
+            if frames:
+                yield dt, concat_compact(frames)
+
+    def _transform_days(self, batches):
+        """
+        Pipeline stage creating the reports of one day at a time. The last
+        aggregate of every ISIN is kept for the change to the previous day.
+
+        Args:
+            batches (iterator): dates and source data of the dates
+
+        Yields:
+            dt (str), reports (dict): date and report of the date per report name
+        """
+        previous = {report.name: None for report in self.reports}
+        for dt, df in batches:
+            reports = {}
+            for report in self.reports:
+                reports[report.name], previous[report.name] = self.transform_day(
+                    df, dt, previous[report.name], report.dest_args)
+            if dt >= self.extract_date:
+                yield dt, {
+                    report.name: self.add_indicators(reports[report.name], report)
+                    for report in self.reports
+                }
+
+    def transform_day(self, df: pd.DataFrame, dt: str, previous: pd.DataFrame=None,
+                      dest_args: DestinationConfig=None):
+        """
+        Creates the report of one day from the source data of the day and
+        the last aggregate of every ISIN of the previous days
+
+        Args:
+            df (pd.DataFrame): source data of the day
+            dt (str): date of the day
+            previous (pd.DataFrame, optional): last aggregate per ISIN before the day
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            report_df (pd.DataFrame): report of the day
+            previous (pd.DataFrame): last aggregate per ISIN including the day
+        """
+        dest_args = dest_args or self.dest_args
+        daily = self.aggregate_report(df, dest_args)
+
+        return self.finalize_day(daily, dt, previous, dest_args)
+
+    def finalize_day(self, daily: pd.DataFrame, dt: str, previous: pd.DataFrame=None,
+                     dest_args: DestinationConfig=None):
+        """
+        Creates the report of one day from the aggregates of the day and
+        the last aggregate of every ISIN of the previous days
+
+        Args:
+            daily (pd.DataFrame): aggregates of the day sorted by ISIN
+            dt (str): date of the day
+            previous (pd.DataFrame, optional): last aggregate per ISIN before the day
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            report_df (pd.DataFrame): report of the day
+            previous (pd.DataFrame): last aggregate per ISIN including the day
+        """
+        dest_args = dest_args or self.dest_args
+        combined = pd.concat([previous, daily], ignore_index=True)
+        report_df = self.finalize_report(combined.copy(), dest_args)
+        report_df = report_df[report_df[self.src_args.src_col_date] == dt].reset_index(drop=True)
+        previous = combined.drop_duplicates(subset=[self.src_args.src_col_isin], keep='last')
+
+        return report_df, previous
+
+    def _load_days(self, batches, key_suffix: str='', timestamp: bool=True):
+        """
+        Pipeline stage writing the reports of one day at a time. Without
+        pipeline_daily_reports the reports of the days are written together
+        after the last day.
+
+        Args:
+            batches (iterator): dates and reports of the dates
+            key_suffix (str, optional): suffix of the report keys before the date
+            timestamp (bool, optional): whether the report keys contain the time of the run
+
+        Yields:
+            dt (str): date that was written
+        """
+        daily = self.proc_args.pipeline_daily_reports
+        day_reports = {report.name: [] for report in self.reports}
+        for dt, reports in batches:
+            for report in self.reports:
+                if daily:
+                    self.load(reports[report.name], update_meta=False,
+                              dest_args=report.dest_args, key_suffix=f'{key_suffix}_{dt}',
+                              timestamp=timestamp)
+                else:
+                    day_reports[report.name].append(reports[report.name])
+            yield dt
+        if not daily:
+            for report in self.reports:
+                df = pd.DataFrame()
+                if day_reports[report.name]:
+                    # the rows of one report are ordered by ISIN and date
+                    df = pd.concat(day_reports[report.name], ignore_index=True)\
+                        .sort_values(by=[self.src_args.src_col_isin, self.src_args.src_col_date],
+                                     kind='stable', ignore_index=True)
+                self.load(df, update_meta=False, dest_args=report.dest_args,
+                          key_suffix=key_suffix, timestamp=timestamp)
+
+    def day_fingerprint(self, etags: dict, dest_args: DestinationConfig=None):
+        """
+        Creates the fingerprint of the daily aggregates of a report from the ETags
+        of the source files of the day, the columns the aggregation reads and
+        writes and the code version. Other settings, e.g. the first extract date
+        or the calendar, do not change the aggregates of a day.
+
+        Args:
+            etags (dict): ETags by key of the source files of the day
+            dest_args (DestinationConfig, optional): destination configuration of the
+                                                     report. Defaults to dest_args of
+                                                     the instance.
+
+        Returns:
+            fingerprint (str): fingerprint of the daily aggregates
+        """
+        dest_args = dest_args or self.dest_args
+        payload = json.dumps({
+            'files': sorted(etags.items()),
+            'source': {
+                name: value for name, value in self.src_args._asdict().items()
+                if name == 'src_columns' or name.startswith('src_col_')
+            },
+            'destination': {
+                name: getattr(dest_args, name)
+                for name in ['dest_col_op_price', 'dest_col_cls_price', 'dest_col_min_price',
+                             'dest_col_max_price', 'dest_col_daily_trd_vol']
+            },
+            'compact_raw': self.proc_args.compact_raw,
+            'code_version': aggregate_code_version()
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _aggregate_days(self, get_daily, put_daily):
+        """
+        Returns the daily aggregates of every report. The aggregates are looked
+        up by their fingerprints first, only the source files of days with a
+        missing aggregate are read, once for all reports.
+
+        Args:
+            get_daily (callable): returns the stored aggregates of a fingerprint or None
+            put_daily (callable): stores the aggregates of a fingerprint
+
+        Returns:
+            aggregates (dict): daily aggregates in date order by report name
+        """
+        aggregates = {report.name: [] for report in self.reports}
+        for dt in self.extract_date_list:
+            etags = self.src_bucket.list_etags_by_prefix(dt)
+            if not etags:
+                continue
+            day_df = None
+            for report in self.reports:
+                fingerprint = self.day_fingerprint(etags, report.dest_args)
+                daily = get_daily(fingerprint)
+                if daily is None:
+                    if day_df is None:
+                        day_df = concat_compact(self.read_sources(list(etags)))
+                    daily = self.aggregate_report(day_df, report.dest_args)
+                    put_daily(fingerprint, daily)
+                aggregates[report.name].append(daily)
+        return aggregates
+
+    def _report_of_aggregates(self, aggregates: list, dest_args: DestinationConfig):
+        """
+        Creates a report without indicators from the daily aggregates
+
+        Args:
+            aggregates (list): daily aggregates of the report
+            dest_args (DestinationConfig): destination configuration of the report
+
+        Returns:
+            df (pd.DataFrame): report, empty if there are no aggregates
+        """
+        if not aggregates:
+            self._logger.info('The dataframe is empty. No transformations will be applied.')
+            return pd.DataFrame()
+        df = pd.concat(aggregates, ignore_index=True)\
+            .sort_values(by=[self.src_args.src_col_isin, self.src_args.src_col_date])\
+                .reset_index(drop=True)
+        return self.finalize_report(df, dest_args)
+
+    def _etl_report_cached(self, update_meta: bool=True, key_suffix: str='',
+                           timestamp: bool=True):
+        """
+        Runs extract, transform and load with the daily aggregates of every report
+        taken from the cache. Only the source files of days whose fingerprint is
+        not cached are read and aggregated.
+
+        Args:
+            update_meta (bool, optional): whether the meta file should be updated
+                                          after the last report. Defaults to True.
+            key_suffix (str, optional): suffix of the report keys
+            timestamp (bool, optional): whether the report keys contain the time of the run
+        """
+        if self.proc_args.transform_engine != TransformEngines.PANDAS.value:
+            self._logger.info("The transform engine %s is not supported by the cache!",
+                              self.proc_args.transform_engine)
+            raise WrongEngineException
+        max_age_days = self.proc_args.cache_max_age_days
+        cache = MemoCache(self.proc_args.cache_dir,
+                          max_age_days * 86400 if max_age_days is not None else None,
+                          self.proc_args.cache_max_bytes)
+        aggregates = self._aggregate_days(cache.get, cache.put)
+        self._logger.info('Daily aggregates: %s taken from the cache, %s calculated.',
+                          cache.hits, cache.misses)
+        cache.evict()
+        for ind, report in enumerate(self.reports):
+            self._logger.info('Creating report %s...', report.name)
+            df = self._report_of_aggregates(aggregates[report.name], report.dest_args)
+            df = self.add_indicators(df, report)
+            self.load(df, update_meta=update_meta and ind == len(self.reports) - 1,
+                      dest_args=report.dest_args, key_suffix=key_suffix, timestamp=timestamp)
+
+        return True
+
+    def run_key(self):
+        """
+        Creates the key of the run parameters. Runs with the same key
+        create the same reports and share their checkpoints.
+
+        Returns:
+            run_key (str): hash of the dates, the configuration and the code version
+        """
+        payload = json.dumps({
+            'extract_date': self.extract_date,
+            'extract_date_list': self.extract_date_list,
+            'source': self.src_args._asdict(),
+            'reports': [
+                [report.name, report.transform, report.dest_args._asdict()]
+                for report in self.reports
+            ],
+            'compact_raw': self.proc_args.compact_raw,
+            'code_version': aggregate_code_version()
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _etl_report_checkpointed(self, update_meta: bool=True, key_suffix: str='',
+                                 timestamp: bool=True):
+        """
+        Runs extract, transform and load with checkpoints of the stages. The daily
+        aggregates of every report are checkpointed by their fingerprints, the
+        reports before their indicators by the run key and every loaded report is
+        marked as done. A failed run resumes with the days that are not aggregated
+        yet and does not write loaded reports again. The checkpoints are removed
+        after the meta file update.
+
+        Args:
+            update_meta (bool, optional): whether the meta file should be updated
+                                          after the last report. Defaults to True.
+            key_suffix (str, optional): suffix of the report keys
+            timestamp (bool, optional): whether the report keys contain the time of the run
+        """
+        if self.proc_args.transform_engine != TransformEngines.PANDAS.value:
+            self._logger.info("The transform engine %s is not supported by the checkpoints!",
+                              self.proc_args.transform_engine)
+            raise WrongEngineException
+        checkpoint = StageCheckpoint(self.proc_args.checkpoint_dir, self.run_key())
+        # Extract and aggregate the days that are not checkpointed
+        aggregates = self._aggregate_days(
+            lambda fingerprint: checkpoint.get(STAGE_DAYS, fingerprint),
+            lambda fingerprint, daily: checkpoint.put(STAGE_DAYS, fingerprint, daily))
+        for report in self.reports:
+            # Transform the reports that are not checkpointed
+            df = checkpoint.get(STAGE_TRANSFORM, report.name)
+            if df is None:
+                self._logger.info('Creating report %s...', report.name)
+                df = self._report_of_aggregates(aggregates[report.name], report.dest_args)
+                checkpoint.put(STAGE_TRANSFORM, report.name, df)
+            # the indicator state is only stored with the meta file, so it is updated again
+            df = self.add_indicators(df, report)
+            # Load the reports that were not written by a failed run
+            if checkpoint.is_done(STAGE_LOAD, report.name):
+                self._logger.info('Report %s was already written.', report.name)
+                continue
+            self.load(df, update_meta=False, dest_args=report.dest_args,
+                      key_suffix=key_suffix, timestamp=timestamp)
+            checkpoint.mark_done(STAGE_LOAD, report.name)
+        self._logger.info('%s stage outputs resumed from the checkpoints.', checkpoint.resumed)
+        if update_meta:
+            self.update_meta()
+            checkpoint.cleanup()
+
         return True
-    
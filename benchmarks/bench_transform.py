@@ -0,0 +1,119 @@
+""" Benchmarks the report transformation engines side by side
+
+Usage: python -m benchmarks.bench_transform [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.common.constants import TransformEngines
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                  ProcessingConfig)
+
+SOURCE_CONFIG = SourceConfig(
+    src_first_extract_date='2022-01-03',
+    src_columns=['ISIN', 'Mnemonic', 'Date', 'Time', 'StartPrice', 'EndPrice',
+                 'MinPrice', 'MaxPrice', 'TradedVolume'],
+    src_col_date='Date',
+    src_col_isin='ISIN',
+    src_col_time='Time',
+    src_col_start_price='StartPrice',
+    src_col_min_price='MinPrice',
+    src_col_max_price='MaxPrice',
+    src_col_traded_vol='TradedVolume'
+)
+DESTINATION_CONFIG = DestinationConfig(
+    dest_col_isin='isin',
+    dest_col_date='date',
+    dest_col_op_price='opening_price_eur',
+    dest_col_cls_price='closing_price_eur',
+    dest_col_min_price='minimum_price_eur',
+    dest_col_max_price='maximum_price_eur',
+    dest_col_daily_trd_vol='daily_traded_volume',
+    dest_col_chg_prev_cls='change_prev_closing_percent',
+    dest_key='report1/xetra_daily_report1_',
+    dest_key_date_format='%Y%m%d_%H%M%S',
+    dest_format='parquet'
+)
+DATES = ['2022-01-03', '2022-01-04', '2022-01-05', '2022-01-06', '2022-01-07']
+
+
+def source_data(rows: int, seed: int=0):
+    """
+    Creates random source data in the layout of the Xetra files
+
+    Args:
+        rows (int): number of generated rows before removing duplicate minutes
+        seed (int, optional): seed of the random generator. Defaults to 0.
+
+    Returns:
+        df: source data
+    """
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(8 * 60, 17 * 60 + 30, rows)
+    df = pd.DataFrame({
+        'ISIN': rng.choice([f'DE000{ind:07d}' for ind in range(3000)], rows),
+        'Mnemonic': 'MNE',
+        'Date': rng.choice(DATES, rows),
+        'Time': [f'{minute // 60:02d}:{minute % 60:02d}' for minute in minutes],
+        'StartPrice': rng.integers(100, 500000, rows) / 100,
+        'EndPrice': rng.integers(100, 500000, rows) / 100,
+        'MinPrice': rng.integers(100, 500000, rows) / 100,
+        'MaxPrice': rng.integers(100, 500000, rows) / 100,
+        'TradedVolume': rng.integers(0, 100000, rows)
+    })
+    # one row per ISIN and minute as in the Xetra data
+    return df.drop_duplicates(subset=['ISIN', 'Date', 'Time']).reset_index(drop=True)
+
+
+def run_engine(transform_engine: str, df: pd.DataFrame, repeat: int=3):
+    """
+    Runs transform_to_report with the given engine
+
+    Args:
+        transform_engine (str): engine calculating the report
+        df (pd.DataFrame): source data
+        repeat (int, optional): number of runs. Defaults to 3.
+
+    Returns:
+        best_seconds (float): duration of the fastest run
+        report (pd.DataFrame): report of the last run
+    """
+    report_etl = ReportETL(None, None, None, SOURCE_CONFIG, DESTINATION_CONFIG,
+                           extract_date=DATES[1], extract_date_list=DATES,
+                           proc_args=ProcessingConfig(transform_engine=transform_engine))
+    if transform_engine == TransformEngines.ARROW.value:
+        # the arrow engine extracts Arrow tables
+        df = pa.Table.from_pandas(df, preserve_index=False)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        report = report_etl.transform_to_report(df)
+        timings.append(time.perf_counter() - start)
+    if isinstance(report, pa.Table):
+        report = report.to_pandas()
+
+    return min(timings), report
+
+
+def main():
+    """
+    Prints the duration of every engine for the same source data
+    """
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = source_data(rows)
+    reports = {}
+    print(f'rows: {rows}')
+    for engine in TransformEngines:
+        seconds, reports[engine.value] = run_engine(engine.value, df)
+        print(f'{engine.value:>8}: {seconds:8.3f} s')
+    baseline = reports[TransformEngines.PANDAS.value]
+    for engine, report in reports.items():
+        print(f'{engine:>8} equals pandas: {baseline.equals(report)}')
+
+
+if __name__ == "__main__":
+    main()
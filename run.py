@@ -5,8 +5,11 @@ import logging.config
 
 import yaml
 
-from app.common.s3 import S3BucketConnector
-from app.transformers.report_transformer import ReportETL, SourceConfig, DestinationConfig
+from app.transformers.report_backfill import ReportBackfill
+from app.transformers.report_builder import build_report_etl, build_tracer
+from app.transformers.report_coordinator import ReportCoordinator
+from app.transformers.report_daemon import ReportDaemon
+from app.transformers.report_planner import ReportPlanner
 
 def main():
     """
@@ -14,50 +17,82 @@ def main():
     """
     arg_parser = argparse.ArgumentParser(description="Run the Report ETL job.")
     arg_parser.add_argument('config', help='a configuration file in YAML format.')
-    
+    arg_parser.add_argument('--explain', action='store_true',
+                            help='print the plan of the run without executing it.')
+    sub_parsers = arg_parser.add_subparsers(dest='mode')
+    backfill_parser = sub_parsers.add_parser(
+        'backfill', help='backfill a date range with several processes.')
+    backfill_parser.add_argument('--from', dest='date_from', required=True,
+                                 help='first date of the backfill (YYYY-MM-DD).')
+    backfill_parser.add_argument('--to', dest='date_to', required=True,
+                                 help='last date of the backfill (YYYY-MM-DD).')
+    backfill_parser.add_argument('--workers', type=int, default=1,
+                                 help='number of processes.')
+    coordinate_parser = sub_parsers.add_parser(
+        'coordinate', help='work on a backfill distributed over several machines.')
+    coordinate_parser.add_argument('--from', dest='date_from', required=True,
+                                   help='first date of the backfill (YYYY-MM-DD).')
+    coordinate_parser.add_argument('--to', dest='date_to', required=True,
+                                   help='last date of the backfill (YYYY-MM-DD).')
+    coordinate_parser.add_argument('--range-days', type=int, default=7,
+                                   help='number of days claimed at once.')
+    coordinate_parser.add_argument('--lease-seconds', type=float, default=300,
+                                   help='seconds until an unrenewed lease expires.')
+    daemon_parser = sub_parsers.add_parser(
+        'daemon', help='stay resident and process new source files as they land.')
+    daemon_parser.add_argument('--poll-seconds', type=float, default=60,
+                               help='seconds between two polls of the source bucket.')
+
     args = arg_parser.parse_args()
+    if args.explain and args.mode is not None:
+        arg_parser.error(f'--explain plans a single run and cannot be used with {args.mode}')
     # Parsing YAML
     config = yaml.safe_load(open(args.config))
-    
+
     # Configure Logging
     log_config = config["logging"]
     logging.config.dictConfig(log_config)
     logger = logging.getLogger(__name__)
-    # reading s3 configuration
-    s3_config = config['s3']
-    # creating the S3BucketConnector class instances
-    # for source and destination
-    src_s3_connector = S3BucketConnector(
-        access_key=s3_config['access_key'],
-        secret_key=s3_config['secret_key'],
-        endpoint_url=s3_config['src_endpoint_url'],
-        bucket=s3_config['src_bucket']
-    )
-    dest_s3_connector = S3BucketConnector(
-        access_key=s3_config['access_key'],
-        secret_key=s3_config['secret_key'],
-        endpoint_url=s3_config['dest_endpoint_url'],
-        bucket=s3_config['dest_bucket']
-    )
-    # reading source configuration
-    source_config = SourceConfig(**config['source'])
-    # reading destination configuration
-    destination_config = DestinationConfig(**config['destination'])
-    # reading meta configuration
-    meta_config = config['meta']
-    # creating ReportETL class instance
-    logger.info('Report ETL job started.')
-    report_etl = ReportETL(
-        src_bucket=src_s3_connector,
-        dest_bucket=dest_s3_connector,
-        meta_key=meta_config['meta_key'],
-        src_args=source_config,
-        dest_args=destination_config
-    )
-    # running etl job
-    report_etl.etl_report()
-    logger.info('Report ETL job finished.')
-    
+    tracer = build_tracer(config)
+    try:
+        if args.mode == 'backfill':
+            # running the sharded backfill
+            logger.info('Report ETL backfill started.')
+            ReportBackfill(config, args.date_from, args.date_to, args.workers,
+                           tracer=tracer).run()
+            logger.info('Report ETL backfill finished.')
+            return
+        if args.mode == 'coordinate':
+            # working on the distributed backfill
+            logger.info('Report ETL backfill worker started.')
+            ReportCoordinator(config, args.date_from, args.date_to, args.range_days,
+                              tracer=tracer, lease_seconds=args.lease_seconds).run_worker()
+            logger.info('Report ETL backfill worker finished.')
+            return
+        if args.mode == 'daemon':
+            # polling the source bucket until the process is stopped
+            logger.info('Report ETL daemon started.')
+            ReportDaemon(build_report_etl(config, tracer), args.poll_seconds).run()
+            return
+        # creating ReportETL class instance
+        logger.info('Report ETL job started.')
+        report_etl = build_report_etl(config, tracer)
+        if args.explain:
+            # printing the plan only
+            print(ReportPlanner(report_etl).plan().explain())
+            return
+        # running etl job
+        if report_etl.proc_args.plan:
+            ReportPlanner(report_etl).run()
+        else:
+            report_etl.etl_report()
+        logger.info('Report ETL job finished.')
+    finally:
+        if tracer is not None:
+            # printing the latencies of the remote calls, also of failed runs
+            tracer.close()
+            print(tracer.report())
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,70 @@
+"""TestStageCheckpointMethods"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from app.common.checkpoint import STAGE_DAYS, StageCheckpoint
+
+class TestStageCheckpointMethods(unittest.TestCase):
+    """
+    Testing the StageCheckpoint class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.checkpoint_dir = tempfile.mkdtemp(prefix='checkpoint_test_')
+        self.df = pd.DataFrame({'isin': ['AT0000A0E9W5', 'AT0000A0E9W6'],
+                                'closing_price_eur': [21.19, 18.27]})
+
+    def tearDown(self) -> None:
+        """
+        Removing the checkpoints
+        """
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def test_put_get(self):
+        """
+        Tests that checkpointed outputs are read by another run with the same key
+        """
+        # Test init
+        checkpoint = StageCheckpoint(self.checkpoint_dir, 'run1')
+        # Method execution
+        checkpoint.put(STAGE_DAYS, 'fingerprint1', self.df)
+        checkpoint.put('transform', 'report1', self.df)
+        checkpoint.mark_done('load', 'report1')
+        resumed = StageCheckpoint(self.checkpoint_dir, 'run1')
+        other_run = StageCheckpoint(self.checkpoint_dir, 'run2')
+        # Test after method execution
+        self.assertTrue(self.df.equals(resumed.get(STAGE_DAYS, 'fingerprint1')))
+        self.assertTrue(self.df.equals(resumed.get('transform', 'report1')))
+        self.assertTrue(resumed.is_done('load', 'report1'))
+        self.assertFalse(resumed.is_done('load', 'report2'))
+        self.assertEqual(2, resumed.resumed)
+        self.assertTrue(self.df.equals(other_run.get(STAGE_DAYS, 'fingerprint1')))
+        self.assertIsNone(other_run.get('transform', 'report1'))
+
+    def test_cleanup(self):
+        """
+        Tests that cleanup removes the checkpoints of the run and its days only
+        """
+        # Test init
+        checkpoint = StageCheckpoint(self.checkpoint_dir, 'run1')
+        other_run = StageCheckpoint(self.checkpoint_dir, 'run2')
+        checkpoint.put(STAGE_DAYS, 'fingerprint1', self.df)
+        checkpoint.put('transform', 'report1', self.df)
+        other_run.put(STAGE_DAYS, 'fingerprint2', self.df)
+        # Method execution
+        checkpoint.cleanup()
+        # Test after method execution
+        self.assertFalse(os.path.exists(checkpoint.run_dir))
+        self.assertIsNone(other_run.get(STAGE_DAYS, 'fingerprint1'))
+        self.assertTrue(self.df.equals(other_run.get(STAGE_DAYS, 'fingerprint2')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""TestAIMDLimiterMethods"""
+import threading
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+from app.common.concurrency import AIMDLimiter, is_throttling_error
+
+class TestAIMDLimiterMethods(unittest.TestCase):
+    """
+    Testing the AIMDLimiter class
+    """
+
+    @staticmethod
+    def _throttling_error():
+        """
+        Returns the error of a throttled S3 request
+        """
+        return ClientError({'Error': {'Code': 'SlowDown', 'Message': 'Please reduce'},
+                            'ResponseMetadata': {'HTTPStatusCode': 503}}, 'GetObject')
+
+    def test_increase_healthy(self):
+        """
+        Tests that every window of healthy operations increases the limit by one
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=2, max_limit=4)
+        # Method execution
+        for _ in range(2 + 3 + 4 + 10):
+            limiter.acquire()
+            limiter.release(0.01)
+        # Test after method execution
+        self.assertEqual(4, limiter.limit)
+        self.assertEqual(2, limiter.metrics()['change_counts']['healthy'])
+
+    def test_decrease_throttled(self):
+        """
+        Tests that throttling cuts the limit once per window
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=8)
+        # Method execution
+        for _ in range(3):
+            with self.assertRaises(ClientError):
+                with limiter.slot():
+                    raise self._throttling_error()
+        # Test after method execution
+        result_metrics = limiter.metrics()
+        self.assertEqual(4, result_metrics['limit'])
+        self.assertEqual(3, result_metrics['throttled'])
+        self.assertEqual(0, result_metrics['in_flight'])
+        self.assertEqual([{'from': 8, 'to': 4, 'reason': 'throttled'}],
+                         [{key: change[key] for key in ['from', 'to', 'reason']}
+                          for change in result_metrics['changes']])
+
+    def test_decrease_latency(self):
+        """
+        Tests that a rising latency cuts the limit
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=16, max_limit=16)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01)
+        # Method execution
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(0.1)
+        # Test after method execution
+        self.assertEqual(8, limiter.limit)
+        self.assertEqual(1, limiter.metrics()['change_counts']['latency'])
+
+    def test_latency_per_operation(self):
+        """
+        Tests that slower operations of another class do not cut the limit
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=16, max_limit=16)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01, operation='range')
+        # Method execution
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.1, operation='get')
+        # Test after method execution
+        result_metrics = limiter.metrics()
+        self.assertEqual(16, result_metrics['limit'])
+        self.assertEqual(0, result_metrics['change_counts']['latency'])
+        self.assertAlmostEqual(0.1, result_metrics['latencies']['get']['min'])
+
+    def test_min_latency_decay(self):
+        """
+        Tests that the lowest average latency follows a lasting rise of the latency
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=8, max_limit=8)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01)
+        # Method execution
+        for _ in range(500):
+            limiter.acquire()
+            limiter.release(0.1)
+        # Test after method execution
+        result_metrics = limiter.metrics()
+        self.assertGreater(result_metrics['latencies']['default']['min'], 0.05)
+        # the limit is cut first and grows again once the latency is the baseline
+        self.assertGreater(result_metrics['change_counts']['latency'], 0)
+        self.assertEqual(8, result_metrics['limit'])
+
+    def test_limit_in_flight(self):
+        """
+        Tests that no more operations than the limit run at once
+        """
+        # Test init
+        limiter = AIMDLimiter(initial_limit=2, max_limit=2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def operation():
+            with limiter.slot():
+                with lock:
+                    running.append(1)
+                    peak.append(len(running))
+                time.sleep(0.02)
+                with lock:
+                    running.pop()
+        # Method execution
+        threads = [threading.Thread(target=operation) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Test after method execution
+        self.assertEqual(2, max(peak))
+        self.assertEqual(8, limiter.completed)
+
+    def test_is_throttling_error(self):
+        """
+        Tests the detection of throttling errors
+        """
+        # Test init
+        not_found = ClientError({'Error': {'Code': 'NoSuchKey'},
+                                 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'GetObject')
+        # Method execution and tests after method execution
+        self.assertTrue(is_throttling_error(self._throttling_error()))
+        self.assertFalse(is_throttling_error(not_found))
+        self.assertFalse(is_throttling_error(ValueError()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""TestLeaseManagerMethods"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_s3
+
+from app.common.lease import LeaseManager, LEASE_STATUS_DONE, LEASE_STATUS_RUNNING
+from app.common.local_storage import LocalFileConnector
+from app.common.s3 import S3BucketConnector
+
+class TestLeaseManagerMethods(unittest.TestCase):
+    """
+    Testing the LeaseManager class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining the class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name = 'test-bucket'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url = self.s3_endpoint_url)
+        self._s3.create_bucket(Bucket=self.s3_bucket_name,
+                               CreateBucketConfiguration={
+                                   'LocationConstraint': 'eu-west-2'
+                               })
+        self._bucket_conn = S3BucketConnector(self.s3_access_key,
+                                              self.s3_secret_key,
+                                              self.s3_endpoint_url,
+                                              self.s3_bucket_name)
+        # Creating two competing testing instances
+        self.lease_manager1 = LeaseManager(self._bucket_conn, 'leases/', owner='worker1',
+                                           lease_seconds=60, settle_seconds=0)
+        self.lease_manager2 = LeaseManager(self._bucket_conn, 'leases/', owner='worker2',
+                                           lease_seconds=60, settle_seconds=0)
+
+    def tearDown(self) -> None:
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def test_claim_new_lease(self):
+        """
+        Tests the claim method when there is no lease
+        and when the lease is held by another worker
+        """
+        # Method execution
+        self.assertTrue(self.lease_manager1.claim('range1'))
+        self.assertFalse(self.lease_manager2.claim('range1'))
+        # Test after method execution
+        lease = self.lease_manager2.read('range1')
+        self.assertEqual('worker1', lease['owner'])
+        self.assertEqual(LEASE_STATUS_RUNNING, lease['status'])
+
+    def test_claim_expired_lease(self):
+        """
+        Tests the claim method reclaiming an expired lease
+        """
+        # Test init
+        self.lease_manager1.lease_seconds = -1
+        self.lease_manager1.claim('range1')
+        # Method execution
+        self.assertTrue(self.lease_manager2.claim('range1'))
+        # Test after method execution
+        self.assertFalse(self.lease_manager1.renew('range1'))
+        self.assertFalse(self.lease_manager1.complete('range1', ['2021-12-01']))
+        self.assertEqual('worker2', self.lease_manager1.read('range1')['owner'])
+
+    def test_renew_and_complete(self):
+        """
+        Tests the renew and complete methods
+        """
+        # Test init
+        self.lease_manager1.claim('range1')
+        expires_at = self.lease_manager1.read('range1')['expires_at']
+        time.sleep(0.01)
+        # Method execution
+        self.assertTrue(self.lease_manager1.renew('range1'))
+        self.assertTrue(self.lease_manager1.complete('range1', ['2021-12-01']))
+        # Test after method execution
+        lease = self.lease_manager1.read('range1')
+        self.assertGreater(lease['expires_at'], expires_at)
+        self.assertEqual(LEASE_STATUS_DONE, lease['status'])
+        self.assertEqual(['2021-12-01'], lease['result'])
+        # completed leases are never reclaimed
+        self.lease_manager1.lease_seconds = -1
+        self.assertFalse(self.lease_manager2.claim('range1'))
+
+    def test_keep_alive(self):
+        """
+        Tests the keep_alive method renewing a lease in the background
+        """
+        # Test init
+        self.lease_manager1.lease_seconds = 0.3
+        self.lease_manager1.claim('range1')
+        # Method execution
+        stop_renewal = self.lease_manager1.keep_alive('range1')
+        time.sleep(0.6)
+        # Test after method execution
+        self.assertFalse(self.lease_manager2.claim('range1'))
+        stop_renewal()
+        time.sleep(0.4)
+        self.assertTrue(self.lease_manager2.claim('range1'))
+
+    def test_claim_precondition_failed(self):
+        """
+        Tests that a claim fails if S3 rejects the conditional write
+        because another worker wrote the lease in the meantime
+        """
+        # Test init
+        error = ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'PutObject')
+        # Method execution
+        with patch.object(self._bucket_conn._bucket, 'put_object', side_effect=error):
+            result = self.lease_manager1.claim('range1')
+        # Test after method execution
+        self.assertFalse(result)
+        self.assertIsNone(self.lease_manager1.read('range1'))
+
+    def test_claim_race(self):
+        """
+        Tests two workers claiming the same leases at the same time
+        without settle time, exactly one of them gets every lease
+        """
+        # Test init
+        root_dir = tempfile.mkdtemp(prefix='lease_test_')
+        self.addCleanup(shutil.rmtree, root_dir, ignore_errors=True)
+        storage = LocalFileConnector(root_dir)
+        managers = [LeaseManager(storage, 'leases/', owner=f'worker{ind}', lease_seconds=60,
+                                 settle_seconds=0) for ind in range(2)]
+        lease_ids = [f'range{ind}' for ind in range(20)]
+        barrier = threading.Barrier(len(managers))
+
+        def _claim_all(manager):
+            claimed = []
+            for lease_id in lease_ids:
+                barrier.wait()
+                if manager.claim(lease_id):
+                    claimed.append(lease_id)
+            return claimed
+        # Method execution
+        with ThreadPoolExecutor(max_workers=len(managers)) as executor:
+            claimed = list(executor.map(_claim_all, managers))
+        # Test after method execution
+        self.assertEqual(lease_ids, sorted(claimed[0] + claimed[1], key=lease_ids.index))
+        for lease_id in lease_ids:
+            owner = managers[0].read(lease_id)['owner']
+            self.assertIn(lease_id, claimed[int(owner[-1])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""TestListingIndexMethods"""
+from datetime import datetime, timedelta
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app.common.listing_index import ListingIndex
+from app.common.local_storage import LocalFileConnector
+
+class TestListingIndexMethods(unittest.TestCase):
+    """
+    Testing the ListingIndex class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.src_dir = tempfile.mkdtemp(prefix='listing_src_test_')
+        self.dest_dir = tempfile.mkdtemp(prefix='listing_dest_test_')
+        self.src_storage = LocalFileConnector(self.src_dir)
+        self.dest_storage = LocalFileConnector(self.dest_dir)
+        self.index_key = 'meta_file.csv.listing.json'
+        self.today = datetime.today().strftime('%Y-%m-%d')
+        for key in ['2021-12-17/file_12.csv', '2021-12-17/file_13.csv',
+                    f'{self.today}/file_08.csv']:
+            self.src_storage.write_text('col1\nA\n', key)
+
+    def tearDown(self) -> None:
+        """
+        Removing the files
+        """
+        shutil.rmtree(self.src_dir, ignore_errors=True)
+        shutil.rmtree(self.dest_dir, ignore_errors=True)
+
+    def test_past_dates_listed_once(self):
+        """
+        Tests that past dates are listed once and taken from the saved index
+        by another run, while today and dates without files are listed every time
+        """
+        # Expected results
+        exp_list = ['2021-12-17/file_12.csv', '2021-12-17/file_13.csv']
+        # Test init
+        listing_index = ListingIndex(self.src_storage, self.dest_storage, self.index_key)
+        # Method execution
+        with mock.patch.object(self.src_storage, 'list_objects_by_prefix',
+                               wraps=self.src_storage.list_objects_by_prefix) as listing:
+            result_first = listing_index.list_files_by_prefix('2021-12-17')
+            result_sizes = listing_index.list_sizes_by_prefix('2021-12-17')
+            result_empty = listing_index.list_files_by_prefix('2021-12-18')
+            listing_index.list_files_by_prefix(self.today)
+            listing_index.list_files_by_prefix(self.today)
+            saved = listing_index.save()
+            next_run = ListingIndex(self.src_storage, self.dest_storage, self.index_key)
+            result_next = next_run.list_etags_by_prefix('2021-12-17')
+            next_run.list_files_by_prefix('2021-12-18')
+        # Test after method execution
+        self.assertEqual(exp_list, result_first)
+        self.assertEqual({key: 7 for key in exp_list}, result_sizes)
+        self.assertEqual([], result_empty)
+        self.assertEqual(self.src_storage.list_etags_by_prefix('2021-12-17'), result_next)
+        self.assertTrue(saved)
+        self.assertFalse(next_run.save())
+        self.assertEqual(1, next_run.hits)
+        self.assertEqual(1, next_run.misses)
+        self.assertEqual(['2021-12-17', '2021-12-18', self.today, self.today, '2021-12-18'],
+                         [call.args[0] for call in listing.call_args_list])
+
+    def test_empty_date_not_indexed(self):
+        """
+        Tests that files arriving late for a date listed without files are found
+        """
+        # Test init
+        listing_index = ListingIndex(self.src_storage, self.dest_storage, self.index_key)
+        result_empty = listing_index.list_files_by_prefix('2021-12-18')
+        self.src_storage.write_text('col1\nA\n', '2021-12-18/file_09.csv')
+        # Method execution
+        result_list = listing_index.list_files_by_prefix('2021-12-18')
+        # Test after method execution
+        self.assertEqual([], result_empty)
+        self.assertEqual(['2021-12-18/file_09.csv'], result_list)
+        # the date is indexed once it has files
+        listing_index.save()
+        prefixes = json.loads(self.dest_storage.read_text(self.index_key))['prefixes']
+        self.assertEqual(['2021-12-18'], list(prefixes))
+
+    def test_save_keeps_other_dates(self):
+        """
+        Tests that saving keeps the dates another process added to the index
+        """
+        # Test init
+        first = ListingIndex(self.src_storage, self.dest_storage, self.index_key)
+        second = ListingIndex(self.src_storage, self.dest_storage, self.index_key)
+        self.src_storage.write_text('col1\nA\n', '2021-12-18/file_09.csv')
+        first.list_files_by_prefix('2021-12-17')
+        second.list_files_by_prefix('2021-12-18')
+        # Method execution
+        first.save()
+        second.save()
+        # Test after method execution
+        prefixes = json.loads(self.dest_storage.read_text(self.index_key))['prefixes']
+        self.assertEqual(['2021-12-17', '2021-12-18'], sorted(prefixes))
+
+    def test_recent_days(self):
+        """
+        Tests that dates within the recent days and other prefixes are not indexed
+        """
+        # Test init
+        yesterday = (datetime.today() - timedelta(days=1)).strftime('%Y-%m-%d')
+        listing_index = ListingIndex(self.src_storage, self.dest_storage, self.index_key,
+                                     recent_days=2)
+        # Method execution
+        result_list = [
+            listing_index.is_immutable(prefix)
+            for prefix in ['2021-12-17', '2021-12-17/', yesterday, self.today, 'meta/']
+        ]
+        # Test after method execution
+        self.assertEqual([True, True, False, False, False], result_list)
+        self.assertEqual(self.src_storage.not_found_error, listing_index.not_found_error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""TestLocalFileConnectorMethods"""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+
+from app.common.local_storage import LocalFileConnector
+
+class TestLocalFileConnectorMethods(unittest.TestCase):
+    """
+    Testing the LocalFileConnector class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.root_dir = tempfile.mkdtemp(prefix='local_storage_test_')
+        self._connector = LocalFileConnector(self.root_dir)
+        self.df = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+
+    def tearDown(self) -> None:
+        """
+        Removing the files
+        """
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def _write_file(self, key: str, data: bytes):
+        """
+        Writes a file directly to the root directory
+        """
+        path = os.path.join(self.root_dir, *key.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def test_list_files(self):
+        """
+        Tests listing files by prefix, with sizes and tags and after a key
+        """
+        # Expected results
+        exp_list = ['2021-12-17/file_12.csv', '2021-12-17/file_13.csv']
+        # Test init
+        for key in exp_list + ['2021-12-16/file_15.csv', '2021-12-18/file_07.csv']:
+            self._write_file(key, b'col1\nA\n')
+        # Method execution
+        result_list = self._connector.list_files_by_prefix('2021-12-17')
+        result_sizes = self._connector.list_sizes_by_prefix('2021-12-17/')
+        result_etags = self._connector.list_etags_by_prefix('2021-12-17')
+        result_after = self._connector.list_files_after('2021-12-17/file_12.csv')
+        result_missing = self._connector.list_files_by_prefix('2021-12-20/')
+        result_objects = self._connector.list_objects_by_prefix('2021-12-17')
+        # Tests after method execution
+        self.assertEqual(exp_list, result_list)
+        self.assertEqual({key: 7 for key in exp_list}, result_sizes)
+        self.assertEqual(exp_list, list(result_etags))
+        self.assertEqual({key: (7, result_etags[key]) for key in exp_list}, result_objects)
+        self.assertEqual(['2021-12-17/file_13.csv', '2021-12-18/file_07.csv'], result_after)
+        self.assertEqual([], result_missing)
+
+    def test_read_csv(self):
+        """
+        Tests reading plain and compressed csv files as DataFrame and Arrow table
+        """
+        # Test init
+        self._write_file('test.csv', self.df.to_csv(index=False).encode())
+        self._write_file('test.csv.gz', gzip.compress(self.df.to_csv(index=False).encode()))
+        # Method execution
+        result_df = self._connector.read_csv('test.csv')
+        result_gz_df = self._connector.read_csv('test.csv.gz')
+        result_table = self._connector.read_csv_arrow('test.csv', {'col2': pa.int32()})
+        # Tests after method execution
+        self.assertTrue(self.df.equals(result_df))
+        self.assertTrue(self.df.equals(result_gz_df))
+        self.assertEqual(pa.int32(), result_table.schema.field('col2').type)
+
+    def test_write_read(self):
+        """
+        Tests writing and reading parquet, csv and text files
+        and deleting them
+        """
+        # Method execution
+        self._connector.to_s3(self.df, 'report/report.parquet', 'parquet')
+        self._connector.to_s3(self.df, 'report/report.csv', 'csv')
+        self._connector.write_text('cursor', 'meta.cursor')
+        result_df = self._connector.read_parquet('report/report.parquet')
+        result_filtered_df = self._connector.read_parquet(
+            'report/report.parquet', columns=['col1'], filters=[('col2', '>', 1)])
+        result_csv_df = self._connector.read_csv('report/report.csv')
+        result_text = self._connector.read_text('meta.cursor')
+        self._connector.delete_objects(['report/report.csv', 'report/missing.csv'])
+        # Tests after method execution
+        self.assertTrue(self.df.equals(result_df))
+        self.assertEqual(['B'], list(result_filtered_df.col1))
+        self.assertEqual(['col1'], list(result_filtered_df.columns))
+        self.assertTrue(self.df.equals(result_csv_df))
+        self.assertEqual('cursor', result_text)
+        self.assertEqual(['report/report.parquet'],
+                         self._connector.list_files_by_prefix('report/'))
+
+    def test_read_missing(self):
+        """
+        Tests that reading a missing file raises the not found error of the connector
+        """
+        # Method execution and tests after method execution
+        with self.assertRaises(self._connector.not_found_error):
+            self._connector.read_csv('missing.csv')
+        with self.assertRaises(self._connector.not_found_error):
+            self._connector.read_text('missing.txt')
+
+    def test_write_text_if(self):
+        """
+        Tests that conditional writes only succeed on the version that was read
+        """
+        # Method execution and tests after method execution
+        self.assertTrue(self._connector.write_text_if('first', 'lease/range1.json'))
+        self.assertFalse(self._connector.write_text_if('second', 'lease/range1.json'))
+        text, tag = self._connector.read_text_tagged('lease/range1.json')
+        self.assertEqual('first', text)
+        self.assertTrue(self._connector.write_text_if('third', 'lease/range1.json', tag))
+        self.assertFalse(self._connector.write_text_if('fourth', 'lease/range1.json', tag))
+        self.assertEqual('third', self._connector.read_text('lease/range1.json'))
+
+
+if __name__ == "__main__":
+    unittest.main()
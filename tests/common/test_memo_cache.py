@@ -0,0 +1,85 @@
+"""TestMemoCacheMethods"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from app.common.memo_cache import MemoCache
+
+class TestMemoCacheMethods(unittest.TestCase):
+    """
+    Testing the MemoCache class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.cache_dir = tempfile.mkdtemp(prefix='memo_cache_test_')
+        self.df = pd.DataFrame({'ISIN': ['A', 'B'], 'Price': [1.5, 2.25], 'Volume': [1, 2]})
+
+    def tearDown(self) -> None:
+        """
+        Removing the cache files
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_put_get(self):
+        """
+        Tests caching a DataFrame and reading a cached and a not cached fingerprint
+        """
+        # Test init
+        cache = MemoCache(self.cache_dir)
+        # Method execution
+        cache.put('abc', self.df)
+        result_df = cache.get('abc')
+        result_missing = cache.get('def')
+        # Test after method execution
+        self.assertTrue(self.df.equals(result_df))
+        self.assertIsNone(result_missing)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(['abc.parquet'], os.listdir(self.cache_dir))
+
+    def test_evict_age(self):
+        """
+        Tests evicting the entries that were not used for max_age_seconds
+        """
+        # Test init
+        cache = MemoCache(self.cache_dir, max_age_seconds=3600)
+        cache.put('old', self.df)
+        cache.put('new', self.df)
+        old_time = time.time() - 7200
+        os.utime(os.path.join(self.cache_dir, 'old.parquet'), (old_time, old_time))
+        # Method execution
+        result_removed = cache.evict()
+        # Test after method execution
+        self.assertEqual(1, result_removed)
+        self.assertIsNone(cache.get('old'))
+        self.assertIsNotNone(cache.get('new'))
+
+    def test_evict_size(self):
+        """
+        Tests evicting the least recently used entries above max_bytes
+        """
+        # Test init
+        for ind, fingerprint in enumerate(['first', 'second', 'third']):
+            MemoCache(self.cache_dir).put(fingerprint, self.df)
+            used_time = time.time() - 100 + ind
+            os.utime(os.path.join(self.cache_dir, f'{fingerprint}.parquet'),
+                     (used_time, used_time))
+        entry_size = os.path.getsize(os.path.join(self.cache_dir, 'first.parquet'))
+        cache = MemoCache(self.cache_dir, max_bytes=2 * entry_size)
+        # Method execution
+        cache.get('first')
+        result_removed = cache.evict()
+        # Test after method execution
+        self.assertEqual(1, result_removed)
+        self.assertEqual(['first.parquet', 'third.parquet'], sorted(os.listdir(self.cache_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@ from app.common.custom_exceptions import WrongMetaFileException
 from app.common.constants import MetaProcessFormat
 from app.common.meta_process import MetaProcess
 from app.common.s3 import S3BucketConnector
+from app.common.trading_calendar import WeekdayCalendar
 
 class TestMetaProcessMethods(unittest.TestCase):
     """
@@ -266,6 +267,37 @@ class TestMetaProcessMethods(unittest.TestCase):
             }
         )
 
+    def test_return_date_list_calendar(self):
+        """
+        Tests the return_date_list method with a trading calendar,
+        days without trading are never missing
+        """
+        # Expected results
+        exp_min_date = self.dates[0]
+        exp_date_list = [self.dates[1], self.dates[0]]
+        exp_date_list_no_meta = [self.dates[6], self.dates[5], self.dates[4],
+                                 self.dates[1], self.dates[0]]
+        # Test init
+        calendar = WeekdayCalendar([self.dates[2], self.dates[3]], weekdays=range(7))
+        meta_key = 'meta.csv'
+        meta_content = (
+            f'{MetaProcessFormat.META_SOURCE_DATE_COL.value},'
+            f'{MetaProcessFormat.META_PROCESS_COL.value}\n'
+            f'{self.dates[5]},{self.dates[0]}\n'
+            f'{self.dates[4]},{self.dates[0]}\n'
+            f'{self.dates[1]},{self.dates[0]}\n'
+        )
+        # Method Execution
+        _, act_date_list_no_meta = MetaProcess.return_date_list(
+            self.dates[5], meta_key, self._bucket_conn_meta, calendar)
+        self._bucket_meta.put_object(Body=meta_content, Key=meta_key)
+        act_min_date, act_date_list = MetaProcess.return_date_list(
+            self.dates[5], meta_key, self._bucket_conn_meta, calendar)
+        # Test after method execution
+        self.assertEqual(exp_date_list_no_meta, act_date_list_no_meta)
+        self.assertEqual(exp_min_date, act_min_date)
+        self.assertEqual(exp_date_list, act_date_list)
+
     def test_return_date_list_wrong(self):
         """
         Tests the return_date_list method
@@ -0,0 +1,89 @@
+"""TestPipelineMethods"""
+import threading
+import time
+import unittest
+
+from app.common.pipeline import Pipeline
+
+class TestPipelineMethods(unittest.TestCase):
+    """
+    Testing the Pipeline class
+    """
+
+    def test_run_ok(self):
+        """
+        Tests that all items pass every stage in order
+        """
+        # Expected results
+        exp_items = [0, 2, 4, 6, 8]
+        # Test init
+        result_items = []
+        def source(_):
+            yield from range(5)
+        def double(items):
+            for item in items:
+                yield item * 2
+        def sink(items):
+            for item in items:
+                result_items.append(item)
+                yield item
+        # Method execution
+        stats = Pipeline([('source', source), ('double', double), ('sink', sink)]).run()
+        # Test after method execution
+        self.assertEqual(exp_items, result_items)
+        self.assertEqual([5, 5, 5], [stage.items for stage in stats])
+        self.assertEqual(['source', 'double', 'sink'], [stage.name for stage in stats])
+
+    def test_run_backpressure(self):
+        """
+        Tests that a slow stage blocks the previous stage
+        by the bounded queue
+        """
+        # Test init
+        produced = []
+        max_in_flight = []
+        lock = threading.Lock()
+        def source(_):
+            for item in range(10):
+                with lock:
+                    produced.append(item)
+                yield item
+        def slow_sink(items):
+            consumed = 0
+            for item in items:
+                consumed += 1
+                with lock:
+                    max_in_flight.append(len(produced) - consumed)
+                time.sleep(0.01)
+                yield item
+        # Method execution
+        stats = Pipeline([('source', source), ('sink', slow_sink)], queue_size=2).run()
+        # Test after method execution
+        # queue_size items in the queue and one item blocked in put
+        self.assertLessEqual(max(max_in_flight), 3)
+        self.assertGreater(stats[0].output_wait, 0.05)
+        self.assertGreater(stats[1].busy, 0.05)
+
+    def test_run_error(self):
+        """
+        Tests that an error of a stage stops the pipeline and is raised
+        """
+        # Test init
+        def source(_):
+            # endless source that is only stopped by the abort
+            item = 0
+            while True:
+                item += 1
+                yield item
+        def failing(items):
+            for item in items:
+                if item == 3:
+                    raise ValueError('failed')
+                yield item
+        # Method execution
+        with self.assertRaises(ValueError):
+            Pipeline([('source', source), ('failing', failing)]).run()
+
+
+if __name__ == "__main__":
+    unittest.main()
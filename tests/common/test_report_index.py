@@ -0,0 +1,65 @@
+"""TestReportIndexMethods"""
+from io import BytesIO
+import unittest
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.common.report_index import BloomFilter, ReportIndex
+
+class TestReportIndexMethods(unittest.TestCase):
+    """
+    Testing the BloomFilter and ReportIndex classes
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        isins = [f'DE{ind:010d}' for ind in range(0, 100, 2)]
+        self.table = pa.table({
+            'isin': [isin for isin in isins for _ in range(2)],
+            'date': ['2022-01-03', '2022-01-04'] * len(isins),
+            'closing_price_eur': [float(ind) for ind in range(2 * len(isins))]
+        })
+        out_buffer = BytesIO()
+        pq.write_table(self.table, out_buffer, row_group_size=20)
+        self.payload = out_buffer.getvalue()
+
+    def test_bloom_filter(self):
+        """
+        Tests that the bloom filter has no false negatives and few false positives
+        """
+        # Test init
+        values = [f'DE{ind:010d}' for ind in range(1000)]
+        # Method execution
+        bloom = BloomFilter.from_dict(BloomFilter.for_values(values).to_dict())
+        false_positives = sum(f'US{ind:010d}' in bloom for ind in range(1000))
+        # Test after method execution
+        self.assertTrue(all(value in bloom for value in values))
+        self.assertLess(false_positives, 50)
+
+    def test_row_groups_of(self):
+        """
+        Tests that lookups return the row groups of an ISIN within the date range
+        """
+        # Test init
+        index = ReportIndex.from_json(ReportIndex.from_parquet(
+            'report.parquet', self.table, self.payload, 'isin', 'date').to_json())
+        # Method execution
+        result_found = index.row_groups_of('DE0000000022')
+        result_range = index.row_groups_of('DE0000000022', '2022-01-04', '2022-01-05')
+        result_missing = index.row_groups_of('DE0000000023')
+        result_dates = index.row_groups_of('DE0000000022', '2022-01-05')
+        # Test after method execution
+        self.assertEqual(5, len(index.row_groups))
+        self.assertEqual(['2022-01-03', '2022-01-04'], [index.min_date, index.max_date])
+        self.assertEqual(index.row_groups[0]['offset'], 4)
+        self.assertEqual([1], result_found)
+        self.assertEqual([1], result_range)
+        self.assertEqual([], result_missing)
+        self.assertEqual([], result_dates)
+
+
+if __name__ == '__main__':
+    unittest.main()
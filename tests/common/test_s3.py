@@ -1,11 +1,17 @@
 """ TestS3BucketConnectorMethods """
+import gzip
 from io import BytesIO, StringIO
 import os
 import unittest
+from unittest.mock import patch
 
 import boto3
+from botocore.exceptions import ClientError
 from moto import mock_s3
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from app.common.custom_exceptions import WrongFormatException
 
 from app.common.s3 import S3BucketConnector
@@ -86,6 +92,41 @@ class TestS3BucketConnectorMethods(unittest.TestCase):
         # Tests after method execution
         self.assertTrue(not result_list)
     
+    def test_list_files_after_ok(self):
+        """Test the list_files_after method for getting only the objects
+        sorting after the given key
+        """
+        # Expected Results
+        exp_list = ['2021-12-17/file_13.csv', '2021-12-18/file_07.csv']
+        # Test Init
+        for key in ['2021-12-16/file_15.csv', '2021-12-17/file_12.csv'] + exp_list:
+            self._bucket.put_object(Body='col1', Key=key)
+        # Method Execution
+        result_list = self._bucket_conn.list_files_after('2021-12-17/file_12.csv')
+        result_all = self._bucket_conn.list_files_after('2021-12-16')
+        # Tests after method execution
+        self.assertEqual(exp_list, result_list)
+        self.assertEqual(4, len(result_all))
+
+    def test_list_sizes_by_prefix_ok(self):
+        """Test the list_sizes_by_prefix method for getting the sizes
+        of the objects with the prefix
+        """
+        # Expected Results
+        exp_sizes = {'2021-12-17/file_12.csv': 4, '2021-12-17/file_13.csv': 9}
+        # Test Init
+        self._bucket.put_object(Body='col1', Key='2021-12-17/file_12.csv')
+        self._bucket.put_object(Body='col1,col2', Key='2021-12-17/file_13.csv')
+        self._bucket.put_object(Body='col1', Key='2021-12-18/file_07.csv')
+        # Method Execution
+        result_sizes = self._bucket_conn.list_sizes_by_prefix('2021-12-17')
+        result_objects = self._bucket_conn.list_objects_by_prefix('2021-12-17')
+        # Tests after method execution
+        self.assertEqual(exp_sizes, result_sizes)
+        self.assertEqual(exp_sizes, {key: size for key, (size, _) in result_objects.items()})
+        self.assertEqual(self._bucket_conn.list_etags_by_prefix('2021-12-17'),
+                         {key: etag for key, (_, etag) in result_objects.items()})
+
     def test_read_csv_ok(self):
         """
         Tests the read_csv method for
@@ -120,6 +161,141 @@ class TestS3BucketConnectorMethods(unittest.TestCase):
             }
         )
 
+    def test_read_csv_arrow_ok(self):
+        """
+        Tests the read_csv_arrow method for reading an .csv file
+        with given column types from the mocked s3 bucket
+        """
+        # Expected Results
+        exp_key = "test.csv"
+        exp_table = pa.table({'col1': pa.array(['1'], pa.string()),
+                              'col2': pa.array([2.0], pa.float64())})
+        # Test Init.
+        csv_content = 'col1,col2\n1,2'
+        self._bucket.put_object(Body=csv_content, Key=exp_key)
+        # Method Execution
+        result_table = self._bucket_conn.read_csv_arrow(
+            exp_key, column_types={'col1': pa.string(), 'col2': pa.float64()})
+        # Test after method execution
+        self.assertTrue(exp_table.equals(result_table))
+
+    def test_to_s3_arrow_parquet(self):
+        """
+        Tests the to_s3() method
+        if writing an Arrow table as parquet is successful
+        """
+        # Expected Results
+        exp_table = pa.table({'col1': ['A', 'C'], 'col2': [1, 2]})
+        exp_key = 'test.parquet'
+        # Method execution
+        result = self._bucket_conn.to_s3(exp_table, exp_key, 'parquet')
+        # Test after method execution
+        data = self._bucket.Object(key=exp_key).get().get('Body').read()
+        result_table = pq.read_table(BytesIO(data))
+        self.assertTrue(result)
+        self.assertTrue(exp_table.equals(result_table))
+        # Empty tables are not written
+        self.assertIsNone(self._bucket_conn.to_s3(exp_table.slice(0, 0), 'empty.parquet',
+                                                  'parquet'))
+
+    def test_to_s3_feather(self):
+        """
+        Tests the to_s3() method writing feather files from a DataFrame
+        uncompressed and from an Arrow table with lz4 compressed buffers
+        """
+        # Expected Results
+        exp_df = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+        # Method execution
+        self._bucket_conn.to_s3(exp_df, 'test.feather', 'feather')
+        self._bucket_conn.to_s3(pa.Table.from_pandas(exp_df), 'test_lz4.feather', 'feather',
+                                compression='lz4')
+        # Test after method execution
+        for key in ['test.feather', 'test_lz4.feather']:
+            data = self._bucket.Object(key=key).get().get('Body').read()
+            self.assertTrue(exp_df.equals(feather.read_table(pa.BufferReader(data)).to_pandas()))
+        with self.assertLogs() as logm:
+            with self.assertRaises(WrongFormatException):
+                self._bucket_conn.to_s3(exp_df, 'test_gz.feather', 'feather', compression='gzip')
+        self.assertIn('The compression gzip is not supported for feather files!',
+                      logm.output[0])
+
+    def test_read_csv_compressed(self):
+        """
+        Tests the read_csv and read_csv_arrow methods for reading
+        a gzip compressed .csv file detected from the key suffix
+        and with the compression given explicitly
+        """
+        # Expected Results
+        exp_df = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+        # Test Init.
+        csv_content = gzip.compress(b'col1,col2\nA,1\nB,2\n')
+        self._bucket.put_object(Body=csv_content, Key='test.csv.gz')
+        self._bucket.put_object(Body=csv_content, Key='test_no_suffix.csv')
+        # Method Execution
+        result_df = self._bucket_conn.read_csv('test.csv.gz')
+        result_given_df = self._bucket_conn.read_csv('test_no_suffix.csv', compression='gzip')
+        result_table = self._bucket_conn.read_csv_arrow('test.csv.gz')
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertTrue(exp_df.equals(result_given_df))
+        self.assertTrue(exp_df.equals(result_table.to_pandas()))
+
+    def test_to_s3_compressed(self):
+        """
+        Tests the to_s3() method writing zstd compressed .csv files
+        from a DataFrame and an Arrow table and a zstd parquet file
+        """
+        # Expected Results
+        exp_df = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+        # Method execution
+        self._bucket_conn.to_s3(exp_df, 'test.csv.zst', 'csv')
+        self._bucket_conn.to_s3(pa.Table.from_pandas(exp_df), 'test_arrow.csv.zst', 'csv')
+        self._bucket_conn.to_s3(exp_df, 'test.parquet', 'parquet', compression='zstd')
+        # Test after method execution
+        raw_data = self._bucket.Object(key='test.csv.zst').get().get('Body').read()
+        self.assertFalse(raw_data.startswith(b'col1'))
+        self.assertTrue(exp_df.equals(self._bucket_conn.read_csv('test.csv.zst')))
+        self.assertTrue(exp_df.equals(self._bucket_conn.read_csv('test_arrow.csv.zst')))
+        parquet_data = self._bucket.Object(key='test.parquet').get().get('Body').read()
+        self.assertEqual('ZSTD', pq.ParquetFile(BytesIO(parquet_data))
+                         .metadata.row_group(0).column(0).compression)
+        self.assertTrue(exp_df.equals(self._bucket_conn.read_parquet('test.parquet')))
+
+    def test_read_csv_wrong_compression(self):
+        """
+        Tests the read_csv method with a not supported compression
+        """
+        # Expected Results
+        exp_exception = WrongFormatException
+        # Test Init.
+        self._bucket.put_object(Body='col1\nA', Key='test.csv')
+        # Method Execution
+        with self.assertRaises(exp_exception):
+            self._bucket_conn.read_csv('test.csv', compression='lzma')
+
+    def test_read_csv_throttled(self):
+        """
+        Tests that throttled reads cut the concurrency limit
+        and are reported in the metrics
+        """
+        # Test Init.
+        self._bucket.put_object(Body='col1\nA', Key='test.csv')
+        error = ClientError({'Error': {'Code': 'SlowDown'},
+                             'ResponseMetadata': {'HTTPStatusCode': 503}}, 'GetObject')
+        exp_limit = self._bucket_conn.limiter.limit // 2
+        # Method Execution
+        with patch.object(self._bucket_conn, '_get_body', side_effect=error):
+            with self.assertRaises(ClientError):
+                self._bucket_conn.read_csv('test.csv')
+        result_df = self._bucket_conn.read_csv('test.csv')
+        result_metrics = self._bucket_conn.concurrency_metrics()
+        # Tests after method execution
+        self.assertEqual(['A'], list(result_df.col1))
+        self.assertEqual(exp_limit, result_metrics['limit'])
+        self.assertEqual(1, result_metrics['throttled'])
+        self.assertEqual(2, result_metrics['completed'])
+        self.assertEqual('throttled', result_metrics['changes'][-1]['reason'])
+
     def test_to_s3_empty(self):
         """
         Tests the to_s3() method with an empty
@@ -0,0 +1,171 @@
+"""TestS3RangedFileMethods"""
+from io import BytesIO
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from moto import mock_s3
+
+from app.common.s3 import S3BucketConnector
+from app.common.s3_ranged import S3RangedFile, read_parquet_ranged, select_row_groups
+from app.common.tracing import Tracer
+
+class TestS3RangedFileMethods(unittest.TestCase):
+    """
+    Testing the S3RangedFile class and the ranged parquet reads
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining the class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name = 'test-bucket'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url)
+        self._s3.create_bucket(Bucket=self.s3_bucket_name,
+                               CreateBucketConfiguration={
+                                   'LocationConstraint': 'eu-west-2'
+                               })
+        self._bucket = self._s3.Bucket(self.s3_bucket_name)
+        self._bucket_conn = S3BucketConnector(self.s3_access_key,
+                                              self.s3_secret_key,
+                                              self.s3_endpoint_url,
+                                              self.s3_bucket_name)
+        # Report like data sorted by date in 4 row groups of one date each
+        rng = np.random.default_rng(0)
+        rows = 20000
+        self.dates = ['2022-01-03', '2022-01-04', '2022-01-05', '2022-01-06']
+        self.df = pd.DataFrame({
+            'isin': [f'DE{ind:010d}' for ind in range(rows)],
+            'date': np.repeat(self.dates, rows // 4),
+            'opening_price_eur': rng.random(rows),
+            'closing_price_eur': rng.random(rows),
+            'daily_traded_volume': rng.integers(0, 10**6, rows)
+        })
+        out_buffer = BytesIO()
+        pq.write_table(pa.Table.from_pandas(self.df, preserve_index=False), out_buffer,
+                       row_group_size=rows // 4)
+        self.key = 'report1/report.parquet'
+        self._bucket.put_object(Body=out_buffer.getvalue(), Key=self.key)
+
+    def tearDown(self) -> None:
+        """
+        Executing after unittests
+        """
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def test_read_ranges(self):
+        """
+        Tests reading and seeking in the ranged file
+        """
+        # Expected results
+        exp_data = self._bucket.Object(key=self.key).get().get('Body').read()
+        # Test init
+        tracer = Tracer()
+        ranged_file = S3RangedFile(self._s3.meta.client, self.s3_bucket_name, self.key,
+                                   tail_bytes=16, tracer=tracer)
+        # Method execution
+        ranged_file.seek(4)
+        result_start = ranged_file.read(10)
+        ranged_file.seek(-16, 2)
+        result_end = ranged_file.read()
+        # Test after method execution
+        self.assertEqual(len(exp_data), ranged_file.size)
+        self.assertEqual(exp_data[4:14], result_start)
+        self.assertEqual(exp_data[-16:], result_end)
+        # the end was fetched by the constructor
+        self.assertEqual(2, ranged_file.requests)
+        # every read of a body has its span
+        self.assertEqual({'count': 2, 'bytes': 26},
+                         {name: tracer.summary()['s3.GetObject.body'][name]
+                          for name in ('count', 'bytes')})
+
+    def test_select_row_groups(self):
+        """
+        Tests the selection of row groups by their statistics
+        """
+        # Test init
+        metadata = pq.ParquetFile(
+            BytesIO(self._bucket.Object(key=self.key).get().get('Body').read())).metadata
+        # Method execution and tests after method execution
+        self.assertEqual([0, 1, 2, 3], select_row_groups(metadata))
+        self.assertEqual([2, 3], select_row_groups(metadata, [('date', '>=', '2022-01-05')]))
+        self.assertEqual([1], select_row_groups(metadata, [('date', '==', '2022-01-04')]))
+        self.assertEqual([0, 3], select_row_groups(
+            metadata, [('date', 'in', ['2022-01-03', '2022-01-06'])]))
+        self.assertEqual([], select_row_groups(metadata, [('date', '<', '2022-01-01')]))
+
+    @patch('app.common.s3_ranged.COALESCE_GAP', 0)
+    def test_read_parquet_ranged(self):
+        """
+        Tests that a projected and filtered read only fetches
+        a fraction of the object
+        """
+        # Expected results
+        exp_df = self.df.loc[self.df.date == '2022-01-06', ['isin', 'opening_price_eur']]\
+            .reset_index(drop=True)
+        # Test init
+        ranged_file = S3RangedFile(self._s3.meta.client, self.s3_bucket_name, self.key)
+        # Method execution
+        result_df = read_parquet_ranged(ranged_file, columns=['isin', 'opening_price_eur'],
+                                        filters=[('date', '==', '2022-01-06')]).to_pandas()
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertLess(ranged_file.bytes_fetched, ranged_file.size / 4)
+
+    @patch('app.common.s3_ranged.COALESCE_GAP', 0)
+    def test_read_parquet_ranged_cache_limit(self):
+        """
+        Tests that the cache of a ranged read stays within max_cache_bytes
+        and the data is complete
+        """
+        # Expected results
+        exp_df = self.df
+        # Test init
+        max_cache_bytes = 64 * 1024
+        ranged_file = S3RangedFile(self._s3.meta.client, self.s3_bucket_name, self.key,
+                                   max_cache_bytes=max_cache_bytes)
+        # Method execution
+        result_df = read_parquet_ranged(ranged_file).to_pandas()
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertLess(max_cache_bytes, ranged_file.size)
+        self.assertLessEqual(ranged_file._cached_bytes, max(
+            max_cache_bytes, max(len(data) for data in ranged_file._blocks.values())))
+        self.assertEqual(sorted(ranged_file._blocks), ranged_file._starts)
+
+    def test_read_parquet(self):
+        """
+        Tests the read_parquet method of S3BucketConnector
+        with and without columns and filters
+        """
+        # Expected results
+        exp_df = self.df[self.df.date > '2022-01-04'].reset_index(drop=True)
+        # Method execution
+        result_all_df = self._bucket_conn.read_parquet(self.key)
+        result_df = self._bucket_conn.read_parquet(self.key, filters=[('date', '>', '2022-01-04')])
+        result_columns_df = self._bucket_conn.read_parquet(self.key, columns=['date'])
+        # Test after method execution
+        self.assertTrue(self.df.equals(result_all_df))
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertEqual(['date'], list(result_columns_df.columns))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""TestSinkWriterMethods"""
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from app.common.bq import BigQueryConnector
+from app.common.custom_exceptions import SinkException
+from app.common.local_storage import LocalFileConnector
+from app.common.report_index import ReportIndex
+from app.common.sinks import BigQuerySink, IndexedStorageSink, Sink, SinkWriter, StorageSink
+from app.transformers.report_transformer import DestinationConfig
+
+
+class BarrierSink(Sink):
+    """
+    Sink recording the reports, waiting for the other sinks while it prepares
+    """
+    def __init__(self, name: str, barrier: threading.Barrier, fail: bool=False,
+                 required: bool=True) -> None:
+        super().__init__(name, required)
+        self.barrier = barrier
+        self.fail = fail
+        self.committed = []
+
+    def target(self, key_stem: str, dest_args):
+        return key_stem
+
+    def prepare(self, data, target: str, dest_args):
+        # every sink has to reach the barrier, so the sinks prepare concurrently
+        self.barrier.wait()
+        if self.fail:
+            raise ValueError(f'{self.name} failed')
+        return data
+
+    def commit(self, payload, target: str):
+        self.committed.append(target)
+
+
+class FailingCommitSink(Sink):
+    """
+    Sink preparing the reports and failing to commit them
+    """
+    def target(self, key_stem: str, dest_args):
+        return key_stem
+
+    def prepare(self, data, target: str, dest_args):
+        return data
+
+    def commit(self, payload, target: str):
+        raise ValueError(f'{self.name} failed')
+
+
+class TestSinkWriterMethods(unittest.TestCase):
+    """
+    Testing the sinks and the SinkWriter class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.root_dir = tempfile.mkdtemp(prefix='sinks_test_')
+        self._connector = LocalFileConnector(self.root_dir)
+        self.dest_args = DestinationConfig(
+            'isin', 'date', 'opening_price_eur', 'closing_price_eur', 'minimum_price_eur',
+            'maximum_price_eur', 'daily_traded_volume', 'change_prev_closing_%',
+            'report1/daily_report1_', '%Y%m%d_%H%M%S', 'parquet')
+        self.df = pd.DataFrame({'isin': ['AT0000A0E9W5'], 'closing_price_eur': [21.19]})
+
+    def tearDown(self) -> None:
+        """
+        Removing the files
+        """
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def test_write_storage_sinks(self):
+        """
+        Tests writing a report as parquet and compressed csv file
+        """
+        # Expected results
+        exp_keys = ['report1/daily_report1_x.csv.gz', 'report1/daily_report1_x.parquet']
+        # Test init
+        sink_writer = SinkWriter([
+            StorageSink('parquet', self._connector),
+            StorageSink('csv', self._connector, file_format='csv', compression='gzip')
+        ])
+        # Method execution
+        results = sink_writer.write(self.df, 'report1/daily_report1_x', self.dest_args)
+        # Test after method execution
+        self.assertEqual(exp_keys, self._connector.list_files_by_prefix('report1/'))
+        self.assertEqual(['parquet', 'csv'], [result.name for result in results])
+        self.assertTrue(all(result.error is None and result.commit_seconds is not None
+                            for result in results))
+        self.assertTrue(self.df.equals(self._connector.read_parquet(exp_keys[1])))
+        self.assertTrue(self.df.equals(self._connector.read_csv(exp_keys[0])))
+
+    def test_write_indexed_sink(self):
+        """
+        Tests writing a report sorted by ISIN with its sidecar index
+        """
+        # Expected results
+        exp_keys = ['report1/daily_report1_x.parquet',
+                    'report1/daily_report1_x.parquet.index.json']
+        # Test init
+        df = pd.DataFrame({'isin': ['DE0000000002', 'AT0000A0E9W5', 'DE0000000002'],
+                           'date': ['2021-12-18', '2021-12-17', '2021-12-17'],
+                           'closing_price_eur': [21.19, 18.27, 20.21]})
+        sink = IndexedStorageSink('indexed', self._connector, row_group_size=2)
+        # Method execution
+        SinkWriter([sink]).write(df, 'report1/daily_report1_x', self.dest_args)
+        # Test after method execution
+        self.assertEqual(exp_keys, self._connector.list_files_by_prefix('report1/'))
+        result_df = self._connector.read_parquet(exp_keys[0])
+        self.assertEqual(['AT0000A0E9W5', 'DE0000000002', 'DE0000000002'],
+                         list(result_df['isin']))
+        self.assertEqual(['2021-12-17', '2021-12-17', '2021-12-18'], list(result_df['date']))
+        index = ReportIndex.from_json(self._connector.read_text(exp_keys[1]))
+        self.assertEqual(exp_keys[0], index.key)
+        self.assertEqual([0, 1], index.row_groups_of('DE0000000002'))
+
+    def test_write_concurrent(self):
+        """
+        Tests that the sinks prepare the report concurrently
+        """
+        # Test init
+        barrier = threading.Barrier(2, timeout=5)
+        sinks = [BarrierSink('sink1', barrier), BarrierSink('sink2', barrier)]
+        # Method execution
+        SinkWriter(sinks).write(self.df, 'key', self.dest_args)
+        # Test after method execution
+        self.assertEqual([['key'], ['key']], [sink.committed for sink in sinks])
+
+    def test_write_required_failed(self):
+        """
+        Tests that no sink commits the report if a required sink fails
+        """
+        # Test init
+        barrier = threading.Barrier(2, timeout=5)
+        sinks = [BarrierSink('sink1', barrier), BarrierSink('sink2', barrier, fail=True)]
+        # Method execution
+        with self.assertLogs() as logm:
+            with self.assertRaises(SinkException):
+                SinkWriter(sinks).write(self.df, 'key', self.dest_args)
+        # Test after method execution
+        self.assertEqual([[], []], [sink.committed for sink in sinks])
+        self.assertIn('Required sink sink2 failed to prepare the report', logm.output[0])
+
+    def test_write_required_commit_failed(self):
+        """
+        Tests that the committed files are deleted if a required sink fails to commit
+        """
+        # Test init
+        df = pd.DataFrame({'isin': ['AT0000A0E9W5'], 'date': ['2021-12-17'],
+                           'closing_price_eur': [21.19]})
+        sinks = [IndexedStorageSink('indexed', self._connector),
+                 StorageSink('csv', self._connector, file_format='csv'),
+                 FailingCommitSink('failing')]
+        # Method execution
+        with self.assertLogs() as logm:
+            with self.assertRaises(SinkException):
+                SinkWriter(sinks).write(df, 'report1/daily_report1_x', self.dest_args)
+        # Test after method execution
+        self.assertEqual([], self._connector.list_files_by_prefix('report1/'))
+        self.assertIn('ERROR:app.common.sinks:Required sink failing failed to commit the report: '
+                      "ValueError('failing failed')", logm.output)
+
+    def test_write_optional_failed(self):
+        """
+        Tests that a failing optional sink does not stop the other sinks
+        """
+        # Test init
+        barrier = threading.Barrier(2, timeout=5)
+        sinks = [BarrierSink('sink1', barrier),
+                 BarrierSink('sink2', barrier, fail=True, required=False)]
+        # Method execution
+        with self.assertLogs() as logm:
+            results = SinkWriter(sinks).write(self.df, 'key', self.dest_args)
+        # Test after method execution
+        self.assertEqual([['key'], []], [sink.committed for sink in sinks])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertIsNone(results[1].commit_seconds)
+        self.assertIn('Optional sink sink2 failed', logm.output[0])
+
+    def test_bigquery_sink(self):
+        """
+        Tests that the BigQuery sink appends the report to its table
+        """
+        # Test init
+        sink = BigQuerySink('bigquery', 'project', 'dataset', 'table')
+        # Method execution
+        with patch.object(BigQueryConnector, 'to_bq') as to_bq:
+            results = SinkWriter([sink]).write(self.df, 'key', self.dest_args)
+        # Test after method execution
+        self.assertEqual('dataset.table', results[0].target)
+        self.assertTrue(self.df.equals(to_bq.call_args[0][0]))
+        self.assertEqual('dataset.table', to_bq.call_args[0][1])
+
+    def test_bigquery_sink_dest_table(self):
+        """
+        Tests that the BigQuery sink appends a report with dest_table to its own table
+        """
+        # Test init
+        sink = BigQuerySink('bigquery', 'project', 'dataset', 'table')
+        dest_args = self.dest_args._replace(dest_table='report1')
+        # Method execution
+        with patch.object(BigQueryConnector, 'to_bq') as to_bq:
+            results = SinkWriter([sink]).write(self.df, 'key', dest_args)
+        # Test after method execution
+        self.assertEqual('dataset.report1', results[0].target)
+        self.assertEqual('dataset.report1', to_bq.call_args[0][1])
+
+    def test_check_targets(self):
+        """
+        Tests that reports sharing the table of an appending sink are rejected
+        """
+        # Test init
+        writer = SinkWriter([StorageSink('storage', self._connector),
+                             BigQuerySink('bigquery', 'project', 'dataset', 'table')])
+        report2_args = self.dest_args._replace(dest_key='report2/daily_report2_')
+        # Method execution
+        writer.check_targets([self.dest_args._replace(dest_table='report1'),
+                              report2_args._replace(dest_table='report2')])
+        with self.assertLogs() as logm:
+            with self.assertRaises(SinkException):
+                writer.check_targets([self.dest_args, report2_args])
+        # Test after method execution
+        self.assertIn('Sink bigquery writes several reports to one target', logm.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""TestSpillStoreMethods"""
+import os
+import unittest
+
+import pandas as pd
+
+from app.common.spill import SpillStore
+
+class TestSpillStoreMethods(unittest.TestCase):
+    """
+    Testing the SpillStore class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        self.spill_store = SpillStore()
+        self.df1 = pd.DataFrame({'ISIN': ['A', 'B'], 'Price': [1.5, 2.25], 'Volume': [1, 2]})
+        self.df2 = pd.DataFrame({'ISIN': ['C'], 'Price': [3.0], 'Volume': [3]})
+
+    def tearDown(self) -> None:
+        """
+        Removing the spill files
+        """
+        self.spill_store.cleanup()
+
+    def test_spill_and_read(self):
+        """
+        Tests spilling several files of a partition and reading them back
+        """
+        # Expected results
+        exp_df = pd.concat([self.df1, self.df2], ignore_index=True)
+        # Method execution
+        self.spill_store.spill('2021-12-18', self.df2)
+        self.spill_store.spill('2021-12-17', self.df1)
+        self.spill_store.spill('2021-12-17', self.df2)
+        # Test after method execution
+        self.assertEqual(['2021-12-17', '2021-12-18'], self.spill_store.partitions())
+        self.assertTrue(exp_df.equals(self.spill_store.read('2021-12-17')))
+        self.assertTrue(self.df2.equals(self.spill_store.read('2021-12-18')))
+
+    def test_cleanup(self):
+        """
+        Tests the cleanup method removing all spill files
+        """
+        # Test init
+        self.spill_store.spill('2021-12-17', self.df1)
+        # Method execution
+        self.spill_store.cleanup()
+        # Test after method execution
+        self.assertFalse(os.path.exists(self.spill_store.path))
+        self.assertEqual([], self.spill_store.partitions())
+
+
+if __name__ == '__main__':
+    unittest.main()
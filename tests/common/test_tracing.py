@@ -0,0 +1,147 @@
+"""TestTracerMethods"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import boto3
+from moto import mock_s3
+import pandas as pd
+
+from app.common.s3 import S3BucketConnector
+from app.common.tracing import JsonlSpanExporter, LatencyHistogram, Tracer, trace_span
+
+class TestTracerMethods(unittest.TestCase):
+    """
+    Testing the Tracer and LatencyHistogram classes
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining the class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name = 'test-bucket'
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url)
+        self._s3.create_bucket(Bucket=self.s3_bucket_name,
+                               CreateBucketConfiguration={
+                                   'LocationConstraint': 'eu-west-2'
+                               })
+        self.tmp_dir = tempfile.mkdtemp(prefix='tracing_test_')
+        self.spans_file = os.path.join(self.tmp_dir, 'spans.jsonl')
+
+    def tearDown(self) -> None:
+        """
+        Executing after unittests
+        """
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_histogram_percentiles(self):
+        """
+        Tests that the percentiles are off by at most the growth of the buckets
+        """
+        # Test init
+        histogram = LatencyHistogram()
+        # Method execution
+        for ms in range(1, 101):
+            histogram.add(ms / 1000)
+        # Test after method execution
+        self.assertEqual(100, histogram.count)
+        self.assertEqual(0.1, histogram.max)
+        for pct in (50, 95, 99):
+            self.assertGreaterEqual(histogram.percentile(pct), pct / 1000)
+            self.assertLessEqual(histogram.percentile(pct), pct / 1000 * 1.1)
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+    def test_s3_spans(self):
+        """
+        Tests that every S3 request of a traced connector is exported as span
+        """
+        # Expected results
+        exp_operations = ['s3.PutObject', 's3.ListObjects', 's3.GetObject', 's3.GetObject.body',
+                          's3.GetObject']
+        # Test init
+        tracer = Tracer(JsonlSpanExporter(self.spans_file))
+        s3_conn = S3BucketConnector(self.s3_access_key, self.s3_secret_key,
+                                    self.s3_endpoint_url, self.s3_bucket_name, tracer=tracer)
+        df = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+        # Method execution
+        s3_conn.to_s3(df, 'prefix/test.csv', 'csv')
+        s3_conn.list_files_by_prefix('prefix/')
+        s3_conn.read_csv('prefix/test.csv')
+        with self.assertRaises(s3_conn.not_found_error):
+            s3_conn.read_bytes('prefix/missing.csv')
+        tracer.close()
+        # Test after method execution
+        with open(self.spans_file, encoding='utf-8') as file:
+            spans = [json.loads(line) for line in file]
+        self.assertEqual(exp_operations, [span['operation'] for span in spans])
+        self.assertEqual(['prefix/test.csv', 'prefix/', 'prefix/test.csv', 'prefix/test.csv',
+                          'prefix/missing.csv'], [span['key'] for span in spans])
+        self.assertEqual([None, None, None, None, 'NoSuchKey'],
+                         [span['error'] for span in spans])
+        # the body span has the bytes of the file
+        self.assertEqual(spans[2]['bytes'], spans[3]['bytes'])
+        self.assertGreater(spans[0]['bytes'], 0)
+        summary = tracer.summary()
+        self.assertEqual(2, summary['s3.GetObject']['count'])
+        self.assertEqual(1, summary['s3.GetObject']['errors'])
+        self.assertLessEqual(summary['s3.GetObject']['p50'], summary['s3.GetObject']['p99'])
+        self.assertIn('s3.PutObject', tracer.report())
+
+    def test_trace_span(self):
+        """
+        Tests the span context manager with errors and disabled tracing
+        """
+        # Test init
+        tracer = Tracer()
+        # Method execution
+        with trace_span(tracer, 'bq.load_table', 'dataset.table') as span:
+            span['bytes'] = 100
+        with self.assertRaises(ValueError):
+            with trace_span(tracer, 'bq.load_table', 'dataset.table'):
+                raise ValueError('failed')
+        with trace_span(None, 'bq.load_table') as span:
+            span['bytes'] = 100
+        # Test after method execution
+        summary = tracer.summary()['bq.load_table']
+        self.assertEqual(2, summary['count'])
+        self.assertEqual(100, summary['bytes'])
+        self.assertEqual(1, summary['errors'])
+
+    def test_merge(self):
+        """
+        Tests adding the latencies of the tracer of another process
+        """
+        # Test init
+        tracer = Tracer()
+        other = Tracer()
+        with trace_span(tracer, 'bq.load_table') as span:
+            span['bytes'] = 100
+        with trace_span(other, 'bq.load_table') as span:
+            span['bytes'] = 50
+        with trace_span(other, 's3.GetObject'):
+            pass
+        # Method execution
+        tracer.merge(other.histograms, other.totals)
+        # Test after method execution
+        summary = tracer.summary()
+        self.assertEqual(2, summary['bq.load_table']['count'])
+        self.assertEqual(150, summary['bq.load_table']['bytes'])
+        self.assertEqual(1, summary['s3.GetObject']['count'])
+
+
+if __name__ == '__main__':
+    unittest.main()
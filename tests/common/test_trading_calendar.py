@@ -0,0 +1,60 @@
+"""TestTradingCalendarMethods"""
+from datetime import date
+import unittest
+
+from app.common.custom_exceptions import WrongCalendarException
+from app.common.trading_calendar import (TradingCalendar, WeekdayCalendar, XetraCalendar,
+                                         create_trading_calendar, easter_sunday)
+
+class TestTradingCalendarMethods(unittest.TestCase):
+    """
+    Testing the trading calendars
+    """
+
+    def test_easter_sunday(self):
+        """
+        Tests the date of Easter Sunday
+        """
+        # Expected results
+        exp_dates = [date(2021, 4, 4), date(2022, 4, 17), date(2024, 3, 31), date(2025, 4, 20)]
+        # Method execution
+        act_dates = [easter_sunday(year) for year in (2021, 2022, 2024, 2025)]
+        # Test after method execution
+        self.assertEqual(exp_dates, act_dates)
+
+    def test_xetra_trading_dates(self):
+        """
+        Tests that weekends, Xetra holidays and given holidays are no trading days
+        """
+        # Expected results
+        exp_dates = ['2021-12-22', '2021-12-27', '2021-12-28', '2021-12-29',
+                     '2021-12-30', '2022-01-03']
+        # Test init
+        calendar = XetraCalendar(['2021-12-23'])
+        # Method execution
+        act_dates = calendar.trading_dates('2021-12-22', '2022-01-03')
+        # Test after method execution
+        self.assertEqual(exp_dates, act_dates)
+        self.assertEqual(date(2022, 4, 14), calendar.previous_trading_day(date(2022, 4, 19)))
+
+    def test_create_trading_calendar(self):
+        """
+        Tests creating the calendars by name
+        """
+        # Method execution
+        calendars = [create_trading_calendar(), create_trading_calendar('all'),
+                     create_trading_calendar('weekdays', ['2021-12-24']),
+                     create_trading_calendar('xetra')]
+        # Test after method execution
+        self.assertEqual([TradingCalendar, TradingCalendar, WeekdayCalendar, XetraCalendar],
+                         [type(calendar) for calendar in calendars])
+        self.assertEqual(['2021-12-18', '2021-12-19'],
+                         calendars[0].trading_dates('2021-12-18', '2021-12-19'))
+        self.assertEqual(['2021-12-23', '2021-12-27'],
+                         calendars[2].trading_dates('2021-12-23', '2021-12-27'))
+        with self.assertRaises(WrongCalendarException):
+            create_trading_calendar('nyse')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""TestReportArrowMethods"""
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                  ProcessingConfig)
+
+class TestReportArrowMethods(unittest.TestCase):
+    """
+    Testing the Arrow engine against the pandas engine
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        conf_dict_src = {
+            'src_first_extract_date': '2021-12-01',
+            'src_columns': ['ISIN', 'Mnemonic', 'Date', 'Time',
+                            'StartPrice', 'EndPrice', 'MinPrice',
+                            'MaxPrice', 'TradedVolume'],
+            'src_col_date': 'Date',
+            'src_col_isin': 'ISIN',
+            'src_col_time': 'Time',
+            'src_col_start_price': 'StartPrice',
+            'src_col_min_price': 'MinPrice',
+            'src_col_max_price': 'MaxPrice',
+            'src_col_traded_vol': 'TradedVolume'
+        }
+        conf_dict_dst = {
+            'dest_col_isin': 'isin',
+            'dest_col_date': 'date',
+            'dest_col_op_price': 'opening_price_eur',
+            'dest_col_cls_price': 'closing_price_eur',
+            'dest_col_min_price': 'minimum_price_eur',
+            'dest_col_max_price': 'maximum_price_eur',
+            'dest_col_daily_trd_vol': 'daily_traded_volume',
+            'dest_col_chg_prev_cls': 'change_prev_closing_%',
+            'dest_key': 'report1/daily_report1_',
+            'dest_key_date_format': '%Y%m%d_%H%M%S',
+            'dest_format': 'parquet'
+        }
+        self.source_config = SourceConfig(**conf_dict_src)
+        self.destination_config = DestinationConfig(**conf_dict_dst)
+        # Creating random source data with missing values
+        rng = np.random.default_rng(42)
+        rows = 5000
+        self.src_df = pd.DataFrame({
+            'ISIN': rng.choice([f'DE000000{ind:04d}' for ind in range(50)], rows),
+            'Mnemonic': 'MNE',
+            'Date': rng.choice(['2021-12-15', '2021-12-16', '2021-12-17', '2021-12-20'], rows),
+            'Time': [f'{hour:02d}:{minute:02d}' for hour, minute
+                     in zip(rng.integers(8, 17, rows), rng.integers(0, 60, rows))],
+            'StartPrice': rng.integers(100, 100000, rows) / 1000,
+            'EndPrice': rng.integers(100, 100000, rows) / 1000,
+            'MinPrice': rng.integers(100, 100000, rows) / 1000,
+            'MaxPrice': rng.integers(100, 100000, rows) / 1000,
+            'TradedVolume': rng.integers(0, 10000, rows)
+        })
+        # one trade per ISIN and minute as in the Xetra data
+        self.src_df = self.src_df.drop_duplicates(subset=['ISIN', 'Date', 'Time'])\
+            .reset_index(drop=True)
+        self.src_df.loc[::97, 'MinPrice'] = np.nan
+
+    def _report_etl(self, transform_engine: str):
+        """Creates a ReportETL instance for the given engine"""
+        return ReportETL(None, None, None, self.source_config, self.destination_config,
+                         extract_date='2021-12-16',
+                         extract_date_list=['2021-12-15', '2021-12-16',
+                                            '2021-12-17', '2021-12-20'],
+                         proc_args=ProcessingConfig(transform_engine=transform_engine))
+
+    def test_transform_arrow_equals_pandas(self):
+        """
+        Tests that the Arrow engine creates the same report as the pandas engine
+        """
+        # Test init
+        input_table = pa.Table.from_pandas(self.src_df, preserve_index=False)
+        # Method execution
+        exp_df = self._report_etl('pandas').transform_to_report(self.src_df)
+        result_table = self._report_etl('arrow').transform_to_report(input_table)
+        # Test after method execution
+        self.assertIsInstance(result_table, pa.Table)
+        self.assertFalse(exp_df.empty)
+        pd.testing.assert_frame_equal(exp_df, result_table.to_pandas())
+
+    def test_transform_arrow_empty(self):
+        """
+        Tests the Arrow engine with an empty table
+        """
+        # Test init
+        input_table = pa.Table.from_pandas(self.src_df.iloc[:0], preserve_index=False)
+        # Method execution
+        result_table = self._report_etl('arrow').transform_to_report(input_table)
+        # Test after method execution
+        self.assertEqual(0, result_table.num_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+"""TestReportBackfillMethods"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import boto3
+import pandas as pd
+from moto import mock_s3
+
+from app.common.custom_exceptions import BackfillException
+from app.common.local_storage import LocalFileConnector
+from app.common.s3 import S3BucketConnector
+from app.common.tracing import Tracer
+from app.common.trading_calendar import XetraCalendar
+from app.transformers.report_backfill import (ReportBackfill, plan_shards, run_backfill_shard,
+                                              split_date_range)
+
+class TestReportBackfillMethods(unittest.TestCase):
+    """
+    Testing the ReportBackfill class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name_src = 'src-bucket'
+        self.s3_bucket_name_dst = 'dst-bucket'
+        self.meta_key = 'meta_key'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url = self.s3_endpoint_url)
+        for bucket_name in [self.s3_bucket_name_src, self.s3_bucket_name_dst]:
+            self._s3.create_bucket(Bucket=bucket_name,
+                                   CreateBucketConfiguration={
+                                       'LocationConstraint': 'eu-west-2'
+                                   })
+        self._bucket_conn_src = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_src)
+        self._bucket_conn_dst = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_dst)
+        # creating the configuration
+        self.config = {
+            's3': {
+                'access_key': self.s3_access_key,
+                'secret_key': self.s3_secret_key,
+                'src_endpoint_url': self.s3_endpoint_url,
+                'src_bucket': self.s3_bucket_name_src,
+                'dest_endpoint_url': self.s3_endpoint_url,
+                'dest_bucket': self.s3_bucket_name_dst
+            },
+            'source': {
+                'src_first_extract_date': '2021-12-01',
+                'src_columns': ['ISIN', 'Mnemonic', 'Date', 'Time',
+                                'StartPrice', 'EndPrice', 'MinPrice',
+                                'MaxPrice', 'TradedVolume'],
+                'src_col_date': 'Date',
+                'src_col_isin': 'ISIN',
+                'src_col_time': 'Time',
+                'src_col_start_price': 'StartPrice',
+                'src_col_min_price': 'MinPrice',
+                'src_col_max_price': 'MaxPrice',
+                'src_col_traded_vol': 'TradedVolume'
+            },
+            'destination': {
+                'dest_col_isin': 'isin',
+                'dest_col_date': 'date',
+                'dest_col_op_price': 'opening_price_eur',
+                'dest_col_cls_price': 'closing_price_eur',
+                'dest_col_min_price': 'minimum_price_eur',
+                'dest_col_max_price': 'maximum_price_eur',
+                'dest_col_daily_trd_vol': 'daily_traded_volume',
+                'dest_col_chg_prev_cls': 'change_prev_closing_%',
+                'dest_key': 'report1/daily_report1_',
+                'dest_key_date_format': '%Y%m%d_%H%M%S',
+                'dest_format': 'parquet'
+            },
+            'meta': {
+                'meta_key': self.meta_key
+            }
+        }
+        # Creating source files on mocked s3
+        columns_src = ['ISIN', 'Mnemonic', 'Date', 'Time',
+                        'StartPrice', 'EndPrice', 'MinPrice',
+                        'MaxPrice', 'TradedVolume']
+        data = [
+            ['AT0000A0E9W5', 'SANT', '2021-12-15', '12:00', 20.19, 18.45, 18.20, 20.33, 877],
+            ['AT0000A0E9W5', 'SANT', '2021-12-16', '15:00', 18.27, 21.19, 18.27, 21.34, 987],
+            ['AT0000A0E9W5', 'SANT', '2021-12-17', '13:00', 20.21, 18.27, 18.21, 20.42, 633],
+            ['AT0000A0E9W5', 'SANT', '2021-12-17', '14:00', 18.27, 21.19, 18.27, 21.34, 455],
+            ['AT0000A0E9W5', 'SANT', '2021-12-18', '07:00', 20.58, 19.27, 18.89, 20.58, 9066],
+            ['AT0000A0E9W5', 'SANT', '2021-12-18', '08:00', 19.27, 21.14, 19.27, 21.14, 1220],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '07:00', 23.58, 23.58, 23.58, 23.58, 1035],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '08:00', 23.58, 24.22, 23.31, 24.34, 1028],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '09:00', 24.22, 22.21, 22.21, 25.01, 1523]
+        ]
+        src_df = pd.DataFrame(data, columns=columns_src)
+        self.src_df = src_df
+        for ind, row in src_df.iterrows():
+            self._bucket_conn_src.to_s3(
+                src_df.loc[ind:ind],
+                f'{row.Date}/{row.Date}_BINS_XETR{row.Time[:2]}.csv', 'csv')
+        columns_report = [
+            'ISIN', 'Date', 'opening_price_eur', 'closing_price_eur',
+            'minimum_price_eur', 'maximum_price_eur', 'daily_traded_volume',
+            'change_prev_closing_%'
+        ]
+        data_report = [
+            ['AT0000A0E9W5', '2021-12-17', 20.21, 18.27, 18.21, 21.34, 1088, 10.62],
+            ['AT0000A0E9W5', '2021-12-18', 20.58, 19.27, 18.89, 21.14, 10286, 1.83],
+            ['AT0000A0E9W5', '2021-12-19', 23.58, 24.22, 22.21, 25.01, 3586, 14.58]
+        ]
+        self.df_report = pd.DataFrame(data_report, columns=columns_report)
+
+    def tearDown(self) -> None:
+        """Executing after unittests
+        """
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def test_split_date_range(self):
+        """
+        Tests the split_date_range function
+        """
+        # Expected results
+        exp_shards = [
+            ('2021-12-01', '2021-12-04'),
+            ('2021-12-05', '2021-12-07'),
+            ('2021-12-08', '2021-12-10')
+        ]
+        # Method execution
+        act_shards = split_date_range('2021-12-01', '2021-12-10', 3)
+        # Test after method execution
+        self.assertEqual(exp_shards, act_shards)
+        self.assertEqual([('2021-12-01', '2021-12-01')],
+                         split_date_range('2021-12-01', '2021-12-01', 4))
+        self.assertEqual([], split_date_range('2021-12-02', '2021-12-01', 4))
+
+    def test_split_date_range_calendar(self):
+        """
+        Tests the split_date_range function splitting the trading days evenly
+        """
+        # Expected results
+        exp_shards = [
+            ('2021-12-01', '2021-12-03'),
+            ('2021-12-06', '2021-12-08'),
+            ('2021-12-09', '2021-12-10')
+        ]
+        # Method execution
+        act_shards = split_date_range('2021-12-01', '2021-12-10', 3, XetraCalendar())
+        # Test after method execution
+        self.assertEqual(exp_shards, act_shards)
+
+    def test_shards_lookback(self):
+        """
+        Tests that the shards never look back before the day
+        preceding the backfill range
+        """
+        # Expected results
+        exp_shards = [
+            ('2021-12-16', '2021-12-17', '2021-12-15'),
+            ('2021-12-18', '2021-12-19', '2021-12-15')
+        ]
+        # Method execution
+        backfill = ReportBackfill(self.config, '2021-12-16', '2021-12-19', workers=2)
+        # Test after method execution
+        self.assertEqual(exp_shards, backfill.shards())
+
+    def test_shards_lookback_calendar(self):
+        """
+        Tests that the first shard of a range starting on a Monday reads
+        the previous Friday like the single process run
+        """
+        # Expected results
+        exp_shards = [
+            ('2021-12-13', '2021-12-14', '2021-12-10'),
+            ('2021-12-15', '2021-12-16', '2021-12-10')
+        ]
+        # Method execution
+        act_shards = plan_shards('2021-12-13', '2021-12-16', 2, calendar=XetraCalendar())
+        # Test after method execution
+        self.assertEqual(exp_shards, act_shards)
+
+    def test_run_backfill_shard(self):
+        """
+        Tests the run_backfill_shard function for a shard
+        whose previous trading day belongs to another shard
+        """
+        # Expected results
+        exp_df = self.df_report.loc[1:].reset_index(drop=True)
+        exp_dates = ['2021-12-18', '2021-12-19']
+        # Method execution
+        act_dates = run_backfill_shard(self.config, '2021-12-18', '2021-12-19', '2021-12-15')
+        # Test after method execution
+        self.assertEqual(exp_dates, act_dates)
+        dest_file = self._bucket_conn_dst.list_files_by_prefix('report1/daily_report1_')[0]
+        self.assertTrue(exp_df.equals(self._bucket_conn_dst.read_parquet(dest_file)))
+
+    def test_run(self):
+        """
+        Tests the run method writing one report per shard and updating
+        the meta file once with all completed shards. The shard processes
+        write to local directories, so their reports can be read back.
+        """
+        # Expected results
+        exp_meta = ['2021-12-17', '2021-12-18', '2021-12-19']
+        exp_df = self.df_report
+        # Test init
+        local_dir = tempfile.mkdtemp(prefix='report_backfill_test_')
+        self.addCleanup(shutil.rmtree, local_dir, ignore_errors=True)
+        local_src = LocalFileConnector(os.path.join(local_dir, 'src'))
+        local_dst = LocalFileConnector(os.path.join(local_dir, 'dst'))
+        for ind, row in self.src_df.iterrows():
+            local_src.to_s3(self.src_df.loc[ind:ind],
+                            f'{row.Date}/{row.Date}_BINS_XETR{row.Time[:2]}.csv', 'csv')
+        config = dict(self.config, local={'src_dir': local_src.root_dir,
+                                          'dest_dir': local_dst.root_dir})
+        # Method execution
+        act_dates = ReportBackfill(config, '2021-12-17', '2021-12-19', workers=3).run()
+        # Test after method execution
+        self.assertEqual(exp_meta, act_dates)
+        result_meta_df = local_dst.read_csv(self.meta_key)
+        self.assertEqual(exp_meta, list(result_meta_df['source_date']))
+        # every shard wrote its own report, none was overwritten
+        dest_files = local_dst.list_files_by_prefix('report1/daily_report1_')
+        self.assertEqual(3, len(dest_files))
+        result_df = pd.concat([local_dst.read_parquet(key) for key in dest_files],
+                              ignore_index=True).sort_values('Date', ignore_index=True)
+        self.assertTrue(exp_df.equals(result_df))
+
+    def test_run_traced(self):
+        """
+        Tests that the latencies of the shard processes are added to the tracer
+        """
+        # Test init
+        tracer = Tracer()
+        # Method execution
+        ReportBackfill(self.config, '2021-12-17', '2021-12-19', workers=2, tracer=tracer).run()
+        # Test after method execution
+        summary = tracer.summary()
+        self.assertGreater(summary['s3.GetObject.body']['count'], 0)
+        self.assertGreater(summary['s3.PutObject']['count'], 0)
+
+    def test_indicators_rejected(self):
+        """
+        Tests that a backfill with indicators is rejected
+        """
+        # Test init
+        config = dict(self.config, processing={'indicators': True})
+        # Method execution and test after method execution
+        with self.assertRaises(BackfillException):
+            ReportBackfill(config, '2021-12-17', '2021-12-19', workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
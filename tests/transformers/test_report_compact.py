@@ -0,0 +1,156 @@
+"""TestReportCompactMethods"""
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.common.custom_exceptions import WrongFormatException
+from app.transformers.report_compact import (compact_source_data, concat_compact, encode_time,
+                                              narrow_price, narrow_volume)
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                  ProcessingConfig)
+
+class TestReportCompactMethods(unittest.TestCase):
+    """
+    Testing the compact encoding of the raw source data
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        conf_dict_src = {
+            'src_first_extract_date': '2021-12-01',
+            'src_columns': ['ISIN', 'Mnemonic', 'Date', 'Time',
+                            'StartPrice', 'EndPrice', 'MinPrice',
+                            'MaxPrice', 'TradedVolume'],
+            'src_col_date': 'Date',
+            'src_col_isin': 'ISIN',
+            'src_col_time': 'Time',
+            'src_col_start_price': 'StartPrice',
+            'src_col_min_price': 'MinPrice',
+            'src_col_max_price': 'MaxPrice',
+            'src_col_traded_vol': 'TradedVolume'
+        }
+        conf_dict_dst = {
+            'dest_col_isin': 'isin',
+            'dest_col_date': 'date',
+            'dest_col_op_price': 'opening_price_eur',
+            'dest_col_cls_price': 'closing_price_eur',
+            'dest_col_min_price': 'minimum_price_eur',
+            'dest_col_max_price': 'maximum_price_eur',
+            'dest_col_daily_trd_vol': 'daily_traded_volume',
+            'dest_col_chg_prev_cls': 'change_prev_closing_%',
+            'dest_key': 'report1/daily_report1_',
+            'dest_key_date_format': '%Y%m%d_%H%M%S',
+            'dest_format': 'parquet'
+        }
+        self.source_config = SourceConfig(**conf_dict_src)
+        self.destination_config = DestinationConfig(**conf_dict_dst)
+        # Creating random source data with missing values
+        rng = np.random.default_rng(42)
+        rows = 5000
+        self.src_df = pd.DataFrame({
+            'ISIN': rng.choice([f'DE000000{ind:04d}' for ind in range(50)], rows),
+            'Mnemonic': 'MNE',
+            'Date': rng.choice(['2021-12-15', '2021-12-16', '2021-12-17', '2021-12-20'], rows),
+            'Time': [f'{hour:02d}:{minute:02d}' for hour, minute
+                     in zip(rng.integers(8, 17, rows), rng.integers(0, 60, rows))],
+            'StartPrice': rng.integers(100, 100000, rows) / 1000,
+            'EndPrice': rng.integers(100, 100000, rows) / 1000,
+            'MinPrice': rng.integers(100, 100000, rows) / 1000,
+            'MaxPrice': rng.integers(100, 100000, rows) / 1000,
+            'TradedVolume': rng.integers(0, 10000, rows)
+        })
+        # one trade per ISIN and minute as in the Xetra data
+        self.src_df = self.src_df.drop_duplicates(subset=['ISIN', 'Date', 'Time'])\
+            .reset_index(drop=True)
+        self.src_df.loc[::97, 'MinPrice'] = np.nan
+
+    def _report_etl(self, transform_engine: str, compact_raw: bool=False):
+        """Creates a ReportETL instance for the given engine"""
+        return ReportETL(None, None, None, self.source_config, self.destination_config,
+                         extract_date='2021-12-16',
+                         extract_date_list=['2021-12-15', '2021-12-16',
+                                            '2021-12-17', '2021-12-20'],
+                         proc_args=ProcessingConfig(transform_engine=transform_engine,
+                                                    compact_raw=compact_raw))
+
+    def test_encode_time(self):
+        """
+        Tests the encode_time function
+        """
+        # Expected results
+        exp_minutes = pd.Series([0, 541, 1439], dtype=np.int16)
+        # Method execution
+        result_minutes = encode_time(pd.Series(['00:00', '09:01', '23:59']))
+        # Test after method execution
+        self.assertTrue(exp_minutes.equals(result_minutes))
+        with self.assertRaises(WrongFormatException):
+            encode_time(pd.Series(['09:01:00']))
+
+    def test_narrow_types(self):
+        """
+        Tests the narrow_price and narrow_volume functions
+        """
+        # Method execution
+        narrow_prices = narrow_price(pd.Series([20.19, 0.0345, 1234.5]))
+        wide_prices = narrow_price(pd.Series([20.19, 0.123456789]))
+        narrow_volumes = narrow_volume(pd.Series([0, 2**31 - 1]))
+        wide_volumes = narrow_volume(pd.Series([0, 2**31]))
+        # Test after method execution
+        self.assertEqual(np.float32, narrow_prices.dtype)
+        self.assertEqual(np.float64, wide_prices.dtype)
+        self.assertEqual(np.int32, narrow_volumes.dtype)
+        self.assertEqual(np.int64, wide_volumes.dtype)
+
+    def test_compact_source_data(self):
+        """
+        Tests that compact_source_data reduces the memory
+        per row and removes rows with missing values
+        """
+        # Method execution
+        result_df = compact_source_data(self.src_df, self.source_config)
+        # Test after method execution
+        self.assertEqual(len(self.src_df.dropna()), len(result_df))
+        self.assertEqual(np.int16, result_df['Time'].dtype)
+        self.assertEqual(np.float32, result_df['StartPrice'].dtype)
+        self.assertLess(result_df.memory_usage(deep=True).sum() / len(result_df),
+                        self.src_df.memory_usage(deep=True).sum() / len(self.src_df))
+
+    def test_concat_compact_mixed_types(self):
+        """
+        Tests that float32 prices of one file are restored exactly
+        when another file keeps float64 prices
+        """
+        # Test init
+        narrow_df = pd.DataFrame({'price': narrow_price(pd.Series([20.19, 18.27]))})
+        wide_df = pd.DataFrame({'price': narrow_price(pd.Series([0.123456789]))})
+        # Method execution
+        result_df = concat_compact([narrow_df, None, wide_df])
+        result_narrow_df = concat_compact([narrow_df, narrow_df])
+        # Test after method execution
+        self.assertEqual(np.float64, result_df['price'].dtype)
+        self.assertEqual([20.19, 18.27, 0.123456789], list(result_df['price']))
+        self.assertEqual(np.float32, result_narrow_df['price'].dtype)
+
+    def test_transform_compact_equals_raw(self):
+        """
+        Tests that every engine creates the same report from
+        compacted source data as from the raw source data
+        """
+        # Test init
+        compact_df = compact_source_data(self.src_df, self.source_config)
+        exp_df = self._report_etl('pandas').transform_to_report(self.src_df)
+        # Method execution
+        for engine in ['pandas', 'duckdb', 'arrow']:
+            result = self._report_etl(engine, compact_raw=True).transform_to_report(compact_df)
+            if isinstance(result, pa.Table):
+                result = result.to_pandas()
+            # Test after method execution
+            pd.testing.assert_frame_equal(exp_df, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+"""TestReportCoordinatorMethods"""
+import multiprocessing
+import os
+import socket
+import unittest
+import urllib.request
+
+import boto3
+import pandas as pd
+from moto.server import ThreadedMotoServer
+
+from app.common.custom_exceptions import BackfillException
+from app.common.lease import LEASE_STATUS_DONE
+from app.common.s3 import S3BucketConnector
+from app.transformers.report_coordinator import COMMIT_LEASE_ID, ReportCoordinator
+
+
+def _run_worker(config: dict, owner: str, results):
+    """Runs one coordinator worker in a separate process"""
+    coordinator = ReportCoordinator(config, '2021-12-16', '2021-12-19', range_days=1,
+                                    poll_seconds=0.2, owner=owner,
+                                    lease_seconds=5, settle_seconds=0.2)
+    results.put((owner, coordinator.run_worker()))
+
+
+class TestReportCoordinatorMethods(unittest.TestCase):
+    """
+    Testing the ReportCoordinator class with several worker
+    processes against a local S3 stand-in
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # starting a local moto server shared by all processes
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self._moto_server = ThreadedMotoServer(port=port, verbose=False)
+        self._moto_server.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = f'http://127.0.0.1:{port}'
+        self.s3_bucket_name_src = 'src-bucket'
+        self.s3_bucket_name_dst = 'dst-bucket'
+        self.meta_key = 'meta_key'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating buckets on the local s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url = self.s3_endpoint_url)
+        for bucket_name in [self.s3_bucket_name_src, self.s3_bucket_name_dst]:
+            self._s3.create_bucket(Bucket=bucket_name,
+                                   CreateBucketConfiguration={
+                                       'LocationConstraint': 'eu-west-2'
+                                   })
+        self._bucket_conn_src = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_src)
+        self._bucket_conn_dst = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_dst)
+        # creating the configuration
+        self.config = {
+            's3': {
+                'access_key': self.s3_access_key,
+                'secret_key': self.s3_secret_key,
+                'src_endpoint_url': self.s3_endpoint_url,
+                'src_bucket': self.s3_bucket_name_src,
+                'dest_endpoint_url': self.s3_endpoint_url,
+                'dest_bucket': self.s3_bucket_name_dst
+            },
+            'source': {
+                'src_first_extract_date': '2021-12-01',
+                'src_columns': ['ISIN', 'Mnemonic', 'Date', 'Time',
+                                'StartPrice', 'EndPrice', 'MinPrice',
+                                'MaxPrice', 'TradedVolume'],
+                'src_col_date': 'Date',
+                'src_col_isin': 'ISIN',
+                'src_col_time': 'Time',
+                'src_col_start_price': 'StartPrice',
+                'src_col_min_price': 'MinPrice',
+                'src_col_max_price': 'MaxPrice',
+                'src_col_traded_vol': 'TradedVolume'
+            },
+            'destination': {
+                'dest_col_isin': 'isin',
+                'dest_col_date': 'date',
+                'dest_col_op_price': 'opening_price_eur',
+                'dest_col_cls_price': 'closing_price_eur',
+                'dest_col_min_price': 'minimum_price_eur',
+                'dest_col_max_price': 'maximum_price_eur',
+                'dest_col_daily_trd_vol': 'daily_traded_volume',
+                'dest_col_chg_prev_cls': 'change_prev_closing_%',
+                'dest_key': 'report1/daily_report1_',
+                'dest_key_date_format': '%Y%m%d_%H%M%S',
+                'dest_format': 'parquet'
+            },
+            'meta': {
+                'meta_key': self.meta_key
+            }
+        }
+        # Creating source files on the local s3
+        columns_src = ['ISIN', 'Mnemonic', 'Date', 'Time',
+                        'StartPrice', 'EndPrice', 'MinPrice',
+                        'MaxPrice', 'TradedVolume']
+        data = [
+            ['AT0000A0E9W5', 'SANT', '2021-12-15', '12:00', 20.19, 18.45, 18.20, 20.33, 877],
+            ['AT0000A0E9W5', 'SANT', '2021-12-16', '15:00', 18.27, 21.19, 18.27, 21.34, 987],
+            ['AT0000A0E9W5', 'SANT', '2021-12-17', '13:00', 20.21, 18.27, 18.21, 20.42, 633],
+            ['AT0000A0E9W5', 'SANT', '2021-12-18', '07:00', 20.58, 19.27, 18.89, 20.58, 9066],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '07:00', 23.58, 23.58, 23.58, 23.58, 1035]
+        ]
+        src_df = pd.DataFrame(data, columns=columns_src)
+        for ind, row in src_df.iterrows():
+            self._bucket_conn_src.to_s3(
+                src_df.loc[ind:ind],
+                f'{row.Date}/{row.Date}_BINS_XETR{row.Time[:2]}.csv', 'csv')
+
+    def tearDown(self) -> None:
+        """Executing after unittests
+        """
+        # resetting and stopping the local moto server
+        urllib.request.urlopen(urllib.request.Request(
+            f'{self.s3_endpoint_url}/moto-api/reset', method='POST'))
+        self._moto_server.stop()
+
+    def test_ranges(self):
+        """
+        Tests the ranges method
+        """
+        # Expected results
+        exp_ranges = [
+            ('2021-12-16', '2021-12-17', '2021-12-15'),
+            ('2021-12-18', '2021-12-19', '2021-12-15')
+        ]
+        # Method execution
+        coordinator = ReportCoordinator(self.config, '2021-12-16', '2021-12-19', range_days=2)
+        # Test after method execution
+        self.assertEqual(exp_ranges, coordinator.ranges())
+
+    def test_run_worker_processes(self):
+        """
+        Tests several worker processes sharing the ranges
+        of one backfill and committing it exactly once
+        """
+        # Expected results
+        exp_meta = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        # Method execution
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_run_worker,
+                                    args=(self.config, f'worker{ind}', results))
+            for ind in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        committed = [results.get(timeout=120) for _ in workers]
+        for worker in workers:
+            worker.join()
+        # Test after method execution
+        self.assertEqual([exp_meta], [dates for _, dates in committed if dates])
+        result_meta_df = self._bucket_conn_dst.read_csv(self.meta_key)
+        self.assertEqual(exp_meta, list(result_meta_df['source_date']))
+        coordinator = ReportCoordinator(self.config, '2021-12-16', '2021-12-19', range_days=1)
+        for date_range in coordinator.ranges():
+            lease = coordinator.lease_manager.read(coordinator.range_id(date_range))
+            self.assertEqual(LEASE_STATUS_DONE, lease['status'])
+        self.assertEqual(LEASE_STATUS_DONE,
+                         coordinator.lease_manager.read(COMMIT_LEASE_ID)['status'])
+        # every range wrote one report under the key of the range
+        self.assertEqual([f'report1/daily_report1_{date}_{date}.parquet' for date in exp_meta],
+                         self._bucket_conn_dst.list_files_by_prefix('report1/'))
+
+    def test_commit_owner_crashed(self):
+        """
+        Tests that a worker waits for the commit of another worker
+        and commits the backfill once the crashed owner's lease expired
+        """
+        # Expected results
+        exp_meta = ['2021-12-16', '2021-12-17']
+        # Test init
+        crashed = ReportCoordinator(self.config, '2021-12-16', '2021-12-17', range_days=1,
+                                    owner='crashed', lease_seconds=1, settle_seconds=0)
+        range_list = crashed.ranges()
+        for date_range in range_list:
+            crashed.lease_manager.claim(crashed.range_id(date_range))
+            crashed.lease_manager.complete(crashed.range_id(date_range), [date_range[0]])
+        # the owner claims the commit lease and stops without renewing it
+        crashed.lease_manager.claim(COMMIT_LEASE_ID)
+        coordinator = ReportCoordinator(self.config, '2021-12-16', '2021-12-17', range_days=1,
+                                        poll_seconds=0.2, owner='worker', lease_seconds=5,
+                                        settle_seconds=0)
+        # Method execution
+        with self.assertLogs() as logm:
+            committed = coordinator.commit(range_list)
+        # Test after method execution
+        self.assertEqual(exp_meta, committed)
+        result_meta_df = self._bucket_conn_dst.read_csv(self.meta_key)
+        self.assertEqual(exp_meta, list(result_meta_df['source_date']))
+        lease = coordinator.lease_manager.read(COMMIT_LEASE_ID)
+        self.assertEqual(('worker', LEASE_STATUS_DONE), (lease['owner'], lease['status']))
+        self.assertIn('Reclaiming expired lease _commit of crashed.', '\n'.join(logm.output))
+        # a worker finding the commit done returns without committing
+        self.assertEqual([], coordinator.commit(range_list))
+
+    def test_process_range_twice(self):
+        """
+        Tests that a range processed again by a worker that lost its lease
+        overwrites the report of the range instead of adding a second one
+        """
+        # Expected results
+        exp_keys = ['report1/daily_report1_2021-12-16_2021-12-17.parquet']
+        exp_dates = ['2021-12-16', '2021-12-17']
+        # Test init
+        first = ReportCoordinator(self.config, '2021-12-16', '2021-12-17', range_days=2,
+                                  owner='first', settle_seconds=0)
+        second = ReportCoordinator(self.config, '2021-12-16', '2021-12-17', range_days=2,
+                                   owner='second', settle_seconds=0)
+        date_range = first.ranges()[0]
+        first.lease_manager.claim(first.range_id(date_range))
+        # Method execution
+        first._process_range(date_range)
+        second._process_range(date_range)
+        # Test after method execution
+        self.assertEqual(exp_keys, self._bucket_conn_dst.list_files_by_prefix('report1/'))
+        result_df = self._bucket_conn_dst.read_parquet(exp_keys[0])
+        self.assertEqual(exp_dates, list(result_df['Date']))
+        lease = first.lease_manager.read(first.range_id(date_range))
+        self.assertEqual(('first', LEASE_STATUS_DONE), (lease['owner'], lease['status']))
+
+    def test_appending_sinks_rejected(self):
+        """
+        Tests that a distributed backfill to a sink appending to its target is rejected
+        """
+        # Test init
+        config = dict(self.config, sinks=[{'type': 'bigquery', 'project_id': 'project',
+                                           'dataset_name': 'dataset', 'table_name': 'table'}])
+        # Method execution and test after method execution
+        with self.assertRaises(BackfillException):
+            ReportCoordinator(config, '2021-12-16', '2021-12-19')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,316 @@
+"""TestReportDaemonMethods"""
+from datetime import datetime, timedelta
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+import pandas as pd
+from moto import mock_s3
+
+from app.common.meta_process import MetaProcess
+from app.common.s3 import S3BucketConnector
+from app.common.sinks import Sink, StorageSink
+from app.transformers.report_daemon import ReportDaemon
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                 ProcessingConfig)
+
+
+class AppendSink(Sink):
+    """
+    Sink appending the reports to a list like a table
+    """
+    appends = True
+
+    def __init__(self) -> None:
+        super().__init__('append')
+        self.rows = []
+
+    def target(self, key_stem: str, dest_args):
+        return 'table'
+
+    def prepare(self, data, target: str, dest_args):
+        return data
+
+    def commit(self, payload, target: str):
+        self.rows.extend(payload.to_dict('records'))
+
+
+class TestReportDaemonMethods(unittest.TestCase):
+    """
+    Testing the ReportDaemon class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name_src = 'src-bucket'
+        self.s3_bucket_name_dst = 'dst-bucket'
+        self.meta_key = 'meta_key'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url = self.s3_endpoint_url)
+        for bucket_name in [self.s3_bucket_name_src, self.s3_bucket_name_dst]:
+            self._s3.create_bucket(Bucket=bucket_name,
+                                   CreateBucketConfiguration={
+                                       'LocationConstraint': 'eu-west-2'
+                                   })
+        self._bucket_conn_src = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_src)
+        self._bucket_conn_dst = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_dst)
+        # creating source and target configuration
+        self.source_config = SourceConfig(
+            src_first_extract_date='2021-12-01',
+            src_columns=['ISIN', 'Mnemonic', 'Date', 'Time', 'StartPrice', 'EndPrice',
+                         'MinPrice', 'MaxPrice', 'TradedVolume'],
+            src_col_date='Date',
+            src_col_isin='ISIN',
+            src_col_time='Time',
+            src_col_start_price='StartPrice',
+            src_col_min_price='MinPrice',
+            src_col_max_price='MaxPrice',
+            src_col_traded_vol='TradedVolume'
+        )
+        self.destination_config = DestinationConfig(
+            dest_col_isin='isin',
+            dest_col_date='date',
+            dest_col_op_price='opening_price_eur',
+            dest_col_cls_price='closing_price_eur',
+            dest_col_min_price='minimum_price_eur',
+            dest_col_max_price='maximum_price_eur',
+            dest_col_daily_trd_vol='daily_traded_volume',
+            dest_col_chg_prev_cls='change_prev_closing_%',
+            dest_key='report1/daily_report1_',
+            dest_key_date_format='%Y%m%d_%H%M%S',
+            dest_format='parquet'
+        )
+        # Source files that land one after another
+        columns_src = ['ISIN', 'Mnemonic', 'Date', 'Time',
+                        'StartPrice', 'EndPrice', 'MinPrice',
+                        'MaxPrice', 'TradedVolume']
+        data = [
+            ['AT0000A0E9W5', 'SANT', '2021-12-16', '15:00', 18.27, 21.19, 18.27, 21.34, 987],
+            ['AT0000A0E9W5', 'SANT', '2021-12-17', '13:00', 20.21, 18.27, 18.21, 20.42, 633],
+            ['AT0000A0E9W5', 'SANT', '2021-12-17', '14:00', 18.27, 21.19, 18.27, 21.34, 455],
+            ['AT0000A0E9W5', 'SANT', '2021-12-18', '07:00', 20.58, 19.27, 18.89, 20.58, 9066],
+            ['AT0000A0E9W5', 'SANT', '2021-12-18', '08:00', 19.27, 21.14, 19.27, 21.14, 1220],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '07:00', 23.58, 23.58, 23.58, 23.58, 1035],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '08:00', 23.58, 24.22, 23.31, 24.34, 1028],
+            ['AT0000A0E9W5', 'SANT', '2021-12-19', '09:00', 24.22, 22.21, 22.21, 25.01, 1523]
+        ]
+        self.src_df = pd.DataFrame(data, columns=columns_src)
+        self.extract_date = '2021-12-17'
+        self.extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+
+    def tearDown(self):
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def _upload(self, start: int, end: int):
+        """
+        Uploads the source rows from start till end (both inclusive) as single files
+        """
+        for ind, row in self.src_df.loc[start:end].iterrows():
+            self._bucket_conn_src.to_s3(
+                self.src_df.loc[ind:ind],
+                f'{row.Date}/{row.Date}_BINS_XETR{row.Time[:2]}.csv', 'csv')
+
+    def _report_etl(self, sinks: list=None, proc_args: ProcessingConfig=None):
+        """
+        Creates the ReportETL instance of the daemon
+        """
+        return ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                         self.source_config, self.destination_config,
+                         extract_date=self.extract_date,
+                         extract_date_list=self.extract_date_list, sinks=sinks,
+                         proc_args=proc_args)
+
+    def _expected_report(self):
+        """
+        Creates the report of all source files in one run
+        """
+        report_etl = self._report_etl()
+        return report_etl.transform_to_report(report_etl.extract())
+
+    def test_poll_incremental(self):
+        """
+        Tests that the polls only read new files and rewrite the reports
+        of the days with new files
+        """
+        # Test init
+        self._upload(0, 3)
+        daemon = ReportDaemon(self._report_etl())
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock, \
+             patch.object(ReportETL, 'update_meta') as meta_mock, \
+             patch.object(S3BucketConnector, 'read_csv',
+                          wraps=self._bucket_conn_src.read_csv) as read_mock:
+            daemon.start()
+            first_keys = daemon.poll()
+            self._upload(4, 7)
+            second_keys = daemon.poll()
+            third_keys = daemon.poll()
+        # Expected results
+        exp_df = self._expected_report()
+        # Test after method execution
+        self.assertEqual(4, len(first_keys))
+        self.assertEqual(4, len(second_keys))
+        self.assertEqual([], third_keys)
+        self.assertEqual(8, read_mock.call_count)
+        self.assertEqual(second_keys[-1], self._bucket_conn_dst.read_text(daemon.cursor_key))
+        # 2021-12-18 was written after each poll, the last report of a day is complete
+        days = [call.kwargs['key_suffix'] for call in load_mock.call_args_list
+                if not call.kwargs['appends']]
+        self.assertEqual(['2021-12-17', '2021-12-18', '2021-12-18', '2021-12-19'], days)
+        # appending sinks only get the complete days
+        appended = [call.kwargs['key_suffix'] for call in load_mock.call_args_list
+                    if call.kwargs['appends']]
+        self.assertEqual(['2021-12-17', '2021-12-18'], appended)
+        self.assertTrue(all(not call.kwargs['timestamp'] for call in load_mock.call_args_list))
+        reports = {
+            call.kwargs['key_suffix']: call.args[0] for call in load_mock.call_args_list
+        }
+        result_df = pd.concat(reports.values(), ignore_index=True)
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertEqual([['2021-12-17'], ['2021-12-18']],
+                         [call.args[0] for call in meta_mock.call_args_list])
+
+    def test_poll_same_day(self):
+        """
+        Tests that several polls of one day overwrite one report of the day
+        and the appending sinks get the rows of the day once it is complete
+        """
+        # Expected results
+        exp_keys = ['report1/daily_report1_2021-12-17.parquet',
+                    'report1/daily_report1_2021-12-18.parquet',
+                    'report1/daily_report1_2021-12-19.parquet']
+        # Test init
+        append_sink = AppendSink()
+        daemon = ReportDaemon(self._report_etl(
+            [StorageSink('storage', self._bucket_conn_dst), append_sink]))
+        # Method execution
+        daemon.start()
+        for ind in range(5):
+            self._upload(ind, ind)
+            daemon.poll()
+        daemon.poll()
+        result_keys = self._bucket_conn_dst.list_files_by_prefix('report1/daily_report1_')
+        result_df = self._bucket_conn_dst.read_parquet(exp_keys[1])
+        result_appended = [row['Date'] for row in append_sink.rows]
+        self._upload(5, 5)
+        daemon.poll()
+        # Test after method execution
+        self.assertEqual(exp_keys[:2], result_keys)
+        # the report of 2021-12-18 has the rows of both polls of the day
+        self.assertEqual(1, len(result_df))
+        self.assertEqual(9066 + 1220, result_df['daily_traded_volume'][0])
+        self.assertEqual(['2021-12-17'], result_appended)
+        self.assertEqual(exp_keys,
+                         self._bucket_conn_dst.list_files_by_prefix('report1/daily_report1_'))
+        self.assertEqual(['2021-12-17', '2021-12-18'], [row['Date'] for row in append_sink.rows])
+
+    def test_poll_indicators(self):
+        """
+        Tests that the reports of complete days get the indicators on all
+        sinks and the indicator state is saved with the meta file
+        """
+        # Test init
+        append_sink = AppendSink()
+        daemon = ReportDaemon(self._report_etl(
+            [StorageSink('storage', self._bucket_conn_dst), append_sink],
+            ProcessingConfig(indicators=True)))
+        # Method execution
+        daemon.start()
+        self._upload(0, 4)
+        daemon.poll()
+        result_poll_df = self._bucket_conn_dst.read_parquet(
+            'report1/daily_report1_2021-12-18.parquet')
+        self._upload(5, 5)
+        daemon.poll()
+        # Test after method execution
+        sma = self.destination_config.dest_col_sma
+        # the report of the open day has no indicators yet
+        self.assertNotIn(sma, result_poll_df.columns)
+        result_df = self._bucket_conn_dst.read_parquet('report1/daily_report1_2021-12-18.parquet')
+        closing = [row['closing_price_eur'] for row in append_sink.rows]
+        self.assertEqual(round(sum(closing) / 2, 2), result_df[sma][0])
+        self.assertEqual([False, False], [pd.isna(row[sma]) for row in append_sink.rows])
+        self.assertEqual(['2021-12-17', '2021-12-18'], [row['Date'] for row in append_sink.rows])
+        self.assertIn('report1/state/indicators.npz',
+                      self._bucket_conn_dst.list_files_by_prefix('report1/state/'))
+
+    def test_start_restore(self):
+        """
+        Tests that a new daemon restores the aggregate state of the cursor's day
+        and the previous day's prices from the persisted cursor
+        """
+        # Test init
+        self._upload(0, 5)
+        with patch.object(ReportETL, 'load', return_value=True):
+            ReportDaemon(self._report_etl()).run(max_polls=1)
+        self._upload(6, 7)
+        daemon = ReportDaemon(self._report_etl())
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock, \
+             patch.object(S3BucketConnector, 'read_csv',
+                          wraps=self._bucket_conn_src.read_csv) as read_mock:
+            daemon.start()
+            result_keys = daemon.poll()
+        # Expected results
+        exp_df = self._expected_report()
+        exp_df = exp_df[exp_df.Date == '2021-12-19'].reset_index(drop=True)
+        # Test after method execution
+        self.assertEqual(2, len(result_keys))
+        # the files before the cursor are restored from the stored state
+        self.assertEqual(2, read_mock.call_count)
+        self.assertIn('report1/state/2021-12-18.parquet',
+                      self._bucket_conn_dst.list_files_by_prefix('report1/state/'))
+        load_mock.assert_called_once()
+        self.assertTrue(exp_df.equals(load_mock.call_args.args[0]))
+
+    def test_start_meta_complete(self):
+        """
+        Tests that a daemon started without cursor on a complete meta file
+        polls the days after today and loads their reports
+        """
+        # Test init
+        today = datetime.today().date()
+        yesterday, tomorrow = [(today + timedelta(days=days)).strftime('%Y-%m-%d')
+                               for days in (-1, 1)]
+        MetaProcess.update_meta_file([yesterday, today.strftime('%Y-%m-%d')], self.meta_key,
+                                     self._bucket_conn_dst)
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config._replace(src_first_extract_date=yesterday),
+                               self.destination_config)
+        daemon = ReportDaemon(report_etl)
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock:
+            daemon.start()
+            self._bucket_conn_src.to_s3(self.src_df.loc[0:0].assign(Date=tomorrow),
+                                        f'{tomorrow}/{tomorrow}_BINS_XETR15.csv', 'csv')
+            result_keys = daemon.poll()
+        # Test after method execution
+        self.assertEqual(tomorrow, daemon.report_etl.extract_date)
+        self.assertEqual([f'{tomorrow}/{tomorrow}_BINS_XETR15.csv'], result_keys)
+        load_mock.assert_called_once()
+        self.assertEqual(tomorrow, load_mock.call_args.kwargs['key_suffix'])
+        self.assertEqual([tomorrow], list(load_mock.call_args.args[0]['Date']))
+
+
+if __name__ == "__main__":
+    unittest.main()
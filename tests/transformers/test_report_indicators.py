@@ -0,0 +1,168 @@
+"""TestReportIndicatorsMethods"""
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.common.local_storage import LocalFileConnector
+from app.transformers.report_indicators import IndicatorEngine, IndicatorState
+from app.transformers.report_transformer import SourceConfig, DestinationConfig
+
+class TestReportIndicatorsMethods(unittest.TestCase):
+    """
+    Testing the IndicatorState and IndicatorEngine classes
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        self.source_config = SourceConfig(
+            src_first_extract_date='2022-01-03',
+            src_columns=['ISIN', 'Date', 'Time', 'StartPrice', 'MinPrice', 'MaxPrice',
+                         'TradedVolume'],
+            src_col_date='Date',
+            src_col_isin='ISIN',
+            src_col_time='Time',
+            src_col_start_price='StartPrice',
+            src_col_min_price='MinPrice',
+            src_col_max_price='MaxPrice',
+            src_col_traded_vol='TradedVolume'
+        )
+        self.destination_config = DestinationConfig(
+            dest_col_isin='isin',
+            dest_col_date='date',
+            dest_col_op_price='opening_price_eur',
+            dest_col_cls_price='closing_price_eur',
+            dest_col_min_price='minimum_price_eur',
+            dest_col_max_price='maximum_price_eur',
+            dest_col_daily_trd_vol='daily_traded_volume',
+            dest_col_chg_prev_cls='change_prev_closing_%',
+            dest_key='report1/daily_report1_',
+            dest_key_date_format='%Y%m%d_%H%M%S',
+            dest_format='parquet'
+        )
+        # Random daily reports of 40 days and 5 ISINs, not every ISIN is traded every day
+        rng = np.random.default_rng(0)
+        days = pd.date_range('2022-01-03', periods=40).strftime('%Y-%m-%d')
+        report = pd.DataFrame(
+            [(isin, day) for isin in ['DE0001', 'DE0002', 'DE0003', 'DE0004', 'DE0005']
+             for day in days],
+            columns=['ISIN', 'Date'])
+        report = report[rng.random(len(report)) < 0.8].reset_index(drop=True)
+        rows = len(report)
+        report['closing_price_eur'] = rng.integers(1000, 2000, rows) / 100
+        report['minimum_price_eur'] = report.closing_price_eur - rng.integers(0, 100, rows) / 100
+        report['maximum_price_eur'] = report.closing_price_eur + rng.integers(0, 100, rows) / 100
+        report['daily_traded_volume'] = rng.integers(0, 1000, rows)
+        self.report = report
+        self.days = list(days)
+        self.storage_dir = tempfile.mkdtemp(prefix='indicators_test_')
+        self._storage = LocalFileConnector(self.storage_dir)
+
+    def tearDown(self):
+        """
+        Removing the state files
+        """
+        shutil.rmtree(self.storage_dir, ignore_errors=True)
+
+    def _expected(self, window: int):
+        """
+        Calculates the indicators with pandas rolling windows over the full history
+        """
+        exp_df = self.report.sort_values(['ISIN', 'Date']).copy()
+        groups = exp_df.groupby('ISIN')
+        exp_df['sma'] = groups.closing_price_eur.transform(
+            lambda close: close.rolling(window, min_periods=1).mean())
+        exp_df['volatility'] = groups.closing_price_eur.transform(
+            lambda close: close.pct_change().rolling(window, min_periods=2).std() * 100)
+        typical = (exp_df.maximum_price_eur + exp_df.minimum_price_eur
+                   + exp_df.closing_price_eur) / 3
+        exp_df['price_volume'] = typical * exp_df.daily_traded_volume
+        exp_df['vwap'] = groups.price_volume.transform(
+            lambda values: values.rolling(window, min_periods=1).sum()) / groups\
+                .daily_traded_volume.transform(
+                    lambda values: values.rolling(window, min_periods=1).sum())
+        return exp_df.sort_index()
+
+    def _update(self, state: IndicatorState, day: pd.DataFrame, dt: str):
+        """
+        Adds one day of the report to the state
+        """
+        return state.update(day.ISIN.to_numpy(), dt, day.closing_price_eur.to_numpy(),
+                            day.minimum_price_eur.to_numpy(),
+                            day.maximum_price_eur.to_numpy(),
+                            day.daily_traded_volume.to_numpy())
+
+    def test_update_rolling(self):
+        """
+        Tests that the incremental updates equal pandas rolling windows
+        and that a serialized state continues with the same results
+        """
+        # Expected results
+        exp_df = self._expected(window=5)
+        # Test init
+        state = IndicatorState(window=5)
+        result = {}
+        # Method execution
+        for ind, dt in enumerate(self.days):
+            if ind == 20:
+                state = IndicatorState.from_bytes(state.to_bytes())
+            day = self.report[self.report.Date == dt]
+            updated, sma, volatility, vwap = self._update(state, day, dt)
+            self.assertTrue(updated.all())
+            for row, values in zip(day.index, zip(sma, volatility, vwap)):
+                result[row] = values
+        result_df = pd.DataFrame.from_dict(result, orient='index',
+                                           columns=['sma', 'volatility', 'vwap']).sort_index()
+        # Test after method execution
+        for column in ['sma', 'volatility', 'vwap']:
+            np.testing.assert_allclose(exp_df[column].to_numpy(), result_df[column].to_numpy())
+
+    def test_update_stale_day(self):
+        """
+        Tests that a day already contained in the state is not added again
+        """
+        # Test init
+        state = IndicatorState(window=5)
+        day = self.report[self.report.Date == self.days[0]]
+        self._update(state, day, self.days[0])
+        exp_sums = state.sums['close'].copy()
+        # Method execution
+        updated, *_ = self._update(state, day, self.days[0])
+        # Test after method execution
+        self.assertFalse(updated.any())
+        np.testing.assert_array_equal(exp_sums, state.sums['close'])
+
+    def test_engine_add_indicators(self):
+        """
+        Tests adding the indicators to reports of two runs with the state
+        stored between the runs
+        """
+        # Expected results
+        exp_key = 'report1/state/indicators.npz'
+        exp_df = self._expected(window=20)
+        # Test init
+        first = self.report[self.report.Date < self.days[30]]
+        second = self.report[self.report.Date >= self.days[30]]
+        # Method execution
+        engine = IndicatorEngine(self._storage, IndicatorEngine.state_key_of_report(
+            self.destination_config.dest_key))
+        result_first = engine.add_indicators(first, self.source_config,
+                                             self.destination_config)
+        engine.save_state()
+        engine = IndicatorEngine(self._storage, exp_key)
+        result_second = engine.add_indicators(second, self.source_config,
+                                              self.destination_config)
+        result_df = pd.concat([result_first, result_second]).sort_index()
+        # Test after method execution
+        self.assertEqual([exp_key], self._storage.list_files_by_prefix('report1/'))
+        # the report values are rounded to cents
+        np.testing.assert_allclose(exp_df.sma, result_df.moving_avg_closing_price_eur, atol=0.01)
+        np.testing.assert_allclose(exp_df.vwap, result_df.vwap_eur, atol=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
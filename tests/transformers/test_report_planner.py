@@ -0,0 +1,215 @@
+"""TestReportPlannerMethods"""
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_s3
+
+from app.common.s3 import S3BucketConnector
+from app.transformers.report_planner import (DEFAULT_MEMORY_FACTOR, DEFAULT_THROUGHPUT,
+                                             MemorySampler, ReportPlanner, RunHistory)
+from app.transformers.report_transformer import ReportETL, ProcessingConfig
+
+class TestReportPlannerMethods(unittest.TestCase):
+    """
+    Testing the ReportPlanner and RunHistory classes
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name_src = 'src-bucket'
+        self.s3_bucket_name_dst = 'dst-bucket'
+        self.meta_key = 'meta_key'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url = self.s3_endpoint_url)
+        for bucket_name in [self.s3_bucket_name_src, self.s3_bucket_name_dst]:
+            self._s3.create_bucket(Bucket=bucket_name,
+                                   CreateBucketConfiguration={
+                                       'LocationConstraint': 'eu-west-2'
+                                   })
+        self._bucket_src = self._s3.Bucket(self.s3_bucket_name_src)
+        self._bucket_conn_src = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_src)
+        self._bucket_conn_dst = S3BucketConnector(self.s3_access_key,
+                                                  self.s3_secret_key,
+                                                  self.s3_endpoint_url,
+                                                  self.s3_bucket_name_dst)
+        # 20 source files of 1000 bytes on 2 dates
+        self.extract_date_list = ['2021-12-16', '2021-12-17']
+        for dt in self.extract_date_list:
+            for hour in range(10):
+                self._bucket_src.put_object(Body=b'x' * 1000,
+                                            Key=f'{dt}/{dt}_BINS_XETR{hour:02d}.csv')
+        self._bucket_src.put_object(Body=b'x' * 1000, Key='2021-12-18/2021-12-18_BINS_XETR08.csv')
+
+    def tearDown(self):
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def _report_etl(self, proc_args: ProcessingConfig=None):
+        """
+        Creates a ReportETL instance extracting the dates of the source files
+        """
+        return ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                         None, extract_date='2021-12-17',
+                         extract_date_list=self.extract_date_list, proc_args=proc_args)
+
+    def test_plan_no_history(self):
+        """
+        Tests the plan of a run without previous runs
+        """
+        # Test init
+        planner = ReportPlanner(self._report_etl())
+        # Method execution
+        result_plan = planner.plan()
+        # Test after method execution
+        self.assertEqual(2, result_plan.dates)
+        self.assertEqual(20, result_plan.files)
+        self.assertEqual(20000, result_plan.bytes)
+        self.assertEqual(3, result_plan.read_workers)
+        self.assertEqual(int(20000 * DEFAULT_MEMORY_FACTOR), result_plan.memory_bytes)
+        self.assertAlmostEqual(20000 / (DEFAULT_THROUGHPUT * 3), result_plan.seconds)
+        self.assertFalse(result_plan.pipeline)
+        self.assertEqual(0, result_plan.history_runs)
+        self.assertIn('Source files:   20', result_plan.explain())
+
+    def test_plan_history_memory_limit(self):
+        """
+        Tests the plan of a run using the history of previous runs
+        and exceeding the memory limit
+        """
+        # Test init
+        planner = ReportPlanner(self._report_etl(ProcessingConfig(plan_memory_limit=40000)))
+        planner.history.append({'dates': 1, 'files': 10, 'bytes': 10000, 'seconds': 2.0,
+                                'read_workers': 1, 'pipeline': False,
+                                'peak_memory_bytes': 70000, 'baseline_memory_bytes': 10000})
+        planner.history.append({'dates': 2, 'files': 20, 'bytes': 20000, 'seconds': 1.0,
+                                'read_workers': 2, 'pipeline': True,
+                                'peak_memory_bytes': 50000, 'baseline_memory_bytes': 10000})
+        # runs recorded without baseline
+        planner.history.append({'dates': 1, 'files': 10, 'bytes': 10000, 'seconds': 1.0,
+                                'read_workers': 1, 'pipeline': False,
+                                'peak_memory_bytes': 50000})
+        # Method execution
+        result_plan = planner.plan()
+        # Test after method execution
+        # 40000 bytes in 5 worker seconds, median of 6, 4 and 5 bytes per held
+        # source byte and one of the two days held in memory
+        self.assertAlmostEqual(20000 / (8000 * 3), result_plan.seconds)
+        self.assertTrue(result_plan.pipeline)
+        self.assertEqual(50000, result_plan.memory_bytes)
+        self.assertEqual(3, result_plan.history_runs)
+
+    def test_plan_memory_limit_checkpoints(self):
+        """
+        Tests that a run with checkpoints is not switched to the pipelined mode
+        """
+        # Test init
+        planner = ReportPlanner(self._report_etl(ProcessingConfig(plan_memory_limit=1,
+                                                                  checkpoint_dir='checkpoints')))
+        # Method execution
+        result_plan = planner.plan()
+        # Test after method execution
+        self.assertFalse(result_plan.pipeline)
+
+    def test_apply_keeps_layout(self):
+        """
+        Tests that a run switched to the pipelined mode writes one report per run
+        and a run configured with the pipelined mode one report per day
+        """
+        # Test init
+        switched_etl = self._report_etl(ProcessingConfig(plan_memory_limit=1))
+        configured_etl = self._report_etl(ProcessingConfig(pipeline=True))
+        # Method execution
+        for report_etl in [switched_etl, configured_etl]:
+            planner = ReportPlanner(report_etl)
+            planner.apply(planner.plan())
+        # Test after method execution
+        self.assertTrue(switched_etl.proc_args.pipeline)
+        self.assertFalse(switched_etl.proc_args.pipeline_daily_reports)
+        self.assertTrue(configured_etl.proc_args.pipeline)
+        self.assertTrue(configured_etl.proc_args.pipeline_daily_reports)
+
+    def test_memory_sampler(self):
+        """
+        Tests that the sampler measures the memory of each run, also after
+        an earlier run of the process took more memory
+        """
+        # Test init
+        size = 200 * 1024 * 1024
+        first, second = MemorySampler(interval=0.01), MemorySampler(interval=0.01)
+        # Method execution
+        first.start()
+        data = b'x' * size
+        time.sleep(0.1)
+        del data
+        first.stop()
+        second.start()
+        time.sleep(0.1)
+        second.stop()
+        # Test after method execution
+        self.assertGreater(first.peak_bytes - first.baseline_bytes, size // 2)
+        self.assertLess(second.peak_bytes - second.baseline_bytes, size // 2)
+
+    def test_run_records_history(self):
+        """
+        Tests that a planned run applies the plan and records the run
+        """
+        # Test init
+        report_etl = self._report_etl()
+        planner = ReportPlanner(report_etl)
+        # Method execution
+        with patch.object(ReportETL, 'etl_report', return_value=True) as etl_mock:
+            planner.run()
+        # Test after method execution
+        etl_mock.assert_called_once()
+        self.assertEqual(3, report_etl.proc_args.read_workers)
+        self.assertIs(self._bucket_conn_src, report_etl.src_bucket)
+        result_runs = RunHistory(self._bucket_conn_dst, f'{self.meta_key}.history.json').read()
+        self.assertEqual(1, len(result_runs))
+        self.assertEqual(20000, result_runs[0]['bytes'])
+        self.assertGreater(result_runs[0]['peak_memory_bytes'], 0)
+        self.assertGreaterEqual(result_runs[0]['peak_memory_bytes'],
+                                result_runs[0]['baseline_memory_bytes'])
+
+    def test_run_reuses_listing(self):
+        """
+        Tests that a planned run extracts the files listed by the plan
+        """
+        # Test init
+        report_etl = self._report_etl()
+        planner = ReportPlanner(report_etl)
+        plan = planner.plan()
+        listed = []
+
+        def _extract():
+            listed.extend(report_etl.src_bucket.list_files_by_prefix(dt)
+                          for dt in self.extract_date_list)
+            return True
+        # Method execution
+        with patch.object(S3BucketConnector, 'list_objects_by_prefix') as list_mock:
+            with patch.object(ReportETL, 'etl_report', side_effect=_extract):
+                planner.run(plan)
+        # Test after method execution
+        list_mock.assert_not_called()
+        self.assertEqual([10, 10], [len(keys) for keys in listed])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""TestReportReaderMethods"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import boto3
+import pandas as pd
+from moto import mock_s3
+
+from app.common.s3 import S3BucketConnector
+from app.common.sinks import IndexedStorageSink, SinkWriter
+from app.transformers.report_reader import MappedReportReader, ReportReader
+from app.transformers.report_transformer import DestinationConfig
+
+class TestReportReaderMethods(unittest.TestCase):
+    """
+    Testing the ReportReader class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name = 'dst-bucket'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url)
+        self._s3.create_bucket(Bucket=self.s3_bucket_name,
+                               CreateBucketConfiguration={
+                                   'LocationConstraint': 'eu-west-2'
+                               })
+        self._bucket_conn = S3BucketConnector(self.s3_access_key,
+                                              self.s3_secret_key,
+                                              self.s3_endpoint_url,
+                                              self.s3_bucket_name)
+        self.dest_args = DestinationConfig(
+            'isin', 'date', 'opening_price_eur', 'closing_price_eur', 'minimum_price_eur',
+            'maximum_price_eur', 'daily_traded_volume', 'change_prev_closing_%',
+            'report1/xetra_daily_report1_', '%Y%m%d_%H%M%S', 'parquet')
+        # Two reports of 100 ISINs on two days each, written unsorted
+        isins = [f'DE{ind:010d}' for ind in range(100)]
+        # the reports keep the ISIN and date columns of the source
+        sink_writer = SinkWriter([IndexedStorageSink('indexed', self._bucket_conn,
+                                                     row_group_size=20, isin_column='ISIN',
+                                                     date_column='Date')])
+        for key_stem, dates in [('report1/xetra_daily_report1_1', ['2021-12-17', '2021-12-18']),
+                                ('report1/xetra_daily_report1_2', ['2021-12-19', '2021-12-20'])]:
+            df = pd.DataFrame({
+                'ISIN': [isin for date in dates for isin in reversed(isins)],
+                'Date': [date for date in dates for _ in isins],
+                'closing_price_eur': [float(ind) for ind in range(2 * len(isins))]
+            })
+            sink_writer.write(df, key_stem, self.dest_args)
+
+    def tearDown(self) -> None:
+        """Executing after unittests
+        """
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def test_get(self):
+        """
+        Tests that get returns the rows of an ISIN by reading one row group per report
+        """
+        # Expected results
+        exp_dates = ['2021-12-17', '2021-12-18', '2021-12-19', '2021-12-20']
+        # Test init
+        report_reader = ReportReader(self._bucket_conn, self.dest_args)
+        # Method execution
+        result_df = report_reader.get('DE0000000042')
+        # Test after method execution
+        self.assertEqual(exp_dates, list(result_df['Date']))
+        self.assertEqual(['DE0000000042'] * 4, list(result_df['ISIN']))
+        self.assertEqual([57.0, 157.0, 57.0, 157.0], list(result_df['closing_price_eur']))
+        self.assertEqual(2, report_reader.row_groups_read)
+
+    def test_get_date_range(self):
+        """
+        Tests that reports outside the date range and missing ISINs are not read
+        """
+        # Test init
+        report_reader = ReportReader(self._bucket_conn, self.dest_args)
+        # Method execution
+        with patch.object(self._bucket_conn, 'read_parquet',
+                          side_effect=self._bucket_conn.read_parquet) as read_mock:
+            result_df = report_reader.get('DE0000000042', '2021-12-18', '2021-12-19')
+            result_missing = report_reader.get('US0000000042')
+        # Test after method execution
+        self.assertEqual(['2021-12-18', '2021-12-19'], list(result_df['Date']))
+        self.assertEqual(2, read_mock.call_count)
+        self.assertTrue(result_missing.empty)
+
+
+    def test_mapped_report_reader(self):
+        """
+        Tests that the latest feather report is synced once and memory mapped
+        """
+        # Expected results
+        exp_df = pd.DataFrame({'isin': ['AT0000A0E9W5', 'DE0000000042'],
+                               'closing_price_eur': [21.19, 18.27]})
+        # Test init
+        local_dir = tempfile.mkdtemp(prefix='report_reader_test_')
+        self.addCleanup(shutil.rmtree, local_dir, ignore_errors=True)
+        self._bucket_conn.to_s3(exp_df.iloc[:1], 'report1/xetra_daily_report1_1.feather',
+                                'feather')
+        self._bucket_conn.to_s3(exp_df, 'report1/xetra_daily_report1_2.feather', 'feather',
+                                compression='zstd')
+        report_reader = MappedReportReader(self._bucket_conn, self.dest_args, local_dir)
+        # Method execution
+        result_table = report_reader.load()
+        result_again = report_reader.load(columns=['isin'])
+        result_first = report_reader.load('report1/xetra_daily_report1_1.feather')
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_table.to_pandas()))
+        self.assertEqual(['AT0000A0E9W5', 'DE0000000042'],
+                         result_again.column('isin').to_pylist())
+        self.assertTrue(exp_df.iloc[:1].equals(result_first.to_pandas()))
+        self.assertEqual(2, report_reader.downloads)
+        self.assertTrue(os.path.exists(
+            os.path.join(local_dir, 'report1', 'xetra_daily_report1_2.feather')))
+        self.assertIsNone(MappedReportReader(
+            self._bucket_conn, self.dest_args._replace(dest_key='report2/'), local_dir).load())
+
+
+if __name__ == '__main__':
+    unittest.main()
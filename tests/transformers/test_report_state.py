@@ -0,0 +1,152 @@
+"""TestReportStateMethods"""
+import os
+import unittest
+
+import boto3
+import numpy as np
+import pandas as pd
+from moto import mock_s3
+
+from app.common.s3 import S3BucketConnector
+from app.transformers.report_state import (AggregateStateStore, merge_states, source_state,
+                                           state_to_daily)
+from app.transformers.report_transformer import ReportETL, SourceConfig, DestinationConfig
+
+class TestReportStateMethods(unittest.TestCase):
+    """
+    Testing the aggregate state functions and the AggregateStateStore class
+    """
+
+    def setUp(self) -> None:
+        """
+        Setting up the testing environment
+        """
+        # mocking s3 connection start
+        self._mock_s3 = mock_s3()
+        self._mock_s3.start()
+        # defining class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-west-2.amazonaws.com'
+        self.s3_bucket_name = 'dst-bucket'
+        # Creating s3 access keys and environmental variables
+        os.environ[self.s3_access_key] = 'ACCESS-KEY1'
+        os.environ[self.s3_secret_key] = 'SECRET-KEY1'
+        # Creating bucket on the mocked s3
+        self._s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url)
+        self._s3.create_bucket(Bucket=self.s3_bucket_name,
+                               CreateBucketConfiguration={
+                                   'LocationConstraint': 'eu-west-2'
+                               })
+        self._bucket_conn = S3BucketConnector(self.s3_access_key,
+                                              self.s3_secret_key,
+                                              self.s3_endpoint_url,
+                                              self.s3_bucket_name)
+        # creating source and target configuration
+        self.source_config = SourceConfig(
+            src_first_extract_date='2022-01-03',
+            src_columns=['ISIN', 'Date', 'Time', 'StartPrice', 'MinPrice', 'MaxPrice',
+                         'TradedVolume'],
+            src_col_date='Date',
+            src_col_isin='ISIN',
+            src_col_time='Time',
+            src_col_start_price='StartPrice',
+            src_col_min_price='MinPrice',
+            src_col_max_price='MaxPrice',
+            src_col_traded_vol='TradedVolume'
+        )
+        self.destination_config = DestinationConfig(
+            dest_col_isin='isin',
+            dest_col_date='date',
+            dest_col_op_price='opening_price_eur',
+            dest_col_cls_price='closing_price_eur',
+            dest_col_min_price='minimum_price_eur',
+            dest_col_max_price='maximum_price_eur',
+            dest_col_daily_trd_vol='daily_traded_volume',
+            dest_col_chg_prev_cls='change_prev_closing_%',
+            dest_key='report1/daily_report1_',
+            dest_key_date_format='%Y%m%d_%H%M%S',
+            dest_format='parquet'
+        )
+        # Random source data of 3 hourly files
+        rng = np.random.default_rng(0)
+        rows = 150
+        minutes = rng.permutation(np.arange(8 * 60, 11 * 60))[:rows]
+        self.src_df = pd.DataFrame({
+            'ISIN': rng.choice(['DE0001', 'DE0002', 'DE0003', 'DE0004'], rows),
+            'Date': rng.choice(['2022-01-03', '2022-01-04'], rows),
+            'Time': [f'{minute // 60:02d}:{minute % 60:02d}' for minute in minutes],
+            'StartPrice': rng.integers(100, 10000, rows) / 100,
+            'MinPrice': rng.integers(100, 10000, rows) / 100,
+            'MaxPrice': rng.integers(100, 10000, rows) / 100,
+            'TradedVolume': rng.integers(0, 1000, rows)
+        })
+        self.files = [
+            self.src_df[self.src_df.Time.str.slice(0, 2) == hour].reset_index(drop=True)
+            for hour in ['08', '09', '10']
+        ]
+
+    def tearDown(self):
+        # mocking s3 connection stop
+        self._mock_s3.stop()
+
+    def test_merge_states_associative(self):
+        """
+        Tests that folding the files one by one, merging partial states
+        and creating the state in one pass lead to the same state
+        """
+        # Test init
+        states = [source_state(df, self.source_config) for df in self.files]
+        # Method execution
+        folded = None
+        for state in states:
+            folded = merge_states([folded, state], self.source_config)
+        right_first = merge_states(
+            [states[0], merge_states(states[1:], self.source_config)], self.source_config)
+        one_pass = source_state(self.src_df, self.source_config)
+        # Test after method execution
+        self.assertTrue(one_pass.equals(folded))
+        self.assertTrue(one_pass.equals(right_first))
+
+    def test_state_to_daily(self):
+        """
+        Tests that the daily aggregates of the state equal aggregate_report
+        """
+        # Test init
+        report_etl = ReportETL(None, None, None, self.source_config, self.destination_config,
+                               extract_date='2022-01-03',
+                               extract_date_list=['2022-01-03', '2022-01-04'])
+        exp_df = report_etl.aggregate_report(self.src_df)
+        state = source_state(self.src_df, self.source_config)
+        # Method execution
+        result_df = state_to_daily(state, self.source_config, self.destination_config)
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+
+    def test_store_write_read(self):
+        """
+        Tests writing and reading the state of a day
+        and reading a not existing state
+        """
+        # Expected results
+        exp_prefix = 'report1/state/'
+        exp_last_key = '2022-01-03/2022-01-03_BINS_XETR10.csv'
+        exp_state = source_state(self.src_df, self.source_config)
+        # Test init
+        store = AggregateStateStore(
+            self._bucket_conn,
+            AggregateStateStore.prefix_of_report(self.destination_config.dest_key))
+        # Method execution
+        store.write('2022-01-03', exp_state, exp_last_key)
+        result_state, result_last_key = store.read('2022-01-03')
+        missing_state, missing_last_key = store.read('2022-01-04')
+        # Test after method execution
+        self.assertEqual(exp_prefix, store.prefix)
+        self.assertEqual(exp_last_key, result_last_key)
+        self.assertTrue(exp_state.equals(result_state))
+        self.assertIsNone(missing_state)
+        self.assertIsNone(missing_last_key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 """TestETLMethods"""
 from io import BytesIO
 import os
+import shutil
+import tempfile
 import unittest
 from unittest import mock
 from unittest.mock import patch
@@ -11,8 +13,15 @@ import pandas as pd
 from moto import mock_s3
 
 from app.common.s3 import S3BucketConnector
+from app.common.local_storage import LocalFileConnector
 from app.common.meta_process import MetaProcess
-from app.transformers.report_transformer import ReportETL, SourceConfig, DestinationConfig
+from app.common.spill import SpillStore
+from app.common.custom_exceptions import (WrongTransformException, WrongEngineException,
+                                          SinkException)
+from app.common.sinks import StorageSink
+from app.transformers.report_transformer import (ReportETL, SourceConfig, DestinationConfig,
+                                                  ProcessingConfig, ReportDefinition,
+                                                  date_time_order, is_sorted_by_date_time)
 
 class TestETLMethods(unittest.TestCase):
     """
@@ -182,6 +191,416 @@ class TestETLMethods(unittest.TestCase):
         # Test after method execution
         self.assertTrue(exp_df.equals(resulted_df))
 
+    def test_extract_files_read_workers(self):
+        """
+        Tests the extract method reading the files in parallel
+        keeps the order of the files
+        """
+        # Expected results
+        exp_df = self.src_df.loc[1:].reset_index(drop=True)
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=['2021-12-16', '2021-12-17',
+                                                  '2021-12-18', '2021-12-19'],
+                               proc_args=ProcessingConfig(read_workers=4))
+        # Method execution
+        resulted_df = report_etl.extract()
+        # Test after method execution
+        self.assertTrue(exp_df.equals(resulted_df))
+
+    def test_extract_files_arrow(self):
+        """
+        Tests the extract method of the arrow engine
+        """
+        # Expected results
+        exp_df = self.src_df.loc[1:].reset_index(drop=True)
+        # columns not used by the calculation are read as strings
+        exp_df['EndPrice'] = exp_df['EndPrice'].astype(str)
+        # Test init
+        extract_date = '2021-12-17'
+        extract_date_list = ['2021-12-16', '2021-12-17',
+                             '2021-12-18', '2021-12-19', '2021-12-20']
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            report_etl = ReportETL(self._bucket_conn_src,
+                                   self._bucket_conn_dst,
+                                   self.meta_key,
+                                   self.source_config,
+                                   self.destination_config,
+                                   proc_args=ProcessingConfig(transform_engine='arrow'))
+            resulted_table = report_etl.extract()
+            result_report = report_etl.transform_to_report(resulted_table)
+        # Test after method execution
+        self.assertTrue(exp_df.equals(resulted_table.to_pandas()))
+        self.assertTrue(self.df_report.equals(result_report.to_pandas()))
+
+    def test_extract_files_compressed(self):
+        """
+        Tests the extract method with gzip compressed source files
+        """
+        # Expected results
+        exp_df = self.src_df.loc[6:8].reset_index(drop=True)
+        # Test init
+        for ind in range(6, 9):
+            self._bucket_conn_src.to_s3(self.src_df.loc[ind:ind],
+                                        f'2021-12-20/2021-12-20_BINS_XETR{ind:02d}.csv.gz',
+                                        'csv')
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-20', extract_date_list=['2021-12-20'])
+        # Method execution
+        result_df = report_etl.extract()
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+
+    def test_etl_compact_raw(self):
+        """
+        Tests extract and transform_to_report with compacted source data
+        """
+        # Expected results
+        exp_df = self.df_report
+        # Test init
+        extract_date = '2021-12-17'
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            report_etl = ReportETL(self._bucket_conn_src,
+                                   self._bucket_conn_dst,
+                                   self.meta_key,
+                                   self.source_config,
+                                   self.destination_config,
+                                   proc_args=ProcessingConfig(compact_raw=True))
+            resulted_df = report_etl.extract()
+            result_report = report_etl.transform_to_report(resulted_df)
+        # Test after method execution
+        self.assertEqual('int16', resulted_df['Time'].dtype)
+        self.assertTrue(exp_df.equals(result_report))
+
+    def test_etl_report_multiple_reports(self):
+        """
+        Tests etl_report with two report definitions sharing one extract
+        """
+        # Expected results
+        dest_args_2 = self.destination_config._replace(
+            dest_col_op_price='open', dest_key='report2/daily_report2_')
+        exp_df_1 = self.df_report
+        exp_df_2 = self.df_report.rename(columns={'opening_price_eur': 'open'})
+        # Test init
+        extract_date = '2021-12-17'
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        reports = [
+            ReportDefinition('report1', self.destination_config),
+            ReportDefinition('report2', dest_args_2)
+        ]
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            report_etl = ReportETL(self._bucket_conn_src,
+                                   self._bucket_conn_dst,
+                                   self.meta_key,
+                                   self.source_config,
+                                   reports=reports)
+            with patch.object(S3BucketConnector, 'read_csv',
+                              wraps=self._bucket_conn_src.read_csv) as read_mock, \
+                 patch.object(ReportETL, 'load', return_value=True) as load_mock:
+                report_etl.etl_report()
+        # Test after method execution
+        self.assertEqual(self.destination_config, report_etl.dest_args)
+        self.assertEqual(8, read_mock.call_count)
+        self.assertEqual(2, load_mock.call_count)
+        result_df_1, result_df_2 = [call.args[0] for call in load_mock.call_args_list]
+        self.assertTrue(exp_df_1.equals(result_df_1))
+        self.assertTrue(exp_df_2.equals(result_df_2))
+        self.assertEqual([False, True],
+                         [call.kwargs['update_meta'] for call in load_mock.call_args_list])
+        self.assertEqual([self.destination_config, dest_args_2],
+                         [call.kwargs['dest_args'] for call in load_mock.call_args_list])
+
+    def test_etl_report_pipeline(self):
+        """
+        Tests etl_report in the pipelined mode writing one report per day
+        """
+        # Expected results
+        exp_df = self.df_report
+        exp_suffixes = ['_2021-12-17', '_2021-12-18', '_2021-12-19']
+        # Test init
+        extract_date = '2021-12-17'
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            report_etl = ReportETL(self._bucket_conn_src,
+                                   self._bucket_conn_dst,
+                                   self.meta_key,
+                                   self.source_config,
+                                   self.destination_config,
+                                   proc_args=ProcessingConfig(pipeline=True,
+                                                              pipeline_queue_size=1))
+            with patch.object(ReportETL, 'load', return_value=True) as load_mock, \
+                 patch.object(ReportETL, 'update_meta') as meta_mock:
+                report_etl.etl_report()
+        # Test after method execution
+        result_df = pd.concat([call.args[0] for call in load_mock.call_args_list],
+                              ignore_index=True)
+        self.assertTrue(exp_df.equals(result_df))
+        self.assertEqual(exp_suffixes,
+                         [call.kwargs['key_suffix'] for call in load_mock.call_args_list])
+        # the day before extract_date is extracted but not written
+        self.assertEqual([4, 3, 3], [stage.items for stage in report_etl.pipeline_stats])
+        meta_mock.assert_called_once()
+
+    def test_etl_report_pipeline_one_report(self):
+        """
+        Tests etl_report in the pipelined mode writing the reports of the
+        days as one report like the run without pipeline
+        """
+        # Expected results
+        exp_df = self.df_report
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=['2021-12-16', '2021-12-17',
+                                                  '2021-12-18', '2021-12-19'],
+                               proc_args=ProcessingConfig(pipeline=True,
+                                                          pipeline_daily_reports=False))
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock:
+            report_etl.etl_report(update_meta=False)
+        # Test after method execution
+        load_mock.assert_called_once()
+        self.assertEqual('', load_mock.call_args.kwargs['key_suffix'])
+        self.assertTrue(exp_df.equals(load_mock.call_args.args[0]))
+
+    def test_etl_report_indicators(self):
+        """
+        Tests etl_report adding the rolling indicators and storing
+        their state with the meta file update
+        """
+        # Expected results
+        exp_sma = [18.27, 18.77, 20.59]
+        exp_key = 'report1/state/indicators.npz'
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=['2021-12-16', '2021-12-17',
+                                                  '2021-12-18', '2021-12-19'],
+                               proc_args=ProcessingConfig(indicators=True))
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock:
+            report_etl.etl_report(update_meta=False)
+            result_keys_before_meta = self._bucket_conn_dst.list_files_by_prefix('report1/')
+            report_etl.update_meta()
+        # Test after method execution
+        result_df = load_mock.call_args.args[0]
+        self.assertEqual(exp_sma, list(result_df.moving_avg_closing_price_eur))
+        self.assertTrue(result_df['volatility_%'][:1].isna().all())
+        self.assertEqual([], result_keys_before_meta)
+        self.assertEqual([exp_key], self._bucket_conn_dst.list_files_by_prefix('report1/'))
+
+    def test_etl_report_pipeline_wrong_engine(self):
+        """
+        Tests etl_report in the pipelined mode with a not supported engine
+        """
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17', extract_date_list=['2021-12-17'],
+                               proc_args=ProcessingConfig(pipeline=True,
+                                                          transform_engine='duckdb'))
+        # Method execution
+        with self.assertRaises(WrongEngineException):
+            report_etl.etl_report()
+
+    def test_etl_report_cached(self):
+        """
+        Tests etl_report with the cache of daily aggregates: the second run reads
+        no source file and a changed file only recalculates its day
+        """
+        # Expected results
+        exp_df = self.df_report
+        # Test init
+        extract_date = '2021-12-17'
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        cache_dir = tempfile.mkdtemp(prefix='report_cache_test_')
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date=extract_date, extract_date_list=extract_date_list,
+                               proc_args=ProcessingConfig(cache_dir=cache_dir))
+        # Method execution
+        with patch.object(ReportETL, 'load', return_value=True) as load_mock, \
+             patch.object(self._bucket_conn_src, 'read_csv',
+                          side_effect=self._bucket_conn_src.read_csv) as read_mock:
+            report_etl.etl_report()
+            first_reads = read_mock.call_count
+            report_etl.etl_report()
+            second_reads = read_mock.call_count - first_reads
+            self._bucket_conn_src.to_s3(self.src_df.loc[4:4].assign(TradedVolume=9067),
+                                        '2021-12-18/2021-12-18_BINS_XETR07.csv', 'csv')
+            report_etl.etl_report()
+            third_reads = read_mock.call_count - first_reads - second_reads
+        # Test after method execution
+        result_first_df = load_mock.call_args_list[0].args[0]
+        result_second_df = load_mock.call_args_list[1].args[0]
+        result_third_df = load_mock.call_args_list[2].args[0]
+        self.assertTrue(exp_df.equals(result_first_df))
+        self.assertTrue(exp_df.equals(result_second_df))
+        self.assertEqual([8, 0, 2], [first_reads, second_reads, third_reads])
+        self.assertEqual(10287, result_third_df.daily_traded_volume[1])
+
+    def test_day_fingerprint(self):
+        """
+        Tests day_fingerprint: settings outside the aggregation keep the fingerprint,
+        the source columns and the files change it
+        """
+        # Test init
+        etags = {'2021-12-16/2021-12-16_BINS_XETR08.csv': '"a"'}
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config)
+        later_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                              self.source_config._replace(src_first_extract_date='2022-01-01',
+                                                          src_calendar='weekdays'),
+                              self.destination_config._replace(dest_key='other_report_'))
+        renamed_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                                self.source_config._replace(src_col_traded_vol='Volume'),
+                                self.destination_config)
+        # Method execution
+        fingerprint = report_etl.day_fingerprint(etags)
+        # Test after method execution
+        self.assertEqual(fingerprint, later_etl.day_fingerprint(etags))
+        self.assertNotEqual(fingerprint, renamed_etl.day_fingerprint(etags))
+        self.assertNotEqual(fingerprint, report_etl.day_fingerprint(
+            {'2021-12-16/2021-12-16_BINS_XETR08.csv': '"b"'}))
+
+    def test_etl_report_cached_wrong_engine(self):
+        """
+        Tests etl_report with the cache and a not supported engine
+        """
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17', extract_date_list=['2021-12-17'],
+                               proc_args=ProcessingConfig(cache_dir='cache',
+                                                          transform_engine='duckdb'))
+        # Method execution
+        with self.assertRaises(WrongEngineException):
+            report_etl.etl_report()
+
+    def test_etl_report_modes_combined(self):
+        """
+        Tests that etl_report rejects processing modes that can not be combined
+        """
+        # Test init
+        proc_args_list = [
+            ProcessingConfig(pipeline=True, cache_dir='cache'),
+            ProcessingConfig(cache_dir='cache', checkpoint_dir='checkpoints'),
+            ProcessingConfig(pipeline=True, memory_budget=10**9)
+        ]
+        for proc_args in proc_args_list:
+            report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                                   self.source_config, self.destination_config,
+                                   extract_date='2021-12-17', extract_date_list=['2021-12-17'],
+                                   proc_args=proc_args)
+            # Method execution and test after method execution
+            with self.assertRaises(ValueError):
+                report_etl.etl_report()
+
+    def test_etl_report_checkpointed(self):
+        """
+        Tests etl_report with checkpoints: after a failed load the next run reads
+        no source file, only writes the missing report and removes the checkpoints
+        """
+        # Expected results
+        exp_df = self.df_report
+        exp_meta = ['2021-12-17', '2021-12-18', '2021-12-19']
+        # Test init
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        checkpoint_dir = tempfile.mkdtemp(prefix='report_checkpoint_test_')
+        self.addCleanup(shutil.rmtree, checkpoint_dir, ignore_errors=True)
+        reports = [ReportDefinition('report1', self.destination_config),
+                   ReportDefinition('report1_csv', self.destination_config._replace(
+                       dest_key='report1_csv/xetra_daily_report1_', dest_format='csv'))]
+        def report_etl():
+            return ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                             self.source_config, extract_date='2021-12-17',
+                             extract_date_list=extract_date_list, reports=reports,
+                             proc_args=ProcessingConfig(checkpoint_dir=checkpoint_dir))
+        # Method execution
+        with patch.object(self._bucket_conn_src, 'read_csv',
+                          side_effect=self._bucket_conn_src.read_csv) as read_mock:
+            with patch.object(ReportETL, 'load', side_effect=[True, OSError('crash')]):
+                with self.assertRaises(OSError):
+                    report_etl().etl_report()
+            first_reads = read_mock.call_count
+            with patch.object(ReportETL, 'load', return_value=True) as load_mock:
+                report_etl().etl_report()
+            second_reads = read_mock.call_count - first_reads
+        # Test after method execution
+        self.assertEqual([8, 0], [first_reads, second_reads])
+        self.assertEqual(1, load_mock.call_count)
+        self.assertEqual('report1_csv', load_mock.call_args.kwargs['dest_args'].dest_key[:11])
+        self.assertTrue(exp_df.equals(load_mock.call_args.args[0]))
+        result_meta_df = self._bucket_conn_dst.read_csv(self.meta_key)
+        self.assertEqual(exp_meta, list(result_meta_df['source_date']))
+        self.assertEqual([], [files for _, _, files in os.walk(checkpoint_dir) if files])
+
+    def test_etl_report_listing_index(self):
+        """
+        Tests etl_report with the listing index: the next run lists no past date
+        """
+        # Expected results
+        exp_index_key = f'{self.meta_key}.listing.json'
+        # Test init
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        def report_etl():
+            return ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                             self.source_config, self.destination_config,
+                             extract_date='2021-12-17', extract_date_list=extract_date_list,
+                             proc_args=ProcessingConfig(listing_index=True))
+        # Method execution
+        with patch.object(self._bucket_conn_src, 'list_objects_by_prefix',
+                          side_effect=self._bucket_conn_src.list_objects_by_prefix) as list_mock:
+            report_etl().etl_report()
+            first_listings = list_mock.call_count
+            report_etl().etl_report()
+            second_listings = list_mock.call_count - first_listings
+        # Test after method execution
+        self.assertEqual([4, 0], [first_listings, second_listings])
+        self.assertIn(exp_index_key, self._bucket_conn_dst.list_files_by_prefix('meta'))
+
+    def test_etl_report_checkpointed_wrong_engine(self):
+        """
+        Tests etl_report with checkpoints and a not supported engine
+        """
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17', extract_date_list=['2021-12-17'],
+                               proc_args=ProcessingConfig(checkpoint_dir='checkpoints',
+                                                          transform_engine='arrow'))
+        # Method execution
+        with self.assertRaises(WrongEngineException):
+            report_etl.etl_report()
+
+    def test_init_wrong_transform(self):
+        """
+        Tests the constructor with a report definition
+        with a not supported transformation
+        """
+        # Test init
+        reports = [ReportDefinition('report2', self.destination_config, 'report2')]
+        # Method execution
+        with self.assertRaises(WrongTransformException):
+            ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                      self.source_config, extract_date='2021-12-17',
+                      extract_date_list=['2021-12-17'], reports=reports)
+
     def test_transform_report_emptydf(self):
         """
         Tests the transform_to_report method with
@@ -240,6 +659,123 @@ class TestETLMethods(unittest.TestCase):
         # Test after method execution
         self.assertTrue(exp_df.equals(result_df))
 
+    def test_transform_report_local(self):
+        """
+        Tests extract and transform_to_report reading
+        a local copy of the source files
+        """
+        # Expected results
+        exp_df = self.df_report
+        # Test init
+        local_dir = tempfile.mkdtemp(prefix='report_local_test_')
+        self.addCleanup(shutil.rmtree, local_dir, ignore_errors=True)
+        local_src = LocalFileConnector(local_dir)
+        extract_date_list = ['2021-12-16', '2021-12-17', '2021-12-18', '2021-12-19']
+        for dt in extract_date_list:
+            for key in self._bucket_conn_src.list_files_by_prefix(dt):
+                local_src.write_text(self._bucket_conn_src.read_text(key), key)
+        report_etl = ReportETL(local_src, LocalFileConnector(local_dir), self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=extract_date_list)
+        # Method execution
+        result_df = report_etl.transform_to_report(report_etl.extract())
+        # Test after method execution
+        self.assertTrue(exp_df.equals(result_df))
+
+    def test_aggregate_report_sorted_input(self):
+        """
+        Tests that aggregate_report skips the sort of time ordered source data
+        and merges source data that is not time ordered to the same result
+        """
+        # Expected results
+        exp_log = 'Source data is not ordered by date and time, merging it.'
+        # Test init
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=['2021-12-17', '2021-12-18', '2021-12-19'])
+        sorted_df = self.src_df.loc[2:8].reset_index(drop=True)
+        # files of one day read in reverse key order
+        unsorted_df = sorted_df.iloc[[0, 1, 2, 3, 6, 5, 4]].reset_index(drop=True)
+        # Method execution
+        with self.assertNoLogs(level='INFO'):
+            result_sorted_df = report_etl.aggregate_report(sorted_df)
+        with self.assertLogs() as logm:
+            result_unsorted_df = report_etl.aggregate_report(unsorted_df)
+        # Test after method execution
+        self.assertIn(exp_log, logm.output[0])
+        self.assertTrue(result_sorted_df.equals(result_unsorted_df))
+        self.assertEqual([20.21, 20.58, 23.58], list(result_sorted_df.opening_price_eur))
+        self.assertEqual([18.27, 19.27, 24.22], list(result_sorted_df.closing_price_eur))
+
+    def test_is_sorted_by_date_time(self):
+        """
+        Tests the check of the order by date and time
+        """
+        # Method execution and tests after method execution
+        self.assertTrue(is_sorted_by_date_time(self.src_df, self.source_config))
+        self.assertTrue(is_sorted_by_date_time(self.src_df.loc[0:0], self.source_config))
+        self.assertFalse(is_sorted_by_date_time(self.src_df.iloc[[0, 2, 1]],
+                                                self.source_config))
+        self.assertFalse(is_sorted_by_date_time(self.src_df.iloc[[2, 3]].assign(
+            Time=['14:00', '13:00']), self.source_config))
+
+    def test_date_time_order(self):
+        """
+        Tests the stable order by date and time of the combined key
+        """
+        # Test init
+        df = pd.DataFrame({'Date': ['2021-12-18', '2021-12-17', '2021-12-18', '2021-12-17'],
+                           'Time': ['07:00', '14:00', '07:00', '09:00']})
+        # Method execution
+        result_order = date_time_order(df, self.source_config)
+        # Test after method execution
+        self.assertEqual([3, 1, 0, 2], list(result_order))
+        self.assertEqual([], list(date_time_order(df.iloc[0:0], self.source_config)))
+
+    def test_transform_report_memory_budget(self):
+        """
+        Tests extract and transform_to_report with a memory budget
+        that is exceeded and one that is not exceeded
+        """
+        # Expected results
+        exp_df = self.df_report
+        exp_src_df = self.src_df.loc[1:8].reset_index(drop=True)
+        # Test Init
+        extract_date = '2021-12-17'
+        extract_date_list = [
+            '2021-12-16', '2021-12-17',
+            '2021-12-18', '2021-12-19'
+        ]
+        # Method Execution
+        with patch.object(MetaProcess, 'return_date_list',
+                        return_value=[extract_date, extract_date_list]):
+            report_etl_spill = ReportETL(self._bucket_conn_src,
+                                         self._bucket_conn_dst,
+                                         self.meta_key,
+                                         self.source_config,
+                                         self.destination_config,
+                                         proc_args=ProcessingConfig(memory_budget=1))
+            report_etl_memory = ReportETL(self._bucket_conn_src,
+                                          self._bucket_conn_dst,
+                                          self.meta_key,
+                                          self.source_config,
+                                          self.destination_config,
+                                          proc_args=ProcessingConfig(memory_budget=10**9))
+            spilled_data = report_etl_spill.extract()
+            memory_data = report_etl_memory.extract()
+            spilled_path = spilled_data.path
+            result_spill_df = report_etl_spill.transform_to_report(spilled_data)
+            # spilled data is kept for further reports
+            self.assertTrue(os.path.exists(spilled_path))
+            spilled_data.cleanup()
+        # Test after method execution
+        self.assertIsInstance(spilled_data, SpillStore)
+        self.assertTrue(exp_src_df.equals(memory_data))
+        self.assertTrue(exp_df.equals(result_spill_df))
+        self.assertFalse(os.path.exists(spilled_path))
+
     def test_load(self):
         """
         Tests the load method
@@ -294,6 +830,37 @@ class TestETLMethods(unittest.TestCase):
             }
         )
 
+    def test_load_sinks(self):
+        """
+        Tests the load method writing to several sinks and not updating
+        the meta file if a required sink fails
+        """
+        # Test init
+        extract_date_list = ['2021-12-17', '2021-12-18', '2021-12-19']
+        local_dir = tempfile.mkdtemp(prefix='load_sinks_test_')
+        local_conn = LocalFileConnector(local_dir)
+        sinks = [StorageSink('storage', self._bucket_conn_dst),
+                 StorageSink('local', local_conn, file_format='csv')]
+        report_etl = ReportETL(self._bucket_conn_src, self._bucket_conn_dst, self.meta_key,
+                               self.source_config, self.destination_config,
+                               extract_date='2021-12-17',
+                               extract_date_list=extract_date_list, sinks=sinks)
+        # Method execution
+        try:
+            report_etl.load(self.df_report, update_meta=False)
+            with patch.object(LocalFileConnector, 'write_bytes', side_effect=OSError('disk full')):
+                with self.assertRaises(SinkException):
+                    report_etl.load(self.df_report, key_suffix='_failed')
+            # Test after method execution
+            local_file = local_conn.list_files_by_prefix(self.destination_config.dest_key)[0]
+            self.assertTrue(local_file.endswith('.csv'))
+            self.assertTrue(self.df_report.equals(local_conn.read_csv(local_file)))
+            self.assertEqual(['storage', 'local'],
+                             [result.name for result in report_etl.load_stats])
+            self.assertEqual([], self._bucket_conn_dst.list_files_by_prefix(self.meta_key))
+        finally:
+            shutil.rmtree(local_dir, ignore_errors=True)
+
     def test_etl_report(self):
         """
         Tests the etl_report method